@@ -4,6 +4,7 @@ from pathlib import Path
 import matplotlib.pyplot as plt
 from openpyxl import load_workbook
 import openpyxl.utils.exceptions
+from .ParseCache import read_excel_cached
 
 # 判断str文件路径是否有效果
 def is_valid_xlsx(file_path: str) -> bool:
@@ -15,9 +16,10 @@ def is_valid_xlsx(file_path: str) -> bool:
         print(f"{file_path}不是正确xlsx文件路径")
         return False
 
-    # 尝试用 openpyxl 打开文件
+    # 尝试用 openpyxl 打开文件(只读模式只读目录, 不解析整个工作簿)
     try:
-        load_workbook(file_path)
+        workbook = load_workbook(file_path, read_only=True)
+        workbook.close()
         return True
     except (openpyxl.utils.exceptions.InvalidFileException, IOError):
         print(f"{file_path}不是正确xlsx文件路径")
@@ -27,7 +29,7 @@ def is_valid_xlsx(file_path: str) -> bool:
 def Get_Data_from_path(file_path):
     if not is_valid_xlsx(file_path):
         return None
-    dataframe = pd.read_excel(file_path)
+    dataframe = read_excel_cached(file_path)
     # data_array = dataframe.to_numpy()
     return dataframe
 
@@ -0,0 +1,298 @@
+import os
+import json
+import hashlib
+import tempfile
+import threading
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+# 解析结果本地缓存
+# 以 源文件内容哈希 + 解析器名 + 解析参数 为键, 把解析好的 DataFrame 或数组字典
+# 存成 npz 列式快照, 再次导入同一文件时直接读取快照, 跳过 openpyxl/json 解析
+# object 列(字符串/混合类型)以JSON文本存入npz, 读取时不启用pickle, 缓存目录中的文件不会被反序列化执行
+#
+# 环境变量:
+#   XLEMENT_PARSE_CACHE=0              关闭缓存
+#   XLEMENT_PARSE_CACHE_DIR=...        缓存目录, 默认 ~/.xlement_cache/parsed
+#   XLEMENT_PARSE_CACHE_MAX_MB=...     缓存目录总大小上限(MB), 默认 512, 超出按最久未使用淘汰
+
+__all__ = ['cached_parse', 'read_excel_cached', 'file_content_hash', 'clear_parse_cache', 'get_cache_dir']
+
+CACHE_FORMAT_VERSION = 2
+DEFAULT_MAX_MB = 512
+HASH_CHUNK_SIZE = 1 << 20
+
+_hash_memo = {}  # (绝对路径, 大小, mtime_ns) -> 内容哈希, 同一进程内避免重复读盘
+_lock = threading.Lock()
+
+
+def cache_enabled() -> bool:
+    return os.environ.get('XLEMENT_PARSE_CACHE', '1') not in ('0', 'false', 'False', 'off')
+
+
+def get_cache_dir() -> Path:
+    path = os.environ.get('XLEMENT_PARSE_CACHE_DIR')
+    return Path(path) if path else Path.home() / '.xlement_cache' / 'parsed'
+
+
+def get_max_bytes() -> int:
+    try:
+        return int(float(os.environ.get('XLEMENT_PARSE_CACHE_MAX_MB', DEFAULT_MAX_MB)) * 1024 * 1024)
+    except ValueError:
+        return DEFAULT_MAX_MB * 1024 * 1024
+
+
+def file_content_hash(file_path) -> str:
+    """
+    源文件内容的sha256, 以 (路径, 大小, 修改时间) 在进程内记忆
+    """
+    path = Path(file_path).resolve()
+    stat = path.stat()
+    memo_key = (str(path), stat.st_size, stat.st_mtime_ns)
+    with _lock:
+        digest = _hash_memo.get(memo_key)
+    if digest is not None:
+        return digest
+
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            h.update(chunk)
+    digest = h.hexdigest()
+    with _lock:
+        _hash_memo[memo_key] = digest
+    return digest
+
+
+def _cache_key(file_path, parser: str, options: dict) -> str:
+    content_hash = file_content_hash(file_path)
+    options_text = json.dumps(options or {}, sort_keys=True, ensure_ascii=False, default=str)
+    key_text = f"{CACHE_FORMAT_VERSION}|{parser}|{options_text}|{content_hash}"
+    return hashlib.sha256(key_text.encode('utf-8')).hexdigest()
+
+
+def _numpy_scalar(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def _json_safe(value) -> bool:
+    try:
+        json.dumps(value, default=_numpy_scalar)
+        return True
+    except (TypeError, ValueError):
+        return False
+
+
+# ---------- 序列化 ----------
+
+def _put_array(arrays: dict, key: str, values: np.ndarray):
+    if values.dtype == object:
+        # object数组存为JSON文本, 无法JSON化的值让整个快照放弃缓存
+        payload = {'shape': list(values.shape), 'values': values.ravel().tolist()}
+        arrays[f"{key}.json"] = np.array(json.dumps(payload, ensure_ascii=False, default=_numpy_scalar))
+    else:
+        arrays[key] = values
+
+
+def _get_array(npz, key: str) -> np.ndarray:
+    if f"{key}.json" not in npz.files:
+        return npz[key]
+    payload = json.loads(str(npz[f"{key}.json"]))
+    values = np.empty(len(payload['values']), dtype=object)
+    values[:] = payload['values']
+    return values.reshape(payload['shape'])
+
+
+def _frame_to_arrays(df: pd.DataFrame, prefix: str, arrays: dict) -> dict:
+    columns = list(df.columns)
+    if not _json_safe(columns):
+        raise TypeError("column labels are not JSON serializable")
+    dtypes = []
+    for i, col in enumerate(columns):
+        _put_array(arrays, f"{prefix}col{i}", df.iloc[:, i].to_numpy())
+        dtypes.append(str(df.iloc[:, i].dtype))
+    default_index = isinstance(df.index, pd.RangeIndex) and df.index.start == 0 and df.index.step == 1
+    if not default_index:
+        _put_array(arrays, f"{prefix}index", df.index.to_numpy())
+    attrs = {k: v for k, v in df.attrs.items() if _json_safe(v)}
+    return {'kind': 'frame', 'columns': columns, 'dtypes': dtypes,
+            'default_index': default_index, 'attrs': attrs}
+
+
+def _frame_from_arrays(meta: dict, prefix: str, npz) -> pd.DataFrame:
+    data = {}
+    for i, dtype in enumerate(meta['dtypes']):
+        values = _get_array(npz, f"{prefix}col{i}")
+        series = pd.Series(values, copy=False)
+        if str(series.dtype) != dtype:
+            try:
+                series = series.astype(dtype)
+            except (TypeError, ValueError):
+                pass
+        data[i] = series
+    df = pd.DataFrame(data)
+    df.columns = meta['columns']
+    if not meta['default_index']:
+        df.index = _get_array(npz, f"{prefix}index")
+    df.attrs.update(meta.get('attrs', {}))
+    return df
+
+
+def _encode(value, name: str, arrays: dict):
+    """把解析结果拆成 npz 数组 + JSON 描述"""
+    if isinstance(value, pd.DataFrame):
+        return _frame_to_arrays(value, f"{name}.", arrays)
+    if isinstance(value, np.ndarray):
+        _put_array(arrays, name, value)
+        return {'kind': 'array'}
+    if isinstance(value, dict):
+        if not all(isinstance(k, str) for k in value):
+            raise TypeError("only str dict keys are supported")
+        return {'kind': 'dict', 'items': {k: _encode(v, f"{name}.{k}", arrays) for k, v in value.items()}}
+    if _json_safe(value):
+        # numpy标量转成python标量保存
+        return {'kind': 'json', 'value': json.loads(json.dumps(value, default=_numpy_scalar))}
+    raise TypeError(f"cannot cache value of type {type(value).__name__}")
+
+
+def _decode(meta: dict, name: str, npz):
+    kind = meta['kind']
+    if kind == 'frame':
+        return _frame_from_arrays(meta, f"{name}.", npz)
+    if kind == 'array':
+        return _get_array(npz, name)
+    if kind == 'dict':
+        return {k: _decode(v, f"{name}.{k}", npz) for k, v in meta['items'].items()}
+    return meta['value']
+
+
+# ---------- 读写与淘汰 ----------
+
+def _load(path: Path):
+    with np.load(path, allow_pickle=False) as npz:
+        meta = json.loads(str(npz['__meta__']))
+        value = _decode(meta, 'root', npz)
+    # 命中即刷新修改时间, 作为LRU依据
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+    return value
+
+
+def _store(path: Path, value):
+    arrays = {}
+    meta = _encode(value, 'root', arrays)
+    arrays['__meta__'] = np.array(json.dumps(meta, ensure_ascii=False, default=_numpy_scalar))
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # 先写临时文件再原子替换, 并发进程写同一键也不会读到半个文件
+    fd, tmp = tempfile.mkstemp(suffix='.tmp', dir=path.parent)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            np.savez(f, **arrays)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def _evict(cache_dir: Path, max_bytes: int):
+    entries = []
+    total = 0
+    for p in cache_dir.glob('*.npz'):
+        try:
+            stat = p.stat()
+        except OSError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, p))
+        total += stat.st_size
+    if total <= max_bytes:
+        return
+    entries.sort()
+    for _, size, p in entries:
+        if total <= max_bytes:
+            break
+        try:
+            p.unlink()
+            total -= size
+        except OSError:
+            pass
+
+
+def cached_parse(file_path, parser: str, options: dict, loader):
+    """
+    Parameters:
+    ------------
+    file_path: 源文件路径, 按其内容哈希建键
+    parser: 解析器名, 不同解析逻辑互不共享缓存
+    options: 影响解析结果的参数(需可JSON序列化)
+    loader: 无参函数, 缓存未命中时调用, 返回 DataFrame / ndarray / 由它们和JSON值组成的dict
+    ------------
+    Return:
+    loader 的返回值(命中时从快照重建, 每次返回新对象, 调用方可随意修改)
+    ------------
+    """
+    if not cache_enabled():
+        return loader()
+    try:
+        cache_dir = get_cache_dir()
+        path = cache_dir / f"{_cache_key(file_path, parser, options)}.npz"
+    except OSError:
+        return loader()
+
+    if path.exists():
+        try:
+            return _load(path)
+        except Exception as e:
+            print(f"[ParseCache] 快照损坏, 重新解析: {path.name} ({e})")
+            try:
+                path.unlink()
+            except OSError:
+                pass
+
+    value = loader()
+    try:
+        _store(path, value)
+        _evict(cache_dir, get_max_bytes())
+    except Exception as e:
+        print(f"[ParseCache] 写入缓存失败, 跳过: {e}")
+    return value
+
+
+def read_excel_cached(file_path, sheet_name=0, **kwargs):
+    """
+    pd.read_excel 的缓存版本, 参数与 pd.read_excel 一致
+    sheet_name 为列表/None 时返回 {sheet_name: DataFrame}
+    """
+    options = {'sheet_name': sheet_name, 'kwargs': kwargs}
+    if not _json_safe(options):
+        return pd.read_excel(file_path, sheet_name=sheet_name, **kwargs)
+
+    def loader():
+        result = pd.read_excel(file_path, sheet_name=sheet_name, **kwargs)
+        if isinstance(result, dict):
+            # npz键名只支持字符串, 工作表名统一成字符串
+            return {str(k): v for k, v in result.items()}
+        return result
+
+    result = cached_parse(file_path, 'read_excel', options, loader)
+    if isinstance(result, dict) and isinstance(sheet_name, list):
+        return {name: result[str(name)] for name in sheet_name}
+    return result
+
+
+def clear_parse_cache():
+    cache_dir = get_cache_dir()
+    if not cache_dir.exists():
+        return
+    for p in cache_dir.glob('*.npz'):
+        try:
+            p.unlink()
+        except OSError:
+            pass
@@ -1,3 +1,4 @@
+import io
 import os
 import re
 import numpy as np
@@ -5,10 +6,18 @@ import pandas as pd
 import zipfile
 import warnings
 import json
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from ..FittingOptions import FittingOptions
+from .ParseCache import cached_parse
 
 __all__ = ['XlementDataFrame']
 
+# zip内CSV并发解码的线程数上限
+ZIP_DECODE_WORKERS = 8
+# 处理流水线阶段缓存的条目上限
+STAGE_CACHE_SIZE = 32
+
 class XlementDataFrame:
     def __init__(self, init_options: dict):
         # init_options是options.json的第一个节点, 应该另外传入
@@ -35,9 +44,21 @@ class XlementDataFrame:
         self._raw_dissociation_signals = data['dissociation_signals']
 
         self._dissociation_time_start = None # 获得解离开始时间
+        self._stage_cache = OrderedDict() # 处理流水线各阶段的中间结果
 
 
     def _format_data(self, file_path):
+        # 解析结果按文件内容哈希缓存, 同一文件再次导入时跳过解析
+        parse_options = {
+            'device': self._device,
+            'dtype': self._dtype,
+            'unit': self._unit,
+            'hole_info': self._hole_info,
+        }
+        return cached_parse(file_path, 'XlementDataFrame', parse_options,
+                            lambda: self._parse_data(file_path))
+
+    def _parse_data(self, file_path):
 
         data = None
 
@@ -134,7 +155,12 @@ class XlementDataFrame:
 
         original_data = pd.read_excel(file_path)
 
-        conc_df = original_data[original_data.iloc[:, 0] == 'Sample concentration(M)']
+        # 一次扫描第一列, 记录每个表头首次出现的行号
+        header_rows = {}
+        for row, key in enumerate(original_data.iloc[:, 0].tolist()):
+            header_rows.setdefault(key, row)
+
+        conc_df = original_data.iloc[[header_rows['Sample concentration(M)']], :]
         conc_df = conc_df.dropna(axis=1, inplace=False)
         conc_list = conc_df.iloc[0, :].tolist()
 
@@ -149,24 +175,20 @@ class XlementDataFrame:
         HEADERAS = ['Base line(s)', 'Association start(s)', 'Association finish(s)', 'Dissociation finish(s)']
 
         for header in HEADERAS:
-            _ = original_data[original_data.iloc[:, 0] == header].index[0]
-            time_split.append(original_data.iloc[_, 1])
+            time_split.append(original_data.iloc[header_rows[header], 1])
         
-        signal_index = original_data[original_data.iloc[:, 0] == 'Time'].index[0]
+        signal_index = header_rows['Time']
         signal_df = original_data.iloc[signal_index:, :]
 
-        signals = np.array([])
+        # 通道数和时间点数已知, 一次性分配
+        signals = np.empty((signal_df.shape[0] - 1, len(concentrations)), dtype=np.float64)
         for i in range(len(concentrations)):
             assert signal_df.iloc[0, 3*i + 1] == 'Test'
             assert signal_df.iloc[0, 3*i + 2] == 'Refe'
 
             signal_refe = signal_df.iloc[1:, 3*i + 1].to_numpy().astype(np.float64)
             signal_test = signal_df.iloc[1:, 3*i + 2].to_numpy().astype(np.float64)
-            signal = signal_refe - signal_test
-            signal = signal.reshape(-1, 1)
-
-            # signals = np.concatenate([signals, signal], axis=1) if signals.size else signal
-            signals = np.hstack([signals, signal]) if signals.size else signal
+            signals[:, i] = signal_refe - signal_test
         
         #split signals
         baseline_start, association_start, association_finish, dissociation_finish = time_split
@@ -196,20 +218,27 @@ class XlementDataFrame:
     def _format_one_zipped(self, file_path)->dict:
 
         time_split = []
-        signals = np.array([])
         concentrations = []
 
         with zipfile.ZipFile(file_path, 'r') as zip_dir:
-            for zip_file_name in zip_dir.namelist():
-
+            zip_file_names = zip_dir.namelist()
+            for zip_file_name in zip_file_names:
                 concentrations.append(zip_file_name.split(' ')[1].split('_')[0])
-                with zip_dir.open(zip_file_name) as f:
-                    signal_df = pd.read_csv(f, delimiter='\t', encoding='utf-8')
-                    signal = signal_df['差值'].to_numpy().reshape(-1, 1)
-                    signal = signal.astype(np.float64)
-                    signals = np.hstack([signals, signal]) if signals.size else signal
-                    
-                    time_split = signal_df.columns[5:9].tolist() 
+
+            def decode_member(zip_file_name):
+                # ZipFile读取自带锁, 解压与CSV解析在各线程中并发进行
+                raw = zip_dir.read(zip_file_name)
+                signal_df = pd.read_csv(io.BytesIO(raw), delimiter='\t', encoding='utf-8')
+                return signal_df['差值'].to_numpy().astype(np.float64), signal_df.columns[5:9].tolist()
+
+            workers = max(1, min(ZIP_DECODE_WORKERS, len(zip_file_names)))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                decoded = list(executor.map(decode_member, zip_file_names))
+
+        signals = np.empty((len(decoded[0][0]) if decoded else 0, len(decoded)), dtype=np.float64)
+        for i, (signal, columns) in enumerate(decoded):
+            signals[:, i] = signal
+            time_split = columns
         
         time_split = [int(i) for i in time_split]
         association_start, association_finish, dissociation_finish, baseline_start = time_split
@@ -244,9 +273,10 @@ class XlementDataFrame:
         if self._device == '100-capture':
             sheet_names = ['配体稳定', '结合', '解离']
 
+        # 一次打开工作簿读取全部工作表, 避免重复解压
+        sheets = pd.read_excel(file_path, sheet_name=sheet_names)
         for sheet_name in sheet_names:
-            df = pd.read_excel(file_path, sheet_name=sheet_name)
-            original_data_dflist.append(df)
+            original_data_dflist.append(sheets[sheet_name])
         
         baseline_df, association_df, dissociation_df = original_data_dflist
 
@@ -285,12 +315,28 @@ class XlementDataFrame:
         return result
     
     
-    def _process_data_pipeline(self, pipeline: dict):
+    def _run_stage(self, key: tuple, compute) -> tuple:
+        # 阶段结果以 (阶段名, 上游全部参数) 为键记忆, 只改下游参数时上游阶段直接命中
+        cached = self._stage_cache.get(key)
+        if cached is not None:
+            self._stage_cache.move_to_end(key)
+            return cached
+
+        result = compute()
+        # 缓存中的数组只读, 下游阶段必须生成新数组而不是原地修改
+        for value in result:
+            if isinstance(value, np.ndarray):
+                value.flags.writeable = False
+        self._stage_cache[key] = result
+        while len(self._stage_cache) > STAGE_CACHE_SIZE:
+            self._stage_cache.popitem(last=False)
+        return result
 
-        concentration_M = self._concentrations_M
-        baseline_signals = self._raw_baseline_signals
-        association_signals = self._raw_association_signals
-        dissociation_signals = self._raw_dissociation_signals
+    def _stage_truncate(self) -> tuple:
+        # stage 1: device 'one' 截掉结合段开头, 解离段不超过结合段2倍
+        baseline_signals = self._raw_baseline_signals[:, :]
+        association_signals = self._raw_association_signals[:, :]
+        dissociation_signals = self._raw_dissociation_signals[:, :]
 
         ASSOCIATION_TRUNCATE = 15
 
@@ -306,6 +352,13 @@ class XlementDataFrame:
             if dissociation_length > 2 * association_length:
                 dissociation_signals = dissociation_signals[:2 * association_length, :]
 
+        return tuple(self._concentrations_M), baseline_signals, association_signals, dissociation_signals
+
+    @staticmethod
+    def _stage_zero_concentration(upstream: tuple, clear: bool, delete: bool) -> tuple:
+        # stage 2: 零浓度通道置零 / 删除
+        concentration_M, baseline_signals, association_signals, dissociation_signals = upstream
+
         zero_indice_list = [i for i, c in enumerate(concentration_M) if c == 0]
         zero_index = -1
 
@@ -316,31 +369,44 @@ class XlementDataFrame:
         else:
             zero_index = zero_indice_list[0]
 
-
-        if pipeline['clear_zero_concentration'] and zero_index != -1:
+        if clear and zero_index != -1:
+            baseline_signals = baseline_signals.copy()
+            association_signals = association_signals.copy()
+            dissociation_signals = dissociation_signals.copy()
             baseline_signals[:, zero_index] = 0
             association_signals[:, zero_index] = 0
             dissociation_signals[:, zero_index] = 0
 
-        if pipeline['delete_zero_concentration'] and zero_index != -1:
-            concentration_M.pop(zero_index)
+        if delete and zero_index != -1:
+            concentration_M = concentration_M[:zero_index] + concentration_M[zero_index + 1:]
             baseline_signals = np.delete(baseline_signals, zero_index, axis=1)
             association_signals = np.delete(association_signals, zero_index, axis=1)
             dissociation_signals = np.delete(dissociation_signals, zero_index, axis=1)
-        
-        alpha = pipeline['signal_expansion_coefficient']
+
+        return concentration_M, baseline_signals, association_signals, dissociation_signals
+
+    @staticmethod
+    def _stage_expansion(upstream: tuple, alpha) -> tuple:
+        # stage 3: 信号放大系数
+        concentration_M, baseline_signals, association_signals, dissociation_signals = upstream
         if alpha != 1:
             baseline_signals = baseline_signals * alpha
             association_signals = association_signals * alpha
             dissociation_signals = dissociation_signals * alpha
+        return concentration_M, baseline_signals, association_signals, dissociation_signals
 
-        if pipeline['100_truncate'] and self._device == '100':
-            baseline_start = pipeline['100_truncate_params']['baseline_start']
-            baseline_end = pipeline['100_truncate_params']['baseline_end']
-            association_start = pipeline['100_truncate_params']['association_start']
-            association_end = pipeline['100_truncate_params']['association_end']
-            dissociation_start = pipeline['100_truncate_params']['dissociation_start']
-            dissociation_end = pipeline['100_truncate_params']['dissociation_end']
+    @staticmethod
+    def _stage_100_truncate(upstream: tuple, truncate_params) -> tuple:
+        # stage 4: device '100' 按参数截取各段, truncate_params 为 None 时不截取
+        concentration_M, baseline_signals, association_signals, dissociation_signals = upstream
+        if truncate_params is not None:
+            params = dict(truncate_params)
+            baseline_start = params['baseline_start']
+            baseline_end = params['baseline_end']
+            association_start = params['association_start']
+            association_end = params['association_end']
+            dissociation_start = params['dissociation_start']
+            dissociation_end = params['dissociation_end']
 
             if baseline_start != -1 and baseline_end != -1:
                 baseline_signals = baseline_signals[baseline_start:baseline_end, :]
@@ -348,11 +414,37 @@ class XlementDataFrame:
                 association_signals = association_signals[association_start:association_end, :]
             if dissociation_start != -1 and dissociation_end != -1:
                 dissociation_signals = dissociation_signals[dissociation_start:dissociation_end, :]
-        
+        return concentration_M, baseline_signals, association_signals, dissociation_signals
+
+    def _process_data_pipeline(self, pipeline: dict):
+        # 各阶段的键包含其全部上游参数: 改动对齐模式只重算最后一步, 改动零浓度策略从第2步开始重算
+        key = ('truncate',)
+        stage = self._run_stage(key, self._stage_truncate)
+
+        upstream = stage
+        clear = bool(pipeline['clear_zero_concentration'])
+        delete = bool(pipeline['delete_zero_concentration'])
+        key += ('zero', clear, delete)
+        stage = self._run_stage(key, lambda: self._stage_zero_concentration(upstream, clear, delete))
+
+        upstream_zero = stage
+        alpha = pipeline['signal_expansion_coefficient']
+        key += ('expansion', alpha)
+        stage = self._run_stage(key, lambda: self._stage_expansion(upstream_zero, alpha))
+
+        truncate_params = None
+        if pipeline['100_truncate'] and self._device == '100':
+            truncate_params = tuple(sorted(pipeline['100_truncate_params'].items()))
+        upstream_expansion = stage
+        key += ('100_truncate', truncate_params)
+        stage = self._run_stage(key, lambda: self._stage_100_truncate(upstream_expansion, truncate_params))
+
+        upstream_truncate = stage
         mode = pipeline['zeroing_logic_mode']
-        _ = self._align_signals(baseline_signals, association_signals, dissociation_signals, mode)
+        key += ('align', mode)
+        stage = self._run_stage(key, lambda: (upstream_truncate[0],) + self._align_signals(*upstream_truncate[1:], mode))
 
-        return _
+        return stage
 
 
     def process(self, pipeline: dict)->pd.DataFrame:
@@ -362,7 +454,7 @@ class XlementDataFrame:
             time_interval = 1
             warnings.warn("device 'one' only supports time_interval=1, setting it to 1 automatically.")
 
-        baseline_signals, association_signals, dissociation_signals = self._process_data_pipeline(pipeline)
+        concentrations_M, baseline_signals, association_signals, dissociation_signals = self._process_data_pipeline(pipeline)
 
         processed_signals = np.vstack(
             [baseline_signals, association_signals, dissociation_signals] 
@@ -374,11 +466,10 @@ class XlementDataFrame:
         self._dissociation_time_start = round(self._dissociation_time_start)
 
         time_array = np.array([i * time_interval for i in range(processed_signals.shape[0])])
-        concentrations_M = self._concentrations_M
+        concentrations_M = [''] + list(concentrations_M)
 
         result_df = pd.DataFrame(processed_signals)
         result_df.insert(0, 'Time(s)', time_array)
-        concentrations_M.insert(0, '')
         result_df.loc[-1] = concentrations_M
         result_df.index = result_df.index + 1
         result_df.sort_index(inplace=True)
@@ -401,24 +492,50 @@ class XlementDataFrame:
 
         time_data = np.array(time_data)
 
-        signals = np.array([])
-        for hole_name in hole_names:
-            
-            signal = df[df.iloc[:, 0] == hole_name]
-            signal = signal.dropna(axis=1, inplace=False)
+        # 一次分组得到每个孔所在的行号, 并把信号区一次性转为float矩阵, 不再逐孔过滤整张表
+        hole_rows = df.groupby(df.iloc[:, 0], sort=False).indices
+        try:
+            values = df.iloc[:, 1:].to_numpy(dtype=np.float64, na_value=np.nan)
+        except (ValueError, TypeError):
+            # 表中有非数值单元格(如备注行)时改为逐孔转换, 孔内的非数值信号照常报错
+            values = None
+
+        signals = None
+        for i, hole_name in enumerate(hole_names):
 
-            if signal.empty:
+            rows = hole_rows.get(hole_name)
+            if rows is None or len(rows) == 0:
                 raise ValueError(f"Signal is empty for hole name '{hole_name}'! Check if it is valid.")
 
-            signal_575 = signal.iloc[0, 1:].to_numpy().astype(np.float64)
-            signal_595 = signal.iloc[1, 1:].to_numpy().astype(np.float64)
-            signal = signal_595 - signal_575
-            signal = signal.reshape(-1, 1)
+            signal = values[rows] if values is not None else XlementDataFrame._hole_signal_block(df, rows, hole_name)
+            signal = signal[:, ~np.isnan(signal).any(axis=0)]
 
-            signals = np.hstack([signals, signal]) if signals.size else signal
+            signal_575 = signal[0]
+            signal_595 = signal[1]
+
+            if signals is None:
+                signals = np.empty((signal_575.shape[0], len(hole_names)), dtype=np.float64)
+            signals[:, i] = signal_595 - signal_575
         
+        if signals is None:
+            signals = np.array([])
+
         return time_data, signals
 
+    @staticmethod
+    def _hole_signal_block(df: pd.DataFrame, rows, hole_name: str) -> np.ndarray:
+        # 单个孔的信号行转为float矩阵, 空单元格为NaN, 非数值单元格报错而不是当作缺失值丢弃
+        block = df.iloc[rows, 1:]
+        try:
+            return block.to_numpy(dtype=np.float64, na_value=np.nan)
+        except (ValueError, TypeError):
+            invalid = (block.apply(pd.to_numeric, errors='coerce').isna() & block.notna()).to_numpy()
+            if not invalid.any():
+                raise
+            row, col = np.argwhere(invalid)[0]
+            raise ValueError(f"Non-numeric signal value {block.iat[row, col]!r} for hole name '{hole_name}' "
+                             f"in column '{block.columns[col]}'! Check if it is valid.") from None
+
     @staticmethod
     def _align_signals(baseline_signals: np.ndarray,
                       association_signals: np.ndarray,
@@ -0,0 +1,130 @@
+import time
+import numpy as np
+from scipy.optimize import minimize, OptimizeResult
+'''
+单次拟合的预算: 目标函数求值次数 / 耗时(秒) / 起点数
+病态曲线上SLSQP/TNC/BFGS可能跑几分钟, 一条坏曲线拖住整个批量
+预算在目标函数包装里检查, 用尽时中止当前minimize并返回目前为止最优的参数(budget_limited=True)
+一次拟合(含所有起点)共用一个预算, 由 FittingOptions.new_budget() 创建
+'''
+__all__ = ['FitBudget', 'BudgetExhausted']
+
+
+# 预算用尽 在目标函数中抛出 由FitBudget.minimize捕获
+class BudgetExhausted(Exception):
+    pass
+
+
+class FitBudget:
+    def __init__(self,
+        max_evaluations: int = None,
+        max_seconds: float = None,
+        max_starts: int = None):
+        # None或0表示不限
+        self.max_evaluations = int(max_evaluations) if max_evaluations else None
+        self.max_seconds = float(max_seconds) if max_seconds else None
+        self.max_starts = int(max_starts) if max_starts else None
+
+        # 已用的预算 计时从第一次求值开始
+        self.evaluations = 0
+        self.starts = 0
+        self.started_at = None
+
+        # 用尽原因 None表示没有用尽
+        self.reason = None
+
+        # 整次拟合的最优点
+        self.best_loss = np.inf
+        self.best_params = None
+
+    @property
+    def limited(self):
+        return self.reason is not None
+
+    def elapsed(self):
+        if self.started_at is None:
+            return 0.0
+        return time.perf_counter() - self.started_at
+
+    # 求值次数/耗时是否用尽 用尽时记录原因
+    def _exhausted(self):
+        if self.reason is not None:
+            return True
+        if self.max_evaluations is not None and self.evaluations >= self.max_evaluations:
+            self.reason = f"目标函数求值达到上限 {self.max_evaluations} 次"
+        elif self.max_seconds is not None and self.elapsed() >= self.max_seconds:
+            self.reason = f"耗时达到上限 {self.max_seconds:g} 秒"
+        return self.reason is not None
+
+    # 是否还能开始下一个起点 第一个起点总是允许
+    def allows_start(self):
+        if self.starts == 0:
+            return True
+        if self._exhausted():
+            return False
+        if self.max_starts is not None and self.starts >= self.max_starts:
+            self.reason = f"起点数达到上限 {self.max_starts} 个"
+            return False
+        return True
+
+    # 包装目标函数: 每次求值前检查预算 记录本次minimize与整次拟合的最优点
+    def wrap(self, fun, run_best: list = None):
+        def objective(params, *args):
+            if self.started_at is None:
+                self.started_at = time.perf_counter()
+            if self._exhausted():
+                raise BudgetExhausted(self.reason)
+            self.evaluations += 1
+            value = fun(params, *args)
+            try:
+                loss = float(value)
+            except (TypeError, ValueError):
+                loss = float(np.sum(value))
+            if np.isfinite(loss):
+                if run_best is not None and loss < run_best[0]:
+                    run_best[0] = loss
+                    run_best[1] = np.array(params, dtype=float, copy=True)
+                if loss < self.best_loss:
+                    self.best_loss = loss
+                    self.best_params = np.array(params, dtype=float, copy=True)
+            return value
+        return objective
+
+    # 带预算的scipy.optimize.minimize 参数与之相同
+    # 预算用尽时返回本次minimize目前最优的参数(还没有有效求值时为起始点), success=False, budget_limited=True
+    def minimize(self, fun, x0, **kwargs):
+        self.starts += 1
+        run_best = [np.inf, None]
+        evaluations_before = self.evaluations
+        try:
+            result = minimize(self.wrap(fun, run_best), x0, **kwargs)
+        except BudgetExhausted as e:
+            x = run_best[1] if run_best[1] is not None else np.array(x0, dtype=float)
+            return OptimizeResult(
+                x=x,
+                fun=run_best[0],
+                success=False,
+                status=-1,
+                message=f"预算用尽: {e}",
+                nfev=self.evaluations - evaluations_before,
+                budget_limited=True)
+        result.budget_limited = False
+        return result
+
+    # 预算使用情况 放进拟合结果
+    def summary(self):
+        return {
+            'budget_limited': self.limited,
+            'reason': self.reason,
+            'evaluations': self.evaluations,
+            'starts': self.starts,
+            'seconds': round(self.elapsed(), 3),
+            'max_evaluations': self.max_evaluations,
+            'max_seconds': self.max_seconds,
+            'max_starts': self.max_starts,
+        }
+
+    def __str__(self):
+        state = f"已用尽({self.reason})" if self.limited else "未用尽"
+        return (f"预算:{state} 求值{self.evaluations}/{self.max_evaluations or '不限'} "
+                f"耗时{self.elapsed():.1f}/{self.max_seconds or '不限'}秒 起点{self.starts}/{self.max_starts or '不限'}")
@@ -2,6 +2,7 @@ import numpy as np
 import pandas as pd
 from pathlib import Path
 import warnings
+from XlementFitting.FitBudget import FitBudget
 '''
 用来给Bivariate系列函数提供设置的类
 '''
@@ -54,6 +55,15 @@ class FittingOptions:
         
         # 设置单循环找点的高度限制
         self.peak_height = 0.02
+        
+        # 取消令牌/进度通道 需要提供track(fun, start, n_starts)->(fun, callback) None时不检查
+        self.control = None
+        
+        # 单次拟合预算 None表示不限 每次拟合由new_budget()新建FitBudget
+        self.max_evaluations = dict_options.pop('max_evaluations', None)
+        self.max_seconds = dict_options.pop('max_seconds', None)
+        self.max_starts = dict_options.pop('max_starts', None)
+        self.budget = None # 最近一次拟合的预算使用情况
         pass
     
     def is_valid_init_params_list(self,lst):
@@ -209,6 +219,34 @@ class FittingOptions:
     
     def get_peak_height(self):
         return self.peak_height
+    
+    # 设置取消令牌/进度通道
+    def set_control(self, control=None):
+        self.control = control
+    
+    def get_control(self):
+        return getattr(self, 'control', None)
+    
+    # 设置单次拟合预算: 目标函数求值次数/耗时(秒)/起点数 None表示不限
+    def set_budget(self, max_evaluations: int = None, max_seconds: float = None, max_starts: int = None):
+        self.max_evaluations = max_evaluations
+        self.max_seconds = max_seconds
+        self.max_starts = max_starts
+    
+    def get_budget_limits(self):
+        return {'max_evaluations': getattr(self, 'max_evaluations', None),
+                'max_seconds': getattr(self, 'max_seconds', None),
+                'max_starts': getattr(self, 'max_starts', None)}
+    
+    # 开始一次拟合时调用: 新建FitBudget 没有任何限制时返回None
+    def new_budget(self):
+        limits = self.get_budget_limits()
+        self.budget = FitBudget(**limits) if any(limits.values()) else None
+        return self.budget
+    
+    # 最近一次拟合的预算(可查看是否用尽 budget.limited)
+    def get_budget(self):
+        return getattr(self, 'budget', None)
             
     # 设置Print函数
     def __str__(self):
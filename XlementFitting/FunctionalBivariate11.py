@@ -3,6 +3,7 @@ import pandas as pd
 from scipy.optimize import minimize
 import matplotlib.pyplot as plt
 from XlementFitting import FittingOptions
+from XlementFitting.FitBudget import FitBudget
 from XlementFitting.ModelandLoss import model_all_in_one, loss_all_in_one, loss_punished, INF_value
 from XlementFitting.FileProcess.Json2Data import transform_dataframe
 from XlementFitting.FileProcess.ExcelandImage import excel_output, save_output_img
@@ -48,7 +49,10 @@ def Bivariate_init(
     Data: np.ndarray,
     time0: float = -1,
     init_params: list = [1.5,4,-4],
-    options: FittingOptions=FittingOptions({'eps': 1e-3, 'init_params': [1.5,4,-4]})):
+    options: FittingOptions=FittingOptions({'eps': 1e-3, 'init_params': [1.5,4,-4]}),
+    start: int = 0,
+    n_starts: int = 1,
+    budget: FitBudget = None):
     
     # 数据整理
     Y_data, A_data, T_data, R_guess = Data
@@ -59,7 +63,14 @@ def Bivariate_init(
     cons = ({'type': 'ineq', 'fun': lambda p: p[2] - p[1] - KD_bound})
     
     eps = options.get_eps()
-    result = minimize(loss_punished,
+    # 取消令牌/进度通道：每次求值/迭代检查取消，上报起点序号/迭代次数/最优损失
+    objective, callback = loss_punished, None
+    control = options.get_control()
+    if control is not None:
+        objective, callback = control.track(loss_punished, start, n_starts)
+    # 预算: 每次求值检查 用尽时返回目前最优的参数
+    run_minimize = budget.minimize if budget is not None else minimize
+    result = run_minimize(objective,
                       initial_guess,
                       args=(A_data,
                             T_data,
@@ -68,7 +79,8 @@ def Bivariate_init(
                             options), 
                       method='SLSQP',
                       constraints=cons, 
-                      options={'eps': eps}) # Y_data归一化
+                      options={'eps': eps},
+                      callback=callback) # Y_data归一化
     
     R_opt, ka_opt_log, kd_opt_log = result.x
     result.x[0]*=R_guess # 反归一化
@@ -102,15 +114,21 @@ def GlobalBivariate(
     R_guess = np.max(Y_data)
     Data = [Y_data, A_data, T_data, R_guess]
     init_params_list = options.get_init_params_list()
+    n_starts = len(init_params_list) + 1
     
-    # 找出总损失最小的结果
-    Results = Bivariate_init(Data, time0, [1.0,4,0], options)
+    # 找出总损失最小的结果 所有起点共用一个预算
+    budget = options.new_budget()
+    Results = Bivariate_init(Data, time0, [1.0,4,0], options, start=0, n_starts=n_starts, budget=budget)
     last_min_loss = np.sum(Results["Loss"])
-    for init_params in init_params_list:
-        current_result =  Bivariate_init(Data, time0, init_params, options)
+    for start, init_params in enumerate(init_params_list, 1):
+        if budget is not None and not budget.allows_start():
+            break # 预算用尽 使用目前最优的结果
+        current_result =  Bivariate_init(Data, time0, init_params, options, start, n_starts, budget)
         if last_min_loss > np.sum(current_result["Loss"]):
             Results = current_result
             last_min_loss = np.sum(current_result["Loss"])
+    if budget is not None and budget.limited:
+        print(f"GlobalBivariate:{budget}")
     
     # 填充浓度项
     Results["Conc"] = A_data[:,0].tolist()
@@ -172,23 +190,33 @@ def GlobalBivariate(
 
 
 # 这个是用来给LocalBivariate调用的代码 把GlobalBivariate11的第一个输入从file_path变成了np_ndarray
+# budget: LocalBivariate传入的整次拟合预算 None时按options新建
 def Bivariate11_for_local(
     Data: np.ndarray,
     time0: float,
-    options: FittingOptions):
+    options: FittingOptions,
+    budget: FitBudget = None):
     
     Y_data, A_data, T_data= transform_dataframe(Data)
     R_guess  = np.max(Y_data)
     init_params_list = options.get_init_params_list()
+    n_starts = len(init_params_list) + 1
     Data = [Y_data, A_data, T_data, R_guess]
+    if budget is None:
+        budget = options.new_budget()
     Results = Bivariate_init(
         Data,
         time0,
         [1.0,4,0],
-        options)
+        options,
+        start=0,
+        n_starts=n_starts,
+        budget=budget)
     last_min_loss = np.sum(Results["Loss"])
-    for init_params in init_params_list:
-        current_result =  Bivariate_init(Data, time0, init_params, options)
+    for start, init_params in enumerate(init_params_list, 1):
+        if budget is not None and not budget.allows_start():
+            break # 预算用尽 使用目前最优的结果
+        current_result =  Bivariate_init(Data, time0, init_params, options, start, n_starts, budget)
         if last_min_loss > np.sum(current_result["Loss"]):
             Results = current_result
             last_min_loss = np.sum(current_result["Loss"])
@@ -256,12 +284,13 @@ def LocalBivariate(
     current_results_list = []
     y_predictions_list = []
     
-    # 遍历每一个单独的浓度组
+    # 遍历每一个单独的浓度组 所有浓度组共用一个预算
+    budget = options.new_budget()
     num_params = 0
     for local_data in local_datas:
         # print(f"LocalBivariate:local_data: {local_data}")
         num_params += 3.0
-        current_results, y_prediction = Bivariate11_for_local(local_data,time0,options)
+        current_results, y_prediction = Bivariate11_for_local(local_data,time0,options,budget)
         current_results["Conc"] = local_data.iat[0,1]
         y_predictions_list.append(np.squeeze(y_prediction))
         if np.array(local_data.columns)[1] != 0.0: # 0浓度参与拟合不参与最终ka和kd的计算
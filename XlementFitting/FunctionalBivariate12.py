@@ -3,6 +3,7 @@ import pandas as pd
 from scipy.optimize import minimize, least_squares
 import matplotlib.pyplot as plt
 from XlementFitting import FittingOptions
+from XlementFitting.FitBudget import FitBudget
 from XlementFitting.ModelandLoss import model_all_in_one, loss_all_in_one, loss_punished, INF_value
 from XlementFitting.FileProcess.Json2Data import transform_dataframe
 from FileProcess.ExcelandImage import excel_output, save_output_img
@@ -49,7 +50,10 @@ def Bivariate_init(
     Data: list,
     time0: float = -1,
     init_params: list = [1.5,4,-4],
-    options: FittingOptions=FittingOptions({'eps': 1e-3, 'init_params': [1.5,4,-4]})):
+    options: FittingOptions=FittingOptions({'eps': 1e-3, 'init_params': [1.5,4,-4]}),
+    start: int = 0,
+    n_starts: int = 1,
+    budget: FitBudget = None):
     
     # 数据整理
     Y_data, A_data, T_data, R_guess = Data
@@ -62,8 +66,15 @@ def Bivariate_init(
     
     # 开始运算
     eps = options.get_eps()
+    # 取消令牌/进度通道：每次求值/迭代检查取消，上报起点序号/迭代次数/最优损失
+    objective, callback = loss_punished, None
+    control = options.get_control()
+    if control is not None:
+        objective, callback = control.track(loss_punished, start, n_starts)
+    # 预算: 每次求值检查 用尽时返回目前最优的参数
+    run_minimize = budget.minimize if budget is not None else minimize
     # print("least_square")
-    result = minimize(loss_punished,
+    result = run_minimize(objective,
                       initial_guess,
                       args=(A_data,
                             T_data,
@@ -72,7 +83,8 @@ def Bivariate_init(
                             options), 
                       method='SLSQP',
                       constraints=cons, 
-                      options={'eps': eps}
+                      options={'eps': eps},
+                      callback=callback
                       ) 
     
     R_opt_array = result.x[-Conc_num-2:-2]
@@ -110,14 +122,21 @@ def PartialBivariate12(
     R_guess = np.max(Y_data)
     Data = [Y_data, A_data, T_data, R_guess]
     init_params_list = options.get_init_params_list()
+    n_starts = len(init_params_list) + 1
         
-    Results = Bivariate_init(Data, time0, [1.0,4,0], options)
+    # 所有起点共用一个预算
+    budget = options.new_budget()
+    Results = Bivariate_init(Data, time0, [1.0,4,0], options, start=0, n_starts=n_starts, budget=budget)
     last_min_loss = np.sum(Results["Loss"])
-    for init_params in init_params_list:
-        current_result =  Bivariate_init(Data, time0, init_params, options)
+    for start, init_params in enumerate(init_params_list, 1):
+        if budget is not None and not budget.allows_start():
+            break # 预算用尽 使用目前最优的结果
+        current_result =  Bivariate_init(Data, time0, init_params, options, start, n_starts, budget)
         if last_min_loss > np.sum(current_result["Loss"]):
             Results = current_result
             last_min_loss = np.sum(current_result["Loss"])
+    if budget is not None and budget.limited:
+        print(f"PartialBivariate:{budget}")
     
     # 填充浓度项
     Results["Conc"] = A_data[:,0].tolist()
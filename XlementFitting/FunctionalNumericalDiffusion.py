@@ -5,6 +5,8 @@ from datetime import datetime
 from scipy.optimize import minimize
 import matplotlib.pyplot as plt
 from FunctionalBivariate2 import Bivariate2
+from FitBudget import FitBudget
+from XlementFitting import FittingOptions
 plt.rcParams['font.sans-serif'] = ['Arial Unicode MS']
 
 # 定义米氏方程微分方程
@@ -253,15 +255,20 @@ def curve_fit_numerical_mf(
     kon_log:float=6,
     koff_log:float=-2,
     R0:float=0.0,
-    custom_method:dict={"numerical":"R-K","time type":"fitted","optimize":'TNC',"eps":1e-3}):
+    custom_method:dict={"numerical":"R-K","time type":"fitted","optimize":'TNC',"eps":1e-3},
+    budget:FitBudget=None):
     custom_numerical_method = custom_method["numerical"] # 解包数值计算方式
+    # 预算: 每次求值检查 用尽时返回目前最优的参数(result.budget_limited)
+    run_minimize = budget.minimize if budget is not None else minimize
     # 初始化拟合时间项
     window_size_init = np.sqrt((bind_end_time - bind_start_time) / 2.0)
     center_time_init = np.sqrt((bind_end_time + bind_start_time) / 2.0)
     if custom_method["time type"] == "fitted": # 如果时间项是待拟合的
         initial_params = Rmax_init + [window_size_init, center_time_init, diffusion_cons_sqrt,
                           kon_log, koff_log]
-        result = minimize(
+        # Biv2预拟合的结果可能是long double TNC只接受float64
+        initial_params = np.asarray(initial_params, dtype=np.float64)
+        result = run_minimize(
             loss_numerical_mf_time_fitted,
             initial_params, 
             args=(
@@ -302,8 +309,10 @@ def get_data_from_path(file_path):
     return time_col, Conc_row, signal_data, Y_max
 
 # 使用Biv2算法预拟合亲和力相关参数
+# budget: TNC拟合的预算 None表示不限
 def curve_fit_numerical_mf_biv2(file_path,bind_start_time:float,bind_end_time:float,diffusion_cons_sqrt:float=-2.3,
-                        R0:float=0.0,customized_methods:dict={"numerical":"R-K","time type":"fitted","optimize":'TNC',"eps":1e-3}):
+                        R0:float=0.0,customized_methods:dict={"numerical":"R-K","time type":"fitted","optimize":'TNC',"eps":1e-3},
+                        budget:FitBudget=None):
     r,p,_ = Bivariate2(file_path,time0=bind_end_time,write_file=False,run_local=True) # Biv2全局预拟合
     R_max_biv2 = r["Rmax"][:-1]
     # print(f"Rmax是:{R_max_biv2}")
@@ -321,7 +330,8 @@ def curve_fit_numerical_mf_biv2(file_path,bind_start_time:float,bind_end_time:fl
         kon_log=kon_log10_biv2,
         koff_log=koff_log10_biv2,
         diffusion_cons_sqrt=diffusion_cons_sqrt,
-        custom_method=customized_methods)
+        custom_method=customized_methods,
+        budget=budget)
     return ND_result
 
 # 把浓度数据转换为图中输出的文字信息
@@ -434,12 +444,18 @@ def excel_output_global(file_path, results:dict, Y_pred: np.ndarray):
     return result_path
 
 # 定义最终的调用接口
+# options: 提供预算(max_evaluations/max_seconds) 用尽时使用目前最优的参数 options.get_budget()查看
 def NumericalDiffusion4(file_path,bind_start_time:float,bind_end_time:float,diffusion_cons_sqrt:float=-2.3,
                         R0:float=0.0,customized_methods:dict={"numerical":"R-K","time type":"fitted","optimize":'TNC',"eps":1e-3},
-                        write_file:bool=False,output_img:bool=False):
+                        write_file:bool=False,output_img:bool=False,options:FittingOptions=None):
+    if options is None:
+        options = FittingOptions({})
+    budget = options.new_budget()
     ND_result = curve_fit_numerical_mf_biv2(file_path=file_path,bind_start_time=bind_start_time,
                                             bind_end_time=bind_end_time,diffusion_cons_sqrt=diffusion_cons_sqrt,
-                                            R0=R0,customized_methods=customized_methods)
+                                            R0=R0,customized_methods=customized_methods,budget=budget)
+    if budget is not None and budget.limited:
+        print(f"NumericalDiffusion4:{budget}")
     time_col, conc_row, signal_real, Ymax = get_data_from_path(file_path)
 
     Rmax_opt_array = ND_result.x[:-5]
@@ -7,6 +7,7 @@ import scipy.optimize
 from XlementFitting import FittingOptions
 from XlementFitting.ModelandLoss import model_all_in_one, loss_all_in_one, loss_punished, INF_value
 from XlementFitting.FileProcess.ExcelandImage import excel_output, save_output_img, Get_Data_from_path, is_valid_xlsx
+from XlementFitting.FileProcess.ParseCache import read_excel_cached
 plt.rcParams['font.sans-serif'] = ['Arial Unicode MS', 'SimHei']
 
 NORM_RANK = 5 # 这个数表示用每个浓度的前几个来归0
@@ -90,8 +91,9 @@ def convert_data_single_cycle(
         return [None, None, None, None, None, None]
     if not isinstance(file_path, Path): file_path = Path(file_path)
     try:
-        sheet_data = pd.read_excel(file_path,sheet_name="信号").dropna()
-        sheet_info = pd.read_excel(file_path,sheet_name="测试信息")
+        sheets = read_excel_cached(file_path, sheet_name=["信号", "测试信息"])
+        sheet_data = sheets["信号"].dropna()
+        sheet_info = sheets["测试信息"]
         data_np = sheet_data.to_numpy()
         concs_np = sheet_info["浓度"].to_numpy()
     except:
@@ -129,7 +131,9 @@ def single_cycle_init(
     Data,
     time0,
     init_params,
-    options: FittingOptions
+    options: FittingOptions,
+    start: int = 0,
+    n_starts: int = 1
 ):
 
     Y_data, A_data, T_data, R_guess = Data
@@ -141,8 +145,13 @@ def single_cycle_init(
     cons = ({'type': 'ineq', 'fun': lambda p: p[2] - p[1] - KD_bound})
     
     eps = options.get_eps()
+    # 取消令牌/进度通道：每次求值/迭代检查取消，上报起点序号/迭代次数/最优损失
+    objective, callback = loss_punished, None
+    control = options.get_control()
+    if control is not None:
+        objective, callback = control.track(loss_punished, start, n_starts)
     result = scipy.optimize.minimize(
-        loss_punished,
+        objective,
         initial_guess,
         args=(
             A_data,
@@ -153,7 +162,8 @@ def single_cycle_init(
             Y_data[0,:]/R_guess), # 归一化
         method='SLSQP',
         constraints=cons, 
-        options={'eps': eps}
+        options={'eps': eps},
+        callback=callback
         ) # Y_data归一化
     
     R_opt_array = result.x[:-2]
@@ -188,11 +198,12 @@ def SingleCycleFitting(
     Data = [Y_data, A_data, T_data, R_guess]
     
     init_params_list = options.get_init_params_list()
+    n_starts = len(init_params_list) + 1
         
-    Results = single_cycle_init(Data, time0, [1.0,4,0], options)
+    Results = single_cycle_init(Data, time0, [1.0,4,0], options, start=0, n_starts=n_starts)
     last_min_loss = np.sum(Results["Loss"])
-    for init_params in init_params_list:
-        current_result =  single_cycle_init(Data, time0, init_params, options)
+    for start, init_params in enumerate(init_params_list, 1):
+        current_result =  single_cycle_init(Data, time0, init_params, options, start, n_starts)
         if last_min_loss > np.sum(current_result["Loss"]):
             Results = current_result
             last_min_loss = np.sum(current_result["Loss"])
@@ -1,6 +1,7 @@
 # __init__.py
 
 from XlementFitting.FittingOptions import FittingOptions
+from XlementFitting.FitBudget import FitBudget
 from XlementFitting.FunctionalBivariate12 import PartialBivariate
 from XlementFitting.FunctionalBivariate11 import LocalBivariate, GlobalBivariate
 from XlementFitting.ModelandLoss import model_all_in_one
@@ -12,6 +13,7 @@ from XlementFitting.FileProcess.XlementDataFrame import XlementDataFrame
 from XlementFitting.XlementFittingFunction import XlementFittingFunction
 __all__ = [
     "FittingOptions",
+    "FitBudget",
     "LocalBivariate",
     "GlobalBivariate",
     "PartialBivariate",
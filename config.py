@@ -12,6 +12,9 @@ BASE_DIR = Path(__file__).resolve().parent
 DATA_DIR = BASE_DIR / "data"
 TEST_DATA_DIR = BASE_DIR / "tests" / "test_data"
 
+# 批量拟合检查点（可续跑）
+BATCH_CHECKPOINT_DIR = BASE_DIR / "batch_runs"
+
 # 日志配置
 LOG_DIR = BASE_DIR / "logs"
 LOG_LEVEL = "INFO"
@@ -30,3 +33,25 @@ FILE_FILTERS = "JSON Files (*.json);;Excel Files (*.xlsx);;All Files (*)"
 # XlementFitting配置
 XLEMENT_FITTING_PATH = BASE_DIR / "XlementFitting"
 
+# 单次拟合预算（每个方法）：目标函数求值次数 / 耗时(秒) / 起点数，None不限；
+# 用尽时返回目前最优的参数并标记 budget_limited，病态曲线不会拖住整个批量
+FIT_BUDGETS = {
+    'LocalBivariate': {'max_evaluations': 20000, 'max_seconds': 120, 'max_starts': None},
+    'GlobalBivariate': {'max_evaluations': 50000, 'max_seconds': 300, 'max_starts': None},
+    'PartialBivariate': {'max_evaluations': 50000, 'max_seconds': 300, 'max_starts': None},
+}
+_FIT_MAX_SECONDS = float(os.environ.get("SPR_FIT_MAX_SECONDS", "0"))  # 覆盖所有方法的耗时上限
+if _FIT_MAX_SECONDS > 0:
+    for _budget in FIT_BUDGETS.values():
+        _budget['max_seconds'] = _FIT_MAX_SECONDS
+
+# 后台任务进程池
+JOB_MAX_WORKERS = int(os.environ.get("SPR_MAX_WORKERS", "0")) or None  # None: CPU核数
+JOB_WORKER_MAX_TASKS = int(os.environ.get("SPR_WORKER_MAX_TASKS", "100"))  # 每个工作进程执行N个任务后重启（0不重启）
+JOB_NATIVE_THREADS = int(os.environ.get("SPR_NATIVE_THREADS", "0")) or None  # 每个工作进程的BLAS/OpenMP线程数，None: CPU核数 // 进程数
+
+# 远程工作进程（见 src/utils/remote_workers.py），例如 SPR_REMOTE_WORKERS="lab-pc1:7810,lab-pc2:7810"
+REMOTE_WORKERS = [a.strip() for a in os.environ.get("SPR_REMOTE_WORKERS", "").split(",") if a.strip()]
+REMOTE_WORKER_PORT = 7810
+# 实验室内共享的密钥：没有默认值，未设置时不启动工作进程、不连接远程工作站（消息是pickle，密钥即执行权限）
+REMOTE_WORKER_AUTHKEY = os.environ.get("SPR_WORKER_AUTHKEY") or None
@@ -30,7 +30,9 @@ matplotlib.rcParams['font.family'] = 'sans-serif'
 # 日志打印 记录错误
 # 创建一个用于记录警告的函数
 
-def model_runner(filename):
+# control: 取消令牌/进度通道（src/utils/job_control.JobControl），None时不检查
+# budget: 拟合预算（XlementFitting.FitBudget），用尽时使用目前最优的参数并在返回值中标记 budget_limited；None时不限
+def model_runner(filename, control=None, budget=None):
     filename= filename
     def log_warning(message, category, filename, lineno, file=None, line=None):
         now = datetime.now()
@@ -138,8 +140,15 @@ def model_runner(filename):
     #链家 执行优化
     # 设置范围 R, ka, kd = params
     bnds = ((0,np.inf),(0,np.inf),(-np.inf,np.inf))
-    result = minimize(Loss_local_in_one, initial_guess, args=(A_data, T_data, Y_data, time_break),
-                      method='BFGS',options={'eps': 1e-3})
+    objective, callback = Loss_local_in_one, None
+    if control is not None:
+        # 每次求值/迭代检查取消，上报迭代次数与最优损失
+        objective, callback = control.track(Loss_local_in_one)
+    run_minimize = budget.minimize if budget is not None else minimize
+    result = run_minimize(objective, initial_guess, args=(A_data, T_data, Y_data, time_break),
+                          method='BFGS',options={'eps': 1e-3}, callback=callback)
+    if budget is not None and budget.limited:
+        print(f"[model_runner] {budget}，使用目前最优的参数")
 
     # 最优参数
     R_opt, ka_opt, kd_opt = result.x
@@ -157,6 +166,7 @@ def model_runner(filename):
         'T_data': T_data,
         'Y_data': Y_data,
         'Y_pred': Y_pred,
+        'budget_limited': bool(getattr(result, 'budget_limited', False)),
         'parameters': {
             'Rmax': R_opt,
             'kon': ka_opt_p,
@@ -5,69 +5,16 @@
 从旧版本迁移：spr_controller_main.py
 协调MainWindowFull、所有Model和业务逻辑
 """
-from PySide6.QtCore import QObject, Slot, QRunnable, Signal, QThreadPool, QTimer
+from PySide6.QtCore import QObject, Signal, Slot, QTimer
 from typing import Optional
 from datetime import datetime
+import copy
 import pandas as pd
 from src.views import MainWindowFull
 from src.models import SessionManager
 from src.utils import load_file, fit_data
 
 
-# ========== 批量拟合任务类 ==========
-
-class FitTaskSignals(QObject):
-    """拟合任务信号"""
-    finished = Signal(dict)  # 拟合成功，参数：result_dict
-    error = Signal(str)      # 拟合失败，参数：error_message
-
-
-class FitTask(QRunnable):
-    """
-    单个拟合任务（可在线程池中执行）
-    
-    设计要点：
-    - 只传递可pickle的数据（numpy数组）
-    - 不直接访问Qt对象
-    - 通过信号返回结果
-    """
-    
-    def __init__(self, data_id: int, data_name: str, x_data, y_data, method: str):
-        super().__init__()
-        self.data_id = data_id
-        self.data_name = data_name
-        self.x_data = x_data
-        self.y_data = y_data
-        self.method = method
-        self.signals = FitTaskSignals()
-    
-    def run(self):
-        """执行拟合（在后台线程中）"""
-        print(f"[FitTask] 开始拟合: {self.data_name} (ID={self.data_id})")
-        try:
-            # 调用拟合函数
-            result = fit_data(self.method, self.x_data, self.y_data)
-            print(f"[FitTask] 拟合完成: {self.data_name}, success={result.get('success')}")
-            
-            # 返回结果
-            result_dict = {
-                'data_id': self.data_id,
-                'method': self.method,
-                'parameters': result.get('parameters', {}),
-                'y_pred': result.get('y_pred'),
-                'metrics': result.get('statistics', {})
-            }
-            
-            print(f"[FitTask] 准备发射finished信号: {self.data_name}")
-            self.signals.finished.emit(result_dict)
-            print(f"[FitTask] finished信号已发射: {self.data_name}")
-            
-        except Exception as e:
-            error_msg = f"{str(e)}"
-            print(f"[FitTask] 拟合失败: {self.data_name}, error={error_msg}")
-            self.signals.error.emit(error_msg)
-
-
 class MainControllerFull(QObject):
     """
     主控制器 - 完整功能版
@@ -79,6 +26,9 @@ class MainControllerFull(QObject):
         4. 更新UI显示
     """
     
+    # 工作线程回调 → GUI线程 的内部中转信号
+    _thread_report_ready = Signal(object)
+    
     def __init__(self, view: MainWindowFull, parent=None):
         super().__init__(parent)
         
@@ -98,7 +48,13 @@ class MainControllerFull(QObject):
         # ⭐ 数据血缘和撤回/重做
         from src.models import ProvenanceManager, CommandManager
         self.provenance_manager = ProvenanceManager()
-        self.command_manager = CommandManager(self.provenance_manager, max_history=50)
+        self.command_manager = CommandManager(self.provenance_manager, max_history=50,
+                                              journal=self.session_manager.journal_command)
+        
+        # ⭐ 数据变化后沿链接增量重新计算下游结果/图表
+        from src.models import RecomputeEngine
+        self.recompute_engine = RecomputeEngine(self.data_manager, self.result_manager, self.figure_manager,
+                                                self.link_manager, parent=self)
         
         # 当前选中的ID
         self.current_data_id: Optional[int] = None
@@ -106,9 +62,22 @@ class MainControllerFull(QObject):
         self.current_result_id: Optional[int] = None
         # 控制：在批量创建图形时抑制自动树节点添加，避免重复顶级项
         self._suppress_figure_added_hook: bool = False
+        # 多文件并发导入状态
+        self._bulk_importer = None
+        self._bulk_progress_dialog = None
+        self._bulk_entries: list = []
+        self._bulk_errors: dict = {}
+        self._bulk_last_df = None
+        # 批量拟合状态
+        self._batch_fitter = None
+        self._batch_sources: dict = {}  # data_id -> (名称, 提交时的DataFrame版本号)
+        self._batch_checkpoint = None  # 当前批量拟合的 BatchCheckpoint
+        self._batch_keys: dict = {}  # data_id -> 检查点项的键
+        self._remote_workers = None  # WorkerCoordinator；False 表示未配置远程工作站
         
         # 连接信号
         self._connect_signals()
+        self._thread_report_ready.connect(self._show_thread_diagnostics)
         
         # 初始化
         self._initialize()
@@ -122,6 +91,8 @@ class MainControllerFull(QObject):
         """连接信号槽"""
         # View -> Controller
         self.view.file_selected.connect(self.on_file_selected)
+        if hasattr(self.view, 'files_selected'):
+            self.view.files_selected.connect(self.on_files_selected)
         self.view.data_item_selected.connect(self.on_data_selected)
         self.view.figure_item_selected.connect(self.on_figure_selected)
         self.view.result_item_selected.connect(self.on_result_selected)
@@ -157,6 +128,12 @@ class MainControllerFull(QObject):
         self.link_manager.link_created.connect(self.on_link_created)
         self.link_manager.link_removed.connect(self.on_link_removed)
         
+        # 增量重新计算 -> Controller
+        self.recompute_engine.result_recomputed.connect(self.on_result_recomputed)
+        self.recompute_engine.figure_refreshed.connect(self.on_figure_refreshed)
+        self.recompute_engine.recompute_failed.connect(self.on_recompute_failed)
+        self.recompute_engine.recompute_finished.connect(self.on_recompute_finished)
+        
         # ✨ SessionManager -> Controller（新增）
         self.session_manager.session_modified.connect(self.on_session_modified)
         self.session_manager.session_saved.connect(self.on_session_saved)
@@ -187,6 +164,8 @@ class MainControllerFull(QObject):
         self.view.clear_action.triggered.connect(self.on_clear_all)
         # self.view.export_graph_action 已移除（UI优化）
         self.view.test_guide_action.triggered.connect(self.on_show_test_guide)
+        if hasattr(self.view, 'thread_diag_action'):
+            self.view.thread_diag_action.triggered.connect(self.on_show_thread_diagnostics)
         if hasattr(self.view, 'auto_save_toggle_action'):
             self.view.auto_save_toggle_action.setChecked(self.session_manager.auto_save_enabled)
             self.view.auto_save_toggle_action.triggered.connect(self._on_toggle_auto_save)
@@ -333,11 +312,8 @@ class MainControllerFull(QObject):
                         )
                 
                 cmd = PostImportCommand(file_path, new_data_ids, new_figure_ids, self)
-                # 手动添加到历史栈
-                self.command_manager._undo_stack.append(cmd)
-                self.command_manager._redo_stack.clear()
-                # 记录血缘
-                self.command_manager._provenance.record_operation(cmd.to_operation_log())
+                # 已完成的导入：加入历史栈并记录血缘/命令日志
+                self.command_manager.record(cmd)
     
     def _do_import_file(self, file_path: str) -> bool:
         """执行实际的文件导入逻辑（保留原有代码）"""
@@ -470,44 +446,192 @@ class MainControllerFull(QObject):
                 self.view.update_status("加载失败")
                 return False
             
-            # ========= 宽表Excel：创建父+子节点结构（不保留单独总节点） =========
-            try:
-                import pandas as pd
-                cols = list(df.columns)
-                is_wide = ('Time' in cols and len(cols) >= 2)
-                display_name = os.path.splitext(file_name)[0]
-                if is_wide:
-                    # 将子列信息写入attrs，交给on_data_added统一创建父/子节点，避免重复
-                    df.attrs['wide_parent_children_cols'] = [str(c) for c in cols[1:]]
-                    df.attrs['wide_parent_base_name'] = display_name
-                    parent_id = self.data_manager.add_data(f"{display_name} (宽表)", df)
-                    self.link_manager.create_link('file', file_path, 'data', parent_id, link_type='import', metadata={'file_name': file_name})
-                    project = self.project_manager.get_current_project()
-                    if project:
-                        project.add_data(parent_id)
-                    # 显示父表
-                    self.view.data_table.load_data(df)
-                    self.view.update_status(f"已加载: {display_name} (宽表)")
-                    print(f"[Controller] Excel宽表导入完成，父节点已创建: parent={parent_id}（子节点由on_data_added负责）")
-                    return True
-            except Exception as e:
-                print(f"[Controller] 宽表Excel节点构建失败，退回单节点: {e}")
-
-            # ========= 退回单节点导入 =========
+            self._add_imported_frame(file_path, df)
+            return True
+    
+    def _add_imported_frame(self, file_path: str, df: pd.DataFrame,
+                            export_path: Optional[str] = None, show: bool = True):
+        """
+        把已解析的DataFrame注册为数据节点
+        
+        - 宽表（Time+多列）或JSON：创建父节点，子节点由on_data_added生成
+        - 其他：单节点
+        
+        参数:
+            export_path: JSON导出的宽表Excel路径（有则记录json_to_excel链接）
+            show: 是否在表格中显示（批量导入时只显示最后一个）
+        返回:
+            (新增data_ids, 新增figure_ids)，包含on_data_added生成的子节点与总图
+        """
+        import os
+        before_data = set(self.data_manager._data_dict.keys())
+        before_figures = set(self.figure_manager._figures.keys())
+        
+        file_name = os.path.basename(file_path)
+        base_name = os.path.splitext(file_name)[0]
+        if export_path:
+            link_type = 'json_to_excel'
+            metadata = {'generated_excel_path': export_path, 'note': 'JSON解析生成的宽表Excel'}
+        else:
+            link_type = 'import'
+            metadata = {'file_name': file_name}
+        
+        cols = list(df.columns)
+        is_json = os.path.splitext(file_path)[1].lower() == '.json'
+        is_wide = is_json or ('Time' in cols and len(cols) >= 2)
+        if is_wide:
+            # 将子列信息写入attrs，交给on_data_added统一创建父/子节点，避免重复
+            df.attrs['wide_parent_children_cols'] = [str(c) for c in cols[1:]]
+            df.attrs['wide_parent_base_name'] = base_name
+            display_name = f"{base_name} (宽表)"
+        else:
             display_name = file_name
-            if hasattr(df, 'attrs') and 'sample_name' in df.attrs:
-                sample_name = df.attrs['sample_name']
-                if sample_name:
-                    display_name = sample_name
-            data_id = self.data_manager.add_data(display_name, df)
-            self.link_manager.create_link('file', file_path, 'data', data_id, link_type='import', metadata={'file_name': file_name})
-            project = self.project_manager.get_current_project()
-            if project:
-                project.add_data(data_id)
+            sample_name = df.attrs.get('sample_name') if hasattr(df, 'attrs') else None
+            if sample_name:
+                display_name = sample_name
+        
+        data_id = self.data_manager.add_data(display_name, df)
+        self.link_manager.create_link('file', file_path, 'data', data_id, link_type=link_type, metadata=metadata)
+        project = self.project_manager.get_current_project()
+        if project:
+            project.add_data(data_id)
+        if show:
             self.view.data_table.load_data(df)
             self.view.update_status(f"已加载: {display_name}")
-            print(f"[Controller] 文件导入完成，已创建链接: file:{file_path} → data:{data_id}")
-            return True
+        print(f"[Controller] 文件导入完成，已创建链接: file:{file_path} → data:{data_id}")
+        
+        new_data_ids = [i for i in self.data_manager._data_dict.keys() if i not in before_data]
+        new_figure_ids = [i for i in self.figure_manager._figures.keys() if i not in before_figures]
+        return new_data_ids, new_figure_ids
+    
+    # ========== 多文件并发导入 ==========
+    
+    @Slot(list)
+    def on_files_selected(self, paths: list):
+        """
+        多文件/文件夹导入：后台进程池并发解析，解析完成一个就在GUI线程注册一个，
+        全部结束后作为一个可撤销命令记录
+        """
+        from src.utils.bulk_import import BulkImporter, collect_import_files
+        
+        files = collect_import_files(paths)
+        if not files:
+            self.view.update_status("未找到可导入的数据文件")
+            return
+        if len(files) == 1:
+            self.on_file_selected(files[0])
+            return
+        if self._bulk_importer is not None and self._bulk_importer.is_running:
+            self.view.show_error("正在导入", "上一批文件尚未导入完成，请稍候")
+            return
+        
+        from PySide6.QtWidgets import QProgressDialog
+        from PySide6.QtCore import Qt
+        
+        self._bulk_entries = []
+        self._bulk_errors = {}
+        self._bulk_last_df = None
+        
+        dialog = QProgressDialog("正在解析文件...", "取消", 0, len(files), self.view)
+        dialog.setWindowTitle("批量导入")
+        dialog.setWindowModality(Qt.WindowModal)
+        dialog.setMinimumDuration(0)
+        dialog.setAutoClose(False)
+        dialog.setAutoReset(False)
+        self._bulk_progress_dialog = dialog
+        
+        importer = BulkImporter(parent=self)
+        importer.file_loaded.connect(self._on_bulk_file_loaded)
+        importer.file_failed.connect(self._on_bulk_file_failed)
+        importer.progress.connect(self._on_bulk_progress)
+        importer.finished.connect(self._on_bulk_import_finished)
+        dialog.canceled.connect(importer.cancel)
+        self._bulk_importer = importer
+        
+        self.view.update_status(f"正在并发导入 {len(files)} 个文件...")
+        importer.start(files)
+    
+    def _on_bulk_file_loaded(self, file_path: str, result: dict):
+        """单个文件解析完成（GUI线程）：立即注册"""
+        import os
+        df = result.get('dataframe')
+        try:
+            # 保存注册前副本：注册过程会修改attrs，重做时需要原始状态
+            pristine = df.copy()
+            pristine.attrs = copy.deepcopy(df.attrs)
+            data_ids, figure_ids = self._add_imported_frame(
+                file_path, df, result.get('export_path'), show=False)
+        except Exception as e:
+            self._on_bulk_file_failed(file_path, f"注册失败: {e}")
+            return
+        self._bulk_entries.append({
+            'file_path': file_path,
+            'dataframe': pristine,
+            'export_path': result.get('export_path'),
+            'data_ids': data_ids,
+            'figure_ids': figure_ids,
+        })
+        self._bulk_last_df = df
+        dialog = self._bulk_progress_dialog
+        if dialog is not None:
+            dialog.setLabelText(f"已导入: {os.path.basename(file_path)}")
+    
+    def _on_bulk_file_failed(self, file_path: str, error: str):
+        """单个文件失败：记录，结束时统一提示"""
+        import os
+        self._bulk_errors[file_path] = error
+        self.view.update_status(f"导入失败: {os.path.basename(file_path)} - {error}")
+    
+    def _on_bulk_progress(self, done: int, total: int):
+        dialog = self._bulk_progress_dialog
+        if dialog is not None:
+            dialog.setMaximum(total)
+            dialog.setValue(done)
+    
+    def _on_bulk_import_finished(self, loaded: list, failed: dict):
+        """全部结束：记录为一个可撤销命令，并汇总错误"""
+        import os
+        from src.models import BulkImportCommand
+        
+        dialog = self._bulk_progress_dialog
+        if dialog is not None:
+            dialog.close()
+            self._bulk_progress_dialog = None
+        
+        entries = self._bulk_entries
+        self._bulk_entries = []
+        if entries:
+            cmd = BulkImportCommand(entries, self._reregister_imported_frame,
+                                    self.data_manager, self.figure_manager, self.project_manager)
+            self.command_manager.record(cmd)
+        if self._bulk_last_df is not None:
+            self.view.data_table.load_data(self._bulk_last_df)
+            self._bulk_last_df = None
+        
+        # 注册阶段的失败也计入
+        errors = dict(failed)
+        errors.update(self._bulk_errors)
+        self._bulk_errors = {}
+        failed_files = {p: e for p, e in errors.items() if e != "已取消"}
+        cancelled = len(errors) - len(failed_files)
+        
+        summary = f"批量导入完成: 成功 {len(entries)} 个"
+        if failed_files:
+            summary += f"，失败 {len(failed_files)} 个"
+        if cancelled:
+            summary += f"，取消 {cancelled} 个"
+        self.view.update_status(summary)
+        print(f"[Controller] {summary}")
+        
+        if failed_files:
+            lines = [f"{os.path.basename(p)}: {e}" for p, e in list(failed_files.items())[:20]]
+            if len(failed_files) > 20:
+                lines.append(f"... 另有 {len(failed_files) - 20} 个文件失败")
+            self.view.show_error("部分文件导入失败", "\n".join(lines))
+    
+    def _reregister_imported_frame(self, file_path: str, df: pd.DataFrame, export_path: Optional[str] = None):
+        """重做批量导入时使用：注册但不刷新表格"""
+        return self._add_imported_frame(file_path, df, export_path, show=False)
     
     @Slot(str, str)
     def on_new_item_created(self, item_type: str, item_name: str):
@@ -1232,6 +1356,33 @@ class MainControllerFull(QObject):
             import traceback
             traceback.print_exc()
     
+    # ========== 增量重新计算槽函数 ==========
+    
+    @Slot(int)
+    def on_result_recomputed(self, result_id: int):
+        """依赖数据变化后结果已重新计算"""
+        if result_id == self.current_result_id:
+            result = self.result_manager.get_result(result_id)
+            if result:
+                self.view.show_result(result.parameters)
+        self.session_manager.mark_modified()
+    
+    @Slot(int)
+    def on_figure_refreshed(self, figure_id: int):
+        """图表的上游已全部更新，当前显示的图表重新绘制"""
+        if figure_id == self.current_figure_id:
+            self.on_figure_selected(figure_id)
+    
+    @Slot(int, str)
+    def on_recompute_failed(self, result_id: int, error: str):
+        self.view.update_status(f"结果#{result_id} 自动重新计算失败: {error}")
+    
+    @Slot()
+    def on_recompute_finished(self):
+        stats = self.recompute_engine.stats
+        self.view.update_status(f"依赖更新完成：重新拟合 {stats['refit']}，复用 {stats['reused']}，"
+                                f"输入未变 {stats['unchanged']}")
+    
     # ========== 链接管理槽函数 ==========
     
     @Slot(str, object, str, object)
@@ -1274,6 +1425,7 @@ class MainControllerFull(QObject):
     def on_session_loaded(self, file_path: str):
         """会话加载成功时的处理"""
         import os
+        self.recompute_engine.reset()
         file_name = os.path.basename(file_path)
         self.view.update_status(f"已加载: {file_name}")
         self.view.setWindowTitle(f"SPR Data Analyst - {file_name}")
@@ -1670,15 +1822,18 @@ class MainControllerFull(QObject):
 
     def _on_menu_import_data(self):
         from PySide6.QtWidgets import QFileDialog
-        file_path, _ = QFileDialog.getOpenFileName(
+        file_paths, _ = QFileDialog.getOpenFileNames(
             self.view,
             "导入数据文件",
             "",
             "数据文件 (*.json *.csv *.xlsx *.xls);;JSON (*.json);;CSV (*.csv);;Excel (*.xlsx *.xls);;所有文件 (*.*)"
         )
-        if file_path:
+        if len(file_paths) == 1:
             # 复用现有加载文件流程
-            self.on_file_selected(file_path)
+            self.on_file_selected(file_paths[0])
+        elif file_paths:
+            # 多个文件：后台并发导入
+            self.on_files_selected(file_paths)
 
     def _on_menu_save(self):
         from PySide6.QtWidgets import QFileDialog
@@ -1723,6 +1878,7 @@ class MainControllerFull(QObject):
                 return
         # 新建会话并清空UI
         self.session_manager.new_session("新会话")
+        self.recompute_engine.reset()
         if hasattr(self.view, 'project_tree') and hasattr(self.view.project_tree, 'clear_all'):
             self.view.project_tree.clear_all()
         self.view.update_status("已新建会话")
@@ -1786,6 +1942,7 @@ class MainControllerFull(QObject):
             pass
         
         self.session_manager.new_session("新会话")
+        self.recompute_engine.reset()
         self.view.setWindowTitle("SPR Data Analyst - 新会话")
         self.view.update_status("新建会话")
         # TODO: 清空UI显示
@@ -2122,6 +2279,10 @@ class MainControllerFull(QObject):
         
         print(f"[Controller] 批量拟合请求: {len(data_ids)}个数据")
         
+        # 上次未完成的批量拟合：可以续跑
+        if self._offer_batch_resume():
+            return
+        
         # 准备数据列表（过滤掉无效数据）
         # 格式：(data_id, data_name, point_count, is_fittable, reason)
         data_list = []
@@ -2149,10 +2310,13 @@ class MainControllerFull(QObject):
         available_methods = ['LocalBivariate', 'GlobalBivariate']
         
         # 创建批量拟合对话框
+        from src.utils.job_manager import JobManager
+        jm = JobManager.instance()
         dialog = BatchFittingDialog(
             data_list=data_list,
             available_methods=available_methods,
-            parent=self.view
+            parent=self.view,
+            default_workers=jm.max_workers
         )
         
         # 连接开始拟合信号
@@ -2161,55 +2325,205 @@ class MainControllerFull(QObject):
             self._start_batch_fitting(dialog, selected_ids, method, num_threads)
         )
         
+        # 对话框打开时预先启动工作进程（导入拟合模块需要数秒）
+        jm.prewarm()
+        
+        dialog.exec()
+    
+    def _offer_batch_resume(self) -> bool:
+        """
+        发现上次未完成的批量拟合（崩溃/断电/取消后留下的检查点）时询问是否续跑
+        
+        返回:
+            是否已开始续跑
+        """
+        from PySide6.QtWidgets import QMessageBox
+        from src.utils.batch_checkpoint import BatchCheckpoint, default_checkpoint_root
+        
+        for checkpoint in BatchCheckpoint.find_unfinished(default_checkpoint_root()):
+            reply = QMessageBox.question(
+                self.view,
+                "继续批量拟合",
+                f"发现未完成的批量拟合：\n{checkpoint.describe()}\n\n"
+                f"是否继续？只重新拟合未完成的数据。\n（选择“放弃”将删除该记录）",
+                QMessageBox.Yes | QMessageBox.No | QMessageBox.Discard,
+                QMessageBox.Yes
+            )
+            if reply == QMessageBox.Yes:
+                self._resume_batch_fitting(checkpoint)
+                return True
+            if reply == QMessageBox.Discard:
+                checkpoint.discard()
+        return False
+    
+    def _resume_batch_fitting(self, checkpoint):
+        """续跑检查点中的批量拟合：按名称找回数据，已完成的直接提交，未完成的重新拟合"""
+        from src.views.dialogs import BatchFittingDialog
+        from src.models.recompute_engine import input_digest
+        from src.utils.batch_checkpoint import PENDING, DONE
+        from src.utils.job_manager import JobManager
+        
+        by_name = {}
+        for data_id, data in self.data_manager.get_all_data().items():
+            by_name.setdefault(data.name, data_id)
+        
+        bindings = {}  # 检查点项的键 -> data_id
+        missing = []
+        for key in checkpoint.keys_in(PENDING, DONE):
+            item = checkpoint.items[key]
+            data_id = by_name.get(item['name'])
+            if data_id is None:
+                missing.append(item['name'])
+                continue
+            digest = input_digest(checkpoint.method, self.data_manager.get_data(data_id))
+            if digest != item['digest']:
+                # 源数据已变化：作废已完成的结果，按当前数据重新拟合
+                checkpoint.reset(key, digest=digest)
+            bindings[key] = data_id
+        
+        if not bindings:
+            checkpoint.close()
+            self.view.show_error("继续批量拟合", "当前会话中找不到该批量拟合的数据，请先打开对应的会话")
+            return
+        
+        jm = JobManager.instance()
+        data_list = []
+        for data_id in bindings.values():
+            data = self.data_manager.get_data(data_id)
+            data_list.append((data_id, data.name, len(data.dataframe), True, ""))
+        dialog = BatchFittingDialog(
+            data_list=data_list,
+            available_methods=[checkpoint.method],
+            parent=self.view,
+            default_workers=jm.max_workers
+        )
+        dialog.mark_started(list(bindings.values()))
+        dialog.append_log(f"继续批量拟合 - {checkpoint.describe()}")
+        for name in missing:
+            dialog.append_log(f"⚠️ {name}: 当前会话中没有该数据，保留在检查点中")
+        
+        jm.prewarm()
+        QTimer.singleShot(0, lambda: self._run_batch(dialog, checkpoint.method, bindings, jm.max_workers, checkpoint))
         dialog.exec()
     
     def _start_batch_fitting(self, dialog, data_ids: list, method: str, num_threads: int):
         """
-        开始批量拟合（多线程）
+        开始批量拟合（JobManager 进程池，见 BatchFitter），任务清单与结果写入检查点
         """
-        from functools import partial
+        from src.models.recompute_engine import input_digest
+        from src.utils.batch_checkpoint import BatchCheckpoint, default_checkpoint_root
+        
+        print(f"[Controller] 开始批量拟合: {len(data_ids)}个数据, 方法={method}, 进程数={num_threads}")
+        
+        entries = []
+        for data_id in data_ids:
+            data = self.data_manager.get_data(data_id)
+            if data:
+                entries.append((data_id, data.name, input_digest(method, data)))
+        bindings = {str(i): data_id for i, (data_id, _, _) in enumerate(entries)}
+        try:
+            checkpoint = BatchCheckpoint.create(default_checkpoint_root(), method, entries)
+        except OSError as e:
+            checkpoint = None
+            dialog.append_log(f"⚠️ 无法创建检查点（本次批量拟合不可续跑）: {e}")
+        self._run_batch(dialog, method, bindings, num_threads, checkpoint)
+    
+    def _run_batch(self, dialog, method: str, bindings: dict, num_workers: int, checkpoint=None):
+        """
+        执行批量拟合
         
-        print(f"[Controller] 开始批量拟合: {len(data_ids)}个数据, 方法={method}, 线程数={num_threads}")
+        参数:
+            bindings: 检查点项的键 -> data_id
+            checkpoint: BatchCheckpoint；其中已完成的项直接提交，不再拟合
+        """
+        from functools import partial
+        from src.utils.batch_fit import BatchFitter
+        from src.utils.batch_checkpoint import DONE
+        from src.utils.job_manager import JobManager
         
         # 初始化进度跟踪
         self._batch_results = {
-            'total': len(data_ids),
+            'total': len(bindings),
             'completed': 0,
             'success': 0,
             'failed': 0
         }
-        
-        # 创建线程池
-        thread_pool = QThreadPool.globalInstance()
-        thread_pool.setMaxThreadCount(num_threads)
-        
-        # 为每个数据创建任务
-        for data_id in data_ids:
+        self._batch_checkpoint = checkpoint
+        self._batch_keys = {data_id: key for key, data_id in bindings.items()}
+        
+        # 配置了实验室工作站且有已连接的工作进程时分发到远程，否则使用本机进程池
+        coordinator = self._remote_coordinator()
+        if coordinator is not None:
+            if coordinator.wait_connected(1, timeout=2.0):
+                connected = sum(w['connected'] for w in coordinator.workers())
+                dialog.append_log(f"🖧 使用远程工作进程: {connected}/{len(coordinator.workers())} 个已连接")
+            else:
+                dialog.append_log("⚠️ 远程工作进程均未连接，使用本机进程池")
+                coordinator = None
+        if coordinator is None:
+            # 对话框中的并行数即进程池进程数
+            jm = JobManager.instance()
+            if jm.max_workers != num_workers:
+                jm.set_max_workers(num_workers)
+            dialog.append_log(f"🧵 每个进程的BLAS/OpenMP线程数: {jm.native_threads}")
+        
+        # 在GUI线程取好拟合输入（与单次拟合相同：x/y + 完整DataFrame），记录提交时的数据版本
+        items = []
+        self._batch_sources = {}
+        done_keys = set(checkpoint.keys_in(DONE)) if checkpoint is not None else set()
+        for key, data_id in bindings.items():
             data = self.data_manager.get_data(data_id)
             if not data:
+                self._batch_results['total'] -= 1
                 continue
-            
+            self._batch_sources[data_id] = (data.name, data.get_dataframe_version())
+            if key in done_keys:
+                try:
+                    fit_result = checkpoint.load_result(key)
+                except Exception as e:
+                    print(f"[Controller] 读取检查点结果失败，重新拟合: {data.name}: {e}")
+                    checkpoint.reset(key)
+                else:
+                    dialog.append_log(f"♻️ {data.name}: 使用检查点中的拟合结果")
+                    self._on_batch_fit_done(dialog, method, data_id, fit_result)
+                    continue
             try:
-                # 获取数据
                 x_data, y_data = data.get_xy_data(auto_sort=False)
-                
-                # 创建任务
-                task = FitTask(data_id, data.name, x_data, y_data, method)
-                
-                # ⭐ 使用partial避免lambda闭包问题
-                task.signals.finished.connect(
-                    partial(self._on_single_fit_done, dialog, data_id, data.name, True)
-                )
-                task.signals.error.connect(
-                    partial(self._on_single_fit_done, dialog, data_id, data.name, False)
-                )
-                
-                # 启动任务
-                thread_pool.start(task)
-                dialog.append_log(f"⏳ {data.name}: 已加入队列...")
-                
             except Exception as e:
+                if checkpoint is not None:
+                    checkpoint.record_failure(key, str(e))
                 self._on_single_fit_done(dialog, data_id, data.name, False, str(e))
+                continue
+            items.append((data_id, method, x_data, y_data, data.dataframe))
+        
+        fitter = BatchFitter(parent=self, coordinator=coordinator)
+        fitter.fit_done.connect(partial(self._on_batch_fit_done, dialog, method))
+        fitter.fit_failed.connect(partial(self._on_batch_fit_failed, dialog))
+        # 对话框关闭时取消未完成的任务（已完成的结果保留在检查点中）
+        dialog.rejected.connect(fitter.cancel)
+        self._batch_fitter = fitter
+        fitter.start(items, checkpoint=checkpoint, keys=self._batch_keys)
+        for item in items:
+            dialog.append_log(f"⏳ {self._batch_sources[item[0]][0]}: 已加入队列...")
+    
+    def _remote_coordinator(self):
+        """按 config.REMOTE_WORKERS 连接实验室工作站（首次调用时创建；未配置时返回None）"""
+        if self._remote_workers is None:
+            from src.utils.remote_workers import coordinator_from_config
+            self._remote_workers = coordinator_from_config() or False
+        return self._remote_workers or None
+    
+    def _on_batch_fit_done(self, dialog, method: str, data_id: int, fit_result: dict):
+        """BatchFitter 返回拟合结果（GUI线程）"""
+        name = self._batch_sources.get(data_id, (f"Data#{data_id}", None))[0]
+        if fit_result and fit_result.get('success'):
+            self._on_single_fit_done(dialog, data_id, name, True, dict(fit_result, method=method))
+        else:
+            self._on_single_fit_done(dialog, data_id, name, False, (fit_result or {}).get('error', '拟合失败'))
+    
+    def _on_batch_fit_failed(self, dialog, data_id: int, error: str):
+        name = self._batch_sources.get(data_id, (f"Data#{data_id}", None))[0]
+        self._on_single_fit_done(dialog, data_id, name, False, error)
     
     def _on_single_fit_done(self, dialog, data_id: int, data_name: str, success: bool, result_or_error=None):
         """
@@ -2220,7 +2534,7 @@ class MainControllerFull(QObject):
             data_id: 数据ID
             data_name: 数据名称
             success: 是否成功
-            result_or_error: 拟合结果或错误信息
+            result_or_error: fit_data() 的结果（含method）或错误信息
         """
         print(f"[批量拟合回调] 收到完成信号: {data_name} (ID={data_id}), success={success}")
         self._batch_results['completed'] += 1
@@ -2250,7 +2564,7 @@ class MainControllerFull(QObject):
                 if not method:
                     raise ValueError("拟合结果中缺少method字段")
                 
-                # 使用Command来创建所有相关对象
+                # 使用Command来创建所有相关对象（直接采用后台拟合结果，不再重新拟合）
                 from src.models import FitDataCommand
                 cmd = FitDataCommand(
                     data_id=data_id,
@@ -2259,18 +2573,29 @@ class MainControllerFull(QObject):
                     result_manager=self.result_manager,
                     figure_manager=self.figure_manager,
                     link_manager=self.link_manager,
-                    project_manager=self.project_manager
+                    project_manager=self.project_manager,
+                    fit_result=result_or_error,
+                    fit_version=self._batch_sources.get(data_id, (None, None))[1]
                 )
                 
-                # 执行Command（会重新拟合，这是简化版本）
-                if self.command_manager.execute(cmd):
+                import time
+                from src.utils.job_metrics import default_registry
+                commit_started = time.perf_counter()
+                committed = self.command_manager.execute(cmd)
+                # 结果提交到会话（创建结果/曲线/图表）的耗时，显示在任务统计面板
+                default_registry().observe('batch_commit', time.perf_counter() - commit_started)
+                if committed:
                     self._batch_results['success'] += 1
+                    self._update_batch_checkpoint(data_id)
                     # 尝试从后台拟合结果获取统计信息
                     try:
-                        metrics = result_or_error.get('metrics', {})
+                        metrics = result_or_error.get('statistics') or {}
                         r2 = metrics.get('r2') or metrics.get('R²')
                         rmse = metrics.get('rmse') or metrics.get('RMSE')
                         
+                        if result_or_error.get('budget_limited'):
+                            reason = (result_or_error.get('budget') or {}).get('reason')
+                            dialog.append_log(f"⏱ {data_name}: 拟合预算用尽（{reason}），采用目前最优的参数")
                         if r2 is not None:
                             dialog.append_log(f"✅ {data_name}: 拟合成功 (R²={r2:.4f})")
                         elif rmse is not None:
@@ -2282,12 +2607,14 @@ class MainControllerFull(QObject):
                 else:
                     self._batch_results['failed'] += 1
                     error_detail = getattr(cmd, 'error', '未知错误')
+                    self._update_batch_checkpoint(data_id, f"Command执行失败 - {error_detail}")
                     dialog.append_log(f"❌ {data_name}: Command执行失败 - {error_detail}")
             except Exception as e:
                 import traceback
                 self._batch_results['failed'] += 1
                 error_trace = traceback.format_exc()
                 print(f"[批量拟合] 后处理失败详情:\n{error_trace}")
+                self._update_batch_checkpoint(data_id, f"后处理失败 - {e}")
                 dialog.append_log(f"❌ {data_name}: 后处理失败 - {str(e)}")
         else:
             # 拟合失败
@@ -2308,6 +2635,29 @@ class MainControllerFull(QObject):
             dialog.append_log(f"批量拟合完成！")
             dialog.append_log(f"成功: {success_count}/{total}")
             dialog.append_log(f"失败: {self._batch_results['failed']}/{total}")
+            
+            checkpoint = getattr(self, '_batch_checkpoint', None)
+            if checkpoint is not None:
+                if checkpoint.is_finished:
+                    checkpoint.discard()
+                else:
+                    checkpoint.close()
+                    dialog.append_log(f"未完成的数据已保存，下次批量拟合时可继续（{checkpoint.describe()}）")
+                self._batch_checkpoint = None
+    
+    def _update_batch_checkpoint(self, data_id: int, error: Optional[str] = None):
+        """结果已提交（error为None）或提交失败时更新检查点"""
+        checkpoint = getattr(self, '_batch_checkpoint', None)
+        key = getattr(self, '_batch_keys', {}).get(data_id)
+        if checkpoint is None or key is None:
+            return
+        try:
+            if error is None:
+                checkpoint.mark_committed(key)
+            else:
+                checkpoint.record_failure(key, error)
+        except OSError as e:
+            print(f"[Controller] 更新批量拟合检查点失败: {e}")
     
     # ========== 工具菜单槽函数 ==========
     
@@ -2360,11 +2710,42 @@ class MainControllerFull(QObject):
         # 同时输出到控制台
         self.session_manager.print_session_info()
 
+    def on_show_thread_diagnostics(self):
+        """并行计算诊断：进程池进程数与主进程/工作进程的原生库线程配置"""
+        print("[Controller] 并行计算诊断")
+        from src.utils.job_manager import JobManager
+        # 工作进程报告作为后台任务获取（可能需要先启动进程池），完成后回到GUI线程显示
+        JobManager.instance().thread_diagnostics(self._thread_report_ready.emit)
+        self.view.update_status("正在获取工作进程的线程配置...")
+    
+    def _show_thread_diagnostics(self, report: dict):
+        """显示并行计算诊断（GUI线程）"""
+        from src.utils.native_threads import describe
+        self.view.update_status("就绪")
+        lines = ["🧵 并行计算诊断", "=" * 60, ""]
+        lines.append(f"进程池进程数: {report['max_workers']}")
+        lines.append(f"每个工作进程的BLAS/OpenMP线程数: {report['native_threads']}"
+                     f"（{'CPU核数 // 进程数' if report['native_threads_auto'] else '设置指定'}）")
+        lines.append("")
+        lines.append("主进程:")
+        lines.append(describe(report['main']))
+        lines.append("")
+        lines.append("工作进程:")
+        worker = report['worker']
+        lines.append(describe(worker) if isinstance(worker, dict) else f"  无法获取: {worker}")
+        lines.append("")
+        lines.append("=" * 60)
+        
+        text = "\n".join(lines)
+        self.view.show_message("并行计算诊断", text)
+        print(text)
+
     # ========== 关闭前保存提示 ==========
     def try_handle_close(self) -> bool:
         """处理窗口关闭前的未保存提示，返回是否允许关闭"""
         from PySide6.QtWidgets import QMessageBox, QFileDialog
         if not self.session_manager.is_modified:
+            self.session_manager.discard_journal()
             return True
         reply = QMessageBox.question(
             self.view,
@@ -2376,6 +2757,8 @@ class MainControllerFull(QObject):
         if reply == QMessageBox.Cancel:
             return False
         if reply == QMessageBox.Discard:
+            # 放弃修改：下次打开不再从命令日志恢复
+            self.session_manager.discard_journal()
             return True
         # Save
         path = self.session_manager.current_file_path
@@ -2390,6 +2773,8 @@ class MainControllerFull(QObject):
                 return False
             path = file_path
         ok = self.save_session(path)
+        if ok:
+            self.session_manager.discard_journal()
         return bool(ok)
     
     @Slot()
@@ -2457,6 +2842,7 @@ class MainControllerFull(QObject):
         if reply == QMessageBox.Yes:
             # 创建新会话（相当于清空）
             self.session_manager.new_session("新会话")
+            self.recompute_engine.reset()
             
             # 清空UI
             self.view.project_tree.clear_all()
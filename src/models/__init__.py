@@ -11,7 +11,8 @@ from .session_manager import SessionManager
 from .series_model import Series, SeriesManager
 from .provenance import OperationLog, ProvenanceManager
 from .commands import ICommand, CommandManager
-from .concrete_commands import ImportDataCommand, FitDataCommand, DeleteItemCommand, CreateFigureCommand
+from .concrete_commands import ImportDataCommand, BulkImportCommand, FitDataCommand, DeleteItemCommand, CreateFigureCommand
+from .recompute_engine import RecomputeEngine
 
 __all__ = [
     'Data', 'DataManager',
@@ -23,6 +24,7 @@ __all__ = [
     'Series', 'SeriesManager',
     'OperationLog', 'ProvenanceManager',
     'ICommand', 'CommandManager',
-    'ImportDataCommand', 'FitDataCommand', 'DeleteItemCommand', 'CreateFigureCommand'
+    'ImportDataCommand', 'BulkImportCommand', 'FitDataCommand', 'DeleteItemCommand', 'CreateFigureCommand',
+    'RecomputeEngine'
 ]
 
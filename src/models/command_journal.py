@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+"""
+命令日志（预写日志）- 两次保存之间的崩溃恢复
+
+每个通过 CommandManager 完成的命令追加一条日志：
+- 变化的元信息成员（data.json / figures.json 等，内容不变的不写）
+- 新产生的数据帧成员（按内容寻址，日志和归档中已有的不写）
+- 一条提交记录（操作日志）
+
+启动时以上次完整保存的归档为基础，按顺序应用日志即可恢复到崩溃前最后一个命令之后的状态。
+每次完整保存后日志重置为只含新归档的指纹。
+
+文件格式：连续的记录，每条为
+    b'SPRJ' | 头长度(uint32) | 内容长度(uint32) | crc32(头+内容)(uint32) | 头(JSON) | 内容
+头的 kind 为 'base'（归档指纹）、'member'（成员名）或 'commit'（操作）；
+末尾写了一半的记录以及最后一条提交之后的成员在读取时被忽略。
+"""
+import os
+import json
+import zlib
+import struct
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+
+_MAGIC = b'SPRJ'
+_RECORD_HEADER = struct.Struct('<4sIII')
+# 归档指纹取文件末尾（含中央目录）的字节数
+_FINGERPRINT_TAIL = 64 * 1024
+
+
+def journal_path_for(archive_path) -> Path:
+    """会话归档对应的日志文件路径"""
+    archive_path = Path(archive_path)
+    return archive_path.with_name(archive_path.name + '.journal')
+
+
+def archive_fingerprint(path) -> Optional[Tuple[int, int]]:
+    """
+    归档内容指纹 (大小, 末尾crc32)
+
+    与 mtime 无关：中断追加被截断恢复、文件被拷贝后指纹不变
+    """
+    try:
+        size = os.path.getsize(path)
+        with open(path, 'rb') as f:
+            f.seek(max(0, size - _FINGERPRINT_TAIL))
+            return size, zlib.crc32(f.read()) & 0xffffffff
+    except OSError:
+        return None
+
+
+@dataclass
+class JournalReplay:
+    """日志读取结果（只含已提交的部分）"""
+    base: Optional[Tuple[int, int]]
+    members: Dict[str, bytes] = field(default_factory=dict)  # 成员名 → 最新内容
+    operations: List[Dict[str, Any]] = field(default_factory=list)
+
+
+def _encode_record(header: Dict[str, Any], body: bytes = b'') -> bytes:
+    head = json.dumps(header, ensure_ascii=False, default=str).encode('utf-8')
+    crc = zlib.crc32(body, zlib.crc32(head)) & 0xffffffff
+    return _RECORD_HEADER.pack(_MAGIC, len(head), len(body), crc) + head + body
+
+
+class CommandJournal:
+    """
+    命令日志文件
+
+    只负责文件格式与追加写入；日志内容（哪些成员变化）由 SessionManager 计算
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._file = None
+        self.entry_count = 0
+
+    def start(self, base: Optional[Tuple[int, int]],
+              members: Optional[Dict[str, bytes]] = None, operation: Optional[Dict[str, Any]] = None):
+        """
+        以新的基础归档重新开始日志，可同时写入第一条记录
+
+        先写临时文件再原子替换，替换前旧日志始终完整
+        """
+        self.close()
+        tmp = self.path.with_name(self.path.name + '.tmp')
+        with open(tmp, 'wb') as f:
+            f.write(_encode_record({'kind': 'base', 'base': list(base) if base else None}))
+            if members is not None:
+                f.write(self._encode_entry(members, operation))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+        self._file = open(self.path, 'ab')
+        self.entry_count = 1 if members is not None else 0
+
+    def append(self, members: Dict[str, bytes], operation: Optional[Dict[str, Any]] = None) -> int:
+        """
+        追加一条日志（成员 + 提交记录），返回写入字节数
+
+        只flush到操作系统，不fsync：目标是程序崩溃后恢复，每条命令的开销保持在毫秒以内
+        """
+        if self._file is None:
+            raise RuntimeError("命令日志未打开")
+        data = self._encode_entry(members, operation)
+        self._file.write(data)
+        self._file.flush()
+        self.entry_count += 1
+        return len(data)
+
+    @staticmethod
+    def _encode_entry(members: Dict[str, bytes], operation: Optional[Dict[str, Any]]) -> bytes:
+        parts = [_encode_record({'kind': 'member', 'name': name}, body) for name, body in members.items()]
+        parts.append(_encode_record({'kind': 'commit', 'operation': operation}))
+        return b''.join(parts)
+
+    @property
+    def is_open(self) -> bool:
+        return self._file is not None
+
+    def close(self):
+        if self._file is not None:
+            try:
+                self._file.close()
+            finally:
+                self._file = None
+
+    def discard(self):
+        """关闭并删除日志（会话已保存或放弃修改）"""
+        self.close()
+        for p in (self.path, self.path.with_name(self.path.name + '.tmp')):
+            try:
+                p.unlink()
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                print(f"[CommandJournal] 删除日志失败: {p}: {e}")
+
+    @staticmethod
+    def read(path) -> Optional[JournalReplay]:
+        """
+        读取日志中已提交的部分
+
+        返回:
+            JournalReplay；文件不存在或不是有效日志时返回None
+        """
+        try:
+            raw = Path(path).read_bytes()
+        except OSError:
+            return None
+        replay = None
+        pending: Dict[str, bytes] = {}
+        offset = 0
+        while offset + _RECORD_HEADER.size <= len(raw):
+            magic, head_len, body_len, crc = _RECORD_HEADER.unpack_from(raw, offset)
+            start = offset + _RECORD_HEADER.size
+            end = start + head_len + body_len
+            if magic != _MAGIC or end > len(raw):
+                break
+            head, body = raw[start:start + head_len], raw[start + head_len:end]
+            if zlib.crc32(body, zlib.crc32(head)) & 0xffffffff != crc:
+                break
+            try:
+                header = json.loads(head.decode('utf-8'))
+            except ValueError:
+                break
+            offset = end
+            kind = header.get('kind')
+            if kind == 'base':
+                base = header.get('base')
+                replay = JournalReplay(base=tuple(base) if base else None)
+            elif replay is None:
+                break
+            elif kind == 'member':
+                pending[header['name']] = body
+            elif kind == 'commit':
+                replay.members.update(pending)
+                pending = {}
+                replay.operations.append(header.get('operation'))
+        if offset < len(raw):
+            print(f"[CommandJournal] 忽略日志末尾不完整的 {len(raw) - offset} 字节")
+        return replay
@@ -5,8 +5,10 @@
 提供可撤销的操作命令
 """
 from abc import ABC, abstractmethod
-from typing import Optional, List
+from collections import deque
+from typing import Callable, Optional, List, Dict
 from .provenance import OperationLog, ProvenanceManager
+from .scratch_store import ScratchStore, default_scratch_store
 
 
 class ICommand(ABC):
@@ -54,21 +56,133 @@ class ICommand(ABC):
             OperationLog对象
         """
         pass
+    
+    def release(self):
+        """
+        命令被移出历史（不会再撤销/重做）时调用，释放保留的资源
+        
+        默认无操作
+        """
+        pass
+    
+    def payload_bytes(self) -> int:
+        """
+        命令独占且常驻内存的数据量估计（字节），用于历史内存预算
+        
+        默认0（只保存ID等少量状态）
+        """
+        return 0
+    
+    def spill(self, store: ScratchStore) -> int:
+        """
+        把大数据写入暂存区，真正撤销/重做时再读回
+        
+        Returns:
+            释放的内存字节数（默认不支持，返回0）
+        """
+        return 0
 
 
 class CommandManager:
-    """管理可撤销的命令"""
+    """
+    管理可撤销的命令
     
-    def __init__(self, provenance_mgr: ProvenanceManager, max_history: int = 50):
+    历史同时受步数和内存预算限制：
+    - 常驻内存的数据量（各命令 payload_bytes 之和）超过 memory_budget 时，
+      从最早的命令开始把大数据写入暂存区（最近一步撤销/重做的命令保留在内存）
+    - 暂存区超过 disk_budget 时丢弃最早的命令
+    """
+    
+    def __init__(self, provenance_mgr: ProvenanceManager, max_history: int = 50,
+                 journal: Optional[Callable[[OperationLog, str], None]] = None,
+                 memory_budget: Optional[int] = 256 * 1024 * 1024,
+                 disk_budget: Optional[int] = 4 * 1024 * 1024 * 1024,
+                 scratch_store: Optional[ScratchStore] = None):
         """
         Args:
             provenance_mgr: 血缘管理器
             max_history: 最多保留的历史步数
+            journal: 命令完成后的日志回调 (操作日志, 'execute'/'undo'/'redo')，
+                     如 SessionManager.journal_command，用于两次保存之间的崩溃恢复
+            memory_budget: 历史常驻内存预算（字节），None 表示不限制
+            disk_budget: 暂存区预算（字节），None 表示不限制
+            scratch_store: 暂存区，默认使用进程共享的临时目录
         """
-        self._undo_stack: List[ICommand] = []
-        self._redo_stack: List[ICommand] = []
+        self._undo_stack: deque = deque()
+        self._redo_stack: deque = deque()
         self._provenance = provenance_mgr
         self._max_history = max_history
+        self._journal = journal
+        self.memory_budget = memory_budget
+        self.disk_budget = disk_budget
+        self._scratch = scratch_store if scratch_store is not None else default_scratch_store()
+    
+    def _clear_redo(self):
+        for cmd in self._redo_stack:
+            cmd.release()
+        self._redo_stack.clear()
+    
+    def _trim_history(self):
+        while len(self._undo_stack) > self._max_history:
+            self._undo_stack.popleft().release()
+        self._enforce_budget()
+    
+    def _enforce_budget(self):
+        """按内存预算暂存较早命令的大数据，按暂存区预算丢弃最早的命令"""
+        if self.memory_budget is not None:
+            sizes = [(cmd, cmd.payload_bytes()) for cmd in self._all_commands()]
+            resident = sum(size for _, size in sizes)
+            if resident > self.memory_budget:
+                # 从最早的命令开始；撤销栈顶与重做栈顶保留在内存，保证下一步撤销/重做即时
+                keep = {id(self._undo_stack[-1])} if self._undo_stack else set()
+                if self._redo_stack:
+                    keep.add(id(self._redo_stack[-1]))
+                spilled = freed = 0
+                for cmd, size in sizes:
+                    if resident - freed <= self.memory_budget:
+                        break
+                    if size <= 0 or id(cmd) in keep:
+                        continue
+                    try:
+                        released = cmd.spill(self._scratch)
+                    except Exception as e:
+                        print(f"[CommandManager] 暂存命令数据失败: {e}")
+                        continue
+                    if released > 0:
+                        freed += released
+                        spilled += 1
+                if spilled:
+                    print(f"[CommandManager] 历史内存超出预算，暂存 {spilled} 个命令的数据 "
+                          f"({freed / 1024 / 1024:.1f} MB)")
+        if self.disk_budget is not None:
+            while self._scratch.bytes_on_disk > self.disk_budget and len(self._undo_stack) > 1:
+                self._undo_stack.popleft().release()
+    
+    def _all_commands(self) -> List[ICommand]:
+        """从最早到最近：撤销栈（底→顶），再重做栈（底→顶）"""
+        return list(self._undo_stack) + list(self._redo_stack)
+    
+    def get_memory_usage(self) -> Dict[str, int]:
+        """
+        历史占用估计
+        
+        Returns:
+            {'commands': 命令数, 'resident_bytes': 常驻内存, 'spilled_bytes': 暂存区}
+        """
+        commands = self._all_commands()
+        return {
+            'commands': len(commands),
+            'resident_bytes': sum(cmd.payload_bytes() for cmd in commands),
+            'spilled_bytes': self._scratch.bytes_on_disk,
+        }
+    
+    def _write_journal(self, command: ICommand, action: str):
+        if self._journal is None:
+            return
+        try:
+            self._journal(command.to_operation_log(), action)
+        except Exception as e:
+            print(f"[CommandManager] 写入命令日志失败: {e}")
     
     def execute(self, command: ICommand) -> bool:
         """
@@ -83,11 +197,10 @@ class CommandManager:
         success = command.execute()
         if success:
             self._undo_stack.append(command)
-            self._redo_stack.clear()  # 执行新命令后，清空redo栈
+            self._clear_redo()  # 执行新命令后，清空redo栈
             
             # 限制历史大小
-            if len(self._undo_stack) > self._max_history:
-                self._undo_stack.pop(0)
+            self._trim_history()
             
             # 自动记录到血缘
             try:
@@ -95,9 +208,26 @@ class CommandManager:
                 self._provenance.record_operation(op_log)
             except Exception as e:
                 print(f"[CommandManager] 记录操作日志失败: {e}")
+            self._write_journal(command, 'execute')
         
         return success
     
+    def record(self, command: ICommand):
+        """
+        记录已在外部完成的命令（不再执行），如后台批量导入
+        
+        Args:
+            command: 已完成的命令
+        """
+        self._undo_stack.append(command)
+        self._clear_redo()
+        self._trim_history()
+        try:
+            self._provenance.record_operation(command.to_operation_log())
+        except Exception as e:
+            print(f"[CommandManager] 记录操作日志失败: {e}")
+        self._write_journal(command, 'execute')
+    
     def undo(self) -> bool:
         """
         撤销最近一次操作
@@ -120,6 +250,8 @@ class CommandManager:
                 self._provenance.mark_reverted(op_log.op_id)
             except Exception as e:
                 print(f"[CommandManager] 标记撤销失败: {e}")
+            self._write_journal(cmd, 'undo')
+            self._enforce_budget()
         else:
             # 撤销失败，恢复到undo栈
             self._undo_stack.append(cmd)
@@ -149,6 +281,8 @@ class CommandManager:
                 self._provenance.record_operation(op_log)
             except Exception as e:
                 print(f"[CommandManager] 记录重做失败: {e}")
+            self._write_journal(cmd, 'redo')
+            self._enforce_budget()
         else:
             # 重做失败，恢复到redo栈
             self._redo_stack.append(cmd)
@@ -182,6 +316,8 @@ class CommandManager:
     
     def clear(self):
         """清空所有历史"""
+        for cmd in self._undo_stack:
+            cmd.release()
         self._undo_stack.clear()
-        self._redo_stack.clear()
+        self._clear_redo()
 
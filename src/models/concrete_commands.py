@@ -5,13 +5,75 @@
 提供导入、拟合、删除等可撤销操作
 """
 import os
+import copy
 import uuid
+import weakref
 from datetime import datetime
 from typing import Optional, List, Dict, Any, Tuple
 import pandas as pd
 
 from .commands import ICommand
 from .provenance import OperationLog
+from .scratch_store import ScratchStore, default_scratch_store
+
+
+def _frame_bytes(df) -> int:
+    """DataFrame内存占用估计（字节）"""
+    if df is None:
+        return 0
+    try:
+        return int(df.memory_usage(index=True, deep=True).sum())
+    except Exception:
+        return 0
+
+
+def build_fitted_frame(fit_result: Dict[str, Any], x_data) -> Optional[pd.DataFrame]:
+    """由拟合结果生成拟合曲线DataFrame（无预测值时返回None）"""
+    if fit_result.get('y_pred') is None:
+        return None
+    y_pred = fit_result['y_pred']
+    y_pred_matrix = fit_result.get('y_pred_matrix')
+    time_vector = fit_result.get('time_vector')
+    headers = fit_result.get('headers')
+    
+    # 判断是否是矩阵形式
+    if (y_pred_matrix is not None and 
+        getattr(y_pred_matrix, 'ndim', 1) == 2 and 
+        time_vector is not None and 
+        headers is not None):
+        # 宽表格式
+        fitted_df = pd.DataFrame({'Time': time_vector})
+        for i, col in enumerate(headers):
+            fitted_df[f"Y_pred_{col}"] = y_pred_matrix[:, i]
+        return fitted_df
+    # 简单两列格式
+    return pd.DataFrame({
+        'XValue': x_data,
+        'YValue': y_pred
+    })
+
+
+def fit_outputs(fit_result: Dict[str, Any], x_data) -> Dict[str, Any]:
+    """拟合结果中需要保留的部分：参数、统计、拟合曲线、预算使用情况"""
+    return {
+        'parameters': copy.deepcopy(fit_result.get('parameters', {})),
+        'statistics': copy.deepcopy(fit_result.get('statistics', {}) or {}),
+        'fitted_df': build_fitted_frame(fit_result, x_data),
+        'budget': copy.deepcopy(fit_result.get('budget')),
+    }
+
+
+def result_parameters(data_name: str, method: str, outputs: Dict[str, Any]) -> Dict[str, Any]:
+    """结果对象的参数表：数据源、方法与拟合参数；预算用尽时附 BudgetLimited（参数是目前最优的点而非收敛结果）"""
+    params = {
+        'DataSource': (data_name, None, ''),
+        'Method': (method, None, ''),
+        **copy.deepcopy(outputs['parameters'])
+    }
+    budget = outputs.get('budget') or {}
+    if budget.get('budget_limited'):
+        params['BudgetLimited'] = (budget.get('reason'), None, '')
+    return params
 
 
 class ImportDataCommand(ICommand):
@@ -140,12 +202,135 @@ class ImportDataCommand(ICommand):
         )
 
 
+class BulkImportCommand(ICommand):
+    """
+    多文件批量导入的可撤销命令
+
+    文件已在后台解析并逐个注册（见 BulkImporter），本命令只记录结果：
+    撤销时删除全部导入对象；重做时用保存的解析结果重新注册，不再重新解析文件。
+    """
+    
+    def __init__(self, entries: List[Dict[str, Any]], register_func,
+                 data_manager, figure_manager, project_manager):
+        """
+        Args:
+            entries: 每个文件一项 {'file_path', 'dataframe', 'export_path', 'data_ids', 'figure_ids'}
+                     dataframe 为注册前的副本（重做时使用）
+            register_func: fn(file_path, dataframe, export_path) -> (data_ids, figure_ids)
+            data_manager: DataManager实例
+            figure_manager: FigureManager实例
+            project_manager: ProjectManager实例
+        """
+        super().__init__()
+        self.entries = entries
+        self.register_func = register_func
+        self.data_manager = data_manager
+        self.figure_manager = figure_manager
+        self.project_manager = project_manager
+        self.op_id = str(uuid.uuid4())
+        self._spill_store: Optional[ScratchStore] = None
+    
+    def payload_bytes(self) -> int:
+        """保存的解析结果（撤销/重做栈上都由本命令独占）"""
+        total = 0
+        for entry in self.entries:
+            if entry.get('dataframe') is not None:
+                if entry.get('nbytes') is None:
+                    entry['nbytes'] = _frame_bytes(entry['dataframe'])
+                total += entry['nbytes']
+        return total
+    
+    def spill(self, store: ScratchStore) -> int:
+        freed = self.payload_bytes()
+        for entry in self.entries:
+            if entry.get('dataframe') is not None:
+                entry['spill_key'] = store.put(entry['dataframe'])
+                entry['dataframe'] = None
+        self._spill_store = store
+        return freed
+    
+    def release(self):
+        if self._spill_store is not None:
+            for entry in self.entries:
+                self._spill_store.discard(entry.pop('spill_key', None))
+    
+    @property
+    def data_ids(self) -> List[int]:
+        return [i for e in self.entries for i in e.get('data_ids', [])]
+    
+    @property
+    def figure_ids(self) -> List[int]:
+        return [i for e in self.entries for i in e.get('figure_ids', [])]
+    
+    def execute(self) -> bool:
+        """重做：用保存的DataFrame重新注册（注册会修改attrs，因此传入副本）"""
+        try:
+            for entry in self.entries:
+                if entry.get('spill_key') is not None:
+                    entry['dataframe'] = self._spill_store.get(entry.pop('spill_key'))
+                df = entry['dataframe'].copy()
+                df.attrs = copy.deepcopy(entry['dataframe'].attrs)
+                data_ids, figure_ids = self.register_func(
+                    entry['file_path'], df, entry.get('export_path'))
+                entry['data_ids'] = list(data_ids)
+                entry['figure_ids'] = list(figure_ids)
+            return True
+        except Exception as e:
+            self.error = f"重新导入失败: {e}"
+            return False
+    
+    def undo(self) -> bool:
+        """撤销导入：删除所有导入的数据和图表"""
+        try:
+            project = self.project_manager.get_current_project()
+            for figure_id in self.figure_ids:
+                if project and figure_id in project.figure_ids:
+                    project.figure_ids.remove(figure_id)
+                self.figure_manager.remove_figure(figure_id)
+            for data_id in self.data_ids:
+                if project and data_id in project.data_ids:
+                    project.data_ids.remove(data_id)
+                self.data_manager.remove_data(data_id)
+            return True
+        except Exception as e:
+            self.error = f"撤销导入失败: {e}"
+            return False
+    
+    def get_description(self) -> str:
+        """返回操作描述"""
+        return (f"批量导入: {len(self.entries)}个文件 "
+                f"({len(self.data_ids)}数据, {len(self.figure_ids)}图表)")
+    
+    def to_operation_log(self) -> OperationLog:
+        """转换为操作日志"""
+        return OperationLog(
+            op_id=self.op_id,
+            op_type='import',
+            timestamp=datetime.now().isoformat(),
+            inputs={'file_paths': [e['file_path'] for e in self.entries]},
+            outputs={'data_ids': self.data_ids, 'figure_ids': self.figure_ids},
+            description=self.get_description(),
+            status='success'
+        )
+
+
 class FitDataCommand(ICommand):
-    """拟合数据的可撤销命令"""
+    """
+    拟合数据的可撤销命令
+    
+    首次执行后保留拟合输出（参数、统计、拟合曲线），重做时直接重新挂接，不再重新拟合；
+    源数据在撤销期间被修改时才重新拟合。
+    批量拟合在进程池中算好结果后以 fit_result 传入，首次执行直接采用（源数据在此期间被修改时重新拟合）。
+    撤销后拟合曲线超过 SPILL_THRESHOLD_BYTES 时暂存到磁盘，重做时读回。
+    """
+    
+    # 撤销后拟合曲线超过该大小（字节）时暂存到磁盘；None表示始终留在内存
+    SPILL_THRESHOLD_BYTES: Optional[int] = 8 * 1024 * 1024
     
     def __init__(self, data_id: int, method: str, 
                  data_manager, result_manager, figure_manager, 
-                 link_manager, project_manager):
+                 link_manager, project_manager,
+                 fit_result: Optional[Dict[str, Any]] = None, fit_version: Optional[int] = None):
         """
         Args:
             data_id: 数据ID
@@ -155,6 +340,8 @@ class FitDataCommand(ICommand):
             figure_manager: FigureManager实例
             link_manager: LinkManager实例
             project_manager: ProjectManager实例
+            fit_result: 已在后台算好的 fit_data() 结果（批量拟合），首次执行时直接采用
+            fit_version: 计算 fit_result 时源数据的DataFrame版本号
         """
         super().__init__()
         self.data_id = data_id
@@ -175,13 +362,19 @@ class FitDataCommand(ICommand):
         self.figure_id: Optional[int] = None
         self.created_links: List[Tuple[str, int, str, int]] = []
         self.op_id = str(uuid.uuid4())
+        
+        # 拟合输出（重做时复用）及其对应的源数据状态
+        self._fit_outputs: Optional[Dict[str, Any]] = None
+        self._fit_source: Optional[Tuple[Any, int]] = None  # (源Data弱引用, DataFrame版本号)
+        self._spill_key: Optional[str] = None
+        self._spill_store: Optional[ScratchStore] = None
+        self.refit_count = 0
+        self._precomputed = (fit_result, fit_version) if fit_result is not None else None
     
     def execute(self) -> bool:
-        """执行拟合"""
+        """执行拟合（重做时复用已保留的拟合输出）"""
         try:
-            from src.utils.fitting_wrapper import fit_data
-            
-            # 1. 获取数据并拟合
+            # 1. 获取数据
             data = self.data_manager.get_data(self.data_id)
             
             # 如果原data_id不存在（可能是重做时ID已变），尝试通过名称查找
@@ -196,168 +389,197 @@ class FitDataCommand(ICommand):
                 self.error = f"数据不存在: data_name={self.data_name}, data_id={self.data_id}"
                 return False
             
-            # 验证数据
-            validation = data.validate_xy_extraction()
-            if 'error' in validation:
-                self.error = validation['error']
-                return False
-            
-            if validation.get('valid_both', 0) < 3:
-                self.error = "有效数据点不足"
-                return False
+            if self._precomputed is not None:
+                self._adopt_precomputed(data)
+            outputs = self._reusable_outputs(data)
+            if outputs is None:
+                outputs = self._compute_fit(data)
+                if outputs is None:
+                    return False
+            else:
+                print(f"[FitDataCommand] 复用已保留的拟合结果: {self.data_name} ({self.method})")
+            
+            self._attach(data, outputs)
+            return True
             
-            # 获取XY数据
-            x_data, y_data = data.get_xy_data(auto_sort=False)
+        except Exception as e:
+            import traceback
+            self.error = f"拟合失败: {str(e)}\n{traceback.format_exc()}"
+            return False
+    
+    def _reusable_outputs(self, data) -> Optional[Dict[str, Any]]:
+        """源数据与上次拟合时相同（同一对象且未修改）时返回保留的输出"""
+        if self._fit_outputs is None or self._fit_source is None:
+            return None
+        data_ref, version = self._fit_source
+        get_version = getattr(data, 'get_dataframe_version', None)
+        current = get_version() if callable(get_version) else None
+        if data_ref() is not data or current != version:
+            return None
+        self._restore_spilled()
+        return self._fit_outputs
+    
+    def _adopt_precomputed(self, data):
+        """采用后台算好的拟合结果作为保留的输出（源数据已被修改或拟合失败时忽略，重新拟合）"""
+        fit_result, version = self._precomputed
+        self._precomputed = None
+        get_version = getattr(data, 'get_dataframe_version', None)
+        current = get_version() if callable(get_version) else None
+        if not fit_result.get('success') or current != version:
+            return
+        x_data, _ = data.get_xy_data(auto_sort=False)
+        self._fit_outputs = fit_outputs(fit_result, x_data)
+        self._fit_source = (weakref.ref(data), version)
+    
+    def _compute_fit(self, data) -> Optional[Dict[str, Any]]:
+        """执行拟合，返回保留的输出；失败时设置error并返回None"""
+        from src.utils.fitting_wrapper import fit_data
+        
+        # 验证数据
+        validation = data.validate_xy_extraction()
+        if 'error' in validation:
+            self.error = validation['error']
+            return None
+        
+        if validation.get('valid_both', 0) < 3:
+            self.error = "有效数据点不足"
+            return None
+        
+        # 获取XY数据
+        x_data, y_data = data.get_xy_data(auto_sort=False)
+        
+        # 执行拟合
+        fit_result = fit_data(self.method, x_data, y_data, 
+                             dataframe=data.dataframe, data_obj=data)
+        self.refit_count += 1
+        
+        if not fit_result.get('success'):
+            self.error = fit_result.get('error', '拟合失败')
+            return None
+        
+        self._discard_spill()
+        self._fit_outputs = fit_outputs(fit_result, x_data)
+        get_version = getattr(data, 'get_dataframe_version', None)
+        self._fit_source = (weakref.ref(data), get_version() if callable(get_version) else None)
+        return self._fit_outputs
+    
+    def _attach(self, data, outputs: Dict[str, Any]):
+        """根据拟合输出创建结果、拟合曲线、对比图及链接"""
+        self.result_id = None
+        self.fitted_data_id = None
+        self.figure_id = None
+        self.created_links = []
+        parameters = outputs['parameters']
+        stats = outputs['statistics']
+        
+        # 2. 创建结果对象
+        self.result_id = self.result_manager.add_result(
+            f"{data.name} - {self.method}",
+            self.method
+        )
+        result = self.result_manager.get_result(self.result_id)
+        
+        # 设置参数
+        result.set_parameters(result_parameters(data.name, self.method, outputs))
+        
+        # 设置统计信息
+        result.set_statistics(rmse=stats.get('rmse'))
+        result.set_data_source(self.data_id)
+        
+        # 创建链接：data → result
+        self.link_manager.create_link(
+            'data', self.data_id,
+            'result', self.result_id,
+            link_type='fitting_output',
+            metadata={
+                'method': self.method,
+                'fit_time': datetime.now().isoformat(),
+                'parameters': copy.deepcopy(parameters),
+                'rmse': stats.get('rmse')
+            }
+        )
+        self.created_links.append(('data', self.data_id, 'result', self.result_id))
+        
+        # 3. 创建拟合曲线数据（交给DataManager的是副本，保留的输出不受之后编辑影响）
+        if outputs['fitted_df'] is not None:
+            fitted_df = outputs['fitted_df'].copy()
+            
+            # 添加元数据标记
+            fitted_df.attrs['source_type'] = 'fitted_curve'
+            fitted_df.attrs['result_id'] = self.result_id
+            fitted_df.attrs['original_data_id'] = self.data_id
+            fitted_df.attrs['method'] = self.method
+            
+            self.fitted_data_id = self.data_manager.add_data(
+                f"{data.name} - 拟合曲线({self.method})",
+                fitted_df
+            )
             
-            # 执行拟合
-            fit_result = fit_data(self.method, x_data, y_data, 
-                                 dataframe=data.dataframe, data_obj=data)
+            # 创建链接：result → fitted_data
+            self.link_manager.create_link(
+                'result', self.result_id,
+                'data', self.fitted_data_id,
+                link_type='result_data',
+                metadata={
+                    'data_type': 'fitted_curve',
+                    'method': self.method,
+                    'created_time': datetime.now().isoformat()
+                }
+            )
+            self.created_links.append(('result', self.result_id, 'data', self.fitted_data_id))
+        
+        # 4. 创建对比图
+        if self.fitted_data_id is not None:
+            self.figure_id = self.figure_manager.add_figure(
+                f"{data.name} - 拟合对比",
+                "fitting"
+            )
+            figure = self.figure_manager.get_figure(self.figure_id)
             
-            if not fit_result.get('success'):
-                self.error = fit_result.get('error', '拟合失败')
-                return False
+            # 添加数据源
+            figure.add_data_source(self.data_id, {
+                'label': '实验数据',
+                'color': '#1a73e8',
+                'linewidth': 1.5,
+                'marker': 'o',
+                'markersize': 4.0,
+                'linestyle': 'none'
+            })
             
-            # 2. 创建结果对象
-            self.result_id = self.result_manager.add_result(
-                f"{data.name} - {self.method}",
-                self.method
-            )
-            result = self.result_manager.get_result(self.result_id)
-            
-            # 设置参数
-            params_with_meta = dict(fit_result.get('parameters', {}))
-            params_with_meta = {
-                'DataSource': (data.name, None, ''),
-                'Method': (self.method, None, ''),
-                **params_with_meta
-            }
-            result.set_parameters(params_with_meta)
+            figure.add_data_source(self.fitted_data_id, {
+                'label': f'拟合曲线({self.method})',
+                'color': '#ea4335',
+                'linewidth': 2.5,
+                'marker': 'none',
+                'linestyle': '-'
+            })
             
-            # 设置统计信息
-            stats = fit_result.get('statistics', {}) or {}
-            result.set_statistics(rmse=stats.get('rmse'))
-            result.set_data_source(self.data_id)
+            figure.set_result_source(self.result_id)
             
-            # 创建链接：data → result
+            # 创建链接：result → figure
             self.link_manager.create_link(
-                'data', self.data_id,
                 'result', self.result_id,
-                link_type='fitting_output',
+                'figure', self.figure_id,
+                link_type='visualization',
                 metadata={
-                    'method': self.method,
-                    'fit_time': datetime.now().isoformat(),
-                    'parameters': fit_result.get('parameters', {}),
-                    'rmse': stats.get('rmse')
+                    'figure_type': 'fitting_comparison',
+                    'created_time': datetime.now().isoformat()
                 }
             )
-            self.created_links.append(('data', self.data_id, 'result', self.result_id))
-            
-            # 3. 创建拟合曲线数据
-            if fit_result.get('y_pred') is not None:
-                y_pred = fit_result['y_pred']
-                y_pred_matrix = fit_result.get('y_pred_matrix')
-                time_vector = fit_result.get('time_vector')
-                headers = fit_result.get('headers')
-                
-                # 判断是否是矩阵形式
-                if (y_pred_matrix is not None and 
-                    getattr(y_pred_matrix, 'ndim', 1) == 2 and 
-                    time_vector is not None and 
-                    headers is not None):
-                    # 宽表格式
-                    fitted_df = pd.DataFrame({'Time': time_vector})
-                    for i, col in enumerate(headers):
-                        fitted_df[f"Y_pred_{col}"] = y_pred_matrix[:, i]
-                else:
-                    # 简单两列格式
-                    fitted_df = pd.DataFrame({
-                        'XValue': x_data,
-                        'YValue': y_pred
-                    })
-                
-                # 添加元数据标记
-                fitted_df.attrs['source_type'] = 'fitted_curve'
-                fitted_df.attrs['result_id'] = self.result_id
-                fitted_df.attrs['original_data_id'] = self.data_id
-                fitted_df.attrs['method'] = self.method
-                
-                self.fitted_data_id = self.data_manager.add_data(
-                    f"{data.name} - 拟合曲线({self.method})",
-                    fitted_df
-                )
-                
-                # 创建链接：result → fitted_data
-                self.link_manager.create_link(
-                    'result', self.result_id,
-                    'data', self.fitted_data_id,
-                    link_type='result_data',
-                    metadata={
-                        'data_type': 'fitted_curve',
-                        'method': self.method,
-                        'created_time': datetime.now().isoformat()
-                    }
-                )
-                self.created_links.append(('result', self.result_id, 'data', self.fitted_data_id))
-            
-            # 4. 创建对比图
-            if self.fitted_data_id is not None:
-                self.figure_id = self.figure_manager.add_figure(
-                    f"{data.name} - 拟合对比",
-                    "fitting"
-                )
-                figure = self.figure_manager.get_figure(self.figure_id)
-                
-                # 添加数据源
-                figure.add_data_source(self.data_id, {
-                    'label': '实验数据',
-                    'color': '#1a73e8',
-                    'linewidth': 1.5,
-                    'marker': 'o',
-                    'markersize': 4.0,
-                    'linestyle': 'none'
-                })
-                
-                figure.add_data_source(self.fitted_data_id, {
-                    'label': f'拟合曲线({self.method})',
-                    'color': '#ea4335',
-                    'linewidth': 2.5,
-                    'marker': 'none',
-                    'linestyle': '-'
-                })
-                
-                figure.set_result_source(self.result_id)
-                
-                # 创建链接：result → figure
-                self.link_manager.create_link(
-                    'result', self.result_id,
-                    'figure', self.figure_id,
-                    link_type='visualization',
-                    metadata={
-                        'figure_type': 'fitting_comparison',
-                        'created_time': datetime.now().isoformat()
-                    }
-                )
-                self.created_links.append(('result', self.result_id, 'figure', self.figure_id))
-                
-                # 添加到项目
-                project = self.project_manager.get_current_project()
-                if project:
-                    project.add_figure(self.figure_id)
+            self.created_links.append(('result', self.result_id, 'figure', self.figure_id))
             
-            # 5. 将结果添加到项目
+            # 添加到项目
             project = self.project_manager.get_current_project()
             if project:
-                project.add_result(self.result_id)
-            
-            return True
-            
-        except Exception as e:
-            import traceback
-            self.error = f"拟合失败: {str(e)}\n{traceback.format_exc()}"
-            return False
+                project.add_figure(self.figure_id)
+        
+        # 5. 将结果添加到项目
+        project = self.project_manager.get_current_project()
+        if project:
+            project.add_result(self.result_id)
     
     def undo(self) -> bool:
-        """撤销拟合：删除所有创建的对象"""
+        """撤销拟合：删除所有创建的对象（拟合输出保留供重做）"""
         try:
             project = self.project_manager.get_current_project()
             
@@ -382,11 +604,58 @@ class FitDataCommand(ICommand):
                     project.result_ids.remove(self.result_id)
                 self.result_manager.remove_result(self.result_id)
             
+            self._spill_if_large()
             return True
         except Exception as e:
             self.error = f"撤销拟合失败: {e}"
             return False
     
+    # ========== 拟合输出暂存 ==========
+    
+    def payload_bytes(self) -> int:
+        """保留的拟合曲线（已暂存的不计）"""
+        if self._fit_outputs is None:
+            return 0
+        return _frame_bytes(self._fit_outputs.get('fitted_df'))
+    
+    def spill(self, store: ScratchStore) -> int:
+        """把保留的拟合曲线写入暂存区，重做时读回"""
+        fitted_df = self._fit_outputs.get('fitted_df') if self._fit_outputs else None
+        if fitted_df is None:
+            return 0
+        freed = _frame_bytes(fitted_df)
+        self._spill_key = store.put(fitted_df)
+        self._spill_store = store
+        self._fit_outputs['fitted_df'] = None
+        return freed
+    
+    def _spill_if_large(self):
+        """在重做栈上时，把较大的拟合曲线暂存到磁盘"""
+        if self.SPILL_THRESHOLD_BYTES is None or self._spill_key is not None:
+            return
+        if self.payload_bytes() >= self.SPILL_THRESHOLD_BYTES:
+            try:
+                self.spill(default_scratch_store())
+            except Exception as e:
+                print(f"[FitDataCommand] 暂存拟合曲线失败，保留在内存: {e}")
+    
+    def _restore_spilled(self):
+        if self._spill_key is None:
+            return
+        self._fit_outputs['fitted_df'] = self._spill_store.get(self._spill_key)
+        self._spill_key = None
+    
+    def _discard_spill(self):
+        if self._spill_key is not None:
+            self._spill_store.discard(self._spill_key)
+            self._spill_key = None
+    
+    def release(self):
+        """命令被移出历史时释放保留的拟合输出与暂存数据"""
+        self._discard_spill()
+        self._fit_outputs = None
+        self._fit_source = None
+    
     def get_description(self) -> str:
         """返回操作描述"""
         data = self.data_manager.get_data(self.data_id)
@@ -567,6 +836,9 @@ class DeleteItemCommand(ICommand):
         self.saved_links: List[Dict[str, Any]] = []
         self.was_in_project = False
         self.op_id = str(uuid.uuid4())
+        self._deleted = False  # 已删除（在撤销栈上），此时被删数据只由本命令持有
+        self._spill_key: Optional[str] = None
+        self._spill_store: Optional[ScratchStore] = None
     
     def execute(self) -> bool:
         """执行删除（保存状态）"""
@@ -622,6 +894,7 @@ class DeleteItemCommand(ICommand):
             elif self.item_type == 'result':
                 self.managers['result'].remove_result(self.item_id)
             
+            self._deleted = True
             return True
         except Exception as e:
             import traceback
@@ -630,21 +903,13 @@ class DeleteItemCommand(ICommand):
     
     def _get_all_links(self, obj_type: str, obj_id: int) -> List[Dict[str, Any]]:
         """获取对象相关的所有链接"""
-        all_links = []
-        link_mgr = self.managers['link']
-        
-        # 获取所有链接
-        for link in link_mgr.get_all_links():
-            if ((link['source_type'] == obj_type and link['source_id'] == obj_id) or
-                (link['target_type'] == obj_type and link['target_id'] == obj_id)):
-                all_links.append(link.copy())
-        
-        return all_links
+        return self.managers['link'].get_object_links(obj_type, obj_id)
     
     def undo(self) -> bool:
         """撤销删除：恢复对象和链接"""
         try:
-            # 1. 恢复对象
+            # 1. 恢复对象（数据已暂存时先读回）
+            self._rehydrate()
             if self.item_type == 'data':
                 self.managers['data']._data_dict[self.item_id] = self.saved_object
             elif self.item_type == 'figure':
@@ -674,11 +939,49 @@ class DeleteItemCommand(ICommand):
                 except Exception:
                     pass  # 链接可能已经存在
             
+            self._deleted = False
             return True
         except Exception as e:
             self.error = f"撤销删除失败: {e}"
             return False
     
+    def _deleted_frame(self):
+        """被删除且仍在内存中的DataFrame"""
+        obj = self.saved_object
+        if not self._deleted or self.item_type != 'data' or obj is None:
+            return None
+        is_loaded = getattr(obj, 'is_dataframe_loaded', None)
+        if not callable(is_loaded) or not is_loaded():
+            return None
+        return obj.dataframe
+    
+    def payload_bytes(self) -> int:
+        return _frame_bytes(self._deleted_frame())
+    
+    def spill(self, store: ScratchStore) -> int:
+        """被删数据的DataFrame写入暂存区，撤销时读回"""
+        df = self._deleted_frame()
+        if df is None or df.empty:
+            return 0
+        freed = _frame_bytes(df)
+        self._spill_key = store.put(df)
+        self._spill_store = store
+        self.saved_object.set_dataframe_loader(self._load_spilled)
+        return freed
+    
+    def _load_spilled(self):
+        key, self._spill_key = self._spill_key, None
+        return self._spill_store.get(key)
+    
+    def _rehydrate(self):
+        if self._spill_key is not None and self.saved_object is not None:
+            self.saved_object.dataframe  # 触发延迟加载
+    
+    def release(self):
+        if self._deleted and self._spill_key is not None:
+            self._spill_store.discard(self._spill_key)
+            self._spill_key = None
+    
     def get_description(self) -> str:
         """返回操作描述"""
         type_names = {
@@ -13,6 +13,48 @@ import pandas as pd
 import numpy as np
 
 
+# 数值片段：可选符号、小数部分、科学计数法
+_NUMBER_PATTERN = r"([-+]?\d*\.?\d+(?:[eE][-+]?\d+)?)"
+
+# XY智能选择规则（get_xy_data 与 validate_xy_extraction 共用）
+_PREFERRED_X = ['Time', 'time', 'XValue', 'X', 'x', 't', 'sec', 'seconds']
+_PREFERRED_Y = ['Response', 'response', 'RU', 'YValue', 'y', 'signal', 'Signal', 'Value']
+_Y_BLACKLIST = {'Concentration', 'concentration', 'Index', 'index', 'ID', 'id',
+                'Cycle', 'Group', 'Sample', 'Run', 'Replicate'}
+
+
+def parse_numeric_series(s: pd.Series) -> pd.Series:
+    """
+    宽松的数值解析（向量化）：
+    - 允许字符串中带单位（提取首个数字片段）
+    - 支持逗号作为小数点或千分位，做合理替换
+    - 支持科学计数法
+    返回float系列（不可转的为NaN）
+
+    全程使用pandas字符串内核（str.replace / str.extract），不逐单元格调用Python函数
+    """
+    if s.dtype.kind in ('i', 'u', 'f'):
+        return pd.to_numeric(s, errors='coerce')
+    # 转为字符串处理
+    s_str = s.astype(str).str.strip()
+
+    # 先把常见千分位和小数点情况做预处理（含前后断言的替换较慢，只作用于可能命中的行）：
+    # 情况A: "1,234.56" → 去掉千分位逗号
+    s_norm = s_str.copy()
+    hit = s_norm.str.contains(",", regex=False, na=False)
+    if hit.any():
+        s_norm[hit] = s_norm[hit].str.replace(r"(?<=\d),(?=\d{3}(\D|$))", "", regex=True)
+    # 情况B: "1.234,56" → 先把点去掉，再把逗号当小数点
+    hit = s_norm.str.contains(r"\d\.\d{3}(?:\D|$)", regex=True, na=False)
+    if hit.any():
+        s_norm[hit] = s_norm[hit].str.replace(r"(\d)\.(?=\d{3}(\D|$))", r"\1", regex=True)
+    s_norm = s_norm.str.replace(",", ".", regex=False)
+
+    # 提取第一个数字（含可选小数与科学计数法）
+    first_number = s_norm.str.extract(_NUMBER_PATTERN, expand=False)
+    return pd.to_numeric(first_number, errors='coerce').astype(float)
+
+
 class Data(QObject):
     """
     统一数据类 - 融合原项目和新项目的所有优点
@@ -40,6 +82,12 @@ class Data(QObject):
         self.itemtype: str = itemtype
         self.connection_id: Optional[int] = None
         
+        # ===== 解析缓存（按DataFrame版本失效） =====
+        self._df_version: int = 0
+        self._parse_cache_key = None
+        self._parse_cache: Dict[str, Dict] = {}
+        self._df_loader = None  # 延迟加载：首次访问dataframe时调用
+        
         # ===== 数据存储 =====
         self.dataframe: pd.DataFrame = pd.DataFrame()  # 统一用DataFrame存储
         self.raw_data: Dict = {}  # 原始JSON数据（如果有）
@@ -304,8 +352,180 @@ class Data(QObject):
         """设置数据名称"""
         self.name = name
     
+    # ===== 数值解析缓存 =====
+
+    @property
+    def dataframe(self) -> pd.DataFrame:
+        """数据表（赋值时自动使解析缓存失效；设置了延迟加载时首次访问才读取）"""
+        if self._df_loader is not None:
+            try:
+                df = self._df_loader()
+            except Exception as e:
+                # 保留loader：仍视为未加载，保存时原样保留已存内容
+                print(f"[Data] 延迟加载数据失败: {self.name}: {e}")
+                return pd.DataFrame()
+            self._df_loader = None
+            # 读取的是已保存的内容，不算修改，不递增版本号
+            self._dataframe = df if df is not None else pd.DataFrame()
+        return self._dataframe
+
+    @dataframe.setter
+    def dataframe(self, df: pd.DataFrame):
+        self._df_loader = None
+        self._dataframe = df
+        self.mark_dataframe_modified()
+
+    def set_dataframe_loader(self, loader):
+        """
+        设置延迟加载：首次访问 dataframe 时调用 loader() 得到DataFrame
+
+        当前内存中的DataFrame随即释放（内容由loader负责提供，版本号不变）
+
+        参数:
+            loader: 无参函数，返回DataFrame
+        """
+        self._df_loader = loader
+        self._dataframe = pd.DataFrame()
+
+    def is_dataframe_loaded(self) -> bool:
+        """DataFrame是否已在内存中（未设置延迟加载或已读取）"""
+        return self._df_loader is None
+
+    def mark_dataframe_modified(self):
+        """
+        标记DataFrame已修改，使列解析缓存与XY选择缓存失效
+
+        对 self.dataframe 重新赋值时会自动调用；
+        原地修改（如 df['col'] = ...）后需手动调用。
+        """
+        self._df_version += 1
+        self._parse_cache_key = None
+
+    def get_dataframe_version(self) -> int:
+        """获取DataFrame版本号（每次修改递增）"""
+        return self._df_version
+
+    def _get_parse_cache(self) -> Dict[str, Dict]:
+        """
+        获取当前DataFrame的解析缓存
+
+        缓存按 (版本号, 对象id, 形状, 列名) 校验，
+        即使漏调 mark_dataframe_modified，增删行列也不会命中旧缓存。
+        """
+        df = self.dataframe
+        key = (self._df_version, id(df), df.shape, tuple(df.columns))
+        if self._parse_cache_key != key:
+            self._parse_cache_key = key
+            self._parse_cache = {'series': {}, 'counts': {}, 'stats': {}, 'summary': {}, 'xy': {}}
+        return self._parse_cache
+
+    def _get_numeric_columns(self) -> Tuple[Dict[str, pd.Series], Dict[str, int]]:
+        """
+        获取所有列的数值解析结果（带缓存）
+
+        返回:
+            (numeric_map, valid_counts): 列名 → 解析后的float Series / 有效点数
+        """
+        cache = self._get_parse_cache()
+        numeric_map = cache['series']
+        valid_counts = cache['counts']
+        df = self.dataframe
+        for col in df.columns:
+            if col not in numeric_map:
+                ser = parse_numeric_series(df[col])
+                numeric_map[col] = ser
+                valid_counts[col] = int(ser.notna().sum())
+        return numeric_map, valid_counts
+
+    def _get_column_stats(self, col: str) -> Dict[str, float]:
+        """获取列的变化性统计（std、unique），用于Y列评分（带缓存）"""
+        cache = self._get_parse_cache()
+        if col not in cache['stats']:
+            numeric_map, _ = self._get_numeric_columns()
+            s = numeric_map[col].dropna()
+            cache['stats'][col] = dict(std=float(s.std()) if not s.empty else 0.0,
+                                       uniq=int(s.nunique()))
+        return cache['stats'][col]
+
+    def _get_column_summary(self, col: str) -> Dict[str, Any]:
+        """获取列的详细信息（validate_xy_extraction 用，带缓存）"""
+        cache = self._get_parse_cache()
+        if col not in cache['summary']:
+            numeric_map, valid_counts = self._get_numeric_columns()
+            ser = numeric_map[col]
+            df = self.dataframe
+            valid_count = valid_counts[col]
+            cache['summary'][col] = {
+                'dtype': str(df[col].dtype),
+                'total': len(df),
+                'valid': valid_count,
+                'na_count': len(df) - valid_count,
+                'mean': float(ser.mean()) if valid_count > 0 else None,
+                'std': float(ser.std()) if valid_count > 0 else None,
+                'min': float(ser.min()) if valid_count > 0 else None,
+                'max': float(ser.max()) if valid_count > 0 else None,
+                'unique': int(ser.nunique())
+            }
+        return cache['summary'][col]
+
+    def _auto_select_x(self) -> Optional[str]:
+        """智能选择X列：X优先 Time/XValue，否则选有效点最多的列（带缓存）"""
+        cache = self._get_parse_cache()
+        if 'x' not in cache['xy']:
+            _, valid_counts = self._get_numeric_columns()
+            selected = None
+            existing_pref = [c for c in _PREFERRED_X if c in valid_counts]
+            # 在偏好列中选择有效点最多的
+            if existing_pref:
+                selected = max(existing_pref, key=lambda c: valid_counts.get(c, 0))
+            # 若偏好列几乎无效，则在所有列中选有效点最多者
+            if (selected is None or valid_counts.get(selected, 0) == 0) and valid_counts:
+                selected = max(valid_counts, key=valid_counts.get)
+            cache['xy']['x'] = selected
+        return cache['xy']['x']
+
+    def _auto_select_y(self, x_col: Optional[str]) -> Tuple[Optional[str], list]:
+        """
+        智能选择Y列（带缓存）
+
+        返回:
+            (selected_y_col, candidates): 无候选时 selected_y_col 为 None
+        """
+        cache = self._get_parse_cache()
+        key = ('y', x_col)
+        if key not in cache['xy']:
+            _, valid_counts = self._get_numeric_columns()
+            # 先构造所有候选（排除X和黑名单，且有效点>0）
+            candidates = [
+                c for c, cnt in valid_counts.items()
+                if c != x_col and cnt > 0 and c not in _Y_BLACKLIST
+            ]
+            selected = None
+            if candidates:
+                stats = {c: self._get_column_stats(c) for c in candidates}
+
+                def score(col: str) -> tuple:
+                    # 评分：是否在首选列表(-0/1)、有效点数、多样性、标准差
+                    pref = 0 if col in _PREFERRED_Y else 1
+                    return (
+                        pref,
+                        -valid_counts[col],
+                        -stats[col]['uniq'],
+                        -stats[col]['std']
+                    )
+
+                # 过滤掉"无变化"的列（std==0 或 uniq<=3）
+                filtered = [c for c in candidates if stats[c]['std'] > 0 and stats[c]['uniq'] > 3]
+                if not filtered:
+                    # 退化：没有满足变化性，仍挑评分最高者
+                    filtered = candidates
+                selected = sorted(filtered, key=score)[0]
+            cache['xy'][key] = (selected, candidates)
+        selected, candidates = cache['xy'][key]
+        return selected, list(candidates)
+
     # ===== 智能XY提取（新项目的核心功能） =====
-    
+
     def get_xy_data(
         self,
         x_col: Optional[str] = None,
@@ -316,84 +536,45 @@ class Data(QObject):
     ) -> Tuple[np.ndarray, np.ndarray]:
         """
         提取X和Y数据（智能选择或手动指定）
-        
+
         功能：
         - 宽松解析字符串为数值（单位/逗号小数/科学计数法）
         - 智能选择：X优先 Time/XValue；Y优先 Response/RU/YValue
         - 排除明显的元数据列（Concentration/Index/ID 等）
         - 可选：按X排序、删除NaN
-        
+        - 列解析结果与选列结果按DataFrame版本缓存，重复调用不再重新解析
+
         参数:
             x_col: 手动指定X列名（None=自动智能选择）
             y_col: 手动指定Y列名（None=自动智能选择）
             auto_sort: 是否按X排序（默认True，绘图用；False保持原顺序，拟合用）
             drop_na: 是否删除NaN（默认True；False保留NaN，适用于某些算法）
             return_info: 是否返回提取信息（用于调试和验证）
-        
+
         返回:
             (x_data, y_data): numpy数组元组
             如果 return_info=True: (x_data, y_data, info_dict)
-        
+
         异常:
             ValueError: 数据为空、列不存在、无有效数据点等
-        
+
         示例:
             # 智能提取（绘图用）
             x, y = data.get_xy_data()
-            
+
             # 手动指定列（拟合用）
             x, y = data.get_xy_data(x_col='Time', y_col='Response', auto_sort=False)
-            
+
             # 获取详细信息
             x, y, info = data.get_xy_data(return_info=True)
             print(f"选择的列: {info['x_col']}, {info['y_col']}")
         """
-        import re
-        
         df = self.dataframe
         if df is None or df.empty:
             raise ValueError("数据为空")
 
-        def parse_numeric_series(s: pd.Series) -> pd.Series:
-            """更宽松的数值解析：
-            - 允许字符串中带单位（提取首个数字片段）
-            - 支持逗号作为小数点或千分位，做合理替换
-            - 支持科学计数法
-            返回float系列（不可转的为NaN）
-            """
-            if s.dtype.kind in ('i', 'u', 'f'):
-                return pd.to_numeric(s, errors='coerce')
-            # 转为字符串处理
-            s_str = s.astype(str).str.strip()
-
-            # 先把常见千分位和小数点情况做预处理：
-            # 情况A: "1,234.56" → 去掉千分位逗号
-            s_norm = s_str.str.replace(r"(?<=\d),(?=\d{3}(\D|$))", "", regex=True)
-            # 情况B: "1.234,56" → 先把点去掉，再把逗号当小数点
-            s_norm = s_norm.str.replace(r"(\d)\.(?=\d{3}(\D|$))", r"\1", regex=True)
-            s_norm = s_norm.str.replace(",", ".", regex=False)
-
-            # 提取第一个数字（含可选小数与科学计数法）
-            num_pat = re.compile(r"[-+]?\d*\.?\d+(?:[eE][-+]?\d+)?")
-            def extract_first_number(text: str) -> float:
-                m = num_pat.search(text)
-                if not m:
-                    return float('nan')
-                try:
-                    return float(m.group(0))
-                except Exception:
-                    return float('nan')
-
-            parsed = s_norm.map(extract_first_number)
-            return pd.to_numeric(parsed, errors='coerce')
-
-        # 为所有列准备"可解析为数值"的统计
-        numeric_map = {}
-        valid_counts = {}
-        for col in df.columns:
-            ser = parse_numeric_series(df[col])
-            numeric_map[col] = ser
-            valid_counts[col] = int(ser.notna().sum())
+        # 为所有列准备"可解析为数值"的统计（缓存）
+        numeric_map, valid_counts = self._get_numeric_columns()
 
         if not valid_counts:
             raise ValueError("没有可用的列")
@@ -401,82 +582,37 @@ class Data(QObject):
         # ===== 选择X列（手动指定 或 智能选择）=====
         selected_x_col = x_col
         if selected_x_col is None:
-            # 智能选择X列
-            preferred_x = ['Time', 'time', 'XValue', 'X', 'x', 't', 'sec', 'seconds']
-            existing_pref = [c for c in preferred_x if c in df.columns]
-            # 在偏好列中选择有效点最多的
-            if existing_pref:
-                selected_x_col = max(existing_pref, key=lambda c: valid_counts.get(c, 0))
-            # 若偏好列几乎无效，则在所有列中选有效点最多者
-            if selected_x_col is None or valid_counts.get(selected_x_col, 0) == 0:
-                selected_x_col = max(valid_counts, key=valid_counts.get)
+            selected_x_col = self._auto_select_x()
         else:
             # 验证手动指定的X列
             if selected_x_col not in df.columns:
                 raise ValueError(f"指定的X列不存在: '{selected_x_col}'，可用列: {list(df.columns)}")
             if valid_counts.get(selected_x_col, 0) == 0:
                 raise ValueError(f"指定的X列无有效数值: '{selected_x_col}'")
-        
+
         if valid_counts.get(selected_x_col, 0) == 0:
             raise ValueError(f"X列无有效数值。列: {list(df.columns)}")
 
         # ===== 选择Y列（手动指定 或 智能选择）=====
         selected_y_col = y_col
-        stats = {}  # 用于存储统计信息
         y_candidates = []  # 候选Y列列表
-        
+
         if selected_y_col is None:
             # 智能选择Y列
-            preferred_y = ['Response', 'response', 'RU', 'YValue', 'y', 'signal', 'Signal', 'Value']
-            blacklist = set(['Concentration', 'concentration', 'Index', 'index', 'ID', 'id', 'Cycle', 'Group', 'Sample', 'Run', 'Replicate'])
-
-            # 先构造所有候选（排除X和黑名单，且有效点>0）
-            candidates = [
-                c for c, cnt in valid_counts.items()
-                if c != selected_x_col and cnt > 0 and c not in blacklist
-            ]
-            if not candidates:
+            selected_y_col, y_candidates = self._auto_select_y(selected_x_col)
+            if selected_y_col is None:
                 raise ValueError("未找到可用的Y列（除X外）")
-
-            # 计算变化性（std、unique）
-            for c in candidates:
-                s = numeric_map[c].dropna()
-                stats[c] = dict(std=float(s.std()) if not s.empty else 0.0,
-                                uniq=int(s.nunique()))
-
-            def score(col: str) -> tuple:
-                # 评分：是否在首选列表(-0/1)、有效点数、多样性、标准差
-                pref = 0 if col in preferred_y else 1
-                return (
-                    pref,
-                    -valid_counts[col],
-                    -stats[col]['uniq'],
-                    -stats[col]['std']
-                )
-
-            # 过滤掉"无变化"的列（std==0 或 uniq<=3）
-            filtered = [c for c in candidates if stats[c]['std'] > 0 and stats[c]['uniq'] > 3]
-            if not filtered:
-                # 退化：没有满足变化性，仍挑评分最高者
-                filtered = candidates
-
-            selected_y_col = sorted(filtered, key=score)[0]
-            y_candidates = candidates  # 保存候选列表供info使用
         else:
             # 验证手动指定的Y列
             if selected_y_col not in df.columns:
                 raise ValueError(f"指定的Y列不存在: '{selected_y_col}'，可用列: {list(df.columns)}")
             if valid_counts.get(selected_y_col, 0) == 0:
                 raise ValueError(f"指定的Y列无有效数值: '{selected_y_col}'")
-            # 计算该列的统计信息
-            s = numeric_map[selected_y_col].dropna()
-            stats[selected_y_col] = dict(std=float(s.std()) if not s.empty else 0.0,
-                                         uniq=int(s.nunique()))
 
         # ===== 提取数据 =====
         x_series = numeric_map[selected_x_col]
         y_series = numeric_map[selected_y_col]
-        
+
         if drop_na:
             # 删除NaN（对齐有效数据）
             mask = x_series.notna() & y_series.notna()
@@ -484,9 +620,9 @@ class Data(QObject):
             y_valid = y_series[mask].to_numpy(dtype=float)
             original_indices = np.where(mask)[0]
         else:
-            # 保留NaN
-            x_valid = x_series.to_numpy(dtype=float)
-            y_valid = y_series.to_numpy(dtype=float)
+            # 保留NaN（复制一份，避免调用方修改污染缓存）
+            x_valid = x_series.to_numpy(dtype=float, copy=True)
+            y_valid = y_series.to_numpy(dtype=float, copy=True)
             original_indices = np.arange(len(x_valid))
 
         if x_valid.size == 0 or y_valid.size == 0:
@@ -508,7 +644,7 @@ class Data(QObject):
         # ===== 调试信息 =====
         mode_str = "手动" if (x_col or y_col) else "智能"
         print(f"[Data.get_xy_data] 模式={mode_str}, X={selected_x_col}({valid_counts.get(selected_x_col)}点), Y={selected_y_col}({valid_counts.get(selected_y_col)}点), 有效={x_data.size}点, 排序={auto_sort}, NaN过滤={drop_na}")
-        
+
         # ===== 返回结果 =====
         if return_info:
             # 返回详细信息
@@ -521,7 +657,7 @@ class Data(QObject):
                 'is_sorted': auto_sort,
                 'mode': mode_str,
                 'y_candidates': y_candidates if not y_col else [],
-                'statistics': stats.get(selected_y_col, {}),
+                'statistics': dict(self._get_column_stats(selected_y_col)),
                 'indices': sorted_indices  # 数据点在原DataFrame中的索引
             }
             return x_data, y_data, info
@@ -535,16 +671,16 @@ class Data(QObject):
     ) -> Dict[str, Any]:
         """
         验证XY提取（不实际提取数据，仅返回会提取什么）
-        
+
         用途：
         - 在拟合前检查数据选择是否正确
         - 提供备选列列表供用户选择
         - 检测潜在问题（数据点过少、NaN过多等）
-        
+
         参数:
             x_col: 指定X列（None=自动选择）
             y_col: 指定Y列（None=自动选择）
-        
+
         返回:
             {
                 'x_col': 'Time',           # 将使用的X列
@@ -558,14 +694,14 @@ class Data(QObject):
                 'y_candidates': [...],     # 其他可选Y列
                 'columns_info': {...}      # 所有列的详细信息
             }
-        
+
         示例:
             # 验证智能选择结果
             result = data.validate_xy_extraction()
             if result['warnings']:
                 print("警告:", result['warnings'])
             print(f"将使用: X={result['x_col']}, Y={result['y_col']}")
-            
+
             # 验证手动指定的列
             result = data.validate_xy_extraction(x_col='Time', y_col='Response')
             if result['valid_both'] < 10:
@@ -577,97 +713,23 @@ class Data(QObject):
                 'error': '数据为空',
                 'warnings': ['DataFrame为空或未初始化']
             }
-        
-        # 准备数值解析（复用get_xy_data的逻辑）
-        import re
-        
-        def parse_numeric_series(s: pd.Series) -> pd.Series:
-            if s.dtype.kind in ('i', 'u', 'f'):
-                return pd.to_numeric(s, errors='coerce')
-            s_str = s.astype(str).str.strip()
-            s_norm = s_str.str.replace(r"(?<=\d),(?=\d{3}(\D|$))", "", regex=True)
-            s_norm = s_norm.str.replace(r"(\d)\.(?=\d{3}(\D|$))", r"\1", regex=True)
-            s_norm = s_norm.str.replace(",", ".", regex=False)
-            num_pat = re.compile(r"[-+]?\d*\.?\d+(?:[eE][-+]?\d+)?")
-            def extract_first_number(text: str) -> float:
-                m = num_pat.search(text)
-                if not m:
-                    return float('nan')
-                try:
-                    return float(m.group(0))
-                except Exception:
-                    return float('nan')
-            parsed = s_norm.map(extract_first_number)
-            return pd.to_numeric(parsed, errors='coerce')
-        
-        # 为所有列准备统计信息
-        numeric_map = {}
-        valid_counts = {}
-        columns_info = {}
-        
-        for col in df.columns:
-            ser = parse_numeric_series(df[col])
-            numeric_map[col] = ser
-            valid_count = int(ser.notna().sum())
-            valid_counts[col] = valid_count
-            
-            # 详细列信息
-            columns_info[col] = {
-                'dtype': str(df[col].dtype),
-                'total': len(df),
-                'valid': valid_count,
-                'na_count': len(df) - valid_count,
-                'mean': float(ser.mean()) if valid_count > 0 else None,
-                'std': float(ser.std()) if valid_count > 0 else None,
-                'min': float(ser.min()) if valid_count > 0 else None,
-                'max': float(ser.max()) if valid_count > 0 else None,
-                'unique': int(ser.nunique())
-            }
-        
+
+        # 数值解析与统计（与get_xy_data共用缓存）
+        numeric_map, valid_counts = self._get_numeric_columns()
+        columns_info = {col: dict(self._get_column_summary(col)) for col in df.columns}
+
         # 选择X列（与get_xy_data逻辑一致）
         selected_x_col = x_col
         if selected_x_col is None:
-            preferred_x = ['Time', 'time', 'XValue', 'X', 'x', 't', 'sec', 'seconds']
-            existing_pref = [c for c in preferred_x if c in df.columns]
-            if existing_pref:
-                selected_x_col = max(existing_pref, key=lambda c: valid_counts.get(c, 0))
-            if selected_x_col is None or valid_counts.get(selected_x_col, 0) == 0:
-                selected_x_col = max(valid_counts, key=valid_counts.get) if valid_counts else None
-        
+            selected_x_col = self._auto_select_x()
+
         # 选择Y列（与get_xy_data逻辑一致）
         selected_y_col = y_col
         y_candidates = []
-        
+
         if selected_y_col is None:
-            preferred_y = ['Response', 'response', 'RU', 'YValue', 'y', 'signal', 'Signal', 'Value']
-            blacklist = set(['Concentration', 'concentration', 'Index', 'index', 'ID', 'id', 'Cycle', 'Group', 'Sample', 'Run', 'Replicate'])
-            
-            candidates = [
-                c for c, cnt in valid_counts.items()
-                if c != selected_x_col and cnt > 0 and c not in blacklist
-            ]
-            
-            if candidates:
-                # 计算统计并排序
-                stats = {}
-                for c in candidates:
-                    s = numeric_map[c].dropna()
-                    stats[c] = dict(
-                        std=float(s.std()) if not s.empty else 0.0,
-                        uniq=int(s.nunique())
-                    )
-                
-                def score(col: str) -> tuple:
-                    pref = 0 if col in preferred_y else 1
-                    return (pref, -valid_counts[col], -stats[col]['uniq'], -stats[col]['std'])
-                
-                filtered = [c for c in candidates if stats[c]['std'] > 0 and stats[c]['uniq'] > 3]
-                if not filtered:
-                    filtered = candidates
-                
-                selected_y_col = sorted(filtered, key=score)[0]
-                y_candidates = candidates  # 所有候选
-        
+            selected_y_col, y_candidates = self._auto_select_y(selected_x_col)
+
         # 计算有效数据点
         if selected_x_col and selected_y_col:
             x_series = numeric_map[selected_x_col]
@@ -675,31 +737,31 @@ class Data(QObject):
             valid_both = int((x_series.notna() & y_series.notna()).sum())
         else:
             valid_both = 0
-        
+
         # 生成警告
         warnings = []
         if selected_x_col is None:
             warnings.append("未找到合适的X列")
         elif valid_counts.get(selected_x_col, 0) < len(df) * 0.5:
             warnings.append(f"X列'{selected_x_col}'缺失值较多（{len(df) - valid_counts.get(selected_x_col, 0)}个）")
-        
+
         if selected_y_col is None:
             warnings.append("未找到合适的Y列")
         elif valid_counts.get(selected_y_col, 0) < len(df) * 0.5:
             warnings.append(f"Y列'{selected_y_col}'缺失值较多（{len(df) - valid_counts.get(selected_y_col, 0)}个）")
-        
+
         if valid_both < 3:
             warnings.append(f"有效数据点过少（仅{valid_both}个），拟合可能失败")
         elif valid_both < 10:
             warnings.append(f"有效数据点较少（{valid_both}个），拟合精度可能不高")
-        
+
         na_count = len(df) - valid_both if valid_both > 0 else len(df)
         if na_count > 0:
             warnings.append(f"将过滤{na_count}个数据点（NaN或无效值）")
-        
+
         if len(y_candidates) > 1:
             warnings.append(f"存在{len(y_candidates)}个候选Y列，请确认选择正确")
-        
+
         # 返回结果
         return {
             'x_col': selected_x_col,
@@ -725,6 +787,7 @@ class DataManager(QObject):
     # 信号
     data_added = Signal(int)  # 参数：数据ID
     data_removed = Signal(int)
+    data_changed = Signal(int)  # 数据内容被替换（只由 update_dataframe 发出）
     
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -843,6 +906,26 @@ class DataManager(QObject):
             return True
         return False
     
+    def update_dataframe(self, data_id: int, dataframe: pd.DataFrame) -> bool:
+        """
+        替换数据内容并发出 data_changed（依赖它的结果/图表随之重新计算）
+
+        替换已有数据内容的操作都应经此方法；直接给 Data.dataframe 赋值不会通知下游
+        
+        参数:
+            data_id: 数据ID
+            dataframe: 新的DataFrame
+        
+        返回:
+            bool: 数据是否存在
+        """
+        data = self._data_dict.get(data_id)
+        if data is None:
+            return False
+        data.dataframe = dataframe
+        self.data_changed.emit(data_id)
+        return True
+    
     def get_all_data(self) -> Dict[int, Data]:
         """
         获取所有数据对象
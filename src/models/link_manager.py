@@ -7,10 +7,15 @@
 2. 查询正向/反向链接
 3. 追踪数据血缘
 4. 序列化/反序列化支持
+
+索引：
+- (源, 目标) → 链接ID，按ID查找链接为O(1)
+- 按链接类型的正向/反向邻接表，带类型过滤的邻居查询不再逐个查找链接
+- 可达性（派生对象/来源对象）查询每个节点只访问一次，结果缓存到链接变化为止
 """
 from PySide6.QtCore import QObject, Signal
-from typing import Dict, List, Optional, Tuple, Any
-from collections import defaultdict
+from typing import Dict, FrozenSet, List, Optional, Tuple, Any
+from collections import defaultdict, deque
 from datetime import datetime
 import json
 
@@ -46,6 +51,12 @@ class LinkManager(QObject):
         
         # 链接ID计数器
         self._link_id_counter = 0
+        
+        # 索引（由 forward_links / link_metadata 派生，不序列化）
+        self._link_index: Dict[Tuple[str, str], str] = {}  # (source, target) → link_id
+        self._typed_forward: Dict[str, Dict[str, List[str]]] = {}  # link_type → source → [targets]
+        self._typed_backward: Dict[str, Dict[str, List[str]]] = {}  # link_type → target → [sources]
+        self._reach_cache: Dict[Tuple[str, str, Optional[str]], Tuple[List[str], FrozenSet[str]]] = {}
     
     # ========== 核心功能 ==========
     
@@ -77,7 +88,7 @@ class LinkManager(QObject):
         target_key = self._make_key(target_type, target_id)
         
         # 检查是否已存在
-        if target_key in self.forward_links[source_key]:
+        if (source_key, target_key) in self._link_index:
             print(f"[LinkManager] 链接已存在: {source_key} → {target_key}")
             return self._find_link_id(source_key, target_key)
         
@@ -101,6 +112,7 @@ class LinkManager(QObject):
             'metadata': metadata or {}
         }
         self.link_metadata[link_id] = link_data
+        self._index_link(link_id, source_key, target_key, link_type)
         
         # 发射信号
         self.link_created.emit(source_type, source_id, target_type, target_id)
@@ -122,7 +134,8 @@ class LinkManager(QObject):
         target_key = self._make_key(target_type, target_id)
         
         # 检查链接是否存在
-        if target_key not in self.forward_links.get(source_key, []):
+        link_id = self._link_index.get((source_key, target_key))
+        if link_id is None:
             print(f"[LinkManager] 链接不存在: {source_key} → {target_key}")
             return False
         
@@ -137,9 +150,9 @@ class LinkManager(QObject):
             del self.backward_links[target_key]
         
         # 删除元数据
-        link_id = self._find_link_id(source_key, target_key)
-        if link_id and link_id in self.link_metadata:
-            del self.link_metadata[link_id]
+        link_data = self.link_metadata.pop(link_id, None)
+        self._unindex_link(source_key, target_key,
+                           link_data.get('link_type', 'default') if link_data else None)
         
         # 发射信号
         self.link_removed.emit(source_type, source_id, target_type, target_id)
@@ -167,23 +180,7 @@ class LinkManager(QObject):
             # 返回: [('result', 3), ('figure', 5)]
         """
         source_key = self._make_key(source_type, source_id)
-        target_keys = self.forward_links.get(source_key, [])
-        
-        results = []
-        for target_key in target_keys:
-            # 如果指定了link_type，需要过滤
-            if link_type:
-                link_id = self._find_link_id(source_key, target_key)
-                if link_id:
-                    link_data = self.link_metadata.get(link_id, {})
-                    if link_data.get('link_type') != link_type:
-                        continue
-            
-            # 解析target_key
-            target_type, target_id = self._parse_key(target_key)
-            results.append((target_type, target_id))
-        
-        return results
+        return [self._parse_key(key) for key in self._neighbours(source_key, 'forward', link_type)]
     
     def get_sources(self, target_type: str, target_id: Any,
                     link_type: Optional[str] = None) -> List[Tuple[str, Any]]:
@@ -203,23 +200,7 @@ class LinkManager(QObject):
             # 返回: [('data', 1)]
         """
         target_key = self._make_key(target_type, target_id)
-        source_keys = self.backward_links.get(target_key, [])
-        
-        results = []
-        for source_key in source_keys:
-            # 如果指定了link_type，需要过滤
-            if link_type:
-                link_id = self._find_link_id(source_key, target_key)
-                if link_id:
-                    link_data = self.link_metadata.get(link_id, {})
-                    if link_data.get('link_type') != link_type:
-                        continue
-            
-            # 解析source_key
-            source_type, source_id = self._parse_key(source_key)
-            results.append((source_type, source_id))
-        
-        return results
+        return [self._parse_key(key) for key in self._neighbours(target_key, 'backward', link_type)]
     
     def get_dependency_chain(self, obj_type: str, obj_id: Any, 
                             direction: str = 'forward') -> List[List[Tuple[str, Any]]]:
@@ -234,6 +215,9 @@ class LinkManager(QObject):
         返回：
             List[List[Tuple]]: 依赖链列表（可能有多条路径）
         
+        注意：路径数随菱形依赖指数增长，只需要“哪些对象受影响”时
+        使用 get_descendants / get_ancestors
+        
         示例：
             # 正向：data:1 → result:3 → figure:6
             chain = get_dependency_chain('data', 1, 'forward')
@@ -252,10 +236,7 @@ class LinkManager(QObject):
             path.append((current_type, current_id))
             
             # 获取下一级
-            if direction == 'forward':
-                next_objs = self.get_targets(current_type, current_id)
-            else:
-                next_objs = self.get_sources(current_type, current_id)
+            next_objs = [self._parse_key(key) for key in self._neighbours(current_key, direction)]
             
             if not next_objs:
                 # 到达终点
@@ -270,12 +251,54 @@ class LinkManager(QObject):
         dfs(obj_type, obj_id, [])
         return chains
     
+    def get_descendants(self, obj_type: str, obj_id: Any,
+                        link_type: Optional[str] = None) -> List[Tuple[str, Any]]:
+        """
+        获取所有派生对象（正向可达，不含自身）
+        
+        参数：
+            link_type: 可选，只沿该类型的链接
+        
+        返回：
+            List[Tuple[type, id]]: 按广度优先顺序
+        """
+        order, _ = self._reachable(self._make_key(obj_type, obj_id), 'forward', link_type)
+        return [self._parse_key(key) for key in order]
+    
+    def get_ancestors(self, obj_type: str, obj_id: Any,
+                      link_type: Optional[str] = None) -> List[Tuple[str, Any]]:
+        """获取所有来源对象（反向可达，不含自身），按广度优先顺序"""
+        order, _ = self._reachable(self._make_key(obj_type, obj_id), 'backward', link_type)
+        return [self._parse_key(key) for key in order]
+    
+    def is_reachable(self, source_type: str, source_id: Any,
+                     target_type: str, target_id: Any,
+                     link_type: Optional[str] = None) -> bool:
+        """检查目标对象是否（直接或间接）派生自源对象"""
+        source_key = self._make_key(source_type, source_id)
+        _, reachable = self._reachable(source_key, 'forward', link_type)
+        return self._make_key(target_type, target_id) in reachable
+    
+    def get_object_links(self, obj_type: str, obj_id: Any) -> List[Dict]:
+        """
+        获取与对象相关的所有链接（作为源或目标）
+        
+        返回：
+            格式同 get_all_links()
+        """
+        key = self._make_key(obj_type, obj_id)
+        link_ids = [self._link_index[(key, target)] for target in self.forward_links.get(key, [])]
+        link_ids += [self._link_index[(source, key)] for source in self.backward_links.get(key, [])
+                     if source != key]
+        # 按创建顺序
+        return [self._link_entry(self.link_metadata[link_id]) for link_id in sorted(link_ids)]
+    
     def has_link(self, source_type: str, source_id: Any,
                  target_type: str, target_id: Any) -> bool:
         """检查两个对象之间是否存在链接"""
         source_key = self._make_key(source_type, source_id)
         target_key = self._make_key(target_type, target_id)
-        return target_key in self.forward_links.get(source_key, [])
+        return (source_key, target_key) in self._link_index
     
     def get_link_info(self, source_type: str, source_id: Any,
                      target_type: str, target_id: Any) -> Optional[Dict]:
@@ -324,6 +347,7 @@ class LinkManager(QObject):
         self.backward_links = defaultdict(list, data.get('backward_links', {}))
         self.link_metadata = data.get('link_metadata', {})
         self._link_id_counter = data.get('link_id_counter', 0)
+        self._rebuild_indexes()
         
         print(f"[LinkManager] 加载完成：{len(self.link_metadata)}个链接")
     
@@ -333,6 +357,7 @@ class LinkManager(QObject):
         self.backward_links.clear()
         self.link_metadata.clear()
         self._link_id_counter = 0
+        self._rebuild_indexes()
         self.dependency_changed.emit()
         print("[LinkManager] 已清空所有链接")
     
@@ -368,20 +393,20 @@ class LinkManager(QObject):
         返回:
             链接列表，每个链接包含 source_type, source_id, target_type, target_id, link_type
         """
-        links = []
-        for link_data in self.link_metadata.values():
-            source_type, source_id = self._parse_key(link_data['source'])
-            target_type, target_id = self._parse_key(link_data['target'])
-            
-            links.append({
-                'source_type': source_type,
-                'source_id': source_id,
-                'target_type': target_type,
-                'target_id': target_id,
-                'link_type': link_data.get('link_type', ''),
-                'metadata': link_data.get('metadata', {})
-            })
-        return links
+        return [self._link_entry(link_data) for link_data in self.link_metadata.values()]
+    
+    def _link_entry(self, link_data: Dict) -> Dict:
+        """链接元数据 → get_all_links() 的条目格式"""
+        source_type, source_id = self._parse_key(link_data['source'])
+        target_type, target_id = self._parse_key(link_data['target'])
+        return {
+            'source_type': source_type,
+            'source_id': source_id,
+            'target_type': target_type,
+            'target_id': target_id,
+            'link_type': link_data.get('link_type', ''),
+            'metadata': link_data.get('metadata', {})
+        }
     
     def print_all_links(self):
         """打印所有链接（用于调试）"""
@@ -421,10 +446,68 @@ class LinkManager(QObject):
     
     def _find_link_id(self, source_key: str, target_key: str) -> Optional[str]:
         """查找链接ID"""
+        return self._link_index.get((source_key, target_key))
+    
+    def _index_link(self, link_id: str, source_key: str, target_key: str, link_type: str):
+        """把链接加入索引"""
+        self._link_index[(source_key, target_key)] = link_id
+        self._typed_forward.setdefault(link_type, {}).setdefault(source_key, []).append(target_key)
+        self._typed_backward.setdefault(link_type, {}).setdefault(target_key, []).append(source_key)
+        self._reach_cache.clear()
+    
+    def _unindex_link(self, source_key: str, target_key: str, link_type: Optional[str]):
+        """从索引中移除链接"""
+        self._link_index.pop((source_key, target_key), None)
+        for index, key, other in ((self._typed_forward, source_key, target_key),
+                                  (self._typed_backward, target_key, source_key)):
+            by_key = index.get(link_type, {})
+            neighbours = by_key.get(key)
+            if neighbours and other in neighbours:
+                neighbours.remove(other)
+                if not neighbours:
+                    del by_key[key]
+        self._reach_cache.clear()
+    
+    def _rebuild_indexes(self):
+        """按 link_metadata 重建索引（加载/清空后）"""
+        self._link_index.clear()
+        self._typed_forward.clear()
+        self._typed_backward.clear()
+        self._reach_cache.clear()
         for link_id, link_data in self.link_metadata.items():
-            if link_data['source'] == source_key and link_data['target'] == target_key:
-                return link_id
-        return None
+            self._index_link(link_id, link_data['source'], link_data['target'],
+                             link_data.get('link_type', 'default'))
+    
+    def _neighbours(self, key: str, direction: str, link_type: Optional[str] = None) -> List[str]:
+        """相邻对象键；link_type 为空时不过滤"""
+        if link_type:
+            index = self._typed_forward if direction == 'forward' else self._typed_backward
+            return index.get(link_type, {}).get(key, [])
+        links = self.forward_links if direction == 'forward' else self.backward_links
+        return links.get(key, [])
+    
+    def _reachable(self, start_key: str, direction: str, link_type: Optional[str]) -> Tuple[List[str], FrozenSet[str]]:
+        """
+        可达对象（广度优先顺序, 集合）
+        
+        每个节点只访问一次（有环时同样终止），结果缓存到链接变化为止
+        """
+        cache_key = (start_key, direction, link_type)
+        cached = self._reach_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        visited = {start_key}
+        order = []
+        queue = deque([start_key])
+        while queue:
+            for key in self._neighbours(queue.popleft(), direction, link_type):
+                if key not in visited:
+                    visited.add(key)
+                    order.append(key)
+                    queue.append(key)
+        visited.discard(start_key)
+        cached = self._reach_cache[cache_key] = (order, frozenset(visited))
+        return cached
     
     def _count_link_types(self) -> Dict[str, int]:
         """统计各类型链接的数量"""
@@ -41,13 +41,171 @@ class OperationLog:
         return cls(**data)
 
 
-class ProvenanceManager:
-    """管理操作历史和数据血缘"""
+ObjectKey = Tuple[str, int]
+
+
+class _MemoryOperationStore:
+    """内存存储：追加写入的操作列表 + op_id / 对象 索引"""
     
     def __init__(self):
         self._operations: List[OperationLog] = []
-        # key: ('data', 0) -> value: [op_id1, op_id2, ...]  # 影响这个对象的所有操作
-        self._object_lineage: Dict[Tuple[str, int], List[str]] = {}
+        self._by_id: Dict[str, int] = {}  # op_id -> 首次出现的位置
+        # key: ('data', 0) -> value: [位置1, 位置2, ...]  # 影响这个对象的所有操作（按时间顺序）
+        self._by_object: Dict[ObjectKey, List[int]] = {}
+    
+    def append(self, op_log: OperationLog, keys: List[ObjectKey]):
+        seq = len(self._operations)
+        self._operations.append(op_log)
+        self._by_id.setdefault(op_log.op_id, seq)
+        for key in keys:
+            self._by_object.setdefault(key, []).append(seq)
+    
+    def get(self, op_id: str) -> Optional[OperationLog]:
+        seq = self._by_id.get(op_id)
+        return self._operations[seq] if seq is not None else None
+    
+    def mark_reverted(self, op_id: str) -> bool:
+        op = self.get(op_id)
+        if op is None:
+            return False
+        op.status = 'reverted'
+        op.reverted = True
+        return True
+    
+    def lineage(self, key: ObjectKey) -> List[OperationLog]:
+        return [self._operations[seq] for seq in self._by_object.get(key, ())]
+    
+    def lineage_op_ids(self) -> Dict[ObjectKey, List[str]]:
+        result = {}
+        for key, seqs in self._by_object.items():
+            result[key] = list(dict.fromkeys(self._operations[seq].op_id for seq in seqs))
+        return result
+    
+    def operations(self) -> List[OperationLog]:
+        return self._operations.copy()
+    
+    def __len__(self) -> int:
+        return len(self._operations)
+    
+    def clear(self):
+        self._operations.clear()
+        self._by_id.clear()
+        self._by_object.clear()
+    
+    def close(self):
+        pass
+
+
+class _SQLiteOperationStore:
+    """
+    SQLite存储：操作日志不常驻内存，按 op_id / 对象 建索引
+    
+    每次记录单独提交（WAL模式），程序崩溃不丢失已记录的操作
+    """
+    
+    def __init__(self, db_path: str):
+        import sqlite3
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS operations (
+                seq INTEGER PRIMARY KEY,
+                op_id TEXT NOT NULL,
+                data TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS operations_op_id ON operations(op_id, seq);
+            CREATE TABLE IF NOT EXISTS lineage (
+                obj_type TEXT NOT NULL,
+                obj_id INTEGER NOT NULL,
+                seq INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS lineage_object ON lineage(obj_type, obj_id, seq);
+        """)
+        self._conn.commit()
+    
+    @staticmethod
+    def _load(data: str) -> OperationLog:
+        return OperationLog.from_dict(json.loads(data))
+    
+    def append(self, op_log: OperationLog, keys: List[ObjectKey]):
+        with self._conn:
+            cur = self._conn.execute(
+                "INSERT INTO operations (op_id, data) VALUES (?, ?)",
+                (op_log.op_id, json.dumps(op_log.to_dict(), ensure_ascii=False, default=str)))
+            seq = cur.lastrowid
+            self._conn.executemany(
+                "INSERT INTO lineage (obj_type, obj_id, seq) VALUES (?, ?, ?)",
+                [(obj_type, obj_id, seq) for obj_type, obj_id in keys])
+    
+    def _first(self, op_id: str):
+        return self._conn.execute(
+            "SELECT seq, data FROM operations WHERE op_id = ? ORDER BY seq LIMIT 1", (op_id,)).fetchone()
+    
+    def get(self, op_id: str) -> Optional[OperationLog]:
+        row = self._first(op_id)
+        return self._load(row[1]) if row else None
+    
+    def mark_reverted(self, op_id: str) -> bool:
+        row = self._first(op_id)
+        if row is None:
+            return False
+        op = self._load(row[1])
+        op.status = 'reverted'
+        op.reverted = True
+        with self._conn:
+            self._conn.execute("UPDATE operations SET data = ? WHERE seq = ?",
+                               (json.dumps(op.to_dict(), ensure_ascii=False, default=str), row[0]))
+        return True
+    
+    def lineage(self, key: ObjectKey) -> List[OperationLog]:
+        rows = self._conn.execute(
+            "SELECT o.data FROM lineage l JOIN operations o ON o.seq = l.seq "
+            "WHERE l.obj_type = ? AND l.obj_id = ? ORDER BY l.seq", key).fetchall()
+        return [self._load(data) for (data,) in rows]
+    
+    def lineage_op_ids(self) -> Dict[ObjectKey, List[str]]:
+        result: Dict[ObjectKey, List[str]] = {}
+        rows = self._conn.execute(
+            "SELECT l.obj_type, l.obj_id, o.op_id FROM lineage l JOIN operations o ON o.seq = l.seq "
+            "ORDER BY l.seq").fetchall()
+        for obj_type, obj_id, op_id in rows:
+            ids = result.setdefault((obj_type, obj_id), [])
+            if op_id not in ids:
+                ids.append(op_id)
+        return result
+    
+    def operations(self) -> List[OperationLog]:
+        return [self._load(data) for (data,) in
+                self._conn.execute("SELECT data FROM operations ORDER BY seq")]
+    
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM operations").fetchone()[0]
+    
+    def clear(self):
+        with self._conn:
+            self._conn.execute("DELETE FROM lineage")
+            self._conn.execute("DELETE FROM operations")
+    
+    def close(self):
+        self._conn.close()
+
+
+class ProvenanceManager:
+    """
+    管理操作历史和数据血缘
+    
+    操作只追加不修改（撤销只改状态），按 op_id 和 (对象类型, 对象ID) 建索引：
+    记录、撤销标记、按ID查找都是O(1)，血缘查询只与该对象相关的操作数有关。
+    指定 db_path 时使用本地SQLite存储，长期项目的操作历史不必常驻内存。
+    """
+    
+    def __init__(self, db_path: Optional[str] = None):
+        """
+        Args:
+            db_path: SQLite数据库路径；None 时存于内存
+        """
+        self._store = _SQLiteOperationStore(db_path) if db_path else _MemoryOperationStore()
     
     def record_operation(self, op_log: OperationLog):
         """
@@ -56,40 +214,23 @@ class ProvenanceManager:
         Args:
             op_log: 操作日志
         """
-        self._operations.append(op_log)
-        self._update_lineage(op_log)
-    
-    def _update_lineage(self, op_log: OperationLog):
-        """更新对象血缘关系"""
-        # 记录输入对象的血缘
-        for key, value in op_log.inputs.items():
-            if key.endswith('_id') and isinstance(value, int):
-                obj_type = key.replace('_id', '')
-                self._add_to_lineage(obj_type, value, op_log.op_id)
-            elif key.endswith('_ids') and isinstance(value, list):
-                obj_type = key.replace('_ids', '').rstrip('s')  # data_ids -> data
-                for obj_id in value:
-                    if isinstance(obj_id, int):
-                        self._add_to_lineage(obj_type, obj_id, op_log.op_id)
-        
-        # 记录输出对象的血缘
-        for key, value in op_log.outputs.items():
-            if key.endswith('_id') and isinstance(value, int):
-                obj_type = key.replace('_id', '')
-                self._add_to_lineage(obj_type, value, op_log.op_id)
-            elif key.endswith('_ids') and isinstance(value, list):
-                obj_type = key.replace('_ids', '').rstrip('s')
-                for obj_id in value:
-                    if isinstance(obj_id, int):
-                        self._add_to_lineage(obj_type, obj_id, op_log.op_id)
-    
-    def _add_to_lineage(self, obj_type: str, obj_id: int, op_id: str):
-        """添加对象到血缘记录"""
-        key = (obj_type, obj_id)
-        if key not in self._object_lineage:
-            self._object_lineage[key] = []
-        if op_id not in self._object_lineage[key]:
-            self._object_lineage[key].append(op_id)
+        self._store.append(op_log, self._object_keys(op_log))
+    
+    @staticmethod
+    def _object_keys(op_log: OperationLog) -> List[ObjectKey]:
+        """操作涉及的对象（输入与输出，去重保序）"""
+        keys: Dict[ObjectKey, None] = {}
+        for params in (op_log.inputs, op_log.outputs):
+            for key, value in params.items():
+                if key.endswith('_id') and isinstance(value, int):
+                    obj_type = key.replace('_id', '')
+                    keys[(obj_type, value)] = None
+                elif key.endswith('_ids') and isinstance(value, list):
+                    obj_type = key.replace('_ids', '').rstrip('s')  # data_ids -> data
+                    for obj_id in value:
+                        if isinstance(obj_id, int):
+                            keys[(obj_type, obj_id)] = None
+        return list(keys)
     
     def get_lineage(self, obj_type: str, obj_id: int) -> List[OperationLog]:
         """
@@ -102,13 +243,11 @@ class ProvenanceManager:
         Returns:
             影响该对象的所有操作日志（按时间顺序）
         """
-        key = (obj_type, obj_id)
-        op_ids = self._object_lineage.get(key, [])
-        return [op for op in self._operations if op.op_id in op_ids]
+        return self._store.lineage((obj_type, obj_id))
     
     def get_all_operations(self) -> List[OperationLog]:
         """获取所有操作记录"""
-        return self._operations.copy()
+        return self._store.operations()
     
     def get_all_logs(self) -> List[Dict[str, Any]]:
         """获取所有操作日志（字典格式，用于显示）"""
@@ -123,21 +262,19 @@ class ProvenanceManager:
                 'status': op.status,
                 'reverted': op.reverted
             }
-            for op in self._operations
+            for op in self._store.operations()
         ]
     
     def get_operation_by_id(self, op_id: str) -> Optional[OperationLog]:
         """根据ID获取操作记录"""
-        for op in self._operations:
-            if op.op_id == op_id:
-                return op
-        return None
+        return self._store.get(op_id)
     
     def mark_reverted(self, op_id: str):
         """标记操作已被撤销"""
-        op = self.get_operation_by_id(op_id)
-        if op:
-            op.status = 'reverted'
+        self._store.mark_reverted(op_id)
+    
+    def __len__(self) -> int:
+        return len(self._store)
     
     def export_lineage(self, obj_type: str, obj_id: int, format: str = 'json') -> str:
         """
@@ -184,13 +321,13 @@ class ProvenanceManager:
             格式化的历史信息
         """
         if format == 'json':
-            return json.dumps([op.to_dict() for op in self._operations], 
+            return json.dumps([op.to_dict() for op in self._store.operations()], 
                             indent=2, ensure_ascii=False)
         
         elif format == 'text':
             lines = ["操作历史"]
             lines.append("=" * 60)
-            for i, op in enumerate(self._operations, 1):
+            for i, op in enumerate(self._store.operations(), 1):
                 lines.append(f"\n{i}. {op.description}")
                 lines.append(f"   时间: {op.timestamp}")
                 lines.append(f"   操作: {op.op_type}")
@@ -202,30 +339,28 @@ class ProvenanceManager:
     
     def clear(self):
         """清空所有记录"""
-        self._operations.clear()
-        self._object_lineage.clear()
+        self._store.clear()
+    
+    def close(self):
+        """关闭存储（SQLite）"""
+        self._store.close()
     
     def save_to_file(self, file_path: str):
         """保存到JSON文件"""
         data = {
-            'operations': [op.to_dict() for op in self._operations],
+            'operations': [op.to_dict() for op in self._store.operations()],
             'object_lineage': {
-                f"{k[0]}_{k[1]}": v for k, v in self._object_lineage.items()
+                f"{k[0]}_{k[1]}": v for k, v in self._store.lineage_op_ids().items()
             }
         }
         with open(file_path, 'w', encoding='utf-8') as f:
             json.dump(data, f, indent=2, ensure_ascii=False)
     
     def load_from_file(self, file_path: str):
-        """从JSON文件加载"""
+        """从JSON文件加载（对象索引按操作内容重建）"""
         with open(file_path, 'r', encoding='utf-8') as f:
             data = json.load(f)
         
-        self._operations = [OperationLog.from_dict(op) for op in data['operations']]
-        
-        self._object_lineage = {}
-        for key_str, op_ids in data['object_lineage'].items():
-            obj_type, obj_id_str = key_str.rsplit('_', 1)
-            obj_id = int(obj_id_str)
-            self._object_lineage[(obj_type, obj_id)] = op_ids
-
+        self._store.clear()
+        for op in data['operations']:
+            self.record_operation(OperationLog.from_dict(op))
@@ -0,0 +1,332 @@
+# -*- coding: utf-8 -*-
+"""
+依赖驱动的增量重新计算
+
+原始数据内容变化（DataManager.data_changed）时：
+1. 沿 LinkManager 的正向链接把所有下游对象（结果、拟合曲线、图表）标记为过期
+2. 只重新拟合受影响的结果，按拓扑顺序：上游结果完成后才开始下游结果
+3. 拟合在后台工作线程执行（JobManager，后台优先级，不挤占交互与批量任务），结果回到主线程后原地更新
+   结果参数与拟合曲线数据；拟合曲线更新本身又会触发其下游的重新计算
+4. 输入（方法 + 源数据内容）与上次相同的结果直接标记为最新；
+   之前算过的输入组合复用缓存的拟合输出，不再重新拟合
+
+对象以 (类型, ID) 元组标识，与 LinkManager.get_descendants() 的返回一致。
+
+触发入口只有 DataManager.update_dataframe()（发出 data_changed）。目前界面中还没有替换已有数据内容的操作
+（导入总是新建数据对象，撤销/重做恢复的是整个对象），因此实际只由本引擎更新拟合曲线时向下游传播；
+之后加入修剪、重新导入、单位换算等操作时须经 update_dataframe() 替换内容，不要直接给 Data.dataframe 赋值。
+"""
+import copy
+import hashlib
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+import pandas as pd
+from PySide6.QtCore import QObject, Qt, QTimer, Signal
+
+from .concrete_commands import fit_outputs, result_parameters
+
+
+Node = Tuple[str, Any]
+
+
+def input_digest(method: str, data) -> Optional[str]:
+    """
+    拟合输入的内容摘要（方法 + XY数据 + DataFrame）
+
+    数据无法提取XY时返回None
+    """
+    try:
+        x_data, y_data = data.get_xy_data(auto_sort=False)
+        df = data.dataframe
+    except Exception:
+        return None
+    h = hashlib.blake2b(digest_size=16)
+    h.update(method.encode('utf-8'))
+    for arr in (x_data, y_data):
+        h.update(np.ascontiguousarray(np.asarray(arr, dtype=float)).tobytes())
+    h.update(repr(list(df.columns)).encode('utf-8'))
+    h.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+class RecomputeEngine(QObject):
+    """
+    增量重新计算引擎
+
+    信号：
+        stale_changed: 过期对象集合变化
+        result_recomputed: 结果已更新 (result_id)
+        recompute_failed: 结果重新计算失败 (result_id, 错误信息)
+        figure_refreshed: 图表的所有上游都已更新 (figure_id)
+        recompute_finished: 本轮重新计算全部完成
+    """
+
+    stale_changed = Signal()
+    result_recomputed = Signal(int)
+    recompute_failed = Signal(int, str)
+    figure_refreshed = Signal(int)
+    recompute_finished = Signal()
+
+    # 后台任务完成（工作线程 → 主线程）：(结果节点, 输入摘要, 拟合结果, 错误)
+    _fit_done = Signal(object, object, object, object)
+
+    # 缓存的拟合输出数（按输入摘要，最近最少使用淘汰）
+    CACHE_SIZE = 32
+
+    def __init__(self, data_manager, result_manager, figure_manager, link_manager,
+                 use_process: bool = False, parent=None):
+        """
+        参数:
+            use_process: 拟合在进程池中执行（默认线程池）
+        """
+        super().__init__(parent)
+        self.data_manager = data_manager
+        self.result_manager = result_manager
+        self.figure_manager = figure_manager
+        self.link_manager = link_manager
+        self.use_process = use_process
+
+        self._stale: Set[Node] = set()
+        self._failed: Dict[Node, str] = {}
+        self._in_flight: Dict[Node, str] = {}  # 结果 → 正在计算的输入摘要
+        self._rerun: Set[Node] = set()  # 计算期间输入又变化的结果
+        self._digests: Dict[int, str] = {}  # result_id → 当前参数对应的输入摘要
+        self._cache: 'OrderedDict[str, Dict[str, Any]]' = OrderedDict()
+        self._pump_scheduled = False
+        self.stats = {'refit': 0, 'reused': 0, 'unchanged': 0, 'failed': 0}
+
+        self._fit_done.connect(self._on_fit_done, Qt.QueuedConnection)
+        data_manager.data_changed.connect(self.mark_changed)
+        link_manager.link_created.connect(self._on_link_created)
+
+    # ========== 公共接口 ==========
+
+    def mark_changed(self, data_id: int):
+        """数据内容已变化：下游对象标记为过期并安排重新计算"""
+        downstream = self.link_manager.get_descendants('data', data_id)
+        if not downstream:
+            return
+        for node in downstream:
+            self._failed.pop(node, None)
+            if node in self._in_flight:
+                self._rerun.add(node)
+        self._stale.update(downstream)
+        print(f"[RecomputeEngine] data:{data_id} 变化，{len(downstream)} 个下游对象过期")
+        self.stale_changed.emit()
+        self._schedule()
+
+    def is_stale(self, obj_type: str, obj_id: Any) -> bool:
+        """对象是否过期（等待重新计算或重新计算失败）"""
+        node = (obj_type, obj_id)
+        return node in self._stale or node in self._failed
+
+    def get_stale(self) -> List[Node]:
+        """所有过期对象"""
+        return sorted(set(self._stale) | set(self._failed), key=str)
+
+    def is_busy(self) -> bool:
+        """是否还有待计算或计算中的结果"""
+        return bool(self._in_flight) or self._pump_scheduled or any(
+            node[0] == 'result' for node in self._stale)
+
+    def reset(self):
+        """清空状态（新建/加载会话后对象ID不再对应）"""
+        self._stale.clear()
+        self._failed.clear()
+        self._rerun.update(self._in_flight)
+        self._digests.clear()
+        self._cache.clear()
+        self.stale_changed.emit()
+
+    # ========== 调度 ==========
+
+    def _schedule(self):
+        """合并同一轮事件中的多次变化"""
+        if not self._pump_scheduled:
+            self._pump_scheduled = True
+            QTimer.singleShot(0, self._pump)
+
+    def _pending_upstream(self, node: Node) -> bool:
+        """上游是否还有过期的结果（拓扑顺序：上游完成后才处理）"""
+        for ancestor in self.link_manager.get_ancestors(*node):
+            if ancestor[0] == 'result' and (ancestor in self._stale or ancestor in self._in_flight):
+                return True
+        return False
+
+    def _pump(self):
+        """启动所有上游已就绪的结果，刷新上游已全部更新的图表"""
+        self._pump_scheduled = False
+        for node in sorted(self._stale, key=str):
+            if node[0] != 'result' or node in self._in_flight:
+                continue
+            if not self._pending_upstream(node):
+                self._start(node)
+
+        refreshed = False
+        for node in [n for n in self._stale if n[0] != 'result']:
+            if self._pending_upstream(node):
+                continue
+            self._stale.discard(node)
+            refreshed = True
+            if node[0] == 'figure':
+                figure = self.figure_manager.get_figure(node[1])
+                if figure is not None:
+                    figure.figure_updated.emit()
+                    self.figure_refreshed.emit(node[1])
+        if refreshed:
+            self.stale_changed.emit()
+        if not self._stale and not self._in_flight:
+            print(f"[RecomputeEngine] 重新计算完成: {self.stats}")
+            self.recompute_finished.emit()
+
+    def _start(self, node: Node):
+        """重新计算一个结果：输入未变直接完成，命中缓存直接应用，否则提交后台拟合"""
+        result_id = node[1]
+        result = self.result_manager.get_result(result_id)
+        if result is None:
+            self._stale.discard(node)
+            return
+        data = self._source_data(result_id)
+        if data is None:
+            self._fail(node, "结果的源数据不唯一或已删除，无法自动重新计算")
+            return
+        digest = input_digest(result.method, data)
+        if digest is None:
+            self._fail(node, "无法从源数据提取XY")
+            return
+
+        if self._digests.get(result_id) == digest:
+            self.stats['unchanged'] += 1
+            self._stale.discard(node)
+            return
+        cached = self._cache.get(digest)
+        if cached is not None:
+            self._cache.move_to_end(digest)
+            self.stats['reused'] += 1
+            self._apply(node, data, cached, digest)
+            return
+
+        validation = data.validate_xy_extraction()
+        if 'error' in validation or validation.get('valid_both', 0) < 3:
+            self._fail(node, validation.get('error', "有效数据点不足"))
+            return
+        x_data, y_data = data.get_xy_data(auto_sort=False)
+        self._in_flight[node] = digest
+        self._submit(node, digest, result.method, x_data, y_data, data.dataframe)
+
+    def _source_data(self, result_id):
+        """结果唯一的源数据（fitting_output 链接中类型为 data 的源）；不唯一或已删除时为None"""
+        sources = [s for s in self.link_manager.get_sources('result', result_id, link_type='fitting_output')
+                   if s[0] == 'data']
+        if len(sources) != 1:
+            return None
+        return self.data_manager.get_data(sources[0][1])
+
+    def _submit(self, node: Node, digest: str, method: str, x_data, y_data, dataframe):
+        """提交后台拟合；回调在工作线程，经信号转回主线程"""
+        from src.utils.job_manager import JobManager
+        from src.utils.job_tasks import run_fit_task
+
+        JobManager.instance().submit_with_callbacks(
+            run_fit_task, method, x_data, y_data, dataframe,
+            on_done=lambda job_id, res: self._fit_done.emit(node, digest, res, None),
+            on_fail=lambda job_id, err: self._fit_done.emit(node, digest, None, err),
+            use_process=self.use_process,
+            priority=JobManager.PRIORITY_BACKGROUND)
+
+    def _on_fit_done(self, node: Node, digest: str, fit_result, error):
+        self._in_flight.pop(node, None)
+        if node in self._rerun:
+            # 计算期间输入又变化：丢弃本次结果，按最新输入重新计算
+            self._rerun.discard(node)
+            self._schedule()
+            return
+        if node not in self._stale:
+            self._schedule()
+            return
+        if error is None and not (fit_result or {}).get('success'):
+            error = (fit_result or {}).get('error', '拟合失败')
+        if error is not None:
+            self._fail(node, str(error))
+            self._schedule()
+            return
+
+        result = self.result_manager.get_result(node[1])
+        data = self._source_data(node[1])
+        if result is None or data is None:
+            self._stale.discard(node)
+            self._schedule()
+            return
+        x_data, _ = data.get_xy_data(auto_sort=False)
+        outputs = fit_outputs(fit_result, x_data)
+        self._cache[digest] = outputs
+        while len(self._cache) > self.CACHE_SIZE:
+            self._cache.popitem(last=False)
+        self.stats['refit'] += 1
+        self._apply(node, data, outputs, digest)
+        self._schedule()
+
+    def _fail(self, node: Node, error: str):
+        self._stale.discard(node)
+        self._failed[node] = error
+        self.stats['failed'] += 1
+        print(f"[RecomputeEngine] {node[0]}:{node[1]} 重新计算失败: {error}")
+        self.recompute_failed.emit(node[1], error)
+        self.stale_changed.emit()
+
+    # ========== 应用输出 ==========
+
+    def _apply(self, node: Node, data, outputs: Dict[str, Any], digest: str):
+        """原地更新结果参数、链接元数据与拟合曲线数据"""
+        result_id = node[1]
+        result = self.result_manager.get_result(result_id)
+        parameters = outputs['parameters']
+        stats = outputs['statistics']
+        result.set_parameters(result_parameters(data.name, result.method, outputs))
+        result.set_statistics(rmse=stats.get('rmse'))
+
+        source_id = result.get_data_source()
+        link = self.link_manager.get_link_info('data', source_id, 'result', result_id)
+        if link is not None:
+            link.setdefault('metadata', {}).update({
+                'fit_time': datetime.now().isoformat(),
+                'parameters': copy.deepcopy(parameters),
+                'rmse': stats.get('rmse')
+            })
+
+        self._digests[result_id] = digest
+        self._stale.discard(node)
+        print(f"[RecomputeEngine] result:{result_id} 已更新")
+        self.result_recomputed.emit(result_id)
+
+        # 拟合曲线：替换内容（保留元数据标记），其下游由 data_changed 继续传播
+        if outputs.get('fitted_df') is not None:
+            for target_type, target_id in self.link_manager.get_targets('result', result_id,
+                                                                        link_type='result_data'):
+                fitted = self.data_manager.get_data(target_id)
+                if target_type != 'data' or fitted is None:
+                    continue
+                fitted_df = outputs['fitted_df'].copy()
+                fitted_df.attrs.update(fitted.dataframe.attrs)
+                self.data_manager.update_dataframe(target_id, fitted_df)
+                self._stale.discard((target_type, target_id))
+
+    # ========== 输入记录 ==========
+
+    def _on_link_created(self, source_type: str, source_id, target_type: str, target_id):
+        """新拟合产生时记录其输入摘要，之后输入未变的变化不触发重新拟合"""
+        if source_type != 'data' or target_type != 'result':
+            return
+        info = self.link_manager.get_link_info(source_type, source_id, target_type, target_id)
+        if not info or info.get('link_type') != 'fitting_output':
+            return
+        data = self.data_manager.get_data(source_id)
+        result = self.result_manager.get_result(target_id)
+        if data is None or result is None or not data.is_dataframe_loaded():
+            return
+        digest = input_digest(result.method, data)
+        if digest is not None:
+            self._digests[target_id] = digest
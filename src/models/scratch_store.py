@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+"""
+本地暂存区 - 撤销历史中大数据的落盘存储
+
+命令历史超出内存预算时，较早命令持有的DataFrame等大对象序列化到临时目录，
+只在这些命令真正被撤销/重做时才读回（见 CommandManager）。
+"""
+import os
+import atexit
+import pickle
+import shutil
+import tempfile
+import threading
+import uuid
+from typing import Any, Dict, Optional
+
+
+class ScratchStore:
+    """按键存取的落盘对象存储（pickle），临时目录在首次写入时创建"""
+
+    def __init__(self, directory: Optional[str] = None):
+        """
+        参数:
+            directory: 存放目录；None 时在系统临时目录下创建，清空时一并删除
+        """
+        self._directory = directory
+        self._owns_directory = directory is None
+        self._sizes: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def _dir(self) -> str:
+        if self._directory is None:
+            self._directory = tempfile.mkdtemp(prefix='spr_scratch_')
+        os.makedirs(self._directory, exist_ok=True)
+        return self._directory
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self._dir(), f"{key}.pkl")
+
+    def put(self, obj: Any) -> str:
+        """写入对象，返回键"""
+        key = uuid.uuid4().hex
+        path = self._path(key)
+        with open(path, 'wb') as f:
+            pickle.dump(obj, f, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._sizes[key] = os.path.getsize(path)
+        return key
+
+    def get(self, key: str, discard: bool = True) -> Any:
+        """读回对象；discard为True时读取后删除"""
+        with open(self._path(key), 'rb') as f:
+            obj = pickle.load(f)
+        if discard:
+            self.discard(key)
+        return obj
+
+    def contains(self, key: str) -> bool:
+        with self._lock:
+            return key in self._sizes
+
+    def discard(self, key: Optional[str]):
+        """删除对象（不存在时忽略）"""
+        if key is None:
+            return
+        with self._lock:
+            known = self._sizes.pop(key, None)
+        if known is None:
+            return
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    @property
+    def bytes_on_disk(self) -> int:
+        with self._lock:
+            return sum(self._sizes.values())
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._sizes)
+
+    def clear(self):
+        """删除全部对象（自建的临时目录一并删除）"""
+        with self._lock:
+            keys = list(self._sizes)
+            self._sizes.clear()
+        if self._directory is None:
+            return
+        if self._owns_directory:
+            shutil.rmtree(self._directory, ignore_errors=True)
+            self._directory = None
+        else:
+            for key in keys:
+                try:
+                    os.remove(self._path(key))
+                except OSError:
+                    pass
+
+
+_default_store: Optional[ScratchStore] = None
+
+
+def default_scratch_store() -> ScratchStore:
+    """进程内共享的暂存区（退出时清理）"""
+    global _default_store
+    if _default_store is None:
+        _default_store = ScratchStore()
+        atexit.register(_default_store.clear)
+    return _default_store
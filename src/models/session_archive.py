@@ -0,0 +1,271 @@
+# -*- coding: utf-8 -*-
+"""
+会话归档（.sprx）读写 - 增量写入
+
+布局：
+- *.json 元信息成员：内容变化时才重写
+- data/<内容哈希>.<parquet|csv> 数据帧成员：按内容寻址，内容相同只存一份，写入后不再改变；
+  parquet本身已压缩，以STORED方式存放，读取时可直接定位，无需解压整个归档
+
+写入策略：
+1. 增量追加：目标文件就是上次保存/加载的归档且未被外部修改时，
+   只把新增/变化的成员追加到文件末尾，再写新的中央目录；
+   旧中央目录与被替换的成员成为死区，不再被引用
+2. 整体重写：首次保存、另存为、外部修改或死区超过一半时，
+   写到同目录临时文件后原子替换；已有的数据帧成员直接从旧归档拷贝，不重新编码
+
+追加前会写入 <文件>.pending 记录原始长度，追加中断时下次打开会截断回原状态。
+
+增量追加需要改动 zipfile 的内部状态（中央目录位置 start_dir、_didModify、NameToInfo/filelist），
+标准库没有对应的公开接口，因此只在验证过的 Python 版本上启用（APPEND_SUPPORTED）；
+其它版本，或 ZipFile 缺少这些属性时，一律整体重写。
+"""
+import os
+import sys
+import time
+import zlib
+import shutil
+import zipfile
+import tempfile
+from pathlib import Path
+from typing import Callable, Dict, Optional, Set, Tuple, Union
+
+
+# 死区占比超过该值时整体重写（压实）
+COMPACT_DEAD_RATIO = 0.5
+# 成员流式拷贝的块大小
+COPY_CHUNK_SIZE = 1 << 20
+
+MemberValue = Union[bytes, Callable[[], bytes]]
+
+# 增量追加验证过的 Python 版本范围（含两端）
+APPEND_TESTED_VERSIONS = ((3, 8), (3, 13))
+APPEND_SUPPORTED = APPEND_TESTED_VERSIONS[0] <= sys.version_info[:2] <= APPEND_TESTED_VERSIONS[1]
+# 增量追加用到的 ZipFile 内部属性
+_APPEND_INTERNALS = ('start_dir', '_didModify', 'NameToInfo', 'filelist', 'fp')
+
+
+def archive_signature(path) -> Optional[Tuple[int, int]]:
+    """文件签名 (大小, mtime_ns)，用于判断归档是否被外部修改"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+def _pending_path(path: Path) -> Path:
+    return path.with_name(path.name + '.pending')
+
+
+def recover_interrupted_append(path) -> bool:
+    """
+    若上次追加写入中断（存在 .pending），截断回追加前的长度
+
+    返回:
+        是否执行了恢复
+    """
+    path = Path(path)
+    pending = _pending_path(path)
+    if not pending.exists():
+        return False
+    try:
+        original_size = int(pending.read_text(encoding='utf-8').strip())
+        if path.exists() and path.stat().st_size > original_size:
+            with open(path, 'r+b') as f:
+                f.truncate(original_size)
+            print(f"[SessionArchive] 检测到中断的增量保存，已恢复: {path}")
+        pending.unlink()
+        return True
+    except Exception as e:
+        print(f"[SessionArchive] 恢复中断的增量保存失败: {e}")
+        return False
+
+
+def list_members(path) -> Set[str]:
+    """归档中的成员名集合（文件不存在或损坏时为空）"""
+    try:
+        with zipfile.ZipFile(path, 'r') as zf:
+            return set(zf.namelist())
+    except (OSError, zipfile.BadZipFile):
+        return set()
+
+
+def _compress_type(name: str) -> int:
+    # parquet已压缩，再DEFLATE只浪费CPU
+    if name.endswith('.parquet'):
+        return zipfile.ZIP_STORED
+    return zipfile.ZIP_DEFLATED
+
+
+def _member_info(name: str) -> zipfile.ZipInfo:
+    zi = zipfile.ZipInfo(name, date_time=time.localtime(time.time())[:6])
+    zi.compress_type = _compress_type(name)
+    return zi
+
+
+def read_member(path, name: str) -> bytes:
+    """直接从归档读取单个成员（不解压其它成员）"""
+    with zipfile.ZipFile(path, 'r') as zf:
+        return zf.read(name)
+
+
+def _live_bytes(zf: zipfile.ZipFile, names) -> int:
+    total = 0
+    for name in names:
+        zi = zf.NameToInfo.get(name)
+        if zi is not None:
+            total += 30 + len(zi.filename.encode('utf-8')) + len(zi.extra) + zi.compress_size
+    return total
+
+
+def _same_content(zi: zipfile.ZipInfo, data: bytes) -> bool:
+    return zi.file_size == len(data) and zi.CRC == (zlib.crc32(data) & 0xffffffff)
+
+
+def write_archive(path, members: Dict[str, MemberValue],
+                  base_path=None, base_signature: Optional[Tuple[int, int]] = None) -> Dict[str, int]:
+    """
+    写入会话归档
+
+    参数:
+        path: 目标 .sprx 路径
+        members: 成员名 → 内容
+                 bytes：元信息成员，内容不同才重写
+                 无参函数：按内容寻址的数据帧成员，归档中已有同名成员时直接复用，否则调用生成
+        base_path: 上次保存/加载的归档路径（用于复用已有成员）
+        base_signature: 上次保存/加载后记录的文件签名；与当前签名一致才允许增量追加
+    返回:
+        统计 {'written': 新写入成员数, 'reused': 复用成员数, 'bytes_written': 写入字节数, 'compacted': 0/1}
+    """
+    path = Path(path)
+    base = Path(base_path) if base_path else None
+    if base is not None:
+        recover_interrupted_append(base)
+
+    can_append = (
+        APPEND_SUPPORTED
+        and base is not None
+        and base.exists()
+        and os.path.abspath(base) == os.path.abspath(path)
+        and base_signature is not None
+        and archive_signature(path) == tuple(base_signature)
+    )
+    if can_append:
+        try:
+            stats = _append(path, members)
+            if stats is not None:
+                return stats
+        except zipfile.BadZipFile:
+            pass
+    source = base if base is not None and base.exists() else None
+    return _rewrite(path, members, source)
+
+
+def _append(path: Path, members: Dict[str, MemberValue]) -> Optional[Dict[str, int]]:
+    """增量追加；死区过大或 zipfile 内部结构不符时返回None由调用方整体重写"""
+    stats = {'written': 0, 'reused': 0, 'bytes_written': 0, 'compacted': 0}
+    original_size = path.stat().st_size
+    pending = _pending_path(path)
+
+    with zipfile.ZipFile(path, 'a') as zf:
+        if not all(hasattr(zf, name) for name in _APPEND_INTERNALS):
+            return None
+        existing = set(zf.NameToInfo)
+        keep = existing & set(members)
+        # 预估压实需求：被丢弃/替换的成员 + 旧中央目录都成为死区
+        replaced = set()
+        for name in keep:
+            value = members[name]
+            if isinstance(value, bytes) and not _same_content(zf.NameToInfo[name], value):
+                replaced.add(name)
+        live = _live_bytes(zf, keep - replaced)
+        if original_size > 0 and live < original_size * (1 - COMPACT_DEAD_RATIO):
+            # 不修改，直接关闭（_didModify为False不会写中央目录）
+            return None
+
+        pending.write_text(str(original_size), encoding='utf-8')
+        # 新成员写在旧中央目录之后，追加中断时旧目录仍完整，可截断恢复
+        zf.fp.seek(0, os.SEEK_END)
+        zf.start_dir = zf.fp.tell()
+        zf._didModify = True
+
+        for name in existing - keep:
+            _drop_entry(zf, name)
+        for name in replaced:
+            _drop_entry(zf, name)
+
+        for name, value in members.items():
+            if name in keep and name not in replaced:
+                stats['reused'] += 1
+                continue
+            data = value if isinstance(value, bytes) else value()
+            zf.writestr(_member_info(name), data)
+            stats['written'] += 1
+            stats['bytes_written'] += len(data)
+
+    _fsync(path)
+    try:
+        pending.unlink()
+    except OSError:
+        pass
+    return stats
+
+
+def _drop_entry(zf: zipfile.ZipFile, name: str):
+    zi = zf.NameToInfo.pop(name, None)
+    if zi is not None:
+        zf.filelist.remove(zi)
+
+
+def _rewrite(path: Path, members: Dict[str, MemberValue], source: Optional[Path]) -> Dict[str, int]:
+    """整体重写到临时文件后原子替换"""
+    stats = {'written': 0, 'reused': 0, 'bytes_written': 0, 'compacted': 1 if source is not None else 0}
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(suffix='.tmp', prefix=path.name + '.', dir=path.parent)
+    os.close(fd)
+    try:
+        src = None
+        try:
+            if source is not None:
+                src = zipfile.ZipFile(source, 'r')
+        except (OSError, zipfile.BadZipFile):
+            src = None
+        try:
+            with zipfile.ZipFile(tmp, 'w') as zf:
+                for name, value in members.items():
+                    if not isinstance(value, bytes) and src is not None and name in src.NameToInfo:
+                        # 内容寻址成员：从旧归档流式拷贝，不重新编码，也不整块读入内存
+                        with src.open(name) as fin, zf.open(_member_info(name), 'w', force_zip64=True) as fout:
+                            shutil.copyfileobj(fin, fout, COPY_CHUNK_SIZE)
+                        stats['reused'] += 1
+                        stats['bytes_written'] += src.NameToInfo[name].file_size
+                    else:
+                        data = value if isinstance(value, bytes) else value()
+                        zf.writestr(_member_info(name), data)
+                        stats['written'] += 1
+                        stats['bytes_written'] += len(data)
+        finally:
+            if src is not None:
+                src.close()
+        _fsync(tmp)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+    try:
+        _pending_path(path).unlink()
+    except OSError:
+        pass
+    return stats
+
+
+def _fsync(path):
+    try:
+        with open(path, 'rb') as f:
+            os.fsync(f.fileno())
+    except OSError:
+        pass
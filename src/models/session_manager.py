@@ -9,13 +9,17 @@
 4. 自动保存机制
 5. 跟踪修改状态
 """
-from PySide6.QtCore import QObject, Signal, QTimer
-from typing import Optional, Dict, Any
+from PySide6.QtCore import QObject, Signal, QTimer, QRunnable, QThreadPool
+from typing import Optional, Dict, Any, Tuple
 from pathlib import Path
+import io
 import json
+import time
+import zlib
 import zipfile
-import tempfile
-import shutil
+import hashlib
+import weakref
+import threading
 from datetime import datetime
 
 from .data_model import DataManager, Data
@@ -23,6 +27,65 @@ from .figure_model import FigureManager
 from .result_model import ResultManager
 from .project_model import ProjectManager
 from .link_manager import LinkManager
+from .session_archive import write_archive, archive_signature, read_member, recover_interrupted_append
+from .command_journal import CommandJournal, journal_path_for, archive_fingerprint
+
+
+def _frame_content_hash(df) -> str:
+    """DataFrame内容哈希（列名/类型/值，不含index），用作数据帧成员名"""
+    import pandas as pd
+    h = hashlib.sha256()
+    header = [[repr(c), str(t)] for c, t in zip(df.columns, df.dtypes)]
+    h.update(json.dumps(header, ensure_ascii=False).encode('utf-8'))
+    try:
+        h.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    except TypeError:
+        # 含不可哈希对象的列，退化为文本
+        h.update(df.to_csv(index=False).encode('utf-8'))
+    return h.hexdigest()[:32]
+
+
+def _encode_frame(df) -> Tuple[str, bytes]:
+    """编码数据帧：parquet优先，失败则csv；返回(扩展名, 字节)"""
+    buf = io.BytesIO()
+    try:
+        df.to_parquet(buf, index=False)
+        return 'parquet', buf.getvalue()
+    except Exception:
+        return 'csv', df.to_csv(index=False).encode('utf-8')
+
+
+def _snapshot_frame(df):
+    """
+    数据帧快照：写时复制模式下浅拷贝即与原对象隔离（之后原对象的原地修改不会影响快照），
+    否则深拷贝（pandas 2.x 默认未开启写时复制；只对上次保存后变化的数据帧调用，见 _take_snapshot）
+    """
+    import pandas as pd
+    try:
+        cow = int(pd.__version__.split('.')[0]) >= 3 or pd.options.mode.copy_on_write is True
+    except Exception:
+        cow = False
+    return df.copy(deep=not cow)
+
+
+class _SaveRunnable(QRunnable):
+    """后台写入会话快照"""
+    
+    def __init__(self, manager, snapshot):
+        super().__init__()
+        self.manager = manager
+        self.snapshot = snapshot
+    
+    def run(self):
+        try:
+            result = SessionManager._write_snapshot(self.snapshot)
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
+            result = {'error': str(e), 'file_path': str(self.snapshot['file_path'])}
+        with self.manager._bg_lock:
+            self.manager._bg_result = result
+        self.manager._background_save_finished.emit()
 
 
 class SessionManager(QObject):
@@ -43,6 +106,8 @@ class SessionManager(QObject):
     session_saved = Signal(str)
     session_loaded = Signal(str)
     auto_save_triggered = Signal()
+    # 后台保存完成（工作线程 → GUI线程）
+    _background_save_finished = Signal()
     
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -61,6 +126,33 @@ class SessionManager(QObject):
         self.created_time = datetime.now()
         self.last_save_time: Optional[datetime] = None
         
+        # 增量保存状态：上次保存/加载的归档及其签名，数据帧 → 已存成员 的记录
+        self._archive_path: Optional[str] = None
+        self._archive_signature: Optional[Tuple[int, int]] = None
+        self._archive_members: set = set()
+        self._frame_blobs: Dict[int, Tuple[Any, int, str]] = {}  # data_id -> (df弱引用, 版本号, 成员名)
+        # 延迟加载：尚未读取DataFrame的数据 data_id -> data.json中的元信息（含成员名'file'）
+        self._lazy_frames: Dict[int, Dict[str, Any]] = {}
+        
+        # 命令日志：两次保存之间每个命令完成后追加变化，崩溃后从上次保存 + 日志恢复
+        self.journal_enabled = True
+        self._journal: Optional[CommandJournal] = None
+        self._journal_digests: Dict[str, int] = {}  # 元信息成员 → 最近写入内容的crc32
+        self._journal_blobs: Dict[int, Tuple[Any, int, str]] = {}  # 同 _frame_blobs，含日志中的数据帧
+        self._journal_members: set = set()  # 日志中已有的数据帧成员
+        # 上一条日志之后可能变化的元信息成员（由各Manager的信号标记），只重新序列化这些
+        self._journal_dirty: set = set()
+        self._journal_file_map: Optional[Dict[str, str]] = None  # 上一条日志中 data.json 的数据帧映射
+        
+        # 后台自动保存：单线程顺序写入；修改序号用于判断快照之后是否又有修改
+        self._save_pool = QThreadPool(self)
+        self._save_pool.setMaxThreadCount(1)
+        self._save_in_progress = False
+        self._bg_lock = threading.Lock()
+        self._bg_result: Optional[Dict[str, Any]] = None
+        self._modification_serial = 0
+        self._background_save_finished.connect(self._on_background_save_finished)
+        
         # 自动保存设置
         self.auto_save_enabled = True
         self.auto_save_interval = 300  # 秒（5分钟）
@@ -100,6 +192,28 @@ class SessionManager(QObject):
         # LinkManager
         self.link_manager.link_created.connect(self._on_link_modified)
         self.link_manager.link_removed.connect(self._on_link_modified)
+        
+        # 命令日志的脏标记：增删对象时项目的成员列表随之变化（命令直接修改 data_ids 等，不发信号）
+        dirty = self._mark_journal_dirty
+        self.data_manager.data_added.connect(lambda *_: dirty('data.json', 'projects.json'))
+        self.data_manager.data_removed.connect(lambda *_: dirty('data.json', 'projects.json'))
+        self.data_manager.data_changed.connect(lambda *_: dirty('data.json'))
+        self.figure_manager.figure_added.connect(lambda *_: dirty('figures.json', 'projects.json'))
+        self.figure_manager.figure_removed.connect(lambda *_: dirty('figures.json', 'projects.json'))
+        self.figure_manager.figure_updated.connect(lambda *_: dirty('figures.json'))
+        self.result_manager.result_added.connect(lambda *_: dirty('results.json', 'projects.json'))
+        self.result_manager.result_removed.connect(lambda *_: dirty('results.json', 'projects.json'))
+        self.result_manager.result_updated.connect(lambda *_: dirty('results.json'))
+        self.project_manager.project_added.connect(lambda *_: dirty('projects.json'))
+        self.project_manager.project_removed.connect(lambda *_: dirty('projects.json'))
+        self.project_manager.project_updated.connect(lambda *_: dirty('projects.json'))
+        self.project_manager.current_project_changed.connect(lambda *_: dirty('projects.json'))
+        self.link_manager.link_created.connect(lambda *_: dirty('links.json'))
+        self.link_manager.link_removed.connect(lambda *_: dirty('links.json'))
+    
+    def _mark_journal_dirty(self, *names: str):
+        """标记元信息成员在下一条日志中需要重新序列化"""
+        self._journal_dirty.update(names)
     
     def mark_modified(self, *args):
         """
@@ -108,6 +222,7 @@ class SessionManager(QObject):
         参数：
             *args: 接受任意参数（来自不同信号）
         """
+        self._modification_serial += 1
         if not self.is_modified:
             self.is_modified = True
             self.session_modified.emit()
@@ -124,11 +239,52 @@ class SessionManager(QObject):
     # ========== 自动保存 ==========
     
     def _on_auto_save(self):
-        """自动保存触发"""
+        """自动保存触发：GUI线程只取快照，序列化/压缩/写盘在后台线程完成"""
         if self.is_modified and self.current_file_path:
+            if self._save_in_progress:
+                print("[SessionManager] 上一次自动保存尚未完成，跳过")
+                return
             print("[SessionManager] 触发自动保存...")
             self.auto_save_triggered.emit()
-            self.save_to_file(self.current_file_path, auto_save=True)
+            self.save_in_background(self.current_file_path)
+    
+    def save_in_background(self, file_path: str) -> bool:
+        """
+        后台保存会话
+        
+        GUI线程上取一致快照（数据帧写时复制引用 + 各对象元信息），
+        之后的修改不会影响正在写入的文件；完成后发射 session_saved
+        
+        返回：
+            bool: 是否已提交（已有保存在进行时返回False）
+        """
+        if self._save_in_progress:
+            return False
+        try:
+            snapshot = self._take_snapshot(file_path)
+        except Exception as e:
+            print(f"[SessionManager] 创建保存快照失败: {e}")
+            return False
+        self._save_in_progress = True
+        self._save_pool.start(_SaveRunnable(self, snapshot))
+        return True
+    
+    def wait_for_background_save(self):
+        """等待进行中的后台保存完成并应用其结果"""
+        if self._save_in_progress:
+            self._save_pool.waitForDone()
+            self._on_background_save_finished()
+    
+    def _on_background_save_finished(self):
+        with self._bg_lock:
+            result, self._bg_result = self._bg_result, None
+        if result is None:
+            return
+        self._save_in_progress = False
+        if 'error' in result:
+            print(f"[SessionManager] 自动保存失败: {result['error']}")
+            return
+        self._apply_save_result(result, auto_save=True)
     
     def enable_auto_save(self, enabled: bool = True, interval: int = 300):
         """
@@ -169,109 +325,17 @@ class SessionManager(QObject):
             - results.json: 结果对象
             - projects.json: 项目对象
             - links.json: 链接关系
+            - data/<内容哈希>.parquet|csv: 数据帧（按内容寻址，相同内容只存一份）
+        
+        增量保存：
+            保存到上次保存/加载的同一文件时，只追加变化的成员（见 session_archive）
         """
         try:
-            file_path = Path(file_path)
-            
-            # 确保文件扩展名为.sprx
-            if file_path.suffix != '.sprx':
-                file_path = file_path.with_suffix('.sprx')
-            
-            print(f"[SessionManager] 正在保存会话到: {file_path}")
-            
-            # 创建临时目录
-            with tempfile.TemporaryDirectory() as temp_dir:
-                temp_path = Path(temp_dir)
-                
-                # 1. 保存manifest.json
-                manifest = self._create_manifest()
-                # 附加schema信息与要求文件
-                manifest.update({
-                    'schema_version': '2.0',
-                    'app': 'SPR Analysis',
-                    'required_files': [
-                        'manifest.json', 'data.json', 'figures.json',
-                        'results.json', 'projects.json', 'links.json'
-                    ]
-                })
-                with open(temp_path / 'manifest.json', 'w', encoding='utf-8') as f:
-                    json.dump(manifest, f, indent=2, ensure_ascii=False)
-                
-                # 2. 保存数据帧文件（parquet优先，失败则csv），并记录映射
-                (temp_path / 'data').mkdir(parents=True, exist_ok=True)
-                data_files_map = {}
-                for data_id, data in self.data_manager._data_dict.items():
-                    # 统一取可用的DataFrame
-                    df = getattr(data, 'dataframe', None)
-                    if df is None or getattr(df, 'empty', True):
-                        df = getattr(data, 'processed_data', None)
-                    if df is None or getattr(df, 'empty', True):
-                        continue
-                    # 先尝试parquet
-                    rel_name = f"data/{data_id}.parquet"
-                    abs_path = temp_path / rel_name
-                    ok = False
-                    try:
-                        df.to_parquet(abs_path, index=False)
-                        ok = True
-                    except Exception:
-                        # 退化为csv
-                        rel_name = f"data/{data_id}.csv"
-                        abs_path = temp_path / rel_name
-                        try:
-                            df.to_csv(abs_path, index=False)
-                            ok = True
-                        except Exception:
-                            ok = False
-                    if ok:
-                        data_files_map[str(data_id)] = rel_name
-
-                # 3. 保存数据对象索引（包含文件映射与元信息）
-                data_export = self._export_data_manager(file_map=data_files_map)
-                with open(temp_path / 'data.json', 'w', encoding='utf-8') as f:
-                    json.dump(data_export, f, indent=2, ensure_ascii=False)
-                
-                # 4. 保存图表对象
-                figures_export = self._export_figure_manager()
-                with open(temp_path / 'figures.json', 'w', encoding='utf-8') as f:
-                    json.dump(figures_export, f, indent=2, ensure_ascii=False)
-                
-                # 5. 保存结果对象
-                results_export = self._export_result_manager()
-                with open(temp_path / 'results.json', 'w', encoding='utf-8') as f:
-                    json.dump(results_export, f, indent=2, ensure_ascii=False)
-                
-                # 6. 保存项目对象
-                projects_export = self._export_project_manager()
-                with open(temp_path / 'projects.json', 'w', encoding='utf-8') as f:
-                    json.dump(projects_export, f, indent=2, ensure_ascii=False)
-                
-                # 7. 保存链接关系
-                links_export = self.link_manager.to_dict()
-                with open(temp_path / 'links.json', 'w', encoding='utf-8') as f:
-                    json.dump(links_export, f, indent=2, ensure_ascii=False)
-                
-                # 8. 创建ZIP文件
-                with zipfile.ZipFile(file_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-                    for file in temp_path.iterdir():
-                        zipf.write(file, file.name)
-                    # 写入子目录内容（如 data/*）
-                    for subdir in temp_path.iterdir():
-                        if subdir.is_dir():
-                            for p in subdir.rglob('*'):
-                                arcname = str(p.relative_to(temp_path))
-                                zipf.write(p, arcname)
-            
-            # 更新状态
-            self.current_file_path = str(file_path)
-            self.last_save_time = datetime.now()
-            self.clear_modified_flag()
-            
-            save_type = "自动保存" if auto_save else "手动保存"
-            print(f"[SessionManager] {save_type}成功: {file_path}")
-            
-            self.session_saved.emit(str(file_path))
-            
+            # 后台自动保存进行中时先等待其完成，避免两次写入交错
+            self.wait_for_background_save()
+            snapshot = self._take_snapshot(file_path)
+            result = self._write_snapshot(snapshot)
+            self._apply_save_result(result, auto_save=auto_save)
             return True
             
         except Exception as e:
@@ -280,6 +344,143 @@ class SessionManager(QObject):
             traceback.print_exc()
             return False
     
+    def _take_snapshot(self, file_path) -> Dict[str, Any]:
+        """
+        在GUI线程上取会话快照（不做编码/压缩/写盘）
+        
+        返回的快照只含不可变内容：数据帧写时复制引用、已序列化的元信息JSON，
+        可安全交给后台线程写入。上次保存后未变化的数据帧（同一对象、版本号未变、成员仍在归档中）
+        不拷贝，只按成员名沿用（快照中为None）；pandas 2.x 未开启写时复制时拷贝即深拷贝，
+        因此只拷贝变化的数据帧
+        """
+        file_path = Path(file_path)
+        
+        # 确保文件扩展名为.sprx
+        if file_path.suffix != '.sprx':
+            file_path = file_path.with_suffix('.sprx')
+        
+        frames = []
+        lazy_frames = {}
+        for data_id, data in self.data_manager._data_dict.items():
+            if self._is_lazy(data_id, data):
+                # 未读取的数据帧不物化，直接沿用归档中的成员
+                lazy_frames[data_id] = self._lazy_frames[data_id]['file']
+                continue
+            df = self._frame_of(data)
+            if df is None:
+                continue
+            version = self._frame_version(data)
+            saved = self._frame_blobs.get(data_id)
+            unchanged = (saved is not None and saved[0]() is df and saved[1] == version
+                         and saved[2] in self._archive_members)
+            frames.append((data_id, weakref.ref(df), version, None if unchanged else _snapshot_frame(df)))
+        
+        return {
+            'file_path': file_path,
+            'frames': frames,
+            'lazy_frames': lazy_frames,
+            # data.json 的文件映射要等数据帧成员规划完才知道，先保存不含映射的元信息
+            'data_export': json.loads(json.dumps(self._export_data_manager(), ensure_ascii=False, default=str)),
+            'json_members': self._metadata_members(),
+            'frame_blobs': dict(self._frame_blobs),
+            'archive_path': self._archive_path,
+            'archive_signature': self._archive_signature,
+            'archive_members': set(self._archive_members),
+            'modification_serial': self._modification_serial,
+        }
+    
+    @staticmethod
+    def _write_snapshot(snapshot: Dict[str, Any]) -> Dict[str, Any]:
+        """把快照编码并写入归档（可在后台线程执行，不访问任何Manager）"""
+        file_path = snapshot['file_path']
+        print(f"[SessionManager] 正在保存会话到: {file_path}")
+        
+        # 1. 数据帧成员：未变化的沿用已有成员，变化的按内容哈希命名，相同内容只存一份
+        existing = snapshot['archive_members'] if snapshot['archive_path'] else set()
+        source = snapshot['archive_path']
+        data_files_map, members, frame_blobs = SessionManager._plan_frame_members(
+            snapshot['frames'], snapshot['frame_blobs'], existing, source=source)
+        # 1.1 未读取的数据帧：成员原样保留（同一文件直接复用，另存为时从原归档流式拷贝）
+        for data_id, rel in snapshot.get('lazy_frames', {}).items():
+            data_files_map[str(data_id)] = rel
+            if rel not in members:
+                members[rel] = (lambda rel=rel: read_member(source, rel))
+        
+        # 2. manifest + 各对象索引
+        data_export = snapshot['data_export']
+        for info in data_export.get('data_list', []):
+            rel = data_files_map.get(str(info.get('id')))
+            if rel:
+                info['file'] = rel
+        members['data.json'] = SessionManager._json_bytes(data_export)
+        members.update(snapshot['json_members'])
+        
+        # 3. 写入归档：同一文件增量追加，否则整体重写（已有数据帧成员直接拷贝）
+        stats = write_archive(file_path, members,
+                              base_path=snapshot['archive_path'],
+                              base_signature=snapshot['archive_signature'])
+        print(f"[SessionManager] 写入 {stats['written']} 个成员，复用 {stats['reused']} 个，"
+              f"{stats['bytes_written'] / 1024:.1f} KB")
+        return {
+            'file_path': str(file_path),
+            'frame_blobs': frame_blobs,
+            'member_names': set(members),
+            'modification_serial': snapshot['modification_serial'],
+        }
+    
+    def _metadata_members(self, names=None) -> Dict[str, bytes]:
+        """
+        除 data.json 外的元信息成员
+        
+        参数:
+            names: 只导出其中的成员（manifest.json 总是导出）；None 导出全部
+        """
+        exporters = {
+            'figures.json': self._export_figure_manager,
+            'results.json': self._export_result_manager,
+            'projects.json': self._export_project_manager,
+            'links.json': self.link_manager.to_dict,
+        }
+        manifest = self._create_manifest()
+        # 附加schema信息与要求文件
+        manifest.update({
+            'schema_version': '2.0',
+            'app': 'SPR Analysis',
+            'required_files': [
+                'manifest.json', 'data.json', 'figures.json',
+                'results.json', 'projects.json', 'links.json'
+            ]
+        })
+        members = {'manifest.json': self._json_bytes(manifest)}
+        for name, export in exporters.items():
+            if names is None or name in names:
+                members[name] = self._json_bytes(export())
+        return members
+    
+    def _apply_save_result(self, result: Dict[str, Any], auto_save: bool = False):
+        """保存完成后（GUI线程）更新会话状态"""
+        file_path = result['file_path']
+        previous_journal = self._journal.path if self._journal is not None else None
+        self._frame_blobs = result['frame_blobs']
+        self._remember_archive(file_path, result['member_names'])
+        
+        # 更新状态
+        self.current_file_path = file_path
+        self.last_save_time = datetime.now()
+        # 快照之后又有修改时保留修改标志，并把这些修改记入以新归档为基础的日志
+        unchanged = result['modification_serial'] == self._modification_serial
+        if unchanged:
+            self.clear_modified_flag()
+        self._restart_journal(checkpoint=not unchanged)
+        if previous_journal is not None and (self._journal is None or previous_journal != self._journal.path):
+            # 另存为：原文件的日志已无用
+            CommandJournal(previous_journal).discard()
+        
+        save_type = "自动保存" if auto_save else "手动保存"
+        print(f"[SessionManager] {save_type}成功: {file_path}")
+        
+        self.session_saved.emit(file_path)
+    
     def load_from_file(self, file_path: str) -> bool:
         """
         从文件加载会话
@@ -298,52 +499,59 @@ class SessionManager(QObject):
                 return False
             
             print(f"[SessionManager] 正在加载会话: {file_path}")
+            self.wait_for_background_save()
+            self.discard_journal()
+            recover_interrupted_append(file_path)
             
-            # 创建临时目录
-            with tempfile.TemporaryDirectory() as temp_dir:
-                temp_path = Path(temp_dir)
-                
-                # 1. 解压ZIP文件
-                with zipfile.ZipFile(file_path, 'r') as zipf:
-                    zipf.extractall(temp_path)
-                # 1.1 校验包结构
-                if not self._validate_unpacked(temp_path):
+            # 只读取元信息成员，数据帧在首次访问时直接从归档成员读取（不解压整个归档）
+            with zipfile.ZipFile(file_path, 'r') as zipf:
+                # 1. 读取并校验包结构
+                docs = self._read_archive_metadata(zipf)
+                if docs is None:
                     print("[SessionManager] 会话文件结构校验失败")
                     return False
-                
-                # 2. 加载manifest
-                with open(temp_path / 'manifest.json', 'r', encoding='utf-8') as f:
-                    manifest = json.load(f)
-                self._load_manifest(manifest)
-                
-                # 3. 加载数据对象
-                with open(temp_path / 'data.json', 'r', encoding='utf-8') as f:
-                    data_export = json.load(f)
-                self._import_data_manager(data_export, base_path=temp_path)
-                
-                # 4. 加载图表对象
-                with open(temp_path / 'figures.json', 'r', encoding='utf-8') as f:
-                    figures_export = json.load(f)
-                self._import_figure_manager(figures_export)
-                
-                # 5. 加载结果对象
-                with open(temp_path / 'results.json', 'r', encoding='utf-8') as f:
-                    results_export = json.load(f)
-                self._import_result_manager(results_export)
-                
-                # 6. 加载项目对象
-                with open(temp_path / 'projects.json', 'r', encoding='utf-8') as f:
-                    projects_export = json.load(f)
-                self._import_project_manager(projects_export)
-                
-                # 7. 加载链接关系
-                with open(temp_path / 'links.json', 'r', encoding='utf-8') as f:
-                    links_export = json.load(f)
-                self.link_manager.from_dict(links_export)
+                archive_members = set(zipf.NameToInfo)
+            # 1.1 上次未保存就崩溃：以归档为基础应用命令日志
+            replay = self._read_journal(file_path)
+            recovered_blobs = {}
+            if replay is not None:
+                for name, body in replay.members.items():
+                    if name in docs:
+                        docs[name] = json.loads(body.decode('utf-8'))
+                    else:
+                        recovered_blobs[name] = body
+            # 先记录归档：延迟读取从这里取成员，读取后登记到 _frame_blobs 供下次保存复用
+            self._frame_blobs = {}
+            self._lazy_frames = {}
+            self._remember_archive(file_path, archive_members)
+            
+            # 2. 加载manifest
+            self._load_manifest(docs['manifest.json'])
+            
+            # 3. 加载数据对象（延迟读取DataFrame）
+            data_export = docs['data.json']
+            self._import_data_manager(data_export, archive_path=file_path, archive_members=archive_members,
+                                      recovered_blobs=recovered_blobs)
+            
+            # 4. 加载图表对象
+            self._import_figure_manager(docs['figures.json'])
+            
+            # 5. 加载结果对象
+            self._import_result_manager(docs['results.json'])
+            
+            # 6. 加载项目对象
+            self._import_project_manager(docs['projects.json'])
+            
+            # 7. 加载链接关系
+            self.link_manager.from_dict(docs['links.json'])
             
             # 更新状态
             self.current_file_path = str(file_path)
             self.clear_modified_flag()
+            self._restart_journal(checkpoint=replay is not None)
+            if replay is not None:
+                # 恢复的修改尚未保存
+                self.mark_modified()
             
             print(f"[SessionManager] 加载成功: {file_path}")
             self.session_loaded.emit(str(file_path))
@@ -356,6 +564,257 @@ class SessionManager(QObject):
             traceback.print_exc()
             return False
     
+    # ========== 命令日志 ==========
+    
+    def journal_command(self, op_log=None, action: str = 'execute'):
+        """
+        命令完成后追加日志（由 CommandManager 在执行/撤销/重做/记录后调用）
+        
+        只写相对上一条日志变化的元信息成员和新产生的数据帧成员；
+        会话尚未保存到文件时没有基础归档，不记录
+        """
+        if self._journal is None or not self._journal.is_open:
+            return
+        try:
+            start = time.perf_counter()
+            members, state = self._journal_delta()
+            operation = {'action': action, 'op': op_log.to_dict() if op_log is not None else None}
+            size = self._journal.append(members, operation)
+            self._commit_journal_state(members, state)
+            print(f"[SessionManager] 命令日志: {len(members)} 个成员，{size / 1024:.1f} KB，"
+                  f"{(time.perf_counter() - start) * 1000:.1f} ms")
+        except Exception as e:
+            print(f"[SessionManager] 写入命令日志失败: {e}")
+    
+    def discard_journal(self):
+        """放弃命令日志（会话已关闭/切换，或用户放弃未保存的修改）"""
+        if self._journal is not None:
+            self._journal.discard()
+            self._journal = None
+    
+    def _journal_delta(self):
+        """
+        计算当前状态相对日志已记录内容的变化，返回 (成员名 → 内容, 待提交的记录状态)
+        
+        元信息只序列化被信号标记过的成员；data.json 另在数据帧映射变化（数据帧被修改）时重新序列化
+        """
+        frames = []
+        lazy_frames = {}
+        for data_id, data in self.data_manager._data_dict.items():
+            if self._is_lazy(data_id, data):
+                lazy_frames[data_id] = self._lazy_frames[data_id]['file']
+                continue
+            df = self._frame_of(data)
+            if df is None:
+                continue
+            frames.append((data_id, weakref.ref(df), self._frame_version(data), df))
+        existing = self._archive_members | self._journal_members
+        file_map, planned, blobs = self._plan_frame_members(frames, self._journal_blobs, existing)
+        members = {rel: produce() for rel, produce in planned.items() if rel not in existing}
+        for data_id, rel in lazy_frames.items():
+            file_map[str(data_id)] = rel
+        
+        dirty = set(self._journal_dirty)
+        if file_map != self._journal_file_map:
+            dirty.add('data.json')
+        metadata = {}
+        if 'data.json' in dirty:
+            metadata['data.json'] = json.dumps(self._export_data_manager(file_map), indent=2,
+                                               ensure_ascii=False, default=str).encode('utf-8')
+        metadata.update(self._metadata_members(dirty))
+        digests = {}
+        for name, body in metadata.items():
+            crc = zlib.crc32(body) & 0xffffffff
+            if self._journal_digests.get(name) != crc:
+                members[name] = body
+                digests[name] = crc
+        return members, (blobs, digests, dirty, file_map)
+    
+    def _commit_journal_state(self, members, state):
+        blobs, digests, dirty, file_map = state
+        self._journal_blobs = blobs
+        self._journal_digests.update(digests)
+        self._journal_members.update(name for name in members if name.startswith('data/'))
+        self._journal_dirty -= dirty
+        self._journal_file_map = file_map
+    
+    def _restart_journal(self, checkpoint: bool = False):
+        """
+        以当前归档为基础重新开始日志
+        
+        参数:
+            checkpoint: 同时写入当前状态相对归档的变化（后台保存快照之后的修改、从日志恢复的修改）
+        """
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+        if not self.journal_enabled or not self._archive_path:
+            return
+        self._journal_blobs = dict(self._frame_blobs)
+        self._journal_members = set()
+        # 不写检查点时当前状态即归档内容；写检查点时与归档的差异未知，全部重新序列化一次
+        self._journal_dirty = {'data.json', 'figures.json', 'results.json', 'projects.json', 'links.json'} \
+            if checkpoint else set()
+        self._journal_file_map = None
+        journal = CommandJournal(journal_path_for(self._archive_path))
+        try:
+            # 归档中的元信息成员内容已知（中央目录里的crc32），日志只写与之不同的
+            with zipfile.ZipFile(self._archive_path, 'r') as zipf:
+                self._journal_digests = {name: zi.CRC for name, zi in zipf.NameToInfo.items()
+                                         if name.endswith('.json')}
+            base = archive_fingerprint(self._archive_path)
+            if checkpoint:
+                members, state = self._journal_delta()
+                journal.start(base, members, {'action': 'checkpoint', 'op': None})
+                self._commit_journal_state(members, state)
+            else:
+                journal.start(base)
+        except Exception as e:
+            print(f"[SessionManager] 创建命令日志失败: {e}")
+            return
+        self._journal = journal
+    
+    def _read_journal(self, file_path: Path):
+        """读取归档对应的日志；基础归档不一致（已被其它保存覆盖）或没有操作时返回None"""
+        path = journal_path_for(file_path)
+        if not self.journal_enabled or not path.exists():
+            return None
+        replay = CommandJournal.read(path)
+        if replay is None or not replay.operations:
+            return None
+        if replay.base is None or tuple(replay.base) != archive_fingerprint(file_path):
+            print(f"[SessionManager] 命令日志与会话文件不匹配，忽略: {path}")
+            return None
+        print(f"[SessionManager] 从命令日志恢复 {len(replay.operations)} 条记录: {path}")
+        return replay
+    
+    # ========== 增量保存辅助方法 ==========
+    
+    @staticmethod
+    def _json_bytes(obj) -> bytes:
+        return json.dumps(obj, indent=2, ensure_ascii=False).encode('utf-8')
+    
+    @staticmethod
+    def _frame_of(data):
+        """统一取可用的DataFrame"""
+        df = getattr(data, 'dataframe', None)
+        if df is None or getattr(df, 'empty', True):
+            df = getattr(data, 'processed_data', None)
+        if df is None or getattr(df, 'empty', True):
+            return None
+        return df
+    
+    @staticmethod
+    def _frame_version(data) -> int:
+        get_version = getattr(data, 'get_dataframe_version', None)
+        return get_version() if callable(get_version) else 0
+    
+    def _is_lazy(self, data_id, data) -> bool:
+        """数据帧是否仍未从归档读取"""
+        is_loaded = getattr(data, 'is_dataframe_loaded', None)
+        return data_id in self._lazy_frames and callable(is_loaded) and not is_loaded()
+    
+    def _load_lazy_frame(self, data_id: int, fallback_path: Path):
+        """
+        首次访问时从归档读取数据帧（由 Data.dataframe 调用）
+        
+        优先读当前归档（另存为后成员已拷贝到新文件），否则读加载时的文件；
+        读取失败（如后台保存正在改写同一文件）时等待保存结束后重试一次
+        """
+        info = self._lazy_frames.get(data_id)
+        if info is None:
+            return None
+        rel = info['file']
+        source = self._archive_path or fallback_path
+        try:
+            blob = read_member(source, rel)
+        except (OSError, KeyError, zipfile.BadZipFile):
+            self.wait_for_background_save()
+            source = self._archive_path or fallback_path
+            try:
+                blob = read_member(source, rel)
+            except (OSError, KeyError, zipfile.BadZipFile):
+                blob = read_member(fallback_path, rel)
+        df = self._decode_frame(rel, blob)
+        # 恢复df.attrs（尽力而为）
+        for k, v in (info.get('df_attrs') or {}).items():
+            df.attrs[k] = v
+        self._lazy_frames.pop(data_id, None)
+        data = self.data_manager._data_dict.get(data_id)
+        if data is not None:
+            self._frame_blobs[data_id] = (weakref.ref(df), self._frame_version(data), rel)
+        print(f"[SessionManager] 延迟读取数据帧: {data_id} ({rel})")
+        return df
+    
+    @staticmethod
+    def _decode_frame(rel: str, blob: bytes):
+        import pandas as pd
+        if rel.lower().endswith('.parquet'):
+            return pd.read_parquet(io.BytesIO(blob))
+        return pd.read_csv(io.BytesIO(blob))
+    
+    @staticmethod
+    def _plan_frame_members(frames, frame_blobs, existing, source=None):
+        """
+        规划数据帧成员
+        
+        - df快照为None：取快照时已判定未变化 → 沿用上次的成员（需要内容时从 source 归档读取）
+        - 同一DataFrame对象且版本号未变（未重新赋值/未标记修改）→ 沿用上次的成员
+        - 否则按内容哈希命名；归档中已有同名成员或本次已规划 → 复用，不重新编码
+        
+        参数:
+            frames: [(data_id, 原df弱引用, 版本号, df快照或None)]
+            frame_blobs: 上次保存的 data_id → (df弱引用, 版本号, 成员名)
+            existing: 上次归档中的成员名
+            source: 上次的归档路径
+        返回:
+            (data_id → 成员名, 成员名 → 内容生成函数, 新的frame_blobs)
+        """
+        file_map: Dict[str, str] = {}
+        members: Dict[str, Any] = {}
+        new_blobs = {}
+        encoded = 0
+        for data_id, df_ref, version, df in frames:
+            saved = frame_blobs.get(data_id)
+            original = df_ref()
+            if df is None:
+                rel = saved[2]
+                if rel not in members:
+                    members[rel] = (lambda rel=rel: read_member(source, rel))
+            elif (saved is not None and original is not None and saved[0]() is original
+                    and saved[1] == version and saved[2] in existing):
+                rel = saved[2]
+                if rel not in members:
+                    members[rel] = (lambda frame=df: _encode_frame(frame)[1])
+            else:
+                digest = _frame_content_hash(df)
+                rel = next((name for name in (f"data/{digest}.parquet", f"data/{digest}.csv")
+                            if name in members or name in existing), None)
+                if rel is None:
+                    ext, blob = _encode_frame(df)
+                    rel = f"data/{digest}.{ext}"
+                    members[rel] = (lambda blob=blob: blob)
+                    encoded += 1
+                elif rel not in members:
+                    members[rel] = (lambda frame=df: _encode_frame(frame)[1])
+            file_map[str(data_id)] = rel
+            new_blobs[data_id] = (df_ref, version, rel)
+        print(f"[SessionManager] 数据帧: {len(file_map)} 个，重新编码 {encoded} 个")
+        return file_map, members, new_blobs
+    
+    def _remember_archive(self, file_path, member_names):
+        """记录当前归档状态，供下次增量保存判断"""
+        self._archive_path = str(file_path)
+        self._archive_signature = archive_signature(file_path)
+        self._archive_members = set(member_names)
+    
+    def _forget_archive(self):
+        self._archive_path = None
+        self._archive_signature = None
+        self._archive_members = set()
+        self._frame_blobs = {}
+        self._lazy_frames = {}
+    
     # ========== 导出/导入辅助方法 ==========
     
     def _create_manifest(self) -> Dict:
@@ -388,9 +847,13 @@ class SessionManager(QObject):
         import pandas as pd  # 延迟导入以避免打包体积
         data_list = []
         for data_id, data in self.data_manager._data_dict.items():
+            if self._is_lazy(data_id, data):
+                # 未读取的数据帧沿用加载时的元信息，不物化
+                data_list.append(self._lazy_data_info(data_id, data))
+                continue
             df = getattr(data, 'dataframe', None)
             columns = list(df.columns) if df is not None and not df.empty else []
-            dtypes = {c: str(df[c].dtype) for c in columns} if columns else {}
+            dtypes = {c: str(t) for c, t in zip(columns, df.dtypes)} if columns else {}
             df_attrs = {}
             try:
                 if df is not None and hasattr(df, 'attrs'):
@@ -423,8 +886,34 @@ class SessionManager(QObject):
             'counter': self.data_manager._counter,
         }
     
-    def _import_data_manager(self, data: Dict, base_path: Path = None):
-        """导入DataManager数据（兼容v1.0/v2.0）"""
+    def _lazy_data_info(self, data_id: int, data) -> Dict:
+        """未读取数据帧的data.json条目（列/类型/行数/attrs取自加载时的记录）"""
+        info = self._lazy_frames[data_id]
+        return {
+            'id': data_id,
+            'name': data.name,
+            'itemtype': getattr(data, 'itemtype', 'dataframe'),
+            'type': type(data).__name__,
+            'columns': list(info.get('columns', [])),
+            'dtypes': dict(info.get('dtypes', {})),
+            'row_count': int(info.get('row_count', 0)),
+            'df_attrs': dict(info.get('df_attrs', {})),
+            'attributes': getattr(data, 'attributes', {}),
+            'extra_attributes': getattr(data, 'extra_attributes', {}),
+        }
+    
+    def _import_data_manager(self, data: Dict, base_path: Path = None,
+                             archive_path: Path = None, archive_members: set = None,
+                             recovered_blobs: Dict[str, bytes] = None):
+        """
+        导入DataManager数据（兼容v1.0/v2.0）
+        
+        参数:
+            base_path: 已解压目录，数据帧从文件立即读取
+            archive_path: 会话归档，数据帧首次访问时才从归档成员读取
+            archive_members: 归档中的成员名（缺失的数据帧按空数据处理）
+            recovered_blobs: 从命令日志恢复、归档中还没有的数据帧成员（立即读取）
+        """
         version = data.get('version', '1.0')
         # v1.0里，文件映射在顶层'files'
         files_map: Dict[str, str] = data.get('files', {})
@@ -436,8 +925,16 @@ class SessionManager(QObject):
             name = info.get('name', f"数据{data_id}")
             # v2.0若每条包含file字段优先其余，否则退回到顶层files映射
             rel = info.get('file') or files_map.get(str(data_id))
-            df = None
             if rel:
+                rel = rel.replace('\\', '/')
+            df = None
+            lazy = archive_path is not None and rel and rel in (archive_members or ())
+            if rel and not lazy and rel in (recovered_blobs or {}):
+                try:
+                    df = self._decode_frame(rel, recovered_blobs[rel])
+                except Exception:
+                    df = None
+            elif rel and archive_path is None:
                 fpath = base_path / rel
                 try:
                     import pandas as pd
@@ -465,6 +962,10 @@ class SessionManager(QObject):
                         df.attrs[k] = v
             except Exception:
                 pass
+            if lazy:
+                self._lazy_frames[int(data_id)] = dict(info, file=rel)
+                data_obj.set_dataframe_loader(
+                    lambda data_id=int(data_id): self._load_lazy_frame(data_id, archive_path))
             self.data_manager._data_dict[int(data_id)] = data_obj
             recovered += 1
         # 恢复计数器
@@ -473,7 +974,10 @@ class SessionManager(QObject):
             self.data_manager._counter = saved_counter
         else:
             self.data_manager._counter = (max(self.data_manager._data_dict.keys()) + 1) if self.data_manager._data_dict else 0
-        print(f"[SessionManager] 导入了 {recovered} 个数据对象（含DataFrame恢复）")
+        if self._lazy_frames:
+            print(f"[SessionManager] 导入了 {recovered} 个数据对象（{len(self._lazy_frames)} 个DataFrame延迟读取）")
+        else:
+            print(f"[SessionManager] 导入了 {recovered} 个数据对象（含DataFrame恢复）")
     
     def _export_figure_manager(self) -> Dict:
         """导出FigureManager数据（v2.0：完整Figure对象）"""
@@ -631,27 +1135,21 @@ class SessionManager(QObject):
         print(f"[SessionManager] 导入项目: {restored} 个")
 
     # ========== 基础校验 ==========
-    def _validate_unpacked(self, base_path: Path) -> bool:
-        """校验解压后的基础文件结构与JSON格式"""
+    def _read_archive_metadata(self, zipf: zipfile.ZipFile) -> Optional[Dict[str, Any]]:
+        """读取并校验归档中的基础JSON成员，返回 成员名 → 解析结果；结构无效时返回None"""
         required = ['manifest.json', 'data.json', 'figures.json', 'results.json', 'projects.json', 'links.json']
+        docs = {}
         for name in required:
-            p = base_path / name
-            if not p.exists():
+            if name not in zipf.NameToInfo:
                 print(f"[SessionManager] 缺少必要文件: {name}")
-                return False
+                return None
             # 基本JSON可读性校验
             try:
-                with open(p, 'r', encoding='utf-8') as f:
-                    json.load(f)
+                docs[name] = json.loads(zipf.read(name).decode('utf-8'))
             except Exception as e:
                 print(f"[SessionManager] JSON无效: {name}: {e}")
-                return False
-        # data目录可选存在
-        data_dir = base_path / 'data'
-        if data_dir.exists() and not data_dir.is_dir():
-            print("[SessionManager] data不是目录")
-            return False
-        return True
+                return None
+        return docs
     
     # ========== 会话管理 ==========
     
@@ -662,6 +1160,8 @@ class SessionManager(QObject):
         参数：
             session_name: 会话名称
         """
+        self.wait_for_background_save()
+        
         # 清空所有Manager
         self.data_manager._data_dict.clear()
         self.data_manager._counter = 0
@@ -677,6 +1177,8 @@ class SessionManager(QObject):
         self.project_manager._current_project_id = None
         
         self.link_manager.clear()
+        self.discard_journal()
+        self._forget_archive()
         
         # 重置状态
         self.session_name = session_name
@@ -2,12 +2,25 @@
 """
 工具模块
 """
+
+
+def config_value(name, default=None):
+    """读取 config.py 中的设置（不可用时返回默认值）"""
+    try:
+        import config
+    except ImportError:
+        return default
+    return getattr(config, name, default)
+
+
+# 子模块在导入时会用到 config_value，须先定义
 from .json_reader import read_json
 from .fitting_wrapper import fit_data, get_fitting_methods, FittingWrapper
 from .data_processor import DataProcessor, load_file
 from .data_exporter import DataExporter
 
 __all__ = [
+    'config_value',
     'read_json',
     'fit_data',
     'get_fitting_methods',
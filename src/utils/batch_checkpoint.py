@@ -0,0 +1,233 @@
+# -*- coding: utf-8 -*-
+"""
+批量拟合检查点 - 崩溃/断电/取消后续跑批量拟合
+
+每次批量拟合在检查点根目录下建一个子目录：
+- manifest.json：任务清单（创建时写一次）：方法、创建时间、每项的键/数据名/输入摘要
+- states.log：状态变化的追加日志，每行一条JSON {"key", "state", ...}，每项以最后一条为准；
+  断电时写了一半的末行在读取时被忽略
+- results/<键>.pkl：拟合一完成就写入（临时文件 + 原子替换 + fsync），之后才追加 done 状态
+
+状态：
+    pending   未完成（含被取消、尚未开始）
+    done      拟合结果已落盘，尚未提交到会话
+    committed 已提交到会话（结果文件随之删除）
+    failed    拟合失败（续跑时不再重跑）
+
+续跑时只重跑 pending 项，done 项直接提交；全部项 committed/failed 后目录删除。
+数据按名称在当前会话中找回，输入摘要（recompute_engine.input_digest）不符的项作废重跑。
+"""
+import os
+import json
+import pickle
+import shutil
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from . import config_value
+
+
+PENDING = 'pending'
+DONE = 'done'
+COMMITTED = 'committed'
+FAILED = 'failed'
+
+_MANIFEST = 'manifest.json'
+_STATES = 'states.log'
+_RESULTS = 'results'
+
+
+def default_checkpoint_root() -> str:
+    """检查点根目录（config.BATCH_CHECKPOINT_DIR，不可用时为当前目录下的 batch_runs）"""
+    return str(config_value('BATCH_CHECKPOINT_DIR') or os.path.join(os.getcwd(), 'batch_runs'))
+
+
+def _write_atomic(path: str, data: bytes):
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+class BatchCheckpoint:
+    """一次批量拟合的任务清单 + 结果检查点"""
+
+    def __init__(self, directory: str, manifest: Dict[str, Any]):
+        self.directory = directory
+        self.run_id: str = manifest['run_id']
+        self.method: str = manifest['method']
+        self.created: str = manifest.get('created', '')
+        # key -> {'key', 'data_id', 'name', 'digest', 'state', 'error'}
+        self.items: Dict[str, Dict[str, Any]] = {}
+        for entry in manifest['items']:
+            self.items[entry['key']] = dict(entry, state=PENDING, error=None)
+        self._log = None
+
+    # ========== 创建/打开 ==========
+
+    @classmethod
+    def create(cls, root: str, method: str, entries: List[tuple]) -> 'BatchCheckpoint':
+        """
+        新建检查点
+
+        参数:
+            root: 检查点根目录
+            method: 拟合方法
+            entries: [(data_id, 数据名, 输入摘要), ...]；项的键依次为 "0"、"1"...
+        """
+        run_id = f"{datetime.now():%Y%m%d_%H%M%S}_{uuid.uuid4().hex[:8]}"
+        directory = os.path.join(root, run_id)
+        os.makedirs(os.path.join(directory, _RESULTS), exist_ok=True)
+        manifest = {
+            'run_id': run_id,
+            'method': method,
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'items': [{'key': str(i), 'data_id': data_id, 'name': name, 'digest': digest}
+                      for i, (data_id, name, digest) in enumerate(entries)],
+        }
+        _write_atomic(os.path.join(directory, _MANIFEST),
+                      json.dumps(manifest, ensure_ascii=False, indent=1).encode('utf-8'))
+        print(f"[BatchCheckpoint] 新建检查点: {directory} ({len(entries)} 项)")
+        return cls(directory, manifest)
+
+    @classmethod
+    def load(cls, directory: str) -> Optional['BatchCheckpoint']:
+        """打开已有检查点（清单缺失或损坏时返回None）"""
+        try:
+            with open(os.path.join(directory, _MANIFEST), 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+            checkpoint = cls(directory, manifest)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"[BatchCheckpoint] 无法读取检查点 {directory}: {e}")
+            return None
+        checkpoint._replay()
+        return checkpoint
+
+    @classmethod
+    def find_unfinished(cls, root: str) -> List['BatchCheckpoint']:
+        """根目录下所有未完成的检查点（按创建时间从新到旧）"""
+        if not os.path.isdir(root):
+            return []
+        found = []
+        for name in sorted(os.listdir(root), reverse=True):
+            directory = os.path.join(root, name)
+            if not os.path.isfile(os.path.join(directory, _MANIFEST)):
+                continue
+            checkpoint = cls.load(directory)
+            if checkpoint is not None and not checkpoint.is_finished:
+                found.append(checkpoint)
+        return found
+
+    def _replay(self):
+        """按状态日志恢复每项状态"""
+        try:
+            with open(os.path.join(self.directory, _STATES), 'rb') as f:
+                lines = f.read().split(b'\n')
+        except FileNotFoundError:
+            return
+        for line in lines:
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line.decode('utf-8'))
+            except ValueError:
+                print(f"[BatchCheckpoint] 忽略不完整的状态记录: {line[:60]!r}")
+                continue
+            item = self.items.get(record.get('key'))
+            if item is None:
+                continue
+            item['state'] = record.get('state', PENDING)
+            item['error'] = record.get('error')
+            if record.get('digest'):
+                item['digest'] = record['digest']
+        # 结果文件丢失的 done 项按未完成处理
+        for item in self.items.values():
+            if item['state'] == DONE and not os.path.exists(self._result_path(item['key'])):
+                item['state'] = PENDING
+
+    # ========== 状态 ==========
+
+    def _append(self, key: str, state: str, **extra):
+        item = self.items[key]
+        item['state'] = state
+        item['error'] = extra.get('error')
+        if extra.get('digest'):
+            item['digest'] = extra['digest']
+        if self._log is None:
+            self._log = open(os.path.join(self.directory, _STATES), 'ab')
+        record = dict(extra, key=key, state=state)
+        self._log.write(json.dumps(record, ensure_ascii=False).encode('utf-8') + b'\n')
+        self._log.flush()
+        os.fsync(self._log.fileno())
+
+    def _result_path(self, key: str) -> str:
+        return os.path.join(self.directory, _RESULTS, f"{key}.pkl")
+
+    def record_result(self, key: str, fit_result: Dict[str, Any]):
+        """拟合完成：成功的结果落盘后标记 done，失败的结果标记 failed"""
+        if not fit_result or not fit_result.get('success'):
+            self.record_failure(key, (fit_result or {}).get('error') or "拟合失败")
+            return
+        _write_atomic(self._result_path(key), pickle.dumps(fit_result, protocol=pickle.HIGHEST_PROTOCOL))
+        self._append(key, DONE)
+
+    def record_failure(self, key: str, error: str):
+        self._append(key, FAILED, error=error)
+
+    def reset(self, key: str, digest: Optional[str] = None):
+        """作废已完成的结果（源数据已变化），标记为未完成"""
+        self._remove_result(key)
+        self._append(key, PENDING, digest=digest)
+
+    def load_result(self, key: str) -> Dict[str, Any]:
+        with open(self._result_path(key), 'rb') as f:
+            return pickle.load(f)
+
+    def mark_committed(self, key: str):
+        """结果已提交到会话：标记 committed 并删除结果文件"""
+        self._append(key, COMMITTED)
+        self._remove_result(key)
+
+    def _remove_result(self, key: str):
+        try:
+            os.remove(self._result_path(key))
+        except OSError:
+            pass
+
+    def keys_in(self, *states: str) -> List[str]:
+        return [key for key, item in self.items.items() if item['state'] in states]
+
+    def counts(self) -> Dict[str, int]:
+        counts = {PENDING: 0, DONE: 0, COMMITTED: 0, FAILED: 0}
+        for item in self.items.values():
+            counts[item['state']] = counts.get(item['state'], 0) + 1
+        return counts
+
+    @property
+    def is_finished(self) -> bool:
+        """所有项都已提交或失败"""
+        return all(item['state'] in (COMMITTED, FAILED) for item in self.items.values())
+
+    def describe(self) -> str:
+        counts = self.counts()
+        return (f"{self.method}，开始于 {self.created.replace('T', ' ')}：共 {len(self.items)} 项，"
+                f"已提交 {counts[COMMITTED]}，已完成未提交 {counts[DONE]}，"
+                f"未完成 {counts[PENDING]}，失败 {counts[FAILED]}")
+
+    # ========== 清理 ==========
+
+    def close(self):
+        if self._log is not None:
+            try:
+                self._log.close()
+            finally:
+                self._log = None
+
+    def discard(self):
+        """删除检查点目录"""
+        self.close()
+        shutil.rmtree(self.directory, ignore_errors=True)
+        print(f"[BatchCheckpoint] 删除检查点: {self.directory}")
@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+"""
+BatchFitter - 批量拟合
+
+流程：
+- 每个数据作为独立任务提交到 JobManager 进程池拟合（run_fit_task），
+  输入与单次拟合相同：x/y 以及完整DataFrame（LocalBivariate 需要宽表）
+- 拟合是CPU密集的Python/SciPy代码，线程池中会被GIL串行化，因此使用进程池
+- 子进程完成后的回调在线程池线程中执行，只发射信号，信号以排队方式回到GUI线程；
+  控制器用返回的拟合结果直接创建结果/拟合曲线/对比图（FitDataCommand(fit_result=...)），不再重新拟合
+- 以批量优先级、每次批量一个公平调度分组提交；等待队列满时暂停提交，收到 capacity_available 后继续
+- 支持取消：尚未提交/尚未开始的任务直接取消，正在运行的拟合在一次迭代内中止
+- 可选远程执行：传入 WorkerCoordinator 时任务分发到实验室工作站（remote_workers.py），
+  回调与取消语义与 JobManager 相同
+- 可选检查点（BatchCheckpoint）：每个结果回到GUI线程时先落盘再发出信号，
+  失败记为 failed，取消的项保持 pending，之后可续跑
+"""
+import uuid
+from collections import deque
+from typing import Any, Dict, List, Optional
+from PySide6.QtCore import QObject, Signal
+
+from .job_manager import JobManager, JobQueueFull, error_summary
+from .job_tasks import run_fit_task
+
+
+class BatchFitter(QObject):
+    """
+    批量拟合器
+
+    信号：
+        fit_done: 单个数据拟合完成 (data_id, fit_result)，fit_result 为 fit_data() 的返回值（可能 success=False）
+        fit_failed: 单个数据拟合异常或被取消 (data_id, error_message)
+        progress: 进度 (已完成数, 总数)
+        finished: 全部结束（含取消） (成功的data_id列表, {data_id: 错误信息})
+    """
+
+    fit_done = Signal(int, object)
+    fit_failed = Signal(int, str)
+    progress = Signal(int, int)
+    finished = Signal(list, object)
+
+    # 线程池回调 → GUI线程 的内部中转信号
+    _result_ready = Signal(int, object)
+    _error_ready = Signal(int, str)
+
+    def __init__(self, parent=None, coordinator=None):
+        """
+        参数:
+            coordinator: WorkerCoordinator；提供时在远程工作进程上拟合，否则使用本机 JobManager 进程池
+        """
+        super().__init__(parent)
+        self._coordinator = coordinator
+        self._jobs: Dict[str, int] = {}  # job_id -> data_id
+        self._queue = deque()  # 尚未提交的 (data_id, method, x_data, y_data, dataframe)
+        self._checkpoint = None
+        self._keys: Dict[int, str] = {}  # data_id -> 检查点项的键
+        self._group = None
+        self._job_manager = None
+        self._total = 0
+        self._done = 0
+        self._succeeded: List[int] = []
+        self._failed: Dict[int, str] = {}
+        self._cancelled = False
+        self._running = False
+        self._result_ready.connect(self._on_result)
+        self._error_ready.connect(self._on_error)
+
+    @property
+    def is_running(self) -> bool:
+        return self._running
+
+    def start(self, items: List[tuple], checkpoint=None, keys: Optional[Dict[int, str]] = None) -> int:
+        """
+        提交批量拟合任务
+
+        参数:
+            items: [(data_id, method, x_data, y_data, dataframe), ...]（在GUI线程中取好的数据）
+            checkpoint: BatchCheckpoint，结果逐个落盘
+            keys: data_id -> 检查点项的键（有检查点时必需）
+
+        返回:
+            提交的任务数
+        """
+        if self._running:
+            raise RuntimeError("BatchFitter 正在运行")
+        self._jobs.clear()
+        self._succeeded = []
+        self._failed = {}
+        self._cancelled = False
+        self._checkpoint = checkpoint
+        self._keys = dict(keys or {})
+        self._total = len(items)
+        self._done = 0
+        if self._total == 0:
+            self.finished.emit([], {})
+            return 0
+
+        self._running = True
+        self._queue = deque(items)
+        self._group = uuid.uuid4().hex
+        if self._coordinator is not None:
+            print(f"[BatchFitter] 提交 {self._total} 个拟合任务 (远程工作进程={len(self._coordinator.workers())})")
+        else:
+            jm = JobManager.instance()
+            jm.capacity_available.connect(self._feed)
+            self._job_manager = jm
+            print(f"[BatchFitter] 提交 {self._total} 个拟合任务 (进程数={jm.max_workers})")
+        self._feed()
+        self.progress.emit(0, self._total)
+        return self._total
+
+    def _feed(self):
+        """提交尚未提交的任务，直到 JobManager 等待队列满（远程执行时一次全部提交）"""
+        jm = self._job_manager
+        while (jm is not None or self._coordinator is not None) and self._queue and not self._cancelled:
+            data_id, method, x_data, y_data, dataframe = self._queue[0]
+            on_done = lambda jid, result, d=data_id: self._result_ready.emit(d, result)
+            on_fail = lambda jid, err, d=data_id: self._error_ready.emit(d, err)
+            if self._coordinator is not None:
+                job_id = self._coordinator.submit('run_fit_task', method, x_data, y_data, dataframe,
+                                                  on_done=on_done, on_fail=on_fail)
+            else:
+                try:
+                    job_id = jm.submit_with_callbacks(
+                        run_fit_task, method, x_data, y_data, dataframe,
+                        on_done=on_done,
+                        on_fail=on_fail,
+                        use_process=True,
+                        priority=JobManager.PRIORITY_BATCH,
+                        group=self._group,
+                        block=False,
+                    )
+                except JobQueueFull:
+                    return
+            self._queue.popleft()
+            self._jobs[job_id] = data_id
+
+    def cancel(self):
+        """取消剩余任务（正在运行的拟合以 fit_failed(data_id, "已取消") 结束）"""
+        if not self._running:
+            return
+        self._cancelled = True
+        executor = self._coordinator or self._job_manager or JobManager.instance()
+        while self._queue:
+            self._fail(self._queue.popleft()[0], "已取消")
+        for job_id, data_id in list(self._jobs.items()):
+            if executor.cancel(job_id):
+                self._jobs.pop(job_id, None)
+                self._fail(data_id, "已取消")
+
+    def _on_result(self, data_id: int, result: Any):
+        self._forget(data_id)
+        if self._checkpoint is not None:
+            # 取消后才返回的结果同样保存，续跑时直接提交
+            self._checkpoint.record_result(self._keys[data_id], result)
+        if self._cancelled:
+            self._fail(data_id, "已取消")
+            return
+        if result and result.get('success'):
+            self._succeeded.append(data_id)
+        else:
+            self._failed[data_id] = (result or {}).get('error') or "拟合失败"
+        self.fit_done.emit(data_id, result)
+        self._advance()
+
+    def _on_error(self, data_id: int, error: str):
+        self._forget(data_id)
+        # 只保留异常所在的最后一行，完整堆栈打印到控制台
+        if error not in ("已取消", "超时"):
+            print(f"[BatchFitter] 拟合失败: data_id={data_id}\n{error}")
+        message = error_summary(error)
+        if self._checkpoint is not None and message != "已取消":
+            self._checkpoint.record_failure(self._keys[data_id], message)
+        self._fail(data_id, message)
+
+    def _fail(self, data_id: int, message: str):
+        self._failed[data_id] = message
+        self.fit_failed.emit(data_id, message)
+        self._advance()
+
+    def _forget(self, data_id: int):
+        for job_id, d in list(self._jobs.items()):
+            if d == data_id:
+                self._jobs.pop(job_id, None)
+                break
+
+    def _advance(self):
+        self._done += 1
+        self.progress.emit(self._done, self._total)
+        if self._done >= self._total and self._running:
+            self._running = False
+            if self._job_manager is not None:
+                try:
+                    self._job_manager.capacity_available.disconnect(self._feed)
+                except (RuntimeError, TypeError):
+                    pass
+                self._job_manager = None
+            print(f"[BatchFitter] 完成: 成功 {len(self._succeeded)}，失败/取消 {len(self._failed)}")
+            self.finished.emit(list(self._succeeded), dict(self._failed))
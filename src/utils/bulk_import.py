@@ -0,0 +1,205 @@
+# -*- coding: utf-8 -*-
+"""
+BulkImporter - 多文件并发导入
+
+流程：
+- 每个文件作为独立任务提交到 JobManager 进程池解析（run_import_task）
+- 子进程完成后的回调在线程池线程中执行，只发射信号；
+  BulkImporter 位于GUI线程，信号以排队方式回到GUI线程，
+  由控制器逐个注册到 DataManager（边解析边显示）
+- 以批量优先级、每次导入一个公平调度分组提交；JobManager 等待队列满时暂停提交，
+  收到 capacity_available 后继续（不阻塞GUI线程，也不会一次堆积全部文件的任务）
+- 支持取消：尚未提交/尚未开始的任务直接取消，已在运行的任务结果被丢弃
+"""
+import os
+import uuid
+from collections import deque
+from typing import Dict, Iterable, List
+from PySide6.QtCore import QObject, Signal
+
+from .job_manager import JobManager, JobQueueFull, error_summary
+from .job_tasks import run_import_task
+
+
+SUPPORTED_IMPORT_EXTENSIONS = ('.json', '.csv', '.xlsx', '.xls')
+
+
+def collect_import_files(paths: Iterable[str]) -> List[str]:
+    """
+    展开待导入路径：文件夹递归查找受支持的数据文件，去重并保持顺序
+
+    参数:
+        paths: 文件或文件夹路径
+    返回:
+        受支持的文件路径列表
+    """
+    files = []
+    seen = set()
+
+    def _add(path):
+        norm = os.path.normpath(path)
+        if norm not in seen and norm.lower().endswith(SUPPORTED_IMPORT_EXTENSIONS):
+            # 跳过Excel打开时产生的锁文件
+            if os.path.basename(norm).startswith('~$'):
+                return
+            seen.add(norm)
+            files.append(norm)
+
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, names in os.walk(path):
+                dirs.sort()
+                for name in sorted(names):
+                    _add(os.path.join(root, name))
+        elif os.path.isfile(path):
+            _add(path)
+    return files
+
+
+class BulkImporter(QObject):
+    """
+    多文件并发导入器
+
+    信号：
+        file_loaded: 单个文件解析完成 (file_path, result_dict)
+        file_failed: 单个文件解析失败 (file_path, error_message)
+        progress: 进度 (已完成数, 总数)
+        finished: 全部结束（含取消） (loaded_paths, failed_dict)
+    """
+
+    file_loaded = Signal(str, object)
+    file_failed = Signal(str, str)
+    progress = Signal(int, int)
+    finished = Signal(list, dict)
+
+    # 线程池回调 → GUI线程 的内部中转信号
+    _result_ready = Signal(str, object)
+    _error_ready = Signal(str, str)
+
+    def __init__(self, use_process: bool = True, parent=None):
+        super().__init__(parent)
+        self.use_process = use_process
+        self._jobs: Dict[str, str] = {}  # job_id -> file_path
+        self._queue = deque()  # 尚未提交的文件
+        self._group = None
+        self._job_manager = None
+        self._total = 0
+        self._done = 0
+        self._loaded: List[str] = []
+        self._failed: Dict[str, str] = {}
+        self._cancelled = False
+        self._running = False
+        self._result_ready.connect(self._on_result)
+        self._error_ready.connect(self._on_error)
+
+    @property
+    def is_running(self) -> bool:
+        return self._running
+
+    def start(self, file_paths: List[str]) -> int:
+        """
+        提交所有文件解析任务
+
+        返回:
+            提交的文件数
+        """
+        if self._running:
+            raise RuntimeError("BulkImporter 正在运行")
+        self._jobs.clear()
+        self._loaded = []
+        self._failed = {}
+        self._cancelled = False
+        self._total = len(file_paths)
+        self._done = 0
+        if self._total == 0:
+            self.finished.emit([], {})
+            return 0
+
+        self._running = True
+        self._queue = deque(file_paths)
+        self._group = uuid.uuid4().hex
+        jm = JobManager.instance()
+        jm.capacity_available.connect(self._feed)
+        self._job_manager = jm
+        print(f"[BulkImporter] 提交 {self._total} 个文件解析任务 (use_process={self.use_process})")
+        self._feed()
+        self.progress.emit(0, self._total)
+        return self._total
+
+    def _feed(self):
+        """提交尚未提交的文件，直到 JobManager 等待队列满"""
+        jm = self._job_manager
+        while jm is not None and self._queue and not self._cancelled:
+            path = self._queue[0]
+            try:
+                job_id = jm.submit_with_callbacks(
+                    run_import_task, path,
+                    on_done=lambda jid, result, p=path: self._result_ready.emit(p, result),
+                    on_fail=lambda jid, err, p=path: self._error_ready.emit(p, err),
+                    use_process=self.use_process,
+                    priority=JobManager.PRIORITY_BATCH,
+                    group=self._group,
+                    block=False,
+                )
+            except JobQueueFull:
+                return
+            self._queue.popleft()
+            self._jobs[job_id] = path
+
+    def cancel(self):
+        """取消剩余任务"""
+        if not self._running:
+            return
+        self._cancelled = True
+        jm = JobManager.instance()
+        while self._queue:
+            self._failed[self._queue.popleft()] = "已取消"
+            self._advance()
+        for job_id, path in list(self._jobs.items()):
+            if jm.cancel(job_id):
+                self._jobs.pop(job_id, None)
+                self._failed[path] = "已取消"
+                self._advance()
+
+    def _on_result(self, path: str, result):
+        self._forget(path)
+        if self._cancelled:
+            self._failed[path] = "已取消"
+        elif result and result.get('success'):
+            self._loaded.append(path)
+            self.file_loaded.emit(path, result)
+        else:
+            error = (result or {}).get('error') or "未知错误"
+            self._failed[path] = error
+            self.file_failed.emit(path, error)
+        self._advance()
+
+    def _on_error(self, path: str, error: str):
+        self._forget(path)
+        # 只保留异常所在的最后一行，完整堆栈打印到控制台
+        print(f"[BulkImporter] 解析失败: {path}\n{error}")
+        message = error_summary(error)
+        self._failed[path] = message
+        if not self._cancelled:
+            self.file_failed.emit(path, message)
+        self._advance()
+
+    def _forget(self, path: str):
+        for job_id, p in list(self._jobs.items()):
+            if p == path:
+                self._jobs.pop(job_id, None)
+                break
+
+    def _advance(self):
+        self._done += 1
+        self.progress.emit(self._done, self._total)
+        if self._done >= self._total and self._running:
+            self._running = False
+            if self._job_manager is not None:
+                try:
+                    self._job_manager.capacity_available.disconnect(self._feed)
+                except (RuntimeError, TypeError):
+                    pass
+                self._job_manager = None
+            print(f"[BulkImporter] 完成: 成功 {len(self._loaded)}，失败/取消 {len(self._failed)}")
+            self.finished.emit(list(self._loaded), dict(self._failed))
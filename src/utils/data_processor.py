@@ -48,7 +48,7 @@ class DataProcessor:
     @staticmethod
     def load_excel(file_path: str, sheet_name: Optional[Union[str, int]] = None) -> Tuple[bool, Optional[pd.DataFrame], Optional[str]]:
         """
-        加载Excel文件
+        加载Excel文件（解析结果按文件内容缓存，重复导入不再解析）
         
         参数:
             file_path: 文件路径
@@ -58,11 +58,12 @@ class DataProcessor:
             (success, dataframe, error_message)
         """
         try:
+            from XlementFitting.FileProcess.ParseCache import read_excel_cached
             # pandas: sheet_name=None 会返回 {sheet_name: DataFrame} 的字典
             # 我们默认读取第一个工作表
             if sheet_name is None:
                 sheet_name = 0
-            df_or_dict = pd.read_excel(file_path, sheet_name=sheet_name)
+            df_or_dict = read_excel_cached(file_path, sheet_name=sheet_name)
             if isinstance(df_or_dict, dict):
                 # 取第一个工作表
                 first_key = next(iter(df_or_dict.keys()))
@@ -510,6 +511,10 @@ class DataProcessor:
 
 # 快捷函数
 
+class _LoadError(Exception):
+    """load_file内部使用：解析失败（不写入缓存）"""
+
+
 def load_file(file_path: str) -> Tuple[bool, Optional[pd.DataFrame], Optional[str]]:
     """
     智能加载文件（自动识别格式）
@@ -525,19 +530,28 @@ def load_file(file_path: str) -> Tuple[bool, Optional[pd.DataFrame], Optional[st
     if suffix == '.json':
         print(f"[load_file] 开始加载JSON文件: {file_path}")
         
-        # 1. 读取JSON
-        success, json_data, error = processor.load_json(str(file_path))
-        if not success:
-            print(f"[load_file] JSON读取失败: {error}")
-            return False, None, error
-        
-        print(f"[load_file] JSON读取成功")
-        
-        # 2. 转换为DataFrame
-        success, df, error = processor.json_to_dataframe(json_data)
-        if not success:
-            print(f"[load_file] DataFrame转换失败: {error}")
-            return False, None, error
+        def parse_json() -> pd.DataFrame:
+            # 1. 读取JSON
+            success, json_data, error = processor.load_json(str(file_path))
+            if not success:
+                print(f"[load_file] JSON读取失败: {error}")
+                raise _LoadError(error)
+            
+            print(f"[load_file] JSON读取成功")
+            
+            # 2. 转换为DataFrame
+            success, df, error = processor.json_to_dataframe(json_data)
+            if not success:
+                print(f"[load_file] DataFrame转换失败: {error}")
+                raise _LoadError(error)
+            return df
+        
+        # 解析结果按文件内容缓存，重复导入同一文件时跳过JSON解析
+        from XlementFitting.FileProcess.ParseCache import cached_parse
+        try:
+            df = cached_parse(file_path, 'DataProcessor.json', {}, parse_json)
+        except _LoadError as e:
+            return False, None, str(e)
         
         print(f"[load_file] DataFrame转换成功: shape={df.shape}")
         
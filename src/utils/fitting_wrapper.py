@@ -88,6 +88,8 @@ class FittingWrapper:
         
         这里采用方法2：直接调用核心算法
         """
+        control = self._control(kwargs)
+        budget = self._budget('LocalBivariate', kwargs)
         try:
             # 准备数据
             x_array = np.array(x_data, dtype=np.float64)
@@ -142,7 +144,7 @@ class FittingWrapper:
                         # ⭐ 调用原始model_runner（现在返回字典格式）
                         from model_data_process.LocalBivariate import model_runner
                         print(f"[FittingWrapper] 调用LocalBivariate.model_runner")
-                        result = model_runner(tmp_path)
+                        result = model_runner(tmp_path, control=control, budget=budget)
                         
                         # 解析结果（新格式：字典）
                         if result and isinstance(result, dict):
@@ -168,6 +170,8 @@ class FittingWrapper:
                                 'KD': (params.get('KD', np.nan), None, 'M')
                             }
                             
+                            if result.get('budget_limited'):
+                                print(f"[FittingWrapper] ⏱ 拟合预算用尽（{budget.reason}），结果为目前最优的参数")
                             print(f"[FittingWrapper] ✅ 拟合成功:")
                             print(f"   Rmax={fit_params['Rmax'][0]:.2f} RU")
                             print(f"   kon={fit_params['kon'][0]:.4e} 1/(M*s)")
@@ -186,7 +190,10 @@ class FittingWrapper:
                                     'chi2': None,
                                     'r2': None,
                                     'rmse': self._calculate_rmse(Y_data.flatten(), Y_pred.flatten()) if Y_pred is not None else None
-                                }
+                                },
+                                # 预算用尽时参数是目前最优的点，而非收敛结果
+                                'budget_limited': bool(result.get('budget_limited')),
+                                'budget': budget.summary() if budget is not None else None
                             }
                         else:
                             return {
@@ -211,7 +218,7 @@ class FittingWrapper:
                             try:
                                 wide_df.to_excel(tmp_path, index=False)
                                 from model_data_process.LocalBivariate import model_runner
-                                result = model_runner(tmp_path)
+                                result = model_runner(tmp_path, control=control, budget=budget)
                                 if result and len(result) == 3:
                                     T_data, Y_data, Y_pred = result
                                     return {
@@ -245,6 +252,8 @@ class FittingWrapper:
             def linear_model(x, a, b):
                 return a * x + b
             
+            if control is not None:
+                control.begin()
             try:
                 params, _ = curve_fit(linear_model, x_array, y_array)
                 y_pred = linear_model(x_array, *params)
@@ -324,6 +333,39 @@ class FittingWrapper:
                 'error': f'SingleCycle拟合失败: {str(e)}'
             }
     
+    @staticmethod
+    def _budget(method, kwargs):
+        """
+        单次拟合预算（XlementFitting.FitBudget）：显式传入的 budget
+        （FitBudget 或 {'max_evaluations', 'max_seconds', 'max_starts'}），否则为 config.FIT_BUDGETS[method]
+
+        没有任何限制时返回None
+        """
+        from XlementFitting.FitBudget import FitBudget
+        budget = kwargs.get('budget')
+        if isinstance(budget, FitBudget):
+            return budget
+        if budget is None:
+            try:
+                import config
+                budget = getattr(config, 'FIT_BUDGETS', {}).get(method)
+            except ImportError:
+                budget = None
+        if not budget or not any(budget.values()):
+            return None
+        return FitBudget(**budget)
+
+    @staticmethod
+    def _control(kwargs):
+        """
+        取消令牌/进度通道：显式传入的 control，否则为 JobManager 设置的当前任务控制
+
+        JobCancelled 继承 BaseException，不会被本类的 except Exception 转成失败结果
+        """
+        from .job_control import active_control
+        control = kwargs.get('control')
+        return control if control is not None else active_control()
+
     def _calculate_rmse(self, y_true, y_pred) -> float:
         """计算RMSE"""
         if y_pred is None:
@@ -347,7 +389,7 @@ class FittingWrapper:
             print(f"[FittingWrapper] 估计time_break失败: {e}，使用默认值133")
             return 133.0
     
-    def _model_runner_with_time_break(self, filename, time_break):
+    def _model_runner_with_time_break(self, filename, time_break, control=None):
         """
         增强版model_runner，可指定time_break参数
         
@@ -423,8 +465,11 @@ class FittingWrapper:
         
         # 执行优化
         bnds = ((0,np.inf),(0,np.inf),(-np.inf,np.inf))
-        result = minimize(Loss_local_in_one, initial_guess, args=(A_data, T_data, Y_data, time_break),
-                          method='BFGS',options={'eps': 1e-3})
+        objective, callback = Loss_local_in_one, None
+        if control is not None:
+            objective, callback = control.track(Loss_local_in_one)
+        result = minimize(objective, initial_guess, args=(A_data, T_data, Y_data, time_break),
+                          method='BFGS',options={'eps': 1e-3}, callback=callback)
         
         # 最优参数
         R_opt, ka_opt, kd_opt = result.x
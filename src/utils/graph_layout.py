@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+"""
+分层图布局（血缘图使用）
+
+- 全量布局：Kahn拓扑排序 + 邻接表，O(节点 + 边)
+- 增量布局：新节点只挂在已有节点之下时直接追加到对应层末尾，已有节点位置不变
+- 有环时剩余节点统一放到最后一层（与原实现一致）
+
+不依赖Qt，只负责计算坐标。
+"""
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+
+Edge = Tuple[str, str]
+
+
+class LayeredLayout:
+    """
+    分层布局缓存
+
+    levels: 节点 → 层号；rows: 层号 → 该层节点（按放置顺序）；positions: 节点 → (x, y)
+    """
+
+    def __init__(self, x_spacing: float = 200, y_spacing: float = 120,
+                 start_x: float = 50, start_y: float = 50):
+        self.x_spacing = x_spacing
+        self.y_spacing = y_spacing
+        self.start_x = start_x
+        self.start_y = start_y
+        self.levels: Dict[str, int] = {}
+        self.rows: Dict[int, List[str]] = defaultdict(list)
+        self.positions: Dict[str, Tuple[float, float]] = {}
+        self._next_slot: Dict[int, int] = defaultdict(int)  # 删除节点留下的空位不复用
+
+    def compute(self, node_ids: Iterable[str], edges: Iterable[Edge]) -> Dict[str, Tuple[float, float]]:
+        """
+        全量布局
+
+        参数:
+            node_ids: 节点（同层内按此顺序排列）
+            edges: (源, 目标)；端点不在 node_ids 中的边忽略
+
+        返回:
+            节点 → (x, y)
+        """
+        self.levels.clear()
+        self.rows.clear()
+        self.positions.clear()
+        self._next_slot.clear()
+        self._place(list(node_ids), edges, base_level=0)
+        return self.positions
+
+    def extend(self, new_ids: Iterable[str], edges: Iterable[Edge]) -> bool:
+        """
+        增量追加新节点
+
+        只有当所有涉及新节点的边都指向新节点（新节点挂在已有节点之下）时才能追加；
+        否则已有节点的层级可能改变，返回False，由调用方改为全量布局。
+
+        参数:
+            new_ids: 新节点
+            edges: 全部边（或至少包含涉及新节点的边）
+        """
+        new_ids = [n for n in new_ids if n not in self.levels]
+        if not new_ids:
+            return True
+        new_set = set(new_ids)
+        relevant = []
+        for source, target in edges:
+            if source in new_set or target in new_set:
+                if target not in new_set:
+                    return False
+                relevant.append((source, target))
+        self._place(new_ids, relevant, base_level=None)
+        return True
+
+    def remove(self, node_ids: Iterable[str]):
+        """移除节点（其余节点位置不变，留下空位）"""
+        for node_id in node_ids:
+            level = self.levels.pop(node_id, None)
+            self.positions.pop(node_id, None)
+            if level is not None:
+                row = self.rows.get(level)
+                if row and node_id in row:
+                    row.remove(node_id)
+
+    # ========== 内部实现 ==========
+
+    def _place(self, node_ids: List[str], edges: Iterable[Edge], base_level: Optional[int]):
+        """
+        Kahn算法分层放置 node_ids
+
+        base_level为None时（增量），层号 = 已有父节点的最大层号 + 1
+        """
+        order = {node_id: i for i, node_id in enumerate(node_ids)}
+        children: Dict[str, List[str]] = defaultdict(list)
+        in_degree: Dict[str, int] = dict.fromkeys(node_ids, 0)
+        level: Dict[str, int] = dict.fromkeys(node_ids, 0 if base_level is None else base_level)
+        seen: Set[Edge] = set()
+        for source, target in edges:
+            if target not in order or (source, target) in seen:
+                continue
+            seen.add((source, target))
+            if source in order:
+                children[source].append(target)
+                in_degree[target] += 1
+            elif source in self.levels:
+                # 已有父节点（增量）
+                level[target] = max(level[target], self.levels[source] + 1)
+
+        frontier = [n for n in node_ids if in_degree[n] == 0]
+        placed: List[str] = []
+        while frontier:
+            next_frontier = []
+            for node_id in frontier:
+                placed.append(node_id)
+                for child in children[node_id]:
+                    level[child] = max(level[child], level[node_id] + 1)
+                    in_degree[child] -= 1
+                    if in_degree[child] == 0:
+                        next_frontier.append(child)
+            frontier = next_frontier
+
+        if len(placed) < len(node_ids):
+            # 有环：剩余节点放到最后一层
+            done = set(placed)
+            remaining = [n for n in node_ids if n not in done]
+            last = max([level[n] for n in placed] + [max(self.rows, default=-1)]) + 1
+            for node_id in remaining:
+                level[node_id] = last
+            placed.extend(remaining)
+
+        # 同层按输入顺序排列，追加到该层末尾
+        for node_id in sorted(placed, key=order.__getitem__):
+            lv = level[node_id]
+            slot = self._next_slot[lv]
+            self._next_slot[lv] = slot + 1
+            self.rows[lv].append(node_id)
+            self.levels[node_id] = lv
+            self.positions[node_id] = (self.start_x + slot * self.x_spacing,
+                                       self.start_y + lv * self.y_spacing)
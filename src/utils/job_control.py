@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+"""
+任务控制 - 取消令牌与进度通道
+
+后台任务与GUI共享一小块状态：取消标志、当前起点序号/起点总数、迭代次数、目前最优损失。
+- 线程任务：状态是进程内的numpy数组
+- 进程任务：状态是临时文件的内存映射（np.memmap），控制对象pickle到子进程后按路径重新映射，
+  两边读写同一块内存
+
+优化器用 track() 包装目标函数并取得 minimize 的 callback：每次目标函数求值和每次迭代
+都检查取消标志，取消后抛出 JobCancelled，正在运行的拟合最多一次迭代内中止。
+
+任务函数不需要额外参数：JobManager 执行任务期间把控制对象设为当前线程的活动控制，
+拟合代码通过 active_control() 取得（没有时为None，不做任何检查）。
+"""
+import os
+import tempfile
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+
+class JobCancelled(BaseException):
+    """
+    任务已取消
+
+    与 asyncio.CancelledError 一样继承 BaseException，
+    不会被拟合代码中大量的 except Exception 当作普通错误吞掉。
+    """
+
+
+# 状态字段
+_CANCEL, _START, _N_STARTS, _ITERATION, _BEST_LOSS = range(5)
+_FIELDS = 5
+
+
+class JobControl:
+    """
+    单个任务的取消令牌 + 进度通道
+
+    GUI侧：cancel() / snapshot() / fraction()
+    任务侧：check() / begin() / track()
+    """
+
+    def __init__(self, shared: bool = False):
+        """
+        参数:
+            shared: 状态放在内存映射文件中，可传给子进程（进程池任务）
+        """
+        self.shared = shared
+        self._path: Optional[str] = None
+        self._owner = True
+        if shared:
+            fd, self._path = tempfile.mkstemp(prefix='spr_job_', suffix='.ctl')
+            os.close(fd)
+            self._state = np.memmap(self._path, dtype=np.float64, mode='w+', shape=(_FIELDS,))
+        else:
+            self._state = np.zeros(_FIELDS)
+        self._state[_N_STARTS] = 1
+        self._state[_BEST_LOSS] = np.inf
+
+    def __getstate__(self):
+        if not self.shared or self._path is None:
+            raise TypeError("非共享的JobControl不能传给子进程")
+        return {'path': self._path}
+
+    def __setstate__(self, state):
+        self.shared = True
+        self._path = state['path']
+        self._owner = False
+        self._state = np.memmap(self._path, dtype=np.float64, mode='r+', shape=(_FIELDS,))
+
+    # ========== 取消 ==========
+
+    def cancel(self):
+        """请求取消（任务在下一次目标函数求值或迭代时中止）"""
+        self._state[_CANCEL] = 1.0
+
+    @property
+    def cancelled(self) -> bool:
+        return bool(self._state[_CANCEL])
+
+    def check(self):
+        """已请求取消时抛出 JobCancelled"""
+        if self._state[_CANCEL]:
+            raise JobCancelled()
+
+    # ========== 进度 ==========
+
+    def begin(self, start: int = 0, n_starts: int = 1):
+        """开始第 start 个起点（从0计，共 n_starts 个）的优化"""
+        self.check()
+        self._state[_START] = start
+        self._state[_N_STARTS] = max(int(n_starts), 1)
+        self._state[_ITERATION] = 0
+
+    def track(self, fun: Callable, start: int = 0, n_starts: int = 1) -> Tuple[Callable, Callable]:
+        """
+        包装一次 minimize
+
+        参数:
+            fun: 目标函数 fun(params, *args)
+            start / n_starts: 当前起点序号与起点总数
+
+        返回:
+            (目标函数, callback)：目标函数每次求值检查取消并记录最优损失，
+            callback 每次迭代计数并检查取消
+        """
+        self.begin(start, n_starts)
+        state = self._state
+
+        def objective(params, *args):
+            if state[_CANCEL]:
+                raise JobCancelled()
+            value = fun(params, *args)
+            try:
+                loss = float(value)
+            except (TypeError, ValueError):
+                loss = float(np.sum(value))
+            if loss < state[_BEST_LOSS]:
+                state[_BEST_LOSS] = loss
+            return value
+
+        def callback(*_):
+            state[_ITERATION] += 1
+            if state[_CANCEL]:
+                raise JobCancelled()
+
+        return objective, callback
+
+    def snapshot(self) -> Dict[str, Any]:
+        """当前进度：start / n_starts / iteration / best_loss（尚无时None）/ cancelled"""
+        state = np.array(self._state)
+        best = float(state[_BEST_LOSS])
+        return {
+            'start': int(state[_START]),
+            'n_starts': int(state[_N_STARTS]),
+            'iteration': int(state[_ITERATION]),
+            'best_loss': best if np.isfinite(best) else None,
+            'cancelled': bool(state[_CANCEL]),
+        }
+
+    def fraction(self) -> float:
+        """粗略进度（已完成的起点数 / 起点总数）"""
+        state = np.array(self._state)
+        return float(state[_START] / max(state[_N_STARTS], 1))
+
+    def close(self):
+        """释放共享状态（只有创建方删除文件；之后 snapshot 返回最后的值）"""
+        if self._path is None:
+            return
+        self._state = np.array(self._state)
+        if self._owner:
+            try:
+                os.remove(self._path)
+            except OSError:
+                pass
+        self._path = None
+
+
+# ========== 活动控制（按线程） ==========
+
+_local = threading.local()
+
+
+def active_control() -> Optional[JobControl]:
+    """当前线程正在执行的任务的控制对象（不在任务中时为None）"""
+    return getattr(_local, 'control', None)
+
+
+def run_with_control(control: Optional[JobControl], func: Callable, args=(), kwargs=None):
+    """以 control 为活动控制执行 func（模块级函数，可提交到进程池）"""
+    previous = active_control()
+    _local.control = control
+    try:
+        return func(*args, **(kwargs or {}))
+    finally:
+        _local.control = previous
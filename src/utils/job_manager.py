@@ -2,54 +2,176 @@
 """
 JobManager - 统一后台任务调度（线程/进程）、进度、取消与结果回传。
 
-最小可用实现：
 - 线程池执行（I/O密集）
 - 进程池执行（CPU密集）
 - 提供 submit(func, *args, **kwargs, use_process=False) → job_id
-- 取消/信号：started/progress/finished/failed/cancelled
+- 取消/信号：started/progress/finished/failed/cancelled/timed_out
+- 每个任务带一个 JobControl（见 job_control.py）：取消令牌 + 进度通道，
+  拟合代码在 minimize 的每次迭代检查取消并上报起点序号/迭代次数/最优损失，
+  主线程定时轮询后以 job_progress / job_progress_info 发出
 
-后续可扩展：优先级、超时、批量任务、阶段化进度。
+调度：
+- 任务先进入 JobManager 自己的等待队列，有空闲槽位（线程池线程数 / 进程数）时才交给执行池，
+  因此后提交的高优先级任务可以越过排队中的低优先级任务
+- 优先级：交互（单次拟合）> 批量 > 后台（依赖重新计算）；同一优先级内按 group 轮转，
+  多个批量提交公平地交替执行
+- 槽位多于1个时保留 RESERVED_INTERACTIVE_SLOTS 个只给交互任务，批量占满时交互任务也能立即开始
+- 非交互任务的等待队列有上限（max_pending）：满时阻塞提交方，或 block=False 时抛出 JobQueueFull，
+  队列降到一半以下时发出 capacity_available
+- 进程任务的大数组/数值DataFrame参数与结果经共享内存块传递（见 shared_arrays.py），
+  跨进程只pickle描述符；参数块在任务结束时释放
+- 进程池在首次提交进程任务（或 prewarm()）时才创建：工作进程启动时预先导入并预热数值计算栈
+  与拟合模块（job_tasks.warm_up_worker），每个进程执行 max_tasks_per_child 个任务后重启，
+  防止长时间批量运行中内存累积；进程数与重启间隔默认取自 config.py（JOB_MAX_WORKERS / JOB_WORKER_MAX_TASKS）；
+  工作进程异常退出（被杀死、崩溃、重启失败）使进程池损坏时丢弃该进程池，之后的任务使用新进程池
+- 工作进程的 BLAS/OpenMP 线程数限制为 CPU核数 // 进程数（config.JOB_NATIVE_THREADS 可覆盖），
+  避免 进程数 × 核数 个线程超订CPU（见 native_threads.py）
+- timeout：从开始执行计时，超时后取消令牌，任务中止后以 on_timeout(job_id, partial) 回调
+  （partial 含最后的进度，以及超时后才返回的结果）
+- 指标：每个任务的排队等待/传递/执行/结果回调耗时，以及等待队列深度、槽位占用率，
+  登记到 job_metrics.MetricsRegistry（默认进程内共享的 default_registry()，任务统计面板读取）
 """
-from PySide6.QtCore import QObject, Signal, QRunnable, QThreadPool
+from PySide6.QtCore import QObject, Signal, QRunnable, QThreadPool, QTimer, QThread, QMetaObject, Qt
 from PySide6.QtWidgets import QApplication
+import os
+import time
 import uuid
+import threading
 import traceback
+import multiprocessing
+from collections import OrderedDict, deque
 from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, Optional
 
+from . import config_value
+from .job_control import JobControl, JobCancelled, run_with_control
+from .shared_arrays import default_shared_store, call_shared, adopt_shared
+from .job_tasks import warm_up_worker, worker_info
+from .native_threads import threads_per_worker, export_thread_env, native_thread_report
+from .job_metrics import default_registry, timed_call
 
-class _Runnable(QRunnable):
-    def __init__(self, job_id, func, args, kwargs, mgr):
-        super().__init__()
+
+class JobQueueFull(RuntimeError):
+    """等待队列已满（block=False 提交时）"""
+
+
+def error_summary(error: str) -> str:
+    """
+    失败回调错误信息的摘要：取最后一个非空行（"异常类型: 信息"）
+
+    on_fail 收到的是 "异常信息\n完整堆栈"，异常信息可能为空或多行，最后一行总是异常本身
+    """
+    lines = [line.strip() for line in (error or "").splitlines() if line.strip()]
+    return lines[-1] if lines else "未知错误"
+
+
+class _Job:
+    """一个任务的调度信息（JobManager 内部使用）"""
+
+    def __init__(self, job_id, func, args, kwargs, use_process, priority, group, timeout, callbacks):
         self.job_id = job_id
         self.func = func
         self.args = args
         self.kwargs = kwargs
+        self.use_process = use_process
+        self.priority = priority
+        self.group = group
+        self.timeout = timeout
+        self.callbacks = callbacks  # on_started/on_done/on_fail/on_progress/on_cancelled/on_timeout
+        self.state = 'pending'  # pending → running
+        self.control = None
+        self.future = None
+        self.pool = None  # 执行该任务的进程池
+        self.runnable = None
+        self.shared_refs = []  # 进程任务参数的共享块
+        self.submitted_at = time.monotonic()
+        self.started_at = None
+        self.run_seconds = None  # 任务函数本身的执行时间（指标）
+        self.timed_out = False
+
+
+class _JobRunnable(QRunnable):
+    def __init__(self, job, mgr):
+        super().__init__()
+        self.job = job
         self.mgr = mgr
 
     def run(self):
+        job = self.job
         try:
-            self.mgr.job_started.emit(self.job_id)
-            result = self.func(*self.args, **self.kwargs)
-            self.mgr.job_finished.emit(self.job_id, result)
+            result, job.run_seconds = run_with_control(job.control, timed_call, (job.func, job.args, job.kwargs))
+        except JobCancelled:
+            self.mgr._finish(job, 'cancelled', None)
         except Exception as e:
             tb = traceback.format_exc()
-            self.mgr.job_failed.emit(self.job_id, f"{e}\n{tb}")
+            self.mgr._finish(job, 'failed', f"{e}\n{tb}")
+        else:
+            self.mgr._finish(job, 'done', result)
 
 
 class JobManager(QObject):
     job_started = Signal(str)
     job_progress = Signal(str, float)
+    job_progress_info = Signal(str, object)  # (job_id, JobControl.snapshot())
     job_finished = Signal(str, object)
     job_failed = Signal(str, str)
     job_cancelled = Signal(str)
+    job_timed_out = Signal(str, object)  # (job_id, partial)
+    capacity_available = Signal()
 
     _instance = None
 
-    def __init__(self, parent=None):
+    # 优先级（数值越小越先执行）
+    PRIORITY_INTERACTIVE = 0
+    PRIORITY_BATCH = 1
+    PRIORITY_BACKGROUND = 2
+
+    # 非交互任务等待队列上限
+    MAX_PENDING = 256
+
+    # 保留给交互任务的槽位数（槽位总数大于此值时生效）
+    RESERVED_INTERACTIVE_SLOTS = 1
+
+    # 进度轮询/超时检查间隔（毫秒）
+    PROGRESS_INTERVAL_MS = 100
+
+    def __init__(self, parent=None, max_workers=None, max_pending=None, max_tasks_per_child=None,
+                 native_threads=None, metrics=None):
+        """
+        参数:
+            max_workers: 进程池进程数（默认 config.JOB_MAX_WORKERS，未设置时为CPU核数）
+            max_pending: 非交互任务等待队列上限（默认 MAX_PENDING）
+            max_tasks_per_child: 工作进程执行多少个任务后重启（默认 config.JOB_WORKER_MAX_TASKS，0不重启）
+            native_threads: 每个工作进程的BLAS/OpenMP线程数（默认 config.JOB_NATIVE_THREADS，
+                未设置时为 CPU核数 // 进程数）
+            metrics: 指标登记（默认 job_metrics.default_registry()）
+        """
         super().__init__(parent)
         self._thread_pool = QThreadPool.globalInstance()
-        self._proc_pool = ProcessPoolExecutor(max_workers=None)
-        self._futures = {}  # job_id -> future (for process jobs)
+        self._max_process_jobs = max_workers or config_value('JOB_MAX_WORKERS') or os.cpu_count() or 1
+        if max_tasks_per_child is None:
+            max_tasks_per_child = config_value('JOB_WORKER_MAX_TASKS', 0)
+        self._max_tasks_per_child = max_tasks_per_child or None
+        self._native_threads = native_threads  # None: 按进程数自动计算
+        self._proc_pool = None  # 首次提交进程任务时创建（_process_pool）
+        self._pool_lock = threading.Lock()
+        self._shared_store = default_shared_store()
+        self.max_pending = max_pending or self.MAX_PENDING
+
+        self._space = threading.Condition(threading.RLock())
+        self._jobs = {}  # job_id -> _Job（等待中与运行中）
+        self._pending = {False: {}, True: {}}  # use_process -> priority -> OrderedDict(group -> deque)
+        self._bounded_pending = 0  # 等待中的非交互任务数
+        self._was_full = False
+        self._running = {False: 0, True: 0}
+        self._controls = {}  # job_id -> JobControl（运行中）
+        self._last_progress = {}
+        self.metrics = metrics or default_registry()
+
+        self._progress_timer = QTimer(self)
+        self._progress_timer.setInterval(self.PROGRESS_INTERVAL_MS)
+        self._progress_timer.timeout.connect(self._poll_progress)
 
     @classmethod
     def instance(cls):
@@ -57,20 +179,30 @@ class JobManager(QObject):
             app = QApplication.instance()
             cls._instance = JobManager(parent=app)
         return cls._instance
-    
+
     @classmethod
     def reset_instance(cls):
         """强制重置JobManager实例,清除所有旧任务和回调"""
         if cls._instance is not None:
+            mgr = cls._instance
+            with mgr._space:
+                # 丢弃等待中的任务；正在运行的任务在下一次迭代中止
+                for queues in mgr._pending.values():
+                    queues.clear()
+                mgr._bounded_pending = 0
+                mgr._space.notify_all()
+                for control in list(mgr._controls.values()):
+                    control.cancel()
             try:
                 # 关闭进程池
-                cls._instance._proc_pool.shutdown(wait=False, cancel_futures=True)
+                if mgr._proc_pool is not None:
+                    mgr._proc_pool.shutdown(wait=False, cancel_futures=True)
             except Exception:
                 pass
             try:
                 # ⭐ 清空线程池中的所有待执行任务
-                cls._instance._thread_pool.clear()
-                cls._instance._thread_pool.waitForDone(100)  # 等待100ms让正在执行的任务完成
+                mgr._thread_pool.clear()
+                mgr._thread_pool.waitForDone(100)  # 等待100ms让正在执行的任务完成
             except Exception:
                 pass
             cls._instance = None
@@ -82,95 +214,486 @@ class JobManager(QObject):
         job_id = self.new_job_id()
         return self.submit_with_id(job_id, func, *args, use_process=use_process, **kwargs)
 
-    def submit_with_id(self, job_id: str, func, *args, use_process=False, **kwargs) -> str:
-        if use_process:
-            # 进程池执行
-            self.job_started.emit(job_id)
-            fut = self._proc_pool.submit(func, *args, **kwargs)
-            self._futures[job_id] = fut
-            fut.add_done_callback(lambda f, jid=job_id: self._on_future_done(jid, f))
-        else:
-            # 线程池执行
-            runnable = _Runnable(job_id, func, args, kwargs, self)
-            self.job_started.emit(job_id)
-            self._thread_pool.start(runnable)
+    def submit_with_id(self, job_id: str, func, *args, use_process=False,
+                       priority=PRIORITY_INTERACTIVE, timeout=None, **kwargs) -> str:
+        job = _Job(job_id, func, args, kwargs, use_process, priority, None, timeout, {})
+        self._enqueue(job, block=True)
         return job_id
 
-    def cancel(self, job_id: str):
-        fut = self._futures.get(job_id)
-        if fut is not None:
-            cancelled = fut.cancel()
-            if cancelled:
-                self.job_cancelled.emit(job_id)
-
-    def _on_future_done(self, job_id: str, future):
-        try:
-            result = future.result()
-            self.job_finished.emit(job_id, result)
-        except Exception as e:
-            tb = traceback.format_exc()
-            self.job_failed.emit(job_id, f"{e}\n{tb}")
-
-    def submit_with_callbacks(self, func, *args, 
-                             on_started=None, on_done=None, on_fail=None, 
-                             use_process=False, **kwargs) -> str:
+    def submit_with_callbacks(self, func, *args,
+                             on_started=None, on_done=None, on_fail=None,
+                             on_progress=None, on_cancelled=None, on_timeout=None,
+                             use_process=False, priority=PRIORITY_INTERACTIVE, group=None,
+                             timeout=None, block=True, **kwargs) -> str:
         """
         提交任务并使用回调函数（而非信号），避免lambda累积问题
-        
+
         Args:
             func: 要执行的函数
-            on_started: 回调 fn(job_id)
+            on_started: 回调 fn(job_id)，任务开始执行时
             on_done: 回调 fn(job_id, result)
             on_fail: 回调 fn(job_id, error_str)
+            on_progress: 回调 fn(job_id, info)，info 见 JobControl.snapshot()（主线程调用）
+            on_cancelled: 回调 fn(job_id)，运行中被取消时调用；未提供时以 on_fail(job_id, "已取消") 代替
+            on_timeout: 回调 fn(job_id, partial)，partial = {'progress': 最后进度, 'result': 超时后才返回的结果或None}；
+                        未提供时以 on_fail(job_id, "超时") 代替
             use_process: 是否使用进程池
-        
+            priority: PRIORITY_INTERACTIVE / PRIORITY_BATCH / PRIORITY_BACKGROUND
+            group: 公平调度分组（同一批量提交使用同一个值）
+            timeout: 执行超时（秒），None不限
+            block: 等待队列满时阻塞；False时抛出 JobQueueFull（交互任务不受队列上限限制）
+
+        on_started/on_done/on_fail/on_cancelled/on_timeout 在工作线程调用。
+
         Returns:
             job_id
         """
         job_id = self.new_job_id()
-        
-        if on_started:
-            on_started(job_id)
-        
+        callbacks = {'on_started': on_started, 'on_done': on_done, 'on_fail': on_fail,
+                     'on_progress': on_progress, 'on_cancelled': on_cancelled, 'on_timeout': on_timeout}
+        job = _Job(job_id, func, args, kwargs, use_process, priority, group, timeout, callbacks)
+        self._enqueue(job, block=block)
+        return job_id
+
+    def cancel(self, job_id: str) -> bool:
+        """
+        取消任务
+
+        - 尚未开始：直接移出队列，发出 job_cancelled，返回True，之后不再有回调
+        - 正在运行：设置取消令牌后返回False；拟合在一次迭代内中止，
+          结束时发出 job_cancelled（submit_with_callbacks 的任务调用 on_cancelled，未提供时调用 on_fail）
+        """
+        with self._space:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return False
+            if job.state == 'pending':
+                self._remove_pending(job)
+                self._jobs.pop(job_id, None)
+                self._sample_gauges()
+                removed = True
+            else:
+                removed = False
+        if removed:
+            self._record_dropped(job)
+            self.job_cancelled.emit(job_id)
+            return True
+
+        # 已交给执行池但尚未开始
+        if job.future is not None and job.future.cancel():
+            self.job_cancelled.emit(job_id)
+            return True
+        if job.runnable is not None:
+            try:
+                taken = self._thread_pool.tryTake(job.runnable)
+            except RuntimeError:  # 刚执行完，已被线程池删除
+                taken = False
+            if taken:
+                self._finish(job, 'dropped', None)
+                self.job_cancelled.emit(job_id)
+                return True
+        if job.control is not None:
+            job.control.cancel()
+        return False
+
+    def get_progress(self, job_id: str):
+        """任务当前进度（JobControl.snapshot()），任务不存在、尚未开始或已结束时为None"""
+        control = self._controls.get(job_id)
+        return control.snapshot() if control is not None else None
+
+    # ========== 进程池 ==========
+
+    @property
+    def max_workers(self) -> int:
+        return self._max_process_jobs
+
+    def set_max_workers(self, count: int):
+        """
+        修改进程数（设置页调用）
+
+        现有进程池在已提交的任务完成后关闭，之后的进程任务使用按新进程数创建的进程池。
+        """
+        count = max(int(count or 0), 1)
+        with self._pool_lock:
+            old, self._proc_pool = self._proc_pool, None
+        with self._space:
+            self._max_process_jobs = count
+            started = self._dispatch(True)
+        if old is not None:
+            old.shutdown(wait=False)
+        for ready in started:
+            self._launch(ready)
+
+    @property
+    def native_threads(self) -> int:
+        """每个工作进程的原生库（BLAS/OpenMP）线程数"""
+        return threads_per_worker(self._max_process_jobs, self._native_threads)
+
+    def set_native_threads(self, count: Optional[int]):
+        """
+        修改每个工作进程的原生库线程数（None 恢复自动计算）
+
+        线程数只能在工作进程启动前设置，因此现有进程池在已提交的任务完成后关闭，之后的任务使用新进程池。
+        """
+        self._native_threads = max(int(count), 1) if count else None
+        with self._pool_lock:
+            old, self._proc_pool = self._proc_pool, None
+        if old is not None:
+            old.shutdown(wait=False)
+
+    def thread_diagnostics(self, on_done, timeout: float = 60.0) -> str:
+        """
+        原生线程配置诊断：主进程与一个进程池工作进程的 native_thread_report()（必要时启动进程池）
+
+        工作进程报告作为交互任务提交（占用进程槽位），不阻塞调用线程；完成后在工作线程调用
+        on_done(report)：
+            {'max_workers', 'native_threads', 'native_threads_auto': 是否按进程数自动计算,
+             'main': 主进程报告, 'worker': 工作进程报告（失败/超时时为错误信息）}
+
+        返回:
+            job_id
+        """
+        report = {
+            'max_workers': self._max_process_jobs,
+            'native_threads': self.native_threads,
+            'native_threads_auto': not (self._native_threads or config_value('JOB_NATIVE_THREADS')),
+            'main': native_thread_report(),
+        }
+
+        def finish(worker):
+            report['worker'] = worker
+            on_done(report)
+
+        return self.submit_with_callbacks(native_thread_report, use_process=True, timeout=timeout,
+                                          on_done=lambda jid, result: finish(result),
+                                          on_fail=lambda jid, error: finish(error))
+
+    def prewarm(self) -> int:
+        """
+        提前创建进程池并启动全部工作进程（例如打开批量拟合对话框时调用），
+        首个批量任务不必等待进程启动与模块导入
+
+        预热任务以后台优先级经槽位调度提交，不抢占已排队的任务；等待队列已满时不再提交
+        （排队的任务本身会启动工作进程）
+
+        返回:
+            提交的预热任务数
+        """
+        submitted = 0
+        for _ in range(self._max_process_jobs):
+            try:
+                self.submit_with_callbacks(worker_info, use_process=True,
+                                           priority=self.PRIORITY_BACKGROUND, block=False)
+            except JobQueueFull:
+                break
+            submitted += 1
+        return submitted
+
+    def _process_pool(self) -> ProcessPoolExecutor:
+        """进程池（首次调用时创建）"""
+        with self._pool_lock:
+            if self._proc_pool is None:
+                # BLAS/OpenMP 只在加载时读取线程数：先写入环境变量，工作进程（含回收后重启的）启动时继承。
+                # 主进程的库早已加载，不受影响
+                threads = self.native_threads
+                export_thread_env(threads)
+                # 统一用 spawn 启动工作进程：主进程已有Qt/线程池线程，fork 可能在子进程中死锁
+                self._proc_pool = ProcessPoolExecutor(
+                    max_workers=self._max_process_jobs,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=warm_up_worker,
+                    initargs=(threads,),
+                    max_tasks_per_child=self._max_tasks_per_child)
+                print(f"[JobManager] 创建进程池: {self._max_process_jobs} 个进程, "
+                      f"每进程 {threads} 个原生库线程, "
+                      f"每进程 {self._max_tasks_per_child or '不限'} 个任务后重启")
+            return self._proc_pool
+
+    def _discard_pool(self, pool: ProcessPoolExecutor):
+        """
+        丢弃已损坏的进程池（工作进程被杀死/崩溃），下一个进程任务创建新进程池
+
+        损坏的进程池已由其管理线程终止剩余进程；这里不调用 shutdown()：
+        回调可能正在该管理线程中执行，且其持有进程池的锁
+        """
+        with self._pool_lock:
+            if self._proc_pool is not pool:
+                return
+            self._proc_pool = None
+        print("[JobManager] 进程池已损坏（工作进程异常退出），之后的进程任务使用新进程池")
+
+    def _submit_process(self, fn, *args):
+        """
+        提交到进程池；进程池已损坏时换新进程池重试一次
+
+        返回:
+            (进程池, future)
+        """
+        pool = self._process_pool()
+        try:
+            return pool, pool.submit(fn, *args)
+        except BrokenProcessPool:
+            self._discard_pool(pool)
+            pool = self._process_pool()
+            return pool, pool.submit(fn, *args)
+
+    def pending_count(self) -> int:
+        """等待中的非交互任务数"""
+        with self._space:
+            return self._bounded_pending
+
+    def has_capacity(self) -> bool:
+        """非交互任务能否不阻塞地提交"""
+        return self.pending_count() < self.max_pending
+
+    # ========== 调度 ==========
+
+    def _enqueue(self, job: _Job, block: bool):
+        with self._space:
+            if job.priority != self.PRIORITY_INTERACTIVE:
+                while self._bounded_pending >= self.max_pending:
+                    self._was_full = True
+                    if not block:
+                        raise JobQueueFull(f"等待队列已满（{self.max_pending}）")
+                    self._space.wait()
+                self._bounded_pending += 1
+            self._jobs[job.job_id] = job
+            groups = self._pending[job.use_process].setdefault(job.priority, OrderedDict())
+            groups.setdefault(job.group, deque()).append(job)
+            started = self._dispatch(job.use_process)
+        self._ensure_polling()
+        for ready in started:
+            self._launch(ready)
+
+    def _slot_limit(self, use_process: bool) -> int:
         if use_process:
-            # 进程池
-            def _callback(future):
-                try:
-                    result = future.result()
-                    if on_done:
-                        on_done(job_id, result)
-                except Exception as e:
-                    tb = traceback.format_exc()
-                    if on_fail:
-                        on_fail(job_id, f"{e}\n{tb}")
-            
-            fut = self._proc_pool.submit(func, *args, **kwargs)
-            self._futures[job_id] = fut
-            fut.add_done_callback(_callback)
+            return self._max_process_jobs
+        return max(self._thread_pool.maxThreadCount(), 1)
+
+    def _dispatch(self, use_process: bool):
+        """取出可以开始的任务（调用方持有锁，返回后在锁外启动）"""
+        started = []
+        queues = self._pending[use_process]
+        limit = self._slot_limit(use_process)
+        while self._running[use_process] < limit:
+            free = limit - self._running[use_process]
+            job = None
+            for priority in sorted(queues):
+                groups = queues[priority]
+                if not groups:
+                    continue
+                if (priority != self.PRIORITY_INTERACTIVE and limit > self.RESERVED_INTERACTIVE_SLOTS
+                        and free <= self.RESERVED_INTERACTIVE_SLOTS):
+                    break
+                # 轮转：取第一个分组的队首，该分组移到末尾
+                group, jobs = next(iter(groups.items()))
+                job = jobs.popleft()
+                del groups[group]
+                if jobs:
+                    groups[group] = jobs
+                break
+            if job is None:
+                break
+            job.state = 'running'
+            # 在锁内设置：_poll_progress 看到 _controls 中的任务时开始时间已经有值
+            job.started_at = time.monotonic()
+            job.control = JobControl(shared=use_process)
+            self._controls[job.job_id] = job.control
+            self._running[use_process] += 1
+            if job.priority != self.PRIORITY_INTERACTIVE:
+                self._bounded_pending -= 1
+            started.append(job)
+        if started:
+            self._space.notify_all()
+            self._check_capacity()
+        self._sample_gauges()
+        return started
+
+    def _sample_gauges(self):
+        """登记等待队列深度与槽位占用率（调用方持有锁）"""
+        running = self._running[False] + self._running[True]
+        self.metrics.gauge('queue_depth', len(self._jobs) - running)
+        self.metrics.gauge('process_busy', self._running[True] / self._slot_limit(True))
+        self.metrics.gauge('thread_busy', self._running[False] / self._slot_limit(False))
+
+    def _remove_pending(self, job: _Job):
+        groups = self._pending[job.use_process].get(job.priority, {})
+        jobs = groups.get(job.group)
+        if jobs is not None and job in jobs:
+            jobs.remove(job)
+            if not jobs:
+                del groups[job.group]
+        if job.priority != self.PRIORITY_INTERACTIVE:
+            self._bounded_pending -= 1
+            self._space.notify_all()
+            self._check_capacity()
+
+    def _check_capacity(self):
+        """队列曾经满过、现在降到一半以下时通知提交方"""
+        if self._was_full and self._bounded_pending <= self.max_pending // 2:
+            self._was_full = False
+            self.capacity_available.emit()
+
+    def _launch(self, job: _Job):
+        """交给执行池（锁外调用）；提交失败（如进程池已损坏）时任务以 failed 结束"""
+        self.job_started.emit(job.job_id)
+        on_started = job.callbacks.get('on_started')
+        if on_started:
+            on_started(job.job_id)
+        try:
+            if job.use_process:
+                args, kwargs, job.shared_refs = self._shared_store.share_payload(job.args, job.kwargs)
+                # timed_call 在工作进程中单独计时任务函数，其余即为传递开销
+                job.pool, fut = self._submit_process(run_with_control, job.control, call_shared,
+                                                     (timed_call, (job.func, args, kwargs), {}))
+                job.future = fut
+                fut.add_done_callback(lambda f, j=job: self._on_future_done(j, f))
+            else:
+                job.runnable = _JobRunnable(job, self)
+                self._thread_pool.start(job.runnable)
+        except Exception as e:
+            tb = traceback.format_exc()
+            print(f"[JobManager] 任务提交失败: {job.job_id} - {type(e).__name__}: {e}")
+            self._finish(job, 'failed', f"{e}\n{tb}")
+
+    def _on_future_done(self, job: _Job, future):
+        if future.cancelled():
+            self._finish(job, 'dropped', None)
+            return
+        try:
+            result, job.run_seconds = adopt_shared(future.result())
+        except JobCancelled:
+            self._finish(job, 'cancelled', None)
+        except BrokenProcessPool as e:
+            # 先丢弃进程池：_finish 启动的下一个任务不能再提交到这个进程池
+            self._discard_pool(job.pool)
+            self._finish(job, 'failed', f"工作进程异常退出: {e}")
+        except Exception as e:
+            tb = traceback.format_exc()
+            self._finish(job, 'failed', f"{e}\n{tb}")
         else:
-            # 线程池 - 需要包装
-            class CallbackRunnable(QRunnable):
-                def __init__(self, jid, f, a, kw, on_d, on_f):
-                    super().__init__()
-                    self.jid = jid
-                    self.func = f
-                    self.args = a
-                    self.kwargs = kw
-                    self.on_done = on_d
-                    self.on_fail = on_f
-                
-                def run(self):
-                    try:
-                        result = self.func(*self.args, **self.kwargs)
-                        if self.on_done:
-                            self.on_done(self.jid, result)
-                    except Exception as e:
-                        tb = traceback.format_exc()
-                        if self.on_fail:
-                            self.on_fail(self.jid, f"{e}\n{tb}")
-            
-            runnable = CallbackRunnable(job_id, func, args, kwargs, on_done, on_fail)
-            self._thread_pool.start(runnable)
-        
-        return job_id
+            self._finish(job, 'done', result)
+
+    def _finish(self, job: _Job, status: str, payload):
+        """
+        任务结束：释放槽位、回调、启动下一个任务
+
+        status: done / failed / cancelled / dropped（尚未开始就被移出，不回调）
+        """
+        finished_at = time.monotonic()
+        with self._space:
+            if self._jobs.pop(job.job_id, None) is None:
+                return
+            self._running[job.use_process] -= 1
+            self._controls.pop(job.job_id, None)
+            self._last_progress.pop(job.job_id, None)
+            started = self._dispatch(job.use_process)
+        for ref in job.shared_refs:
+            self._shared_store.release(ref)
+        job.shared_refs = []
+        # 断开 任务 ↔ future（完成回调引用任务与 JobManager）的引用环：
+        # 否则 JobManager 可能由循环垃圾回收在进程池管理线程中析构，Qt 对象跨线程销毁会崩溃
+        job.future = job.pool = job.runnable = None
+        progress = None
+        if job.control is not None:
+            progress = job.control.snapshot()
+            job.control.close()
+        try:
+            if status == 'dropped':
+                self._record_dropped(job)
+                return
+            delivered_at = time.monotonic()
+            try:
+                self._deliver(job, status, payload, progress)
+            finally:
+                self._record(job, status, finished_at, delivered_at)
+        finally:
+            # 先回调本任务再启动下一个：启动失败不会吞掉本任务的结果
+            for ready in started:
+                self._launch(ready)
+
+    def _deliver(self, job: _Job, status: str, payload, progress):
+        """发出完成信号并调用回调"""
+        callbacks = job.callbacks
+        if job.timed_out and status != 'failed':
+            partial = {'progress': progress, 'result': payload if status == 'done' else None}
+            print(f"[JobManager] 任务超时: {job.job_id} ({job.timeout}s)")
+            self.job_timed_out.emit(job.job_id, partial)
+            if callbacks.get('on_timeout'):
+                callbacks['on_timeout'](job.job_id, partial)
+            elif callbacks.get('on_fail'):
+                callbacks['on_fail'](job.job_id, "超时")
+        elif status == 'done':
+            self.job_finished.emit(job.job_id, payload)
+            if callbacks.get('on_done'):
+                callbacks['on_done'](job.job_id, payload)
+        elif status == 'failed':
+            self.job_failed.emit(job.job_id, payload)
+            if callbacks.get('on_fail'):
+                callbacks['on_fail'](job.job_id, payload)
+        else:
+            self.job_cancelled.emit(job.job_id)
+            if callbacks.get('on_cancelled'):
+                callbacks['on_cancelled'](job.job_id)
+            elif callbacks.get('on_fail'):
+                callbacks['on_fail'](job.job_id, "已取消")
+
+    def _record(self, job: _Job, status: str, finished_at: float, delivered_at: float):
+        """登记任务的分段耗时（finished_at: 执行结束；delivered_at: 开始回调）"""
+        now = time.monotonic()
+        started = job.started_at if job.started_at is not None else finished_at
+        elapsed = finished_at - started
+        run = job.run_seconds if job.run_seconds is not None else elapsed
+        self.metrics.record_job(
+            job.job_id,
+            getattr(job.func, '__name__', str(job.func)),
+            'process' if job.use_process else 'thread',
+            job.priority,
+            'timed_out' if job.timed_out and status != 'failed' else status,
+            queue_wait=started - job.submitted_at,
+            transfer=elapsed - run if job.use_process else 0.0,
+            run=run,
+            commit=now - delivered_at,
+            total=now - job.submitted_at)
+
+    def _record_dropped(self, job: _Job):
+        """登记尚未开始就被取消的任务（只有排队等待时间）"""
+        waited = time.monotonic() - job.submitted_at
+        self.metrics.record_job(
+            job.job_id,
+            getattr(job.func, '__name__', str(job.func)),
+            'process' if job.use_process else 'thread',
+            job.priority,
+            'cancelled',
+            queue_wait=waited,
+            total=waited)
+
+    # ========== 进度与超时 ==========
+
+    def _ensure_polling(self):
+        if QThread.currentThread() is self.thread():
+            self._progress_timer.start()
+        else:
+            QMetaObject.invokeMethod(self._progress_timer, "start", Qt.QueuedConnection)
 
+    def _poll_progress(self):
+        """主线程定时读取各任务的进度（变化时发出信号/调用 on_progress），并检查超时"""
+        now = time.monotonic()
+        for job_id, control in list(self._controls.items()):
+            job = self._jobs.get(job_id)
+            if job is None:
+                continue
+            if job.timeout is not None and not job.timed_out and now - job.started_at > job.timeout:
+                job.timed_out = True
+                control.cancel()
+            info = control.snapshot()
+            if self._last_progress.get(job_id) == info:
+                continue
+            self._last_progress[job_id] = info
+            self.job_progress.emit(job_id, control.fraction())
+            self.job_progress_info.emit(job_id, info)
+            on_progress = job.callbacks.get('on_progress')
+            if on_progress is not None:
+                on_progress(job_id, info)
+        if not self._jobs:
+            self._progress_timer.stop()
@@ -0,0 +1,235 @@
+# -*- coding: utf-8 -*-
+"""
+任务指标 - JobManager 的进程内轻量指标登记
+
+记录内容：
+- 每个任务的分段耗时（秒）：
+    queue_wait 提交 → 开始执行（在 JobManager 等待队列中的时间）
+    transfer   进程任务的参数/结果传递：开始执行 → 结果回到主进程，减去工作进程内的执行时间
+               （共享块打包、pickle、进程间通信、进程启动；线程任务为0）
+    run        任务函数本身的执行时间
+    commit     结果回调（on_done/on_fail 等与完成信号）的耗时
+    total      提交 → 回调结束
+- 状态量的变化：等待队列深度、进程/线程槽位占用率（按时间加权求平均）
+- 其他耗时序列：observe(name, seconds)，例如控制器把批量结果提交到会话的耗时
+
+只保留最近 max_jobs 个任务与 max_samples 个状态样本，登记本身是加锁的 deque 追加，开销可忽略。
+snapshot(window) 汇总最近 window 秒的吞吐量与分位数；export_csv() 导出逐任务记录与状态样本。
+"""
+import csv
+import time
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+
+STAGES = ('queue_wait', 'transfer', 'run', 'commit', 'total')
+JOB_FIELDS = ('finished_at', 'job_id', 'name', 'kind', 'priority', 'status') + STAGES
+
+
+def timed_call(func, args=(), kwargs=None):
+    """
+    执行并计时：返回 (结果, 执行秒数)
+
+    （模块级函数，可提交到进程池；在工作进程中计时，主进程据此把执行时间与传递时间分开）
+    """
+    started = time.perf_counter()
+    result = func(*args, **(kwargs or {}))
+    return result, time.perf_counter() - started
+
+
+def _percentiles(values: List[float]) -> Optional[Dict[str, float]]:
+    if not values:
+        return None
+    array = np.asarray(values, dtype=float)
+    p50, p90, p99 = np.percentile(array, [50, 90, 99])
+    return {'p50': float(p50), 'p90': float(p90), 'p99': float(p99),
+            'max': float(array.max()), 'mean': float(array.mean()), 'count': int(array.size)}
+
+
+class MetricsRegistry:
+    """任务指标登记（线程安全）"""
+
+    def __init__(self, max_jobs: int = 5000, max_samples: int = 20000):
+        self._lock = threading.Lock()
+        self._jobs = deque(maxlen=max_jobs)  # (monotonic, record)
+        self._gauges: Dict[str, deque] = {}  # name -> deque[(monotonic, value)]
+        self._series: Dict[str, deque] = {}  # name -> deque[(monotonic, seconds)]
+        self._max_samples = max_samples
+        self._created = time.monotonic()
+
+    # ========== 登记 ==========
+
+    def record_job(self, job_id: str, name: str, kind: str, priority: int, status: str, **stages: float):
+        """登记一个结束的任务（stages: queue_wait/transfer/run/commit/total，缺省为None）"""
+        record = {
+            'finished_at': datetime.now().isoformat(timespec='milliseconds'),
+            'job_id': job_id,
+            'name': name,
+            'kind': kind,
+            'priority': priority,
+            'status': status,
+        }
+        for stage in STAGES:
+            value = stages.get(stage)
+            record[stage] = max(float(value), 0.0) if value is not None else None
+        with self._lock:
+            self._jobs.append((time.monotonic(), record))
+
+    def gauge(self, name: str, value: float):
+        """记录状态量的新值（与上一个值相同时不记录）"""
+        now = time.monotonic()
+        with self._lock:
+            samples = self._gauges.get(name)
+            if samples is None:
+                samples = self._gauges[name] = deque(maxlen=self._max_samples)
+            elif samples and samples[-1][1] == value:
+                return
+            samples.append((now, float(value)))
+
+    def observe(self, name: str, seconds: float):
+        """记录一次其他耗时（如 'batch_commit'）"""
+        with self._lock:
+            samples = self._series.get(name)
+            if samples is None:
+                samples = self._series[name] = deque(maxlen=self._max_samples)
+            samples.append((time.monotonic(), float(seconds)))
+
+    def clear(self):
+        with self._lock:
+            self._jobs.clear()
+            # 状态量保留当前值，作为之后加权平均的起点
+            now = time.monotonic()
+            for name, samples in self._gauges.items():
+                if samples:
+                    last = samples[-1][1]
+                    samples.clear()
+                    samples.append((now, last))
+            self._series.clear()
+            self._created = now
+
+    # ========== 汇总 ==========
+
+    def _weighted_mean(self, samples, since: float, now: float) -> Optional[float]:
+        """阶梯状态量在 [since, now] 内的时间加权平均"""
+        if not samples:
+            return None
+        total = 0.0
+        value = None
+        last_t = since
+        for t, v in samples:
+            if t <= since:
+                value = v
+                continue
+            if value is not None:
+                total += value * (t - last_t)
+            last_t = t
+            value = v
+        if value is not None:
+            total += value * (now - last_t)
+        first = max(since, samples[0][0])
+        span = now - first
+        return total / span if span > 0 else value
+
+    def snapshot(self, window: float = 60.0) -> Dict[str, Any]:
+        """
+        最近 window 秒的汇总
+
+        返回:
+            {'window': 实际统计的秒数, 'completed'/'failed'/'cancelled'/'timed_out': 个数,
+             'throughput': 每秒结束的任务数, 'latency': {阶段: {'p50','p90','p99','max','mean','count'}},
+             'by_name': {任务函数: {'count', 'run': 分位数}}, 'gauges': {名称: {'current', 'max', 'mean'}},
+             'series': {名称: 分位数}}
+        """
+        now = time.monotonic()
+        since = now - window
+        with self._lock:
+            jobs = [record for t, record in self._jobs if t >= since]
+            gauges = {name: list(samples) for name, samples in self._gauges.items()}
+            series = {name: [v for t, v in samples if t >= since] for name, samples in self._series.items()}
+            span = min(window, now - self._created)
+
+        counts = {'done': 0, 'failed': 0, 'cancelled': 0, 'timed_out': 0}
+        for record in jobs:
+            counts[record['status']] = counts.get(record['status'], 0) + 1
+        latency = {}
+        for stage in STAGES:
+            latency[stage] = _percentiles([r[stage] for r in jobs if r[stage] is not None])
+        by_name: Dict[str, Dict[str, Any]] = {}
+        for record in jobs:
+            entry = by_name.setdefault(record['name'], {'count': 0, 'runs': []})
+            entry['count'] += 1
+            if record['run'] is not None:
+                entry['runs'].append(record['run'])
+        gauge_summary = {}
+        for name, samples in gauges.items():
+            if not samples:
+                continue
+            recent = [v for t, v in samples if t >= since]
+            # 窗口开始时的值也算在内
+            before = [v for t, v in samples if t < since]
+            if before:
+                recent.append(before[-1])
+            gauge_summary[name] = {
+                'current': samples[-1][1],
+                'max': max(recent) if recent else samples[-1][1],
+                'mean': self._weighted_mean(samples, since, now),
+            }
+        return {
+            'window': span,
+            'completed': counts['done'],
+            'failed': counts['failed'],
+            'cancelled': counts['cancelled'],
+            'timed_out': counts['timed_out'],
+            'throughput': len(jobs) / span if span > 0 else 0.0,
+            'latency': latency,
+            'by_name': {name: {'count': e['count'], 'run': _percentiles(e['runs'])} for name, e in by_name.items()},
+            'gauges': gauge_summary,
+            'series': {name: _percentiles(values) for name, values in series.items()},
+        }
+
+    # ========== 导出 ==========
+
+    def job_records(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [dict(record) for _, record in self._jobs]
+
+    def export_csv(self, path: str, gauges_path: Optional[str] = None) -> int:
+        """
+        导出逐任务记录（每行一个任务，耗时单位秒）；提供 gauges_path 时另导出状态样本与其他耗时序列
+
+        返回:
+            导出的任务数
+        """
+        records = self.job_records()
+        with open(path, 'w', newline='', encoding='utf-8-sig') as f:
+            writer = csv.DictWriter(f, fieldnames=JOB_FIELDS)
+            writer.writeheader()
+            writer.writerows(records)
+        if gauges_path:
+            with self._lock:
+                rows = [('gauge', name, t - self._created, v)
+                        for name, samples in self._gauges.items() for t, v in samples]
+                rows += [('series', name, t - self._created, v)
+                         for name, samples in self._series.items() for t, v in samples]
+            rows.sort(key=lambda row: row[2])
+            with open(gauges_path, 'w', newline='', encoding='utf-8-sig') as f:
+                writer = csv.writer(f)
+                writer.writerow(('type', 'name', 'seconds', 'value'))
+                writer.writerows(rows)
+        print(f"[MetricsRegistry] 导出 {len(records)} 条任务记录: {path}")
+        return len(records)
+
+
+_default_registry: Optional[MetricsRegistry] = None
+
+
+def default_registry() -> MetricsRegistry:
+    """进程内共享的指标登记"""
+    global _default_registry
+    if _default_registry is None:
+        _default_registry = MetricsRegistry()
+    return _default_registry
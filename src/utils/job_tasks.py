@@ -2,14 +2,103 @@
 """
 可在进程池中调用的纯函数任务（可pickle）。
 """
+import os
+import time
 from typing import Any, Dict
 
 
+# 本工作进程的预热信息（warm_up_worker 填写）
+_WORKER_INFO: Dict[str, Any] = {}
+
+
+def warm_up_worker(native_threads: int = None):
+    """进程池工作进程初始化：预先导入数值计算栈与拟合模块，并各运行一次小计算。
+    首个任务不再承担数秒的导入开销；回收重启的进程同样在空闲时完成预热。
+    native_threads: 本进程原生库（BLAS/OpenMP）线程数上限，见 native_threads.py
+    """
+    started = time.perf_counter()
+    if native_threads:
+        from src.utils.native_threads import limit_native_threads
+        _WORKER_INFO.update(native_threads=native_threads,
+                            native_limited_at_runtime=limit_native_threads(native_threads))
+    os.environ.setdefault('MPLBACKEND', 'Agg')  # 工作进程不需要GUI绘图后端
+    import io
+    import numpy as np
+    import pandas as pd
+    from scipy.optimize import minimize
+    import openpyxl  # noqa: F401  Excel读写（LocalBivariate经临时Excel传数据）
+    from src.utils import fitting_wrapper  # noqa: F401  同时把 XlementFitting 加入 sys.path
+    from model_data_process import LocalBivariate  # noqa: F401
+    try:
+        import XlementFitting  # noqa: F401
+    except Exception as e:
+        print(f"[warm_up_worker] XlementFitting 预导入失败: {e}")
+
+    # 各跑一次：minimize（含BFGS/SLSQP路径）与 Excel 往返
+    minimize(lambda p: float(np.sum((p - 1.0) ** 2)), np.zeros(3), method='BFGS')
+    buffer = io.BytesIO()
+    pd.DataFrame({'Time': [0.0, 1.0], '1e-9': [0.0, 1.0]}).to_excel(buffer, index=False)
+    buffer.seek(0)
+    pd.read_excel(buffer)
+
+    _WORKER_INFO.update(pid=os.getpid(), warm_seconds=time.perf_counter() - started, tasks=0)
+
+
+def worker_info() -> Dict[str, Any]:
+    """当前工作进程的预热信息（也用于触发进程启动）"""
+    return dict(_WORKER_INFO, pid=os.getpid())
+
+
 def run_fit_task(method: str, x_data, y_data, dataframe) -> Dict[str, Any]:
     """子进程可执行的拟合任务。
     不接受 GUI/Data 对象，只接受可序列化的数据结构。
+    经 JobManager 进程池执行时，大的 x/y/数值DataFrame 与结果中的拟合曲线通过共享内存块传递
+    （shared_arrays.py），这里拿到的已是映射后的数组。
     """
     from src.utils.fitting_wrapper import fit_data as _fit
     return _fit(method, x_data, y_data, dataframe=dataframe)
 
 
+
+def run_import_task(file_path: str, export_dir: str = None) -> Dict[str, Any]:
+    """子进程可执行的导入任务：解析单个文件为DataFrame。
+    JSON文件同时导出宽表Excel（与单文件导入一致），避免在GUI线程写盘。
+    导出文件名附加源文件路径的哈希：并发导入不同目录下的同名JSON时不会写同一个文件。
+    返回可pickle的字典：file_path / success / dataframe / error / export_path
+    """
+    import os
+    import hashlib
+    import tempfile
+    from src.utils.data_processor import load_file
+
+    result = {'file_path': file_path, 'success': False, 'dataframe': None,
+              'error': None, 'export_path': None}
+    success, df, error = load_file(file_path)
+    if not success:
+        result['error'] = error
+        return result
+
+    if os.path.splitext(file_path)[1].lower() == '.json':
+        try:
+            export_dir = export_dir or os.path.join(os.getcwd(), 'Json2excel')
+            os.makedirs(export_dir, exist_ok=True)
+            base_name = os.path.splitext(os.path.basename(file_path))[0]
+            path_hash = hashlib.sha1(os.path.abspath(file_path).encode('utf-8')).hexdigest()[:8]
+            export_path = os.path.join(export_dir, f"{base_name}_{path_hash}.xlsx")
+            # 先写临时文件再原子替换, 同一文件被两次导入同时写出时也不会得到半个文件
+            fd, tmp_path = tempfile.mkstemp(suffix='.xlsx', dir=export_dir)
+            os.close(fd)
+            try:
+                df.to_excel(tmp_path, index=False)
+                os.replace(tmp_path, export_path)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+            result['export_path'] = export_path
+        except Exception as e:
+            print(f"[run_import_task] ⚠️ JSON→Excel转换失败: {e}")
+
+    result['success'] = True
+    result['dataframe'] = df
+    return result
@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+"""
+原生数值库线程数控制 - 防止并行拟合时的线程超订
+
+NumPy/SciPy 底层的 BLAS/LAPACK（OpenBLAS、MKL、Accelerate）与 OpenMP 默认各开 CPU核数 个线程，
+进程池 N 个工作进程同时计算时就是 N × 核数 个线程争抢CPU，并行批量反而比串行慢。
+
+- 这些库在加载时读取线程数环境变量（之后再改无效），因此在启动工作进程之前写入环境变量，
+  spawn 启动的子进程继承后按限制加载
+- 已经加载的库（主进程、远程工作进程）在安装了 threadpoolctl 时于运行时限制；
+  未安装时只能影响之后加载的库
+- 每个工作进程的线程数默认 CPU核数 // 进程数（至少1），
+  可用 config.JOB_NATIVE_THREADS（环境变量 SPR_NATIVE_THREADS）覆盖
+
+诊断：python -m src.utils.native_threads 打印当前进程的线程配置；
+JobManager.thread_diagnostics() 同时采集主进程与进程池工作进程的配置
+"""
+import os
+from typing import Any, Dict, List, Optional
+
+from . import config_value
+
+
+THREAD_ENV_VARS = (
+    'OMP_NUM_THREADS',
+    'OPENBLAS_NUM_THREADS',
+    'MKL_NUM_THREADS',
+    'VECLIB_MAXIMUM_THREADS',
+    'BLIS_NUM_THREADS',
+    'NUMEXPR_NUM_THREADS',
+)
+
+
+def threads_per_worker(workers: int, override: Optional[int] = None, cpu_count: Optional[int] = None) -> int:
+    """
+    每个工作进程的原生库线程数
+
+    参数:
+        workers: 同时计算的工作进程数（或远程工作进程的并发任务数）
+        override: 指定线程数（默认 config.JOB_NATIVE_THREADS，未设置时自动计算）
+        cpu_count: CPU核数（默认 os.cpu_count()）
+    """
+    if override is None:
+        override = config_value('JOB_NATIVE_THREADS')
+    if override:
+        return max(int(override), 1)
+    cpus = cpu_count or os.cpu_count() or 1
+    return max(cpus // max(int(workers or 1), 1), 1)
+
+
+def thread_env(threads: int) -> Dict[str, str]:
+    """限制为 threads 个线程的环境变量"""
+    return {name: str(int(threads)) for name in THREAD_ENV_VARS}
+
+
+def export_thread_env(threads: int):
+    """
+    写入当前进程的环境变量，之后启动的子进程继承
+
+    当前进程已加载的库不受影响（它们只在加载时读取一次）。
+    """
+    os.environ.update(thread_env(threads))
+
+
+def limit_native_threads(threads: int) -> bool:
+    """
+    在当前进程内限制原生库线程数：写环境变量，并在 threadpoolctl 可用时限制已加载的库
+
+    返回:
+        是否在运行时生效（False 表示只对之后加载的库生效）
+    """
+    export_thread_env(threads)
+    try:
+        from threadpoolctl import threadpool_limits
+    except ImportError:
+        return False
+    threadpool_limits(limits=int(threads))
+    return True
+
+
+def _numpy_blas() -> Optional[str]:
+    """NumPy 编译时链接的 BLAS（numpy>=1.26）"""
+    try:
+        import numpy
+        blas = numpy.show_config(mode='dicts')['Build Dependencies']['blas']
+        return f"{blas.get('name', '')} {blas.get('version', '')}".strip() or None
+    except Exception:
+        return None
+
+
+def _threadpools() -> Optional[List[Dict[str, Any]]]:
+    """已加载的线程池及其实际线程数（需要 threadpoolctl）"""
+    try:
+        from threadpoolctl import threadpool_info
+    except ImportError:
+        return None
+    return [{key: pool.get(key) for key in ('user_api', 'internal_api', 'version', 'num_threads')}
+            for pool in threadpool_info()]
+
+
+def native_thread_report() -> Dict[str, Any]:
+    """当前进程的原生线程配置（也可在进程池中执行，报告工作进程的配置）"""
+    return {
+        'pid': os.getpid(),
+        'cpu_count': os.cpu_count(),
+        'env': {name: os.environ.get(name) for name in THREAD_ENV_VARS},
+        'blas': _numpy_blas(),
+        'threadpools': _threadpools(),
+    }
+
+
+def describe(report: Dict[str, Any]) -> str:
+    """把 native_thread_report() 的结果格式化为多行文本"""
+    env = report.get('env') or {}
+    limits = sorted({value for value in env.values() if value})
+    lines = [
+        f"进程 {report.get('pid')}，CPU核数 {report.get('cpu_count')}，NumPy BLAS: {report.get('blas') or '未知'}",
+        f"  线程数环境变量: {', '.join(limits) if limits else '未设置（库默认使用全部核）'}",
+    ]
+    unset = [name for name, value in env.items() if not value]
+    if limits and unset:
+        lines.append(f"  未设置: {', '.join(unset)}")
+    pools = report.get('threadpools')
+    if pools is None:
+        lines.append("  实际线程池: 未安装 threadpoolctl，无法检测")
+    elif not pools:
+        lines.append("  实际线程池: 未加载")
+    else:
+        for pool in pools:
+            lines.append(f"  实际线程池: {pool['internal_api']} {pool.get('version') or ''} "
+                         f"({pool['user_api']}) {pool['num_threads']} 线程")
+    return "\n".join(lines)
+
+
+if __name__ == '__main__':
+    print(describe(native_thread_report()))
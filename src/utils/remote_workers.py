@@ -0,0 +1,599 @@
+# -*- coding: utf-8 -*-
+"""
+远程工作进程协议 - 把拟合任务分发到实验室的多台工作站
+
+- 工作站上运行无界面的工作进程，监听指定的 host:port（默认只监听本机，须显式给出局域网地址）：
+      SPR_WORKER_AUTHKEY=<密钥> python -m src.utils.remote_workers --host 192.168.1.20 --port 7810
+  一台机器可以在不同端口运行多个工作进程（每个进程同时执行 slots 个任务，默认1个）
+- 主程序中的 WorkerCoordinator 连接所有工作进程，按 run_fit_task 的形式（任务名 + 参数）
+  发送任务，工作进程执行后把结果发回
+
+传输使用 multiprocessing.connection：带长度前缀的pickle消息，连接时以共享密钥（authkey）
+做HMAC质询认证。认证后的消息内容是pickle（持有密钥即可在工作站上执行代码），因此密钥没有默认值，
+必须通过 SPR_WORKER_AUTHKEY（config.REMOTE_WORKER_AUTHKEY）或 --authkey 显式设置，且只应在可信的实验室网络内使用。
+
+消息：
+    工作进程 → 协调者: ('hello', info) / ('heartbeat', [运行中的task_id]) /
+                      ('result', task_id, result) / ('error', task_id, message, cancelled)
+    协调者 → 工作进程: ('task', task_id, name, args, kwargs) / ('cancel', task_id)
+
+可靠性：
+- 心跳：工作进程每 HEARTBEAT_INTERVAL 秒发送一次；协调者超过 heartbeat_timeout 未收到任何消息时
+  把该工作进程视为可疑，其上运行的任务重新排队（连接保持，恢复心跳后继续使用）
+- 连接断开（进程退出、机器掉线）时运行中的任务立即重新排队，之后定时重连
+- 每个任务最多重试 max_retries 次；任务本身抛出的异常不重试
+- 去重：同一任务可能在多个工作进程上各运行一次（可疑后重试），只接受第一个结果，
+  其余副本被取消，迟到的结果丢弃（duplicates_dropped 计数）
+"""
+import os
+import sys
+import time
+import socket
+import argparse
+import threading
+import traceback
+import uuid
+from collections import deque
+from multiprocessing.connection import Listener, Client, AuthenticationError
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from . import config_value
+from .job_control import JobControl, JobCancelled, run_with_control
+from .job_tasks import run_fit_task
+
+
+DEFAULT_PORT = 7810
+
+# 工作进程可执行的任务（按名称发送，不传函数对象）
+TASKS: Dict[str, Callable] = {'run_fit_task': run_fit_task}
+
+
+def register_task(name: str, func: Callable):
+    """注册可远程执行的任务（函数需在工作进程中可导入）"""
+    TASKS[name] = func
+
+
+class MissingAuthKey(ValueError):
+    """未设置共享密钥"""
+
+
+def _authkey(value=None) -> bytes:
+    """共享密钥（未显式设置时抛出 MissingAuthKey，不使用任何默认值）"""
+    value = value if value is not None else config_value('REMOTE_WORKER_AUTHKEY')
+    if not value:
+        raise MissingAuthKey("未设置远程工作进程的共享密钥（环境变量 SPR_WORKER_AUTHKEY 或 --authkey）")
+    return value if isinstance(value, bytes) else str(value).encode('utf-8')
+
+
+def parse_address(address) -> Tuple[str, int]:
+    """'host:port' / 'host' / (host, port) → (host, port)"""
+    if isinstance(address, (tuple, list)):
+        return str(address[0]), int(address[1])
+    host, _, port = str(address).strip().rpartition(':')
+    if not host:
+        return port, DEFAULT_PORT
+    return host, int(port)
+
+
+# ========== 工作进程 ==========
+
+class RemoteWorker:
+    """
+    无界面工作进程：接受一个协调者连接，执行其发来的任务
+
+    一次服务一个协调者；连接断开时取消正在运行的任务，然后等待下一个连接。
+    """
+
+    HEARTBEAT_INTERVAL = 1.0
+
+    def __init__(self, host: str = '127.0.0.1', port: int = DEFAULT_PORT, authkey=None,
+                 slots: int = 1, heartbeat_interval: Optional[float] = None):
+        """
+        参数:
+            host / port: 监听地址（默认只监听本机；port=0 时由系统分配，见 address）
+            authkey: 共享密钥（默认 config.REMOTE_WORKER_AUTHKEY，都未设置时抛出 MissingAuthKey）
+            slots: 同时执行的任务数
+            heartbeat_interval: 心跳间隔（秒）
+        """
+        self._authkey = _authkey(authkey)
+        self._listener = Listener((host, port), authkey=self._authkey)
+        self.address: Tuple[str, int] = self._listener.address
+        self.slots = max(int(slots), 1)
+        self.heartbeat_interval = heartbeat_interval or self.HEARTBEAT_INTERVAL
+        self._stopped = threading.Event()
+
+    def serve_forever(self):
+        print(f"[RemoteWorker] 监听 {self.address[0]}:{self.address[1]} (pid={os.getpid()}, slots={self.slots})",
+              flush=True)
+        while not self._stopped.is_set():
+            try:
+                conn = self._listener.accept()
+            except AuthenticationError as e:
+                print(f"[RemoteWorker] 拒绝连接（密钥不符）: {e}")
+                continue
+            except (EOFError, OSError):
+                if self._stopped.is_set():
+                    break
+                continue
+            if self._stopped.is_set():
+                conn.close()
+                break
+            self._serve(conn)
+        self._listener.close()
+
+    def stop(self):
+        """停止服务（可在其他线程调用）"""
+        if self._stopped.is_set():
+            return
+        self._stopped.set()
+        # 用一个空连接唤醒阻塞中的 accept()（认证失败后检查停止标志）
+        host, port = self.address
+        try:
+            socket.create_connection((host if host not in ('0.0.0.0', '') else '127.0.0.1', port), timeout=1).close()
+        except OSError:
+            pass
+
+    def _serve(self, conn):
+        print("[RemoteWorker] 协调者已连接")
+        send_lock = threading.Lock()
+        running: Dict[str, JobControl] = {}
+        threads: List[threading.Thread] = []
+        connected = threading.Event()
+        connected.set()
+
+        def send(message):
+            with send_lock:
+                conn.send(message)
+
+        def heartbeat():
+            while not self._stopped.wait(self.heartbeat_interval):
+                if not connected.is_set():
+                    break
+                try:
+                    send(('heartbeat', list(running)))
+                except OSError:
+                    break
+
+        try:
+            send(('hello', {'slots': self.slots, 'pid': os.getpid(), 'host': socket.gethostname()}))
+        except OSError:
+            conn.close()
+            return
+        beat = threading.Thread(target=heartbeat, daemon=True)
+        beat.start()
+
+        while not self._stopped.is_set():
+            try:
+                if not conn.poll(0.2):
+                    continue
+                message = conn.recv()
+            except (EOFError, OSError):
+                break
+            kind = message[0]
+            if kind == 'task':
+                _, task_id, name, args, kwargs = message
+                control = JobControl()
+                running[task_id] = control
+                thread = threading.Thread(target=self._run, daemon=True,
+                                          args=(send, running, task_id, control, name, args, kwargs))
+                threads.append(thread)
+                thread.start()
+            elif kind == 'cancel':
+                control = running.get(message[1])
+                if control is not None:
+                    control.cancel()
+
+        connected.clear()
+        for control in list(running.values()):
+            control.cancel()
+        for thread in threads:
+            thread.join(5)
+        conn.close()
+        print("[RemoteWorker] 协调者已断开")
+
+    @staticmethod
+    def _run(send, running, task_id, control, name, args, kwargs):
+        try:
+            func = TASKS.get(name)
+            if func is None:
+                raise KeyError(f"未知任务: {name}")
+            message = ('result', task_id, run_with_control(control, func, args, kwargs))
+        except JobCancelled:
+            message = ('error', task_id, "已取消", True)
+        except Exception as e:
+            message = ('error', task_id, f"{e}\n{traceback.format_exc()}", False)
+        finally:
+            running.pop(task_id, None)
+        try:
+            send(message)
+        except OSError:
+            pass
+
+
+# ========== 协调者 ==========
+
+class _RemoteTask:
+    def __init__(self, task_id, name, args, kwargs, on_done, on_fail):
+        self.task_id = task_id
+        self.name = name
+        self.args = args
+        self.kwargs = kwargs
+        self.on_done = on_done
+        self.on_fail = on_fail
+        self.state = 'queued'  # queued → running → done/failed/cancelled
+        self.attempts = 0
+        self.cancel_requested = False
+
+
+class _WorkerLink:
+    """协调者到一个工作进程的连接状态"""
+
+    def __init__(self, address):
+        self.address = parse_address(address)
+        self.conn = None
+        self.send_lock = threading.Lock()
+        self.running = set()  # task_id
+        self.slots = 1
+        self.info: Dict[str, Any] = {}
+        self.last_seen = 0.0
+        self.suspect = False
+        self.completed = 0
+
+    @property
+    def alive(self) -> bool:
+        return self.conn is not None
+
+    def send(self, message):
+        conn = self.conn
+        if conn is None:
+            raise OSError("未连接")
+        with self.send_lock:
+            conn.send(message)
+
+
+class WorkerCoordinator:
+    """
+    把任务分发到远程工作进程
+
+    回调与 JobManager.submit_with_callbacks 一致：on_done(task_id, result) / on_fail(task_id, error)，
+    在协调者的后台线程中调用。
+    """
+
+    HEARTBEAT_TIMEOUT = 5.0
+    RECONNECT_INTERVAL = 2.0
+    MAX_RETRIES = 2
+
+    def __init__(self, addresses, authkey=None, heartbeat_timeout: Optional[float] = None,
+                 max_retries: Optional[int] = None, reconnect_interval: Optional[float] = None):
+        """
+        参数:
+            addresses: 工作进程地址列表（'host:port' 或 (host, port)）
+            authkey: 共享密钥（默认 config.REMOTE_WORKER_AUTHKEY，都未设置时抛出 MissingAuthKey）
+            heartbeat_timeout: 超过该秒数没有收到工作进程的任何消息时视为可疑，任务重新排队
+            max_retries: 每个任务在工作进程丢失后最多重试的次数
+        """
+        self._links = [_WorkerLink(address) for address in addresses]
+        self._authkey = _authkey(authkey)
+        self.heartbeat_timeout = heartbeat_timeout or self.HEARTBEAT_TIMEOUT
+        self.max_retries = self.MAX_RETRIES if max_retries is None else max_retries
+        self.reconnect_interval = reconnect_interval or self.RECONNECT_INTERVAL
+        self._lock = threading.Condition()
+        self._tasks: Dict[str, _RemoteTask] = {}
+        self._queue = deque()
+        self._finished = set()  # 已结束的task_id（去重）
+        self._threads: List[threading.Thread] = []
+        self._stopped = threading.Event()
+        self.retries = 0
+        self.duplicates_dropped = 0
+
+    # ========== 公共接口 ==========
+
+    def start(self):
+        """开始连接所有工作进程（后台线程，连不上时定时重试）"""
+        if self._threads:
+            return
+        for link in self._links:
+            thread = threading.Thread(target=self._link_loop, args=(link,), daemon=True)
+            self._threads.append(thread)
+            thread.start()
+        thread = threading.Thread(target=self._dispatch_loop, daemon=True)
+        self._threads.append(thread)
+        thread.start()
+
+    def shutdown(self):
+        """停止分发并断开所有连接（未完成的任务不再回调）"""
+        self._stopped.set()
+        with self._lock:
+            self._lock.notify_all()
+        for thread in self._threads:
+            thread.join(5)
+        self._threads = []
+
+    def submit(self, name: str, *args, on_done=None, on_fail=None, **kwargs) -> str:
+        """提交任务（name 为 TASKS 中的任务名），返回 task_id"""
+        task_id = uuid.uuid4().hex
+        with self._lock:
+            self._tasks[task_id] = _RemoteTask(task_id, name, args, kwargs, on_done, on_fail)
+            self._queue.append(task_id)
+            self._lock.notify_all()
+        return task_id
+
+    def cancel(self, task_id: str) -> bool:
+        """
+        取消任务
+
+        - 尚未分发：直接移出队列，返回True，之后不再有回调
+        - 正在运行：通知工作进程取消后返回False，任务以 on_fail(task_id, "已取消") 结束
+        """
+        with self._lock:
+            task = self._tasks.get(task_id)
+            if task is None:
+                return False
+            if task.state == 'queued':
+                self._queue.remove(task_id)
+                self._forget(task, 'cancelled')
+                return True
+            task.cancel_requested = True
+            links = [link for link in self._links if task_id in link.running]
+        for link in links:
+            try:
+                link.send(('cancel', task_id))
+            except OSError:
+                pass
+        return False
+
+    def pending_count(self) -> int:
+        """尚未结束的任务数"""
+        with self._lock:
+            return len(self._tasks)
+
+    def workers(self) -> List[Dict[str, Any]]:
+        """各工作进程的状态"""
+        with self._lock:
+            return [{'address': f"{link.address[0]}:{link.address[1]}", 'connected': link.alive,
+                     'suspect': link.suspect, 'slots': link.slots, 'running': len(link.running),
+                     'completed': link.completed, 'info': dict(link.info)}
+                    for link in self._links]
+
+    def wait_connected(self, count: int = 1, timeout: float = 10.0) -> bool:
+        """等待至少 count 个工作进程连接"""
+        deadline = time.monotonic() + timeout
+        with self._lock:
+            while sum(link.alive for link in self._links) < count:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._lock.wait(remaining)
+        return True
+
+    # ========== 连接 ==========
+
+    def _link_loop(self, link: _WorkerLink):
+        while not self._stopped.is_set():
+            try:
+                conn = Client(link.address, authkey=self._authkey)
+                hello = conn.recv() if conn.poll(self.heartbeat_timeout) else None
+            except (OSError, EOFError, AuthenticationError) as e:
+                if isinstance(e, AuthenticationError):
+                    print(f"[WorkerCoordinator] 认证失败 {link.address}: {e}")
+                self._stopped.wait(self.reconnect_interval)
+                continue
+            if not hello or hello[0] != 'hello':
+                conn.close()
+                self._stopped.wait(self.reconnect_interval)
+                continue
+            with self._lock:
+                link.conn = conn
+                link.info = hello[1]
+                link.slots = max(int(hello[1].get('slots', 1)), 1)
+                link.last_seen = time.monotonic()
+                link.suspect = False
+                self._lock.notify_all()
+            print(f"[WorkerCoordinator] 已连接工作进程 {link.address[0]}:{link.address[1]} "
+                  f"({link.info.get('host')}, pid={link.info.get('pid')})")
+            try:
+                while not self._stopped.is_set():
+                    if conn.poll(0.2):
+                        self._on_message(link, conn.recv())
+            except (EOFError, OSError):
+                pass
+            self._lose(link, conn, "连接断开")
+            if not self._stopped.is_set():
+                self._stopped.wait(self.reconnect_interval)
+
+    def _lose(self, link: _WorkerLink, conn, reason: str):
+        """连接断开：运行中的任务重新排队"""
+        failed = []
+        with self._lock:
+            if link.conn is not conn:
+                return
+            link.conn = None
+            lost = list(link.running)
+            link.running.clear()
+            for task_id in lost:
+                self._retry(task_id, link, reason, failed)
+            self._lock.notify_all()
+        try:
+            conn.close()
+        except OSError:
+            pass
+        if not self._stopped.is_set():
+            print(f"[WorkerCoordinator] 工作进程 {link.address[0]}:{link.address[1]} {reason}，"
+                  f"{len(lost)} 个任务重新排队")
+        self._notify_failed(failed)
+
+    def _retry(self, task_id: str, lost_link: _WorkerLink, reason: str, failed: list):
+        """工作进程丢失后重新排队（调用方持有锁）"""
+        task = self._tasks.get(task_id)
+        if task is None or task.state != 'running':
+            return
+        if any(task_id in link.running for link in self._links
+               if link is not lost_link and link.alive and not link.suspect):
+            return  # 另一个工作进程上的副本仍在运行
+        if task.cancel_requested:
+            self._forget(task, 'cancelled')
+            failed.append((task, "已取消"))
+        elif task.attempts > self.max_retries:
+            self._forget(task, 'failed')
+            failed.append((task, f"工作进程丢失（{reason}），已重试 {self.max_retries} 次"))
+        else:
+            task.state = 'queued'
+            self._queue.appendleft(task_id)
+            self.retries += 1
+
+    @staticmethod
+    def _notify_failed(failed: list):
+        """回调 _retry 放弃的任务（锁外调用）"""
+        for task, message in failed:
+            if task.on_fail:
+                task.on_fail(task.task_id, message)
+
+    # ========== 分发 ==========
+
+    def _dispatch_loop(self):
+        while not self._stopped.is_set():
+            failed = []
+            with self._lock:
+                self._check_heartbeats(failed)
+                assignments = self._assign()
+                if not assignments and not failed:
+                    self._lock.wait(0.1)
+            self._notify_failed(failed)
+            for link, task in assignments:
+                try:
+                    link.send(('task', task.task_id, task.name, task.args, task.kwargs))
+                except OSError:
+                    pass  # 连接线程会发现断开并重新排队
+
+    def _check_heartbeats(self, failed: list):
+        now = time.monotonic()
+        for link in self._links:
+            if link.alive and not link.suspect and now - link.last_seen > self.heartbeat_timeout:
+                link.suspect = True
+                print(f"[WorkerCoordinator] 工作进程 {link.address[0]}:{link.address[1]} "
+                      f"{self.heartbeat_timeout:.1f}s 无心跳，{len(link.running)} 个任务重新排队")
+                for task_id in list(link.running):
+                    self._retry(task_id, link, "心跳超时", failed)
+
+    def _assign(self) -> List[Tuple[_WorkerLink, _RemoteTask]]:
+        """把排队的任务分给有空闲的工作进程（调用方持有锁）"""
+        assignments = []
+        for link in self._links:
+            while self._queue and link.alive and not link.suspect and len(link.running) < link.slots:
+                task = self._tasks.get(self._queue.popleft())
+                if task is None or task.state != 'queued':
+                    continue
+                task.state = 'running'
+                task.attempts += 1
+                link.running.add(task.task_id)
+                assignments.append((link, task))
+        return assignments
+
+    # ========== 结果 ==========
+
+    def _on_message(self, link: _WorkerLink, message):
+        with self._lock:
+            link.last_seen = time.monotonic()
+            if link.suspect:
+                link.suspect = False
+                print(f"[WorkerCoordinator] 工作进程 {link.address[0]}:{link.address[1]} 恢复心跳")
+                self._lock.notify_all()
+        kind = message[0]
+        if kind == 'result':
+            self._complete(link, message[1], 'done', message[2])
+        elif kind == 'error':
+            _, task_id, error, cancelled = message
+            self._complete(link, task_id, 'cancelled' if cancelled else 'failed', error)
+
+    def _complete(self, link: _WorkerLink, task_id: str, status: str, payload):
+        failed = []
+        with self._lock:
+            link.running.discard(task_id)
+            self._lock.notify_all()
+            task = self._tasks.get(task_id)
+            if task is None:
+                if status == 'done' and task_id in self._finished:
+                    self.duplicates_dropped += 1
+                    print(f"[WorkerCoordinator] 丢弃重复结果: {task_id}")
+                return
+            if status == 'cancelled' and not task.cancel_requested:
+                # 该副本被取消（另一副本已完成）或工作进程断开时被中止：按丢失处理，重试次数用尽时回调失败
+                self._retry(task_id, link, "任务被中止", failed)
+                task = None
+            else:
+                link.completed += status == 'done'
+                others = [other for other in self._links if task_id in other.running]
+                for other in others:
+                    other.running.discard(task_id)
+                self._forget(task, status)
+        self._notify_failed(failed)
+        if task is None:
+            return
+        for other in others:
+            try:
+                other.send(('cancel', task_id))
+            except OSError:
+                pass
+        if status == 'done':
+            if task.on_done:
+                task.on_done(task_id, payload)
+        elif task.on_fail:
+            task.on_fail(task_id, "已取消" if status == 'cancelled' else payload)
+
+    def _forget(self, task: _RemoteTask, state: str):
+        """任务结束（调用方持有锁）"""
+        task.state = state
+        self._tasks.pop(task.task_id, None)
+        self._finished.add(task.task_id)
+
+
+def coordinator_from_config() -> Optional[WorkerCoordinator]:
+    """按 config.REMOTE_WORKERS 创建并启动协调者（未配置工作站或密钥时返回None，在本机拟合）"""
+    addresses = config_value('REMOTE_WORKERS') or []
+    if not addresses:
+        return None
+    try:
+        coordinator = WorkerCoordinator(addresses)
+    except MissingAuthKey as e:
+        print(f"[WorkerCoordinator] {e}，不使用远程工作站")
+        return None
+    coordinator.start()
+    return coordinator
+
+
+def main(argv=None):
+    """工作站上运行的无界面工作进程"""
+    parser = argparse.ArgumentParser(description="SPR 拟合远程工作进程")
+    parser.add_argument('--host', default='127.0.0.1',
+                        help="监听地址（默认只监听本机；供其他机器连接时指定本机的局域网地址）")
+    parser.add_argument('--port', type=int, default=config_value('REMOTE_WORKER_PORT', DEFAULT_PORT))
+    parser.add_argument('--authkey', default=None,
+                        help="共享密钥（默认读取环境变量 SPR_WORKER_AUTHKEY；都未设置时拒绝启动）")
+    parser.add_argument('--slots', type=int, default=1, help="同时执行的任务数")
+    parser.add_argument('--no-warm', action='store_true', help="不预先导入拟合模块")
+    parser.add_argument('--threads', type=int, default=None,
+                        help="每个任务的BLAS/OpenMP线程数（默认 CPU核数 // slots）")
+    args = parser.parse_args(argv)
+    try:
+        authkey = _authkey(args.authkey)
+    except MissingAuthKey as e:
+        parser.error(str(e))
+
+    # 同时执行 slots 个任务，每个任务的原生库线程数相应减少，避免超订
+    from .native_threads import threads_per_worker, limit_native_threads
+    threads = threads_per_worker(args.slots, args.threads)
+    if not limit_native_threads(threads):
+        print(f"[RemoteWorker] 未安装 threadpoolctl，已加载的BLAS线程数不受限制（建议设置 OMP_NUM_THREADS={threads} 后启动）")
+    if not args.no_warm:
+        from .job_tasks import warm_up_worker
+        warm_up_worker(threads)
+    worker = RemoteWorker(args.host, args.port, authkey=authkey, slots=args.slots)
+    try:
+        worker.serve_forever()
+    except KeyboardInterrupt:
+        worker.stop()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
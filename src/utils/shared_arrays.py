@@ -0,0 +1,265 @@
+# -*- coding: utf-8 -*-
+"""
+共享内存数组传输 - 进程池任务的大数组不经pickle
+
+大的 numpy 数组 / 数值DataFrame 写入内存映射的暂存文件（优先放在 /dev/shm，即内存盘），
+跨进程只传一个很小的描述符（路径、dtype、形状），对方直接映射同一块内存：
+- 输入：主进程 share_payload() 打包参数，子进程 call_shared() 映射后调用任务函数（写时复制，不改动源数据）
+- 输出：子进程把结果中的大数组写成新的共享块，主进程 adopt_shared() 映射后立即删除文件
+  （映射仍然有效，数组被回收时内存随之释放；不能删除已映射文件的平台上退化为复制一次）
+- 主进程创建的块按引用计数管理（SharedArrayStore），任务结束时释放，计数归零时删除文件
+
+小于 MIN_SHARED_BYTES 的数组、非数值DataFrame 照常pickle。
+"""
+import os
+import atexit
+import tempfile
+import threading
+from typing import Any, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+
+# 小于该字节数的数组直接pickle更快
+MIN_SHARED_BYTES = 64 * 1024
+
+
+def _shared_dir() -> str:
+    """共享块所在目录（两端进程计算结果相同）"""
+    if os.path.isdir('/dev/shm') and os.access('/dev/shm', os.W_OK):
+        return '/dev/shm'
+    return tempfile.gettempdir()
+
+
+class SharedArrayRef:
+    """共享数组的描述符（可pickle，只含路径/dtype/形状）"""
+
+    __slots__ = ('path', 'dtype', 'shape')
+
+    def __init__(self, path: str, dtype: str, shape):
+        self.path = path
+        self.dtype = dtype
+        self.shape = tuple(shape)
+
+    def __getstate__(self):
+        return (self.path, self.dtype, self.shape)
+
+    def __setstate__(self, state):
+        self.path, self.dtype, self.shape = state
+
+    @property
+    def nbytes(self) -> int:
+        return int(np.prod(self.shape, dtype=np.int64)) * np.dtype(self.dtype).itemsize
+
+    def open(self) -> np.ndarray:
+        """映射为数组（写时复制：写入只影响本进程，不改动共享块）"""
+        if self.nbytes == 0:
+            return np.empty(self.shape, dtype=self.dtype)
+        block = np.memmap(self.path, dtype=self.dtype, mode='c', shape=self.shape)
+        return block.view(np.ndarray)  # 普通数组视图，映射随数组回收
+
+
+class SharedFrameRef:
+    """数值DataFrame的描述符：数据块共享，列名/索引/attrs随描述符pickle"""
+
+    __slots__ = ('values', 'columns', 'index', 'attrs')
+
+    def __init__(self, values: SharedArrayRef, columns, index, attrs):
+        self.values = values
+        self.columns = columns
+        self.index = index  # ('range', start, stop, step) 或 Index 对象
+        self.attrs = attrs
+
+    def __getstate__(self):
+        return (self.values, self.columns, self.index, self.attrs)
+
+    def __setstate__(self, state):
+        self.values, self.columns, self.index, self.attrs = state
+
+    def open(self, values: Optional[np.ndarray] = None) -> pd.DataFrame:
+        """重建DataFrame（values为None时映射数据块）"""
+        if isinstance(self.index, tuple) and self.index and self.index[0] == 'range':
+            index = pd.RangeIndex(*self.index[1:])
+        else:
+            index = self.index
+        values = self.values.open() if values is None else values
+        df = pd.DataFrame(values, columns=self.columns, index=index, copy=False)
+        df.attrs.update(self.attrs)
+        return df
+
+
+def _write_block(array: np.ndarray) -> SharedArrayRef:
+    """把数组写入新的共享块（只接受不含Python对象的数组：对象数组写入的是指针，另一进程读取会崩溃）"""
+    array = np.ascontiguousarray(array)
+    if array.dtype.hasobject:
+        raise TypeError(f"不能把含Python对象的数组（dtype={array.dtype}）写入共享块")
+    fd, path = tempfile.mkstemp(prefix='spr_arr_', suffix='.bin', dir=_shared_dir())
+    os.close(fd)
+    ref = SharedArrayRef(path, array.dtype.str, array.shape)
+    if array.nbytes:
+        block = np.memmap(path, dtype=array.dtype, mode='w+', shape=array.shape)
+        block[...] = array
+        block.flush()
+        del block
+    return ref
+
+
+def _shareable_array(obj) -> bool:
+    return (isinstance(obj, np.ndarray) and obj.dtype.kind in 'biufc'
+            and obj.nbytes >= MIN_SHARED_BYTES)
+
+
+def _shareable_frame(obj) -> bool:
+    if not isinstance(obj, pd.DataFrame) or obj.shape[1] == 0:
+        return False
+    dtypes = set(obj.dtypes)
+    if len(dtypes) != 1:
+        return False
+    dtype = next(iter(dtypes))
+    # 只共享普通numpy数值类型：可空扩展类型（Int64/Float64等）的 kind 也是 'i'/'f'，但 to_numpy() 是对象数组
+    if not isinstance(dtype, np.dtype) or dtype.kind not in 'biuf':
+        return False
+    return obj.shape[0] * obj.shape[1] * dtype.itemsize >= MIN_SHARED_BYTES
+
+
+def _share(obj, write):
+    """把obj中的大数组/数值DataFrame换成描述符（递归处理 dict/list/tuple）"""
+    if _shareable_array(obj):
+        return write(obj)
+    if _shareable_frame(obj):
+        index = obj.index
+        if isinstance(index, pd.RangeIndex):
+            index = ('range', index.start, index.stop, index.step)
+        return SharedFrameRef(write(obj.to_numpy()), list(obj.columns), index, dict(obj.attrs))
+    if isinstance(obj, dict):
+        return {k: _share(v, write) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)) and not hasattr(obj, '_fields'):
+        return type(obj)(_share(v, write) for v in obj)
+    return obj
+
+
+def _open(obj, adopt: bool = False):
+    """把描述符换回数组/DataFrame（递归）；adopt为True时接管共享块（映射后删除文件）"""
+    if isinstance(obj, SharedArrayRef):
+        return _adopt(obj) if adopt else obj.open()
+    if isinstance(obj, SharedFrameRef):
+        return obj.open(_adopt(obj.values) if adopt else None)
+    if isinstance(obj, dict):
+        return {k: _open(v, adopt) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)) and not hasattr(obj, '_fields'):
+        return type(obj)(_open(v, adopt) for v in obj)
+    return obj
+
+
+def _adopt(ref: SharedArrayRef) -> np.ndarray:
+    """接管对方创建的共享块：映射后删除文件；删除失败（Windows）时复制后删除"""
+    array = ref.open()
+    try:
+        os.remove(ref.path)
+    except FileNotFoundError:
+        pass
+    except OSError:
+        array = np.array(array)  # 先释放映射再删除
+        try:
+            os.remove(ref.path)
+        except OSError:
+            pass
+    return array
+
+
+def _iter_refs(obj):
+    if isinstance(obj, SharedArrayRef):
+        yield obj
+    elif isinstance(obj, SharedFrameRef):
+        yield obj.values
+    elif isinstance(obj, dict):
+        for v in obj.values():
+            yield from _iter_refs(v)
+    elif isinstance(obj, (list, tuple)):
+        for v in obj:
+            yield from _iter_refs(v)
+
+
+class SharedArrayStore:
+    """主进程创建的共享块，按引用计数删除"""
+
+    def __init__(self):
+        self._counts: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def share(self, array: np.ndarray) -> SharedArrayRef:
+        """写入共享块（引用计数为1）"""
+        ref = _write_block(array)
+        with self._lock:
+            self._counts[ref.path] = 1
+        return ref
+
+    def retain(self, ref: SharedArrayRef):
+        with self._lock:
+            self._counts[ref.path] = self._counts.get(ref.path, 0) + 1
+
+    def release(self, ref: SharedArrayRef):
+        """引用计数减一，归零时删除文件"""
+        with self._lock:
+            count = self._counts.get(ref.path, 0) - 1
+            if count > 0:
+                self._counts[ref.path] = count
+                return
+            self._counts.pop(ref.path, None)
+        try:
+            os.remove(ref.path)
+        except OSError:
+            pass
+
+    def share_payload(self, args, kwargs):
+        """
+        打包任务参数
+
+        返回:
+            (args, kwargs, refs)：任务结束后对 refs 逐个 release()
+        """
+        args = _share(tuple(args), self.share)
+        kwargs = _share(dict(kwargs), self.share)
+        return args, kwargs, list(_iter_refs(args)) + list(_iter_refs(kwargs))
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._counts)
+
+    def clear(self):
+        with self._lock:
+            paths = list(self._counts)
+            self._counts.clear()
+        for path in paths:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+_default_store: Optional[SharedArrayStore] = None
+
+
+def default_shared_store() -> SharedArrayStore:
+    """进程内共享的共享块存储（退出时清理）"""
+    global _default_store
+    if _default_store is None:
+        _default_store = SharedArrayStore()
+        atexit.register(_default_store.clear)
+    return _default_store
+
+
+def call_shared(func, args, kwargs) -> Any:
+    """
+    子进程入口：映射参数中的共享块后调用 func，结果中的大数组写成新的共享块
+
+    （模块级函数，可提交到进程池）
+    """
+    result = func(*_open(args), **_open(kwargs))
+    return _share(result, _write_block)
+
+
+def adopt_shared(result) -> Any:
+    """主进程接管 call_shared() 返回结果中的共享块"""
+    return _open(result, adopt=True)
@@ -5,7 +5,7 @@
 功能：
 - 显示待拟合数据列表（可勾选）
 - 统一或分别设置拟合方法
-- 多线程并行拟合
+- 多进程并行拟合
 - 实时进度显示
 """
 from PySide6.QtWidgets import (
@@ -20,10 +20,10 @@ from PySide6.QtGui import QFont
 class BatchFittingDialog(QDialog):
     """批量拟合对话框"""
     
-    # 信号：开始批量拟合 (data_ids, method, num_threads)
+    # 信号：开始批量拟合 (data_ids, method, num_workers)
     start_fitting = Signal(list, str, int)
     
-    def __init__(self, data_list, available_methods, parent=None):
+    def __init__(self, data_list, available_methods, parent=None, default_workers=4):
         """
         初始化对话框
         
@@ -31,10 +31,12 @@ class BatchFittingDialog(QDialog):
             data_list: [(data_id, data_name, point_count, is_fittable, reason)]
             available_methods: ["LocalBivariate", "BalanceFitting", ...]
             parent: 父窗口
+            default_workers: 默认并行进程数（当前进程池进程数，不改动时无需重建进程池）
         """
         super().__init__(parent)
         self.data_list = data_list
         self.available_methods = available_methods
+        self.default_workers = default_workers
         self.selected_data_ids = []
         
         self._setup_ui()
@@ -94,16 +96,16 @@ class BatchFittingDialog(QDialog):
         parallel_group = QGroupBox("性能设置")
         parallel_layout = QVBoxLayout(parallel_group)
         
-        self.enable_parallel_check = QCheckBox("启用多线程加速")
+        self.enable_parallel_check = QCheckBox("启用多进程并行")
         self.enable_parallel_check.setChecked(True)
         self.enable_parallel_check.toggled.connect(self._on_parallel_toggled)
         parallel_layout.addWidget(self.enable_parallel_check)
         
         thread_row = QHBoxLayout()
-        thread_row.addWidget(QLabel("  线程数:"))
+        thread_row.addWidget(QLabel("  进程数:"))
         self.thread_spin = QSpinBox()
         self.thread_spin.setRange(1, 16)
-        self.thread_spin.setValue(4)
+        self.thread_spin.setValue(min(max(int(self.default_workers), 1), 16))
         self.thread_spin.setSuffix(" 个")
         thread_row.addWidget(self.thread_spin)
         
@@ -199,7 +201,7 @@ class BatchFittingDialog(QDialog):
                     item.setCheckState(Qt.Checked)
     
     def _on_parallel_toggled(self, enabled):
-        """多线程开关切换"""
+        """并行开关切换"""
         self.thread_spin.setEnabled(enabled)
     
     def _on_start(self):
@@ -217,19 +219,23 @@ class BatchFittingDialog(QDialog):
             QMessageBox.warning(self, "未选择数据", "请至少选择一个数据进行拟合")
             return
         
-        # 获取拟合方法和线程数
+        # 获取拟合方法和进程数
         method = self.method_combo.currentText()
         num_threads = self.thread_spin.value() if self.enable_parallel_check.isChecked() else 1
         
         # 禁用开始按钮，防止重复点击
+        self.mark_started(selected_ids)
+        
+        # 发射信号
+        self.start_fitting.emit(selected_ids, method, num_threads)
+    
+    def mark_started(self, selected_ids):
+        """进入运行状态（续跑的批量拟合由控制器直接开始，不经开始按钮）"""
         self.start_btn.setEnabled(False)
         self.select_all_btn.setEnabled(False)
         self.deselect_all_btn.setEnabled(False)
         self.invert_btn.setEnabled(False)
-        
-        # 发射信号
-        self.selected_data_ids = selected_ids
-        self.start_fitting.emit(selected_ids, method, num_threads)
+        self.selected_data_ids = list(selected_ids)
     
     @Slot(int, int, str)
     def update_progress(self, completed, total, current_name=""):
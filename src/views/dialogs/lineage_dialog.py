@@ -6,6 +6,11 @@
 1. 以图形方式展示数据、操作、结果之间的关系
 2. 支持点击节点查看详情
 3. 支持导出为PNG图片
+
+大图性能：
+- 分层布局为线性时间（LayeredLayout），结果缓存；新节点只追加，已有节点不移动
+- 刷新时只增删/移动变化的图形项，不重建整个场景
+- 节点文字、边标签只为进入视口的部分创建（视口裁剪），缩小到一定比例后隐藏（细节层次）
 """
 from PySide6.QtWidgets import (
     QDialog, QVBoxLayout, QHBoxLayout, QPushButton, 
@@ -13,10 +18,12 @@ from PySide6.QtWidgets import (
     QGraphicsEllipseItem, QGraphicsTextItem, QGraphicsLineItem,
     QFileDialog, QMessageBox, QGraphicsItem, QGraphicsDropShadowEffect
 )
-from PySide6.QtCore import Qt, QRectF, QPointF, Signal
+from PySide6.QtCore import Qt, QRectF, QPointF, Signal, QTimer
 from PySide6.QtGui import QPen, QBrush, QColor, QPainter, QFont, QCursor
 from typing import Dict, List, Tuple, Optional
 
+from src.utils.graph_layout import LayeredLayout
+
 
 class LineageNode:
     """血缘图节点"""
@@ -74,10 +81,13 @@ class ClickableNodeItem(QGraphicsRectItem):
     """可点击的节点图形项"""
     
     def __init__(self, node: LineageNode, dialog):
-        super().__init__(node.x, node.y, node.width, node.height)
+        super().__init__(0, 0, node.width, node.height)
+        self.setPos(node.x, node.y)
         self.node = node
         self.dialog = dialog
         self.original_color = node.color
+        self.label_item: Optional[QGraphicsTextItem] = None
+        self.type_item: Optional[QGraphicsTextItem] = None
         
         # 设置外观
         self.setBrush(QBrush(node.color))
@@ -94,23 +104,48 @@ class ClickableNodeItem(QGraphicsRectItem):
         # 设置tooltip
         self.setToolTip(f"点击查看: {node.label}\n类型: {node.node_type}")
         
-        # ⭐ 添加现代阴影效果（仅在悬停时显示）
-        self.shadow = QGraphicsDropShadowEffect()
-        self.shadow.setBlurRadius(15)
-        self.shadow.setColor(QColor(0, 0, 0, 80))
-        self.shadow.setOffset(0, 3)
-        self.shadow.setEnabled(False)  # 默认禁用
-        self.setGraphicsEffect(self.shadow)
+    def has_details(self) -> bool:
+        return self.label_item is not None
+    
+    def ensure_details(self):
+        """创建节点文字（进入视口时才创建）"""
+        if self.label_item is not None:
+            return
+        node = self.node
+        # 添加节点标签
+        self.label_item = QGraphicsTextItem(node.label, self)
+        self.label_item.setDefaultTextColor(QColor(0, 0, 0))
+        self.label_item.setFont(QFont("Arial", 10))
+        
+        # 居中文本
+        text_rect = self.label_item.boundingRect()
+        self.label_item.setPos((node.width - text_rect.width()) / 2,
+                               (node.height - text_rect.height()) / 2)
+        
+        # 添加类型标签（小字）
+        self.type_item = QGraphicsTextItem(f"[{node.node_type}]", self)
+        self.type_item.setDefaultTextColor(QColor(120, 120, 120))
+        self.type_item.setFont(QFont("Arial", 8))
+        self.type_item.setPos(5, 5)
+    
+    def set_details_visible(self, visible: bool):
+        for item in (self.label_item, self.type_item):
+            if item is not None:
+                item.setVisible(visible)
     
     def hoverEnterEvent(self, event):
-        """鼠标进入 - 显示阴影"""
-        self.shadow.setEnabled(True)
+        """鼠标进入 - 显示阴影（阴影效果只给悬停中的节点创建）"""
+        shadow = QGraphicsDropShadowEffect()
+        shadow.setBlurRadius(15)
+        shadow.setColor(QColor(0, 0, 0, 80))
+        shadow.setOffset(0, 3)
+        self.setGraphicsEffect(shadow)
         self.setZValue(3)  # 提升层级
         super().hoverEnterEvent(event)
     
     def hoverLeaveEvent(self, event):
         """鼠标离开 - 隐藏阴影"""
-        self.shadow.setEnabled(False)
+        self.setGraphicsEffect(None)
         self.setZValue(2)  # 恢复层级
         super().hoverLeaveEvent(event)
     
@@ -123,6 +158,41 @@ class ClickableNodeItem(QGraphicsRectItem):
         super().mousePressEvent(event)
 
 
+class EdgeItem(QGraphicsLineItem):
+    """边图形项（标签进入视口时才创建）"""
+    
+    def __init__(self, key: Tuple[str, str], label: str, start: QPointF, end: QPointF):
+        super().__init__(start.x(), start.y(), end.x(), end.y())
+        self.key = key
+        self.label = label
+        self.label_item: Optional[QGraphicsTextItem] = None
+        self.setPen(QPen(QColor(100, 100, 100), 2))
+        self.setZValue(0)  # 确保在节点下方
+    
+    def move_to(self, start: QPointF, end: QPointF):
+        self.setLine(start.x(), start.y(), end.x(), end.y())
+        if self.label_item is not None:
+            self._place_label()
+    
+    def ensure_details(self):
+        """添加边标签（如果有）"""
+        if self.label_item is not None or not self.label:
+            return
+        self.label_item = QGraphicsTextItem(self.label, self)
+        self.label_item.setDefaultTextColor(QColor(80, 80, 80))
+        self.label_item.setFont(QFont("Arial", 8))
+        self.label_item.setZValue(1)
+        self._place_label()
+    
+    def set_details_visible(self, visible: bool):
+        if self.label_item is not None:
+            self.label_item.setVisible(visible)
+    
+    def _place_label(self):
+        line = self.line()
+        self.label_item.setPos((line.x1() + line.x2()) / 2 - 20, (line.y1() + line.y2()) / 2 - 10)
+
+
 class LineageDialog(QDialog):
     """
     数据血缘可视化对话框
@@ -133,6 +203,9 @@ class LineageDialog(QDialog):
     # ⭐ 信号：节点被点击 (node_id: "data:5", "figure:3", etc.)
     node_clicked = Signal(str)
     
+    # 缩放比例低于该值时隐藏文字（细节层次）
+    LOD_TEXT_SCALE = 0.45
+    
     def __init__(self, link_manager, data_manager, result_manager, 
                  figure_manager, provenance_manager, parent=None):
         super().__init__(parent)
@@ -146,10 +219,27 @@ class LineageDialog(QDialog):
         self.nodes: Dict[str, LineageNode] = {}
         self.edges: List[LineageEdge] = []
         
+        # 布局缓存与已渲染的图形项
+        self._layout = LayeredLayout()
+        self._node_items: Dict[str, ClickableNodeItem] = {}
+        self._edge_items: Dict[Tuple[str, str], EdgeItem] = {}
+        self._details_visible = True
+        
+        # 合并短时间内的多次刷新/视口变化
+        self._refresh_timer = QTimer(self)
+        self._refresh_timer.setSingleShot(True)
+        self._refresh_timer.timeout.connect(self._sync_graph)
+        self._viewport_timer = QTimer(self)
+        self._viewport_timer.setSingleShot(True)
+        self._viewport_timer.setInterval(30)
+        self._viewport_timer.timeout.connect(self._update_viewport_details)
+        
         self._setup_ui()
         self._build_graph()
         self._layout_graph()
         self._render_graph()
+        self.view.fitInView(self.scene.sceneRect(), Qt.KeepAspectRatio)
+        self._schedule_viewport_update()
         
         # ⭐ 连接管理器信号以实现实时更新
         self._connect_manager_signals()
@@ -178,6 +268,10 @@ class LineageDialog(QDialog):
         # ⭐ 启用滚轮缩放
         self.view.wheelEvent = self._wheel_zoom
         
+        # 视口变化时补建可见区域的文字
+        self.view.horizontalScrollBar().valueChanged.connect(self._schedule_viewport_update)
+        self.view.verticalScrollBar().valueChanged.connect(self._schedule_viewport_update)
+        
         layout.addWidget(self.view)
         
         # 按钮栏
@@ -185,15 +279,15 @@ class LineageDialog(QDialog):
         
         # 缩放按钮
         zoom_in_btn = QPushButton("放大 (+)")
-        zoom_in_btn.clicked.connect(lambda: self.view.scale(1.2, 1.2))
+        zoom_in_btn.clicked.connect(lambda: self._zoom(1.2))
         button_layout.addWidget(zoom_in_btn)
         
         zoom_out_btn = QPushButton("缩小 (-)")
-        zoom_out_btn.clicked.connect(lambda: self.view.scale(1/1.2, 1/1.2))
+        zoom_out_btn.clicked.connect(lambda: self._zoom(1 / 1.2))
         button_layout.addWidget(zoom_out_btn)
         
         zoom_fit_btn = QPushButton("适应窗口")
-        zoom_fit_btn.clicked.connect(lambda: self.view.fitInView(self.scene.sceneRect(), Qt.KeepAspectRatio))
+        zoom_fit_btn.clicked.connect(self._zoom_fit)
         button_layout.addWidget(zoom_fit_btn)
         
         button_layout.addSpacing(20)
@@ -203,7 +297,7 @@ class LineageDialog(QDialog):
         button_layout.addWidget(export_btn)
         
         refresh_btn = QPushButton("刷新")
-        refresh_btn.clicked.connect(self._refresh)
+        refresh_btn.clicked.connect(self._relayout)
         button_layout.addWidget(refresh_btn)
         
         button_layout.addStretch()
@@ -265,134 +359,94 @@ class LineageDialog(QDialog):
         print(f"[LineageDialog] 构建图形: {len(self.nodes)}个节点, {len(self.edges)}条边")
     
     def _layout_graph(self):
-        """布局算法：简单的层次布局"""
-        if not self.nodes:
-            return
-        
-        # 计算每个节点的层级（使用拓扑排序的思想）
-        levels: Dict[str, int] = {}
-        in_degree: Dict[str, int] = {node_id: 0 for node_id in self.nodes}
-        
-        # 计算入度
-        for edge in self.edges:
-            if edge.to_node in in_degree:
-                in_degree[edge.to_node] += 1
-        
-        # 层次布局：从入度为0的节点开始
-        current_level = 0
-        processed = set()
-        
-        while len(processed) < len(self.nodes):
-            # 找到当前层的节点（入度为0且未处理）
-            current_level_nodes = [
-                node_id for node_id in self.nodes
-                if node_id not in processed and in_degree[node_id] == 0
-            ]
-            
-            if not current_level_nodes:
-                # 如果没有入度为0的节点，说明有环或孤立节点
-                # 将剩余节点都放到当前层
-                current_level_nodes = [
-                    node_id for node_id in self.nodes if node_id not in processed
-                ]
-            
-            # 设置层级
-            for node_id in current_level_nodes:
-                levels[node_id] = current_level
-                processed.add(node_id)
-                
-                # 减少子节点的入度
-                for edge in self.edges:
-                    if edge.from_node == node_id and edge.to_node in in_degree:
-                        in_degree[edge.to_node] -= 1
-            
-            current_level += 1
-        
-        # 根据层级设置坐标
-        y_spacing = 120  # 层间距
-        x_spacing = 200  # 节点间距
-        start_x = 50
-        start_y = 50
-        
-        # 按层级分组
-        level_groups: Dict[int, List[str]] = {}
-        for node_id, level in levels.items():
-            if level not in level_groups:
-                level_groups[level] = []
-            level_groups[level].append(node_id)
-        
-        # 设置每层节点的位置
-        for level, node_ids in level_groups.items():
-            y = start_y + level * y_spacing
-            total_width = len(node_ids) * x_spacing
-            x_offset = start_x
-            
-            for i, node_id in enumerate(node_ids):
-                x = x_offset + i * x_spacing
-                self.nodes[node_id].x = x
-                self.nodes[node_id].y = y
+        """布局算法：分层布局（Kahn拓扑排序，线性时间）"""
+        positions = self._layout.compute(self.nodes.keys(),
+                                         [(e.from_node, e.to_node) for e in self.edges])
+        for node_id, (x, y) in positions.items():
+            self.nodes[node_id].x = x
+            self.nodes[node_id].y = y
     
     def _render_graph(self):
-        """渲染图形到场景"""
-        self.scene.clear()
+        """
+        渲染图形到场景（增量）
         
-        # 绘制边（先绘制，使其在节点下方）
+        只为新节点/新边创建图形项，删除已不存在的，移动位置变化的；
+        文字在 _update_viewport_details 中按视口补建
+        """
+        # 删除已不存在的边和节点
+        edge_keys = {(e.from_node, e.to_node) for e in self.edges}
+        for key in [k for k in self._edge_items if k not in edge_keys]:
+            self.scene.removeItem(self._edge_items.pop(key))
+        for node_id in [n for n in self._node_items if n not in self.nodes]:
+            self.scene.removeItem(self._node_items.pop(node_id))
+        
+        # 节点：新建、重建（名称变化）或移动
+        moved = set()
+        for node_id, node in self.nodes.items():
+            item = self._node_items.get(node_id)
+            if item is not None and (item.node.label != node.label or item.node.height != node.height):
+                self.scene.removeItem(item)
+                item = None
+            if item is None:
+                # ⭐ 使用可点击的节点矩形
+                item = ClickableNodeItem(node, self)
+                item.set_details_visible(self._details_visible)
+                self.scene.addItem(item)
+                self._node_items[node_id] = item
+                moved.add(node_id)
+            else:
+                item.node = node
+                if item.pos() != QPointF(node.x, node.y):
+                    item.setPos(node.x, node.y)
+                    moved.add(node_id)
+        
+        # 边：新建或跟随端点移动
         for edge in self.edges:
-            if edge.from_node in self.nodes and edge.to_node in self.nodes:
-                from_node = self.nodes[edge.from_node]
-                to_node = self.nodes[edge.to_node]
-                
-                from_center = from_node.get_center()
-                to_center = to_node.get_center()
-                
-                # 绘制箭头线
-                pen = QPen(QColor(100, 100, 100), 2)
-                line = self.scene.addLine(
-                    from_center.x(), from_center.y(),
-                    to_center.x(), to_center.y(),
-                    pen
-                )
-                line.setZValue(0)  # 确保在节点下方
-                
-                # 添加边标签（如果有）
-                if edge.label:
-                    mid_x = (from_center.x() + to_center.x()) / 2
-                    mid_y = (from_center.y() + to_center.y()) / 2
-                    label = self.scene.addText(edge.label)
-                    label.setDefaultTextColor(QColor(80, 80, 80))
-                    label.setFont(QFont("Arial", 8))
-                    label.setPos(mid_x - 20, mid_y - 10)
-                    label.setZValue(1)
-        
-        # 绘制节点 (使用可点击的节点)
-        for node in self.nodes.values():
-            # ⭐ 使用可点击的节点矩形
-            rect = ClickableNodeItem(node, self)
-            self.scene.addItem(rect)
-            
-            # 添加节点标签
-            text = self.scene.addText(node.label)
-            text.setDefaultTextColor(QColor(0, 0, 0))
-            text.setFont(QFont("Arial", 10))
-            
-            # 居中文本
-            text_width = text.boundingRect().width()
-            text_height = text.boundingRect().height()
-            text.setPos(
-                node.x + (node.width - text_width) / 2,
-                node.y + (node.height - text_height) / 2
-            )
-            text.setZValue(3)
-            
-            # 添加类型标签（小字）
-            type_text = self.scene.addText(f"[{node.node_type}]")
-            type_text.setDefaultTextColor(QColor(120, 120, 120))
-            type_text.setFont(QFont("Arial", 8))
-            type_text.setPos(node.x + 5, node.y + 5)
-            type_text.setZValue(3)
-        
-        # 调整视图以适应内容
+            key = (edge.from_node, edge.to_node)
+            item = self._edge_items.get(key)
+            if item is not None and edge.from_node not in moved and edge.to_node not in moved:
+                continue
+            from_center = self.nodes[edge.from_node].get_center()
+            to_center = self.nodes[edge.to_node].get_center()
+            if item is None:
+                item = EdgeItem(key, edge.label, from_center, to_center)
+                self.scene.addItem(item)
+                self._edge_items[key] = item
+            else:
+                item.move_to(from_center, to_center)
+        
+        self.scene.setSceneRect(self.scene.itemsBoundingRect())
+        self._schedule_viewport_update()
+    
+    # ========== 视口裁剪与细节层次 ==========
+    
+    def _schedule_viewport_update(self, *args):
+        self._viewport_timer.start()
+    
+    def _visible_scene_rect(self) -> QRectF:
+        return self.view.mapToScene(self.view.viewport().rect()).boundingRect()
+    
+    def _update_viewport_details(self):
+        """为视口内的节点/边补建文字；缩放过小时隐藏文字"""
+        show = self.view.transform().m11() >= self.LOD_TEXT_SCALE
+        if show != self._details_visible:
+            self._details_visible = show
+            for item in list(self._node_items.values()) + list(self._edge_items.values()):
+                item.set_details_visible(show)
+        if not show:
+            return
+        
+        for item in self.scene.items(self._visible_scene_rect()):
+            if isinstance(item, (ClickableNodeItem, EdgeItem)):
+                item.ensure_details()
+    
+    def _zoom(self, factor: float):
+        self.view.scale(factor, factor)
+        self._schedule_viewport_update()
+    
+    def _zoom_fit(self):
         self.view.fitInView(self.scene.sceneRect(), Qt.KeepAspectRatio)
+        self._schedule_viewport_update()
     
     def _export_png(self):
         """导出为PNG图片"""
@@ -409,6 +463,11 @@ class LineageDialog(QDialog):
         try:
             from PySide6.QtGui import QImage
             
+            # 导出完整图：补建视口外的文字
+            for item in list(self._node_items.values()) + list(self._edge_items.values()):
+                item.ensure_details()
+                item.set_details_visible(True)
+            
             # 创建图像
             rect = self.scene.sceneRect()
             image = QImage(
@@ -425,6 +484,10 @@ class LineageDialog(QDialog):
             # 保存图像
             image.save(file_path)
             
+            # 恢复细节层次
+            self._details_visible = True
+            self._update_viewport_details()
+            
             QMessageBox.information(
                 self,
                 "导出成功",
@@ -456,13 +519,49 @@ class LineageDialog(QDialog):
             self.figure_manager.figure_added.connect(self._on_data_changed)
         if hasattr(self.figure_manager, 'figure_removed'):
             self.figure_manager.figure_removed.connect(self._on_data_changed)
+        
+        # 链接变化（新对象的链接通常在对象创建之后才建立）
+        if hasattr(self.link_manager, 'link_created'):
+            self.link_manager.link_created.connect(self._on_data_changed)
+        if hasattr(self.link_manager, 'link_removed'):
+            self.link_manager.link_removed.connect(self._on_data_changed)
     
     def _on_data_changed(self, *args):
-        """数据变化时自动刷新血缘图"""
-        self._refresh()
+        """数据变化时自动刷新血缘图（同一轮事件中的多次变化合并为一次）"""
+        self._refresh_timer.start(0)
     
     def _refresh(self):
-        """刷新图形"""
+        """刷新图形（增量）"""
+        self._sync_graph()
+    
+    def _sync_graph(self):
+        """
+        按管理器当前状态增量更新
+        
+        新节点只挂在已有节点之下时追加布局，已有节点不动；
+        已有节点之间出现新链接时才重新全量布局
+        """
+        old_nodes = set(self.nodes)
+        old_edges = {(e.from_node, e.to_node) for e in self.edges}
+        old_positions = {n: (node.x, node.y) for n, node in self.nodes.items()}
+        self.nodes.clear()
+        self.edges.clear()
+        self._build_graph()
+        
+        edges = [(e.from_node, e.to_node) for e in self.edges]
+        added = [n for n in self.nodes if n not in old_nodes]
+        self._layout.remove(old_nodes - set(self.nodes))
+        relink = any(src in old_nodes and dst in old_nodes
+                     for src, dst in set(edges) - old_edges)
+        if relink or not self._layout.extend(added, edges):
+            self._layout_graph()
+        else:
+            for node_id, node in self.nodes.items():
+                node.x, node.y = self._layout.positions.get(node_id, old_positions.get(node_id, (0.0, 0.0)))
+        self._render_graph()
+    
+    def _relayout(self):
+        """重新全量布局（刷新按钮）"""
         self.nodes.clear()
         self.edges.clear()
         self._build_graph()
@@ -478,7 +577,7 @@ class LineageDialog(QDialog):
         factor = 1.2 if angle > 0 else 1 / 1.2
         
         # 应用缩放
-        self.view.scale(factor, factor)
+        self._zoom(factor)
     
     def _wrap_text(self, text: str, max_width: int = 20) -> str:
         """
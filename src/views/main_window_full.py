@@ -44,6 +44,7 @@ class MainWindowFull(QMainWindow):
     
     信号：
         file_selected: 文件被选择 (file_path)
+        files_selected: 多个文件/文件夹被选择 (paths)
         data_item_selected: 数据项被选择 (data_id)
         figure_item_selected: 图表项被选择 (figure_id)
         result_item_selected: 结果项被选择 (result_id)
@@ -52,6 +53,7 @@ class MainWindowFull(QMainWindow):
     
     # 信号定义
     file_selected = Signal(str)
+    files_selected = Signal(list)
     data_item_selected = Signal(int)
     figure_item_selected = Signal(int)
     result_item_selected = Signal(int)
@@ -262,6 +264,10 @@ class MainWindowFull(QMainWindow):
         test_guide_action.setShortcut("F1")
         help_menu.addAction(test_guide_action)
         
+        thread_diag_action = QAction("并行计算诊断(&D)...", self)
+        thread_diag_action.setStatusTip("查看进程池与BLAS/OpenMP线程配置")
+        help_menu.addAction(thread_diag_action)
+        
         help_menu.addSeparator()
         
         about_action = QAction("关于(&A)", self)
@@ -278,6 +284,7 @@ class MainWindowFull(QMainWindow):
         self.stats_action = stats_action
         self.clear_action = clear_action
         self.test_guide_action = test_guide_action
+        self.thread_diag_action = thread_diag_action
         self.auto_save_toggle_action = auto_save_toggle
         self.auto_save_interval_action = auto_save_interval
     
@@ -351,6 +358,24 @@ class MainWindowFull(QMainWindow):
         toolbar.addSeparator()
         toolbar.addAction(stats_toggle)
         self.toolbar_stats_toggle_action = stats_toggle
+
+        # 任务统计切换
+        metrics_toggle = QAction("⚙️ 任务统计", self)
+        metrics_toggle.setCheckable(True)
+        metrics_toggle.setChecked(False)
+        metrics_toggle.setStatusTip("显示/隐藏后台任务的吞吐量与延迟统计")
+        def _toggle_metrics(checked):
+            try:
+                if hasattr(self, 'metrics_dock') and self.metrics_dock is not None:
+                    if checked:
+                        self.metrics_dock.show()
+                    else:
+                        self.metrics_dock.hide()
+            except Exception:
+                pass
+        metrics_toggle.triggered.connect(_toggle_metrics)
+        toolbar.addAction(metrics_toggle)
+        self.toolbar_metrics_toggle_action = metrics_toggle
     
     def _create_left_docks(self):
         """创建左侧可停靠面板（项目树）"""
@@ -426,6 +451,19 @@ class MainWindowFull(QMainWindow):
         except Exception:
             pass
 
+        # 右侧Dock：任务统计（同样默认隐藏）
+        try:
+            from PySide6.QtWidgets import QDockWidget
+            from .widgets import JobMetricsWidget
+            self.job_metrics = JobMetricsWidget()
+            self.job_metrics.set_registry()
+            self.metrics_dock = QDockWidget("任务统计", self)
+            self.metrics_dock.setWidget(self.job_metrics)
+            self.addDockWidget(Qt.RightDockWidgetArea, self.metrics_dock)
+            self.metrics_dock.hide()
+        except Exception:
+            pass
+
         # 主工作区拖放：为Tab安装过滤器
         try:
             self._drop_filter = MainAreaDropFilter(self)
@@ -7,6 +7,7 @@ from .project_tree import ProjectTreeWidget
 from .data_tables import DataTableWidget, ResultTableWidget, ProjectDetailTableWidget
 from .canvas_widget import CanvasWidget
 from .session_stats import SessionStatsWidget
+from .job_metrics_panel import JobMetricsWidget
 
 __all__ = [
     'DraggableLabel',
@@ -15,6 +16,7 @@ __all__ = [
     'ResultTableWidget',
     'ProjectDetailTableWidget',
     'CanvasWidget',
-    'SessionStatsWidget'
+    'SessionStatsWidget',
+    'JobMetricsWidget'
 ]
 
@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+"""
+任务统计面板 - 后台任务系统的吞吐量、延迟分位数与资源占用
+
+显示内容（最近一个统计窗口）：
+- 吞吐量（任务/分钟）、完成/失败/取消/超时数
+- 等待队列深度（当前/峰值）、进程与线程槽位占用率（时间加权平均）
+- 各阶段耗时分位数：排队等待 / 传递 / 执行 / 结果回调 / 总计，以及批量结果提交
+- 导出CSV：逐任务记录 + 状态样本（用于确定进程数、发现性能退化）
+
+用法：
+  widget.set_registry(registry)  # 默认 job_metrics.default_registry()，内部定时刷新
+"""
+import os
+from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QGridLayout, QTableWidget,
+                               QTableWidgetItem, QPushButton, QComboBox, QHeaderView, QFileDialog)
+from PySide6.QtCore import QTimer, Qt
+
+
+_STAGE_NAMES = [
+    ('queue_wait', "排队等待"),
+    ('transfer', "传递"),
+    ('run', "执行"),
+    ('commit', "结果回调"),
+    ('total', "总计"),
+]
+_WINDOWS = [("最近1分钟", 60.0), ("最近5分钟", 300.0), ("最近30分钟", 1800.0)]
+
+
+def _format_seconds(value) -> str:
+    if value is None:
+        return "-"
+    if value < 1.0:
+        return f"{value * 1000:.0f} ms"
+    return f"{value:.2f} s"
+
+
+class JobMetricsWidget(QWidget):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._registry = None
+        self._timer = None
+        self._init_ui()
+
+    def _init_ui(self):
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(10, 10, 10, 10)
+        layout.setSpacing(8)
+
+        header = QHBoxLayout()
+        self.title_label = QLabel("⚙️ 任务统计")
+        self.title_label.setStyleSheet("font-weight: 700; font-size: 14px;")
+        header.addWidget(self.title_label)
+        header.addStretch(1)
+        self.window_combo = QComboBox()
+        for name, _seconds in _WINDOWS:
+            self.window_combo.addItem(name)
+        self.window_combo.currentIndexChanged.connect(lambda _: self._refresh())
+        header.addWidget(self.window_combo)
+        layout.addLayout(header)
+
+        grid = QGridLayout()
+        grid.setHorizontalSpacing(12)
+        grid.setVerticalSpacing(6)
+
+        def add_row(r, name):
+            label = QLabel(name)
+            label.setStyleSheet("color:#555;")
+            value = QLabel("-")
+            value.setAlignment(Qt.AlignRight | Qt.AlignVCenter)
+            grid.addWidget(label, r, 0)
+            grid.addWidget(value, r, 1)
+            return value
+
+        row = 0
+        self.throughput_val = add_row(row, "吞吐量") ; row += 1
+        self.finished_val   = add_row(row, "完成/失败/取消/超时") ; row += 1
+        self.queue_val      = add_row(row, "等待队列（当前/峰值）") ; row += 1
+        self.process_val    = add_row(row, "进程占用率") ; row += 1
+        self.thread_val     = add_row(row, "线程占用率") ; row += 1
+        layout.addLayout(grid)
+
+        self.latency_table = QTableWidget(len(_STAGE_NAMES) + 1, 4)
+        self.latency_table.setHorizontalHeaderLabels(["P50", "P90", "P99", "最大"])
+        self.latency_table.setVerticalHeaderLabels([name for _, name in _STAGE_NAMES] + ["批量结果提交"])
+        self.latency_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.latency_table.setSelectionMode(QTableWidget.NoSelection)
+        self.latency_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        layout.addWidget(self.latency_table)
+
+        buttons = QHBoxLayout()
+        self.export_btn = QPushButton("导出CSV...")
+        self.export_btn.clicked.connect(self._on_export)
+        self.clear_btn = QPushButton("清空")
+        self.clear_btn.clicked.connect(self._on_clear)
+        buttons.addStretch(1)
+        buttons.addWidget(self.clear_btn)
+        buttons.addWidget(self.export_btn)
+        layout.addLayout(buttons)
+        layout.addStretch(1)
+
+        self.setStyleSheet("""
+            QLabel { font-size: 12px; }
+        """)
+
+    def set_registry(self, registry=None):
+        if registry is None:
+            from src.utils.job_metrics import default_registry
+            registry = default_registry()
+        self._registry = registry
+        # 启动/重启定时刷新
+        if self._timer is None:
+            self._timer = QTimer(self)
+            self._timer.timeout.connect(self._refresh)
+        self._timer.start(1500)
+        self._refresh()
+
+    def _window(self) -> float:
+        return _WINDOWS[max(self.window_combo.currentIndex(), 0)][1]
+
+    def _refresh(self):
+        if self._registry is None:
+            return
+        snapshot = self._registry.snapshot(self._window())
+        self.throughput_val.setText(f"{snapshot['throughput'] * 60:.1f} 个/分钟")
+        self.finished_val.setText(f"{snapshot['completed']} / {snapshot['failed']} / "
+                                  f"{snapshot['cancelled']} / {snapshot['timed_out']}")
+        gauges = snapshot['gauges']
+        queue = gauges.get('queue_depth')
+        self.queue_val.setText(f"{queue['current']:.0f} / {queue['max']:.0f}" if queue else "-")
+        for label, name in ((self.process_val, 'process_busy'), (self.thread_val, 'thread_busy')):
+            gauge = gauges.get(name)
+            if gauge and gauge['mean'] is not None:
+                label.setText(f"{gauge['mean'] * 100:.0f}%（当前 {gauge['current'] * 100:.0f}%）")
+            else:
+                label.setText("-")
+
+        rows = [snapshot['latency'].get(stage) for stage, _ in _STAGE_NAMES]
+        rows.append(snapshot['series'].get('batch_commit'))
+        for r, stats in enumerate(rows):
+            for c, key in enumerate(('p50', 'p90', 'p99', 'max')):
+                item = QTableWidgetItem(_format_seconds(stats[key]) if stats else "-")
+                item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+                self.latency_table.setItem(r, c, item)
+
+    def _on_export(self):
+        if self._registry is None:
+            return
+        path, _ = QFileDialog.getSaveFileName(self, "导出任务指标", "job_metrics.csv", "CSV Files (*.csv)")
+        if not path:
+            return
+        root, ext = os.path.splitext(path)
+        count = self._registry.export_csv(path, gauges_path=f"{root}_gauges{ext or '.csv'}")
+        self.title_label.setText(f"⚙️ 任务统计（已导出 {count} 条）")
+        QTimer.singleShot(3000, lambda: self.title_label.setText("⚙️ 任务统计"))
+
+    def _on_clear(self):
+        if self._registry is not None:
+            self._registry.clear()
+            self._refresh()
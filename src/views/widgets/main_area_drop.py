@@ -5,9 +5,11 @@
 用途：为中间主区域（含Tab）提供拖入文件导入能力。
 行为：
 - 仅接受本地文件（urls）
-- 支持常见数据后缀：.json/.csv/.xlsx/.xls
-- 放下后调用父View的 file_selected 信号
+- 支持常见数据后缀：.json/.csv/.xlsx/.xls，以及包含这些文件的文件夹
+- 放下单个文件时调用父View的 file_selected 信号；
+  多个文件或文件夹调用 files_selected 信号（后台并发导入）
 """
+import os
 from PySide6.QtCore import QObject, QEvent, Qt
 from PySide6.QtGui import QDragEnterEvent, QDropEvent
 
@@ -22,11 +24,11 @@ class MainAreaDropFilter(QObject):
         if et == QEvent.DragEnter or et == QEvent.DragMove:
             mime = event.mimeData()
             if mime and mime.hasUrls():
-                # 检查是否包含支持的文件后缀
+                # 检查是否包含支持的文件后缀或文件夹
                 for url in mime.urls():
                     if url.isLocalFile():
                         path = url.toLocalFile()
-                        if self._is_supported(path):
+                        if self._is_supported(path) or os.path.isdir(path):
                             event.acceptProposedAction()
                             return True
             return False
@@ -34,27 +36,31 @@ class MainAreaDropFilter(QObject):
         if et == QEvent.Drop:
             mime = event.mimeData()
             if mime and mime.hasUrls():
-                for url in mime.urls():
-                    if url.isLocalFile():
-                        path = url.toLocalFile()
-                        if self._is_supported(path):
+                paths = [url.toLocalFile() for url in mime.urls() if url.isLocalFile()]
+                paths = [p for p in paths if self._is_supported(p) or os.path.isdir(p)]
+                if paths:
+                    try:
+                        # 交给View统一处理
+                        if len(paths) == 1 and not os.path.isdir(paths[0]):
+                            if hasattr(self.view, 'file_selected'):
+                                self.view.file_selected.emit(paths[0])
+                            if hasattr(self.view, 'update_status'):
+                                self.view.update_status(f"已拖入文件: {paths[0]}")
+                        elif hasattr(self.view, 'files_selected'):
+                            self.view.files_selected.emit(paths)
+                            if hasattr(self.view, 'update_status'):
+                                self.view.update_status(f"已拖入 {len(paths)} 项，正在后台导入")
+                        # 首次使用后移除覆盖提示层
+                        overlay = getattr(self.view, 'data_overlay', None)
+                        if overlay is not None:
                             try:
-                                # 交给View统一处理
-                                if hasattr(self.view, 'file_selected'):
-                                    self.view.file_selected.emit(path)
-                                if hasattr(self.view, 'update_status'):
-                                    self.view.update_status(f"已拖入文件: {path}")
-                                # 首次使用后移除覆盖提示层
-                                overlay = getattr(self.view, 'data_overlay', None)
-                                if overlay is not None:
-                                    try:
-                                        overlay.hide()
-                                    except Exception:
-                                        pass
+                                overlay.hide()
                             except Exception:
                                 pass
-                            event.acceptProposedAction()
-                            return True
+                    except Exception:
+                        pass
+                    event.acceptProposedAction()
+                    return True
             return False
 
         return False
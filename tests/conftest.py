@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+"""
+测试共用的 fixture
+- app: Qt事件循环所需的应用对象（已有 QApplication 时直接使用）
+- wait: wait(app, condition, timeout=60.0) 处理事件直到条件成立，返回最终的条件值
+- wide_frame: wide_frame(scale=1.0) 生成三个浓度的结合/解离宽表（LocalBivariate 可拟合）
+- run_process: run_process(mgr, func, count=1) 向 JobManager 提交 count 个进程任务并等待，返回结果（失败时为错误信息）列表
+"""
+import sys
+import os
+import time
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import numpy as np
+import pandas as pd
+import pytest
+from PySide6.QtCore import QCoreApplication
+
+
+def _wait(app, condition, timeout=60.0):
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        app.processEvents()
+        time.sleep(0.01)
+    app.processEvents()
+    return condition()
+
+
+def _wide_frame(scale=1.0):
+    t = np.arange(0, 200.0)
+    columns = {'Time': t}
+    for c in (1e-8, 2e-8, 4e-8):
+        rise = 100 * scale * c / (c + 1e-8) * (1 - np.exp(-(c * 1e5 + 1e-3) * np.minimum(t, 100)))
+        columns[str(c)] = rise * np.exp(-1e-3 * np.maximum(t - 100, 0))
+    return pd.DataFrame(columns)
+
+
+@pytest.fixture
+def app():
+    return QCoreApplication.instance() or QCoreApplication([])
+
+
+@pytest.fixture
+def wait():
+    return _wait
+
+
+@pytest.fixture
+def wide_frame():
+    return _wide_frame
+
+
+@pytest.fixture
+def run_process(app):
+    def run(mgr, func, count=1):
+        results = []
+        for _ in range(count):
+            mgr.submit_with_callbacks(func, use_process=True,
+                                      on_done=lambda jid, res: results.append(res),
+                                      on_fail=lambda jid, err: results.append(err))
+        assert _wait(app, lambda: len(results) == count)
+        return results
+    return run
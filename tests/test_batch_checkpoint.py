@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""
+测试可续跑的批量拟合检查点
+验证：
+1. 清单与状态日志落盘，重新打开后恢复每项状态；写了一半的末行被忽略，结果文件丢失的 done 项回到 pending
+2. BatchFitter 带检查点运行时逐个保存结果；中途取消后，续跑只重新拟合未完成的项
+3. 全部项提交/失败后不再列为未完成，discard() 删除目录
+"""
+import sys
+import os
+import time
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'XlementFitting'))
+
+
+def _entries(n):
+    return [(10 + i, f"曲线{i}", f"digest{i}") for i in range(n)]
+
+
+def test_manifest_and_states(tmp_path):
+    """测试1：状态日志恢复"""
+    from src.utils.batch_checkpoint import BatchCheckpoint, PENDING, DONE, COMMITTED, FAILED
+    cp = BatchCheckpoint.create(str(tmp_path), 'LocalBivariate', _entries(4))
+    cp.record_result('0', {'success': True, 'parameters': {'ka': (1.0, None, '')}})
+    cp.record_result('1', {'success': True, 'parameters': {}})
+    cp.mark_committed('1')
+    cp.record_result('2', {'success': False, 'error': '不收敛'})
+    cp.close()
+    # 断电：最后一条记录只写了一半
+    with open(os.path.join(cp.directory, 'states.log'), 'ab') as f:
+        f.write(b'{"key": "3", "sta')
+
+    reopened = BatchCheckpoint.load(cp.directory)
+    states = {key: item['state'] for key, item in reopened.items.items()}
+    assert states == {'0': DONE, '1': COMMITTED, '2': FAILED, '3': PENDING}
+    assert reopened.items['2']['error'] == '不收敛'
+    assert reopened.load_result('0')['parameters'] == {'ka': (1.0, None, '')}
+    assert not os.path.exists(reopened._result_path('1'))  # 提交后删除结果文件
+    assert reopened.method == 'LocalBivariate' and reopened.items['0']['name'] == '曲线0'
+
+    # done 项的结果文件丢失：按未完成处理
+    os.remove(reopened._result_path('0'))
+    assert BatchCheckpoint.load(cp.directory).items['0']['state'] == PENDING
+    print("✅ 测试1通过！")
+
+
+def test_resume_after_cancel(tmp_path, app, wait, wide_frame):
+    """测试2：取消后续跑只重跑未完成项"""
+    from src.utils.job_manager import JobManager
+    from src.utils.batch_fit import BatchFitter
+    from src.utils.batch_checkpoint import BatchCheckpoint, PENDING, DONE
+    JobManager.reset_instance()
+    JobManager.instance().set_max_workers(1)
+
+    frames = {10 + i: wide_frame(1.0 + 0.2 * i) for i in range(4)}
+    item = lambda d: (d, 'LocalBivariate', frames[d]['Time'].to_numpy(), frames[d].iloc[:, 1].to_numpy(), frames[d])
+    cp = BatchCheckpoint.create(str(tmp_path), 'LocalBivariate', _entries(4))
+    keys = {data_id: key for key, data_id in zip(cp.items, frames)}
+
+    fitter = BatchFitter()
+    done, finished = [], []
+    fitter.fit_done.connect(lambda d, res: done.append(d))
+    fitter.finished.connect(lambda ok, failed: finished.append((ok, failed)))
+    fitter.start([item(d) for d in frames], checkpoint=cp, keys=keys)
+    assert wait(app, lambda: done)
+    fitter.cancel()
+    assert wait(app, lambda: finished)
+    cp.close()
+
+    # 模拟重启：重新打开检查点
+    reopened = BatchCheckpoint.find_unfinished(str(tmp_path))[0]
+    completed = reopened.keys_in(DONE)
+    pending = reopened.keys_in(PENDING)
+    assert keys[done[0]] in completed and pending
+    assert sorted(completed + pending) == ['0', '1', '2', '3']
+
+    by_key = {key: data_id for data_id, key in keys.items()}
+    resumed, finished = [], []
+    fitter = BatchFitter()
+    fitter.fit_done.connect(lambda d, res: resumed.append(d))
+    fitter.finished.connect(lambda ok, failed: finished.append((ok, failed)))
+    fitter.start([item(by_key[k]) for k in pending], checkpoint=reopened, keys=keys)
+    assert wait(app, lambda: finished)
+    assert sorted(resumed) == sorted(by_key[k] for k in pending)
+    assert sorted(reopened.keys_in(DONE)) == ['0', '1', '2', '3']
+    assert all(reopened.load_result(k)['success'] for k in reopened.items)
+    print("✅ 测试2通过！")
+
+
+def test_finish_and_discard(tmp_path):
+    """测试3：全部提交后结束"""
+    from src.utils.batch_checkpoint import BatchCheckpoint
+    old = BatchCheckpoint.create(str(tmp_path), 'LocalBivariate', _entries(2))
+    time.sleep(1.1)  # 目录名按秒排序
+    new = BatchCheckpoint.create(str(tmp_path), 'LocalBivariate', _entries(1))
+    assert [cp.run_id for cp in BatchCheckpoint.find_unfinished(str(tmp_path))] == [new.run_id, old.run_id]
+
+    old.record_result('0', {'success': True})
+    old.mark_committed('0')
+    old.record_failure('1', '数据点不足')
+    assert old.is_finished
+    assert [cp.run_id for cp in BatchCheckpoint.find_unfinished(str(tmp_path))] == [new.run_id]
+    old.discard()
+    assert not os.path.exists(old.directory)
+    print("✅ 测试3通过！")
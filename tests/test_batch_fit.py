@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""
+测试批量拟合（BatchFitter + FitDataCommand(fit_result=...)）
+验证：
+1. 批量拟合在进程池中执行，输入与单次拟合相同（含DataFrame），结果与进程内 fit_data 一致
+2. FitDataCommand 直接采用后台拟合结果，不再重新拟合；源数据在此期间被修改时重新拟合
+3. 取消：尚未开始的任务以"已取消"结束，finished 信号照常发出
+4. 任务抛出异常时失败信息取堆栈最后一行的异常
+"""
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'XlementFitting'))
+
+import numpy as np
+
+
+def _item(data_id, df):
+    return (data_id, 'LocalBivariate', df['Time'].to_numpy(), df.iloc[:, 1].to_numpy(), df)
+
+
+def _fitter():
+    from src.utils.job_manager import JobManager
+    from src.utils.batch_fit import BatchFitter
+    JobManager.reset_instance()
+    JobManager.instance().set_max_workers(1)
+    fitter = BatchFitter()
+    events = {'done': {}, 'failed': {}, 'finished': None}
+    fitter.fit_done.connect(lambda d, res: events['done'].__setitem__(d, res))
+    fitter.fit_failed.connect(lambda d, err: events['failed'].__setitem__(d, err))
+    fitter.finished.connect(lambda ok, failed: events.update(finished=(ok, failed)))
+    return fitter, events
+
+
+def test_batch_matches_single_fit(app, wait, wide_frame):
+    """测试1：进程池批量拟合与单次拟合结果一致"""
+    from src.utils.fitting_wrapper import fit_data
+    fitter, events = _fitter()
+    frames = {1: wide_frame(), 2: wide_frame(0.5)}
+    assert fitter.start([_item(d, df) for d, df in frames.items()]) == 2
+    assert wait(app, lambda: events['finished'] is not None)
+    assert sorted(events['finished'][0]) == [1, 2] and not events['failed']
+
+    for data_id, df in frames.items():
+        remote = events['done'][data_id]
+        _, _, x, y, _ = _item(data_id, df)
+        local = fit_data('LocalBivariate', x, y, dataframe=df)
+        assert remote['success'] and remote['y_pred_matrix'].shape == (len(df), 3)
+        assert remote['parameters'].keys() == local['parameters'].keys()
+        assert np.isclose(remote['statistics']['rmse'], local['statistics']['rmse'], rtol=1e-6)
+    print("✅ 测试1通过！")
+
+
+def test_command_adopts_fit_result(monkeypatch, app, wide_frame):
+    """测试2：采用后台拟合结果，不再重新拟合"""
+    import src.utils.fitting_wrapper as wrapper
+    from src.models import (DataManager, ResultManager, FigureManager, LinkManager, ProjectManager,
+                            ProvenanceManager, CommandManager, FitDataCommand)
+    calls = []
+    original = wrapper.fit_data
+
+    def counting(*args, **kwargs):
+        calls.append(1)
+        return original(*args, **kwargs)
+
+    managers = dict(data_manager=DataManager(), result_manager=ResultManager(), figure_manager=FigureManager(),
+                    link_manager=LinkManager(), project_manager=ProjectManager())
+    managers['project_manager'].create_project("默认项目")
+    data_id = managers['data_manager'].add_data("宽表", wide_frame())
+    data = managers['data_manager'].get_data(data_id)
+    x, y = data.get_xy_data(auto_sort=False)
+    fit_result = original('LocalBivariate', x, y, dataframe=data.dataframe)
+    monkeypatch.setattr(wrapper, 'fit_data', counting)
+    commands = CommandManager(ProvenanceManager())
+
+    cmd = FitDataCommand(data_id, 'LocalBivariate', **managers,
+                         fit_result=fit_result, fit_version=data.get_dataframe_version())
+    assert commands.execute(cmd), cmd.error
+    assert not calls and cmd.refit_count == 0
+    fitted = managers['data_manager'].get_data(cmd.fitted_data_id).dataframe
+    assert np.allclose(fitted.iloc[:, 1:].to_numpy(), fit_result['y_pred_matrix'])
+    result = managers['result_manager'].get_result(cmd.result_id)
+    assert result.parameters['Method'][0] == 'LocalBivariate'
+
+    # 拟合期间源数据被修改：重新拟合
+    stale_version = data.get_dataframe_version()
+    data.dataframe = wide_frame(2.0)
+    cmd = FitDataCommand(data_id, 'LocalBivariate', **managers,
+                         fit_result=fit_result, fit_version=stale_version)
+    assert commands.execute(cmd), cmd.error
+    assert len(calls) == 1 and cmd.refit_count == 1
+    print("✅ 测试2通过！")
+
+
+def test_cancel_batch(app, wait, wide_frame):
+    """测试3：取消批量拟合"""
+    fitter, events = _fitter()
+    df = wide_frame()
+    fitter.start([_item(d, df) for d in range(1, 6)])
+    fitter.cancel()
+    assert wait(app, lambda: events['finished'] is not None)
+    ok, failed = events['finished']
+    assert len(ok) + len(failed) == 5 and len(failed) >= 4
+    assert all(failed[d] == "已取消" for d in failed)
+    assert not fitter.is_running
+    print("✅ 测试3通过！")
+
+
+def test_failure_message_is_exception_line(app):
+    """测试4：失败信息取堆栈最后一行"""
+    fitter, events = _fitter()
+    fitter._total = 1
+    fitter._running = True
+    fitter._on_error(7, "\nTraceback (most recent call last):\n  File \"fit.py\", line 3, in run\nValueError: 数据点不足\n")
+    assert events['failed'] == {7: "ValueError: 数据点不足"}
+    assert events['finished'] == ([], {7: "ValueError: 数据点不足"})
+    print("✅ 测试4通过！")
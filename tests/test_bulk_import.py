@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+"""
+测试多文件并发导入
+验证：
+1. collect_import_files 展开文件夹、过滤后缀、去重
+2. run_import_task 在后台解析单个文件，失败时返回错误而非抛出
+3. BulkImporter 逐个回传结果并汇总失败
+4. BulkImportCommand 撤销删除全部导入对象，重做用保存的解析结果重新注册
+5. 解析失败时报告堆栈最后一行的异常，而不是首行
+6. 不同目录下的同名JSON并发导入时导出到各自的Excel
+"""
+import sys
+import os
+import json
+import time
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import pandas as pd
+from PySide6.QtCore import QCoreApplication
+
+
+def _app():
+    return QCoreApplication.instance() or QCoreApplication([])
+
+
+def _write_xlsx(path, scale=1.0):
+    pd.DataFrame({'Time': [0.0, 1.0, 2.0], 'A1': [0.1 * scale, 0.2 * scale, 0.3 * scale]}).to_excel(path, index=False)
+
+
+def test_collect_import_files(tmp_path):
+    """测试1：文件夹展开与过滤"""
+    from src.utils.bulk_import import collect_import_files
+    run_dir = tmp_path / 'run'
+    (run_dir / 'sub').mkdir(parents=True)
+    _write_xlsx(run_dir / 'b.xlsx')
+    _write_xlsx(run_dir / 'sub' / 'a.xlsx')
+    (run_dir / 'notes.txt').write_text('x')
+    (run_dir / '~$b.xlsx').write_text('lock')
+
+    files = collect_import_files([str(run_dir), str(run_dir / 'b.xlsx')])
+    assert [os.path.basename(f) for f in files] == ['b.xlsx', 'a.xlsx']
+    print("✅ 测试1通过！")
+
+
+def test_run_import_task(tmp_path):
+    """测试2：后台解析任务"""
+    from src.utils.job_tasks import run_import_task
+    src = tmp_path / 'plate.xlsx'
+    _write_xlsx(src)
+    result = run_import_task(str(src))
+    assert result['success'] and result['error'] is None
+    assert list(result['dataframe'].columns) == ['Time', 'A1']
+
+    missing = run_import_task(str(tmp_path / 'missing.xlsx'))
+    assert not missing['success'] and missing['error']
+    print("✅ 测试2通过！")
+
+
+def test_bulk_importer_streams_results(tmp_path):
+    """测试3：逐个回传结果并汇总失败"""
+    app = _app()
+    from src.utils.bulk_import import BulkImporter
+    paths = []
+    for i in range(4):
+        p = tmp_path / f'f{i}.xlsx'
+        _write_xlsx(p, scale=i + 1)
+        paths.append(str(p))
+    paths.append(str(tmp_path / 'missing.xlsx'))
+
+    importer = BulkImporter(use_process=False)
+    loaded, failed, finished = [], [], []
+    importer.file_loaded.connect(lambda p, r: loaded.append((p, r['dataframe'])))
+    importer.file_failed.connect(lambda p, e: failed.append(p))
+    importer.finished.connect(lambda ok, errors: finished.append((ok, errors)))
+    importer.start(paths)
+
+    deadline = time.time() + 30
+    while not finished and time.time() < deadline:
+        app.processEvents()
+        time.sleep(0.01)
+
+    assert finished, "批量导入未在超时内结束"
+    ok, errors = finished[0]
+    assert sorted(ok) == sorted(paths[:4])
+    assert list(errors) == [paths[4]] and failed == [paths[4]]
+    assert len(loaded) == 4 and not importer.is_running
+    print("✅ 测试3通过！")
+
+
+def test_bulk_import_command_undo_redo():
+    """测试4：一个命令撤销/重做整批导入"""
+    _app()
+    from src.models import DataManager, ProjectManager, FigureManager, BulkImportCommand
+    data_manager = DataManager()
+    figure_manager = FigureManager()
+    project_manager = ProjectManager()
+    project_manager.create_project("默认项目")
+
+    def register(file_path, df, export_path=None):
+        data_id = data_manager.add_data(os.path.basename(file_path), df)
+        project_manager.get_current_project().add_data(data_id)
+        df.attrs['registered'] = True  # 模拟注册过程修改attrs
+        return [data_id], []
+
+    entries = []
+    for name in ['a.csv', 'b.csv']:
+        df = pd.DataFrame({'Time': [0, 1], 'A1': [1.0, 2.0]})
+        data_ids, figure_ids = register(name, df.copy())
+        entries.append({'file_path': name, 'dataframe': df, 'export_path': None,
+                        'data_ids': data_ids, 'figure_ids': figure_ids})
+
+    cmd = BulkImportCommand(entries, register, data_manager, figure_manager, project_manager)
+    assert len(data_manager.get_all_data()) == 2
+
+    assert cmd.undo()
+    assert len(data_manager.get_all_data()) == 0
+    assert cmd.execute()
+    assert len(data_manager.get_all_data()) == 2
+    # 保存的解析结果不被注册过程修改
+    assert 'registered' not in entries[0]['dataframe'].attrs
+    assert "2个文件" in cmd.get_description()
+    print("✅ 测试4通过！")
+
+
+def test_error_message_is_last_line():
+    """测试5：失败信息取堆栈最后一行"""
+    _app()
+    from src.utils.bulk_import import BulkImporter
+    importer = BulkImporter(use_process=False)
+    failed = []
+    importer.file_failed.connect(lambda p, e: failed.append(e))
+    importer._total = 2
+    importer._running = True
+
+    error = "\nTraceback (most recent call last):\n  File \"x.py\", line 1, in <module>\nKeyError: 'Time'\n"
+    importer._on_error('a.xlsx', error)
+    importer._on_error('b.xlsx', "  \n")
+    assert failed == ["KeyError: 'Time'", "未知错误"]
+    assert importer._failed == {'a.xlsx': "KeyError: 'Time'", 'b.xlsx': "未知错误"}
+    print("✅ 测试5通过！")
+
+
+def test_json_exports_do_not_collide(tmp_path):
+    """测试6：同名JSON的导出文件互不覆盖"""
+    from concurrent.futures import ThreadPoolExecutor
+    from src.utils.job_tasks import run_import_task
+    paths = []
+    for folder, value in (('a', 1.0), ('b', 5.0)):
+        (tmp_path / folder).mkdir()
+        sample = {'SampleID': 1, 'SampleName': 'S1', 'Concentration': 1.0,
+                  'OriginalDataList': [{'ID': i, 'Value': value + i} for i in range(3)]}
+        path = tmp_path / folder / 'run.json'
+        path.write_text(json.dumps({'CalculateDataList': [sample]}), encoding='utf-8')
+        paths.append(str(path))
+
+    export_dir = str(tmp_path / 'Json2excel')
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        results = list(pool.map(lambda p: run_import_task(p, export_dir), paths))
+
+    exports = [r['export_path'] for r in results]
+    assert all(r['success'] for r in results) and len(set(exports)) == 2
+    assert all(os.path.basename(e).startswith('run_') for e in exports)
+    for result, export in zip(results, exports):
+        assert pd.read_excel(export)['YValue'].tolist() == result['dataframe']['YValue'].tolist()
+    # 同一文件再次导入覆盖自己的导出文件
+    assert run_import_task(paths[0], export_dir)['export_path'] == exports[0]
+    assert sorted(os.listdir(export_dir)) == sorted(os.path.basename(e) for e in exports)
+    print("✅ 测试6通过！")
+
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+    for fn in (test_collect_import_files, test_run_import_task, test_bulk_importer_streams_results,
+               test_json_exports_do_not_collide):
+        with tempfile.TemporaryDirectory() as d:
+            fn(Path(d))
+    test_bulk_import_command_undo_redo()
+    test_error_message_is_last_line()
+    print("🎉 所有测试通过！")
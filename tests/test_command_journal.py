@@ -0,0 +1,210 @@
+# -*- coding: utf-8 -*-
+"""
+测试命令日志（两次保存之间的崩溃恢复）
+验证：
+1. 只读取已提交的记录，末尾写了一半的记录被忽略
+2. 命令执行后追加日志，未修改的数据帧不重复写入
+3. 未保存就崩溃后，重新打开会话按日志恢复到最后一个命令之后
+4. 会话文件被其它保存覆盖后旧日志不再应用；放弃修改时删除日志
+5. 每条日志只重新序列化发生变化的Manager，其它Manager的元信息不导出；按此写入的日志仍能完整恢复
+"""
+import sys
+import os
+import shutil
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import numpy as np
+import pandas as pd
+from PySide6.QtWidgets import QApplication
+
+
+def _session():
+    QApplication.instance() or QApplication([])
+    from src.models import SessionManager
+    sm = SessionManager()
+    sm.enable_auto_save(False)
+    return sm
+
+
+def _frame(seed):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({'Time': np.arange(50.0), 'Y': rng.normal(size=50)})
+
+
+def _commands(sm):
+    from src.models import CommandManager, ProvenanceManager
+    return CommandManager(ProvenanceManager(), journal=sm.journal_command)
+
+
+def _add_command(sm, name, df):
+    """新增数据的简单命令"""
+    from datetime import datetime
+    from src.models import ICommand, OperationLog
+
+    class AddDataCommand(ICommand):
+        def __init__(self):
+            super().__init__()
+            self.data_id = None
+
+        def execute(self):
+            self.data_id = sm.data_manager.add_data(name, df)
+            return True
+
+        def undo(self):
+            return sm.data_manager.remove_data(self.data_id)
+
+        def get_description(self):
+            return f"新增数据: {name}"
+
+        def to_operation_log(self):
+            return OperationLog(op_id=f"add-{name}", op_type='create', timestamp=datetime.now().isoformat(),
+                                inputs={'name': name}, outputs={'data_id': self.data_id},
+                                description=self.get_description())
+
+    return AddDataCommand()
+
+
+def test_torn_tail_ignored(tmp_path):
+    """测试1：末尾不完整的记录被忽略"""
+    from src.models.command_journal import CommandJournal
+    path = tmp_path / 's.sprx.journal'
+    journal = CommandJournal(path)
+    journal.start((10, 1))
+    journal.append({'a.json': b'1'}, {'action': 'execute'})
+    journal.append({'a.json': b'2', 'data/x.parquet': b'blob'}, {'action': 'execute'})
+    journal.close()
+    intact = path.read_bytes()
+
+    # 第三条只写了成员没写提交，之后又写了一半的记录
+    journal = CommandJournal(path)
+    journal._file = open(path, 'ab')
+    journal._file.write(CommandJournal._encode_entry({'a.json': b'3'}, None)[:-10])
+    journal.close()
+
+    replay = CommandJournal.read(path)
+    assert replay.base == (10, 1)
+    assert replay.members == {'a.json': b'2', 'data/x.parquet': b'blob'}
+    assert len(replay.operations) == 2
+    assert path.read_bytes().startswith(intact)
+    print("✅ 测试1通过！")
+
+
+def test_append_writes_only_changes(tmp_path):
+    """测试2：日志只写变化"""
+    sm = _session()
+    sm.data_manager.add_data("d0", _frame(0))
+    path = str(tmp_path / 'session.sprx')
+    assert sm.save_to_file(path)
+    commands = _commands(sm)
+
+    written = []
+    original = sm._journal.append
+    sm._journal.append = lambda members, op=None: (written.append(set(members)), original(members, op))[1]
+    assert commands.execute(_add_command(sm, "d1", _frame(1)))
+    assert commands.execute(_add_command(sm, "d2", _frame(2)))
+    frames = [[n for n in names if n.startswith('data/')] for names in written]
+    assert [len(f) for f in frames] == [1, 1]
+    assert 'data.json' in written[1] and 'links.json' not in written[1]
+    print("✅ 测试2通过！")
+
+
+def test_crash_recovery(tmp_path):
+    """测试3：崩溃后从上次保存 + 日志恢复"""
+    sm = _session()
+    first = sm.data_manager.add_data("d0", _frame(0))
+    path = str(tmp_path / 'session.sprx')
+    assert sm.save_to_file(path)
+    commands = _commands(sm)
+    assert commands.execute(_add_command(sm, "d1", _frame(1)))
+    assert commands.execute(_add_command(sm, "d2", _frame(2)))
+    assert commands.undo()
+    sm.figure_manager.add_figure("图1", "line")
+    assert commands.execute(_add_command(sm, "d3", _frame(3)))
+    expected = {i: d.name for i, d in sm.data_manager._data_dict.items()}
+    # 模拟崩溃：不保存，直接从磁盘打开
+    crashed = tmp_path / 'crashed.sprx'
+    shutil.copy(path, crashed)
+    shutil.copy(path + '.journal', str(crashed) + '.journal')
+
+    recovered = _session()
+    assert recovered.load_from_file(str(crashed))
+    assert {i: d.name for i, d in recovered.data_manager._data_dict.items()} == expected
+    assert len(recovered.figure_manager._figures) == 1
+    last = max(expected)
+    assert recovered.data_manager.get_data(last).dataframe.equals(_frame(3))
+    assert recovered.data_manager.get_data(first).dataframe.equals(_frame(0))
+    assert recovered.is_modified
+
+    # 保存后日志重置，再次打开不再恢复
+    assert recovered.save_to_file(str(crashed))
+    again = _session()
+    assert again.load_from_file(str(crashed))
+    assert not again.is_modified
+    assert {i: d.name for i, d in again.data_manager._data_dict.items()} == expected
+    print("✅ 测试3通过！")
+
+
+def test_stale_or_discarded_journal(tmp_path):
+    """测试4：过期日志不应用，放弃修改删除日志"""
+    sm = _session()
+    sm.data_manager.add_data("d0", _frame(0))
+    path = str(tmp_path / 'session.sprx')
+    assert sm.save_to_file(path)
+    assert _commands(sm).execute(_add_command(sm, "d1", _frame(1)))
+    stale = open(path + '.journal', 'rb').read()
+
+    # 另一个会话覆盖了同一文件
+    other = _session()
+    other.data_manager.add_data("x", _frame(9))
+    assert other.save_to_file(path)
+    open(path + '.journal', 'wb').write(stale)
+    loaded = _session()
+    assert loaded.load_from_file(path)
+    assert [d.name for d in loaded.data_manager._data_dict.values()] == ["x"]
+    assert not loaded.is_modified
+
+    loaded.discard_journal()
+    assert not os.path.exists(path + '.journal')
+    print("✅ 测试4通过！")
+
+
+def test_serializes_only_changed_managers(tmp_path):
+    """测试5：只序列化有变化的Manager"""
+    sm = _session()
+    sm.data_manager.add_data("d0", _frame(0))
+    figure_id = sm.figure_manager.add_figure("图1", "line")
+    sm.link_manager.create_link('data', 1, 'figure', figure_id)
+    path = str(tmp_path / 'session.sprx')
+    assert sm.save_to_file(path)
+    commands = _commands(sm)
+
+    exported = []
+    for name in ('_export_figure_manager', '_export_result_manager', '_export_data_manager'):
+        original = getattr(sm, name)
+        setattr(sm, name, lambda *a, _n=name, _f=original: (exported.append(_n), _f(*a))[1])
+    original_links = sm.link_manager.to_dict
+    sm.link_manager.to_dict = lambda: (exported.append('links'), original_links())[1]
+
+    assert commands.execute(_add_command(sm, "d1", _frame(1)))
+    assert exported == ['_export_data_manager']
+
+    # 命令之外修改图表：下一条日志带上 figures.json，但不导出数据
+    exported.clear()
+    sm.figure_manager.get_figure(figure_id).set_title("新标题")
+    assert commands.execute(_add_command(sm, "d2", _frame(2)))
+    assert sorted(exported) == ['_export_data_manager', '_export_figure_manager']
+    exported.clear()
+    sm.figure_manager.get_figure(figure_id).set_grid(False)
+    sm.journal_command()
+    assert exported == ['_export_figure_manager']
+
+    crashed = tmp_path / 'crashed.sprx'
+    shutil.copy(path, crashed)
+    shutil.copy(path + '.journal', str(crashed) + '.journal')
+    recovered = _session()
+    assert recovered.load_from_file(str(crashed))
+    assert [d.name for d in recovered.data_manager._data_dict.values()] == ["d0", "d1", "d2"]
+    figure = recovered.figure_manager.get_figure(figure_id)
+    assert figure.plot_config['title'] == "新标题" and figure.plot_config['grid'] is False
+    assert len(recovered.link_manager.link_metadata) == 1
+    print("✅ 测试5通过！")
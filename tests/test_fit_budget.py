@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+"""
+测试单次拟合的求值/耗时/起点数预算
+验证：
+1. 求值次数或耗时用尽时 minimize 中止，返回目前最优的参数并标记 budget_limited；不限时正常收敛
+2. 起点数预算：用尽后不再开始新的起点；FittingOptions 没有任何限制时不创建预算
+3. LocalBivariate 拟合在预算用尽时仍返回成功结果与拟合曲线，标记 budget_limited，
+   创建的结果对象参数中带 BudgetLimited
+4. NumericalDiffusion4 的 TNC 拟合按 FittingOptions 的预算中止，返回目前最优的参数
+"""
+import sys
+import os
+import time
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'XlementFitting'))
+
+import numpy as np
+
+
+def _rosenbrock(p):
+    return float((1 - p[0]) ** 2 + 100 * (p[1] - p[0] ** 2) ** 2)
+
+
+def test_minimize_budget():
+    """测试1：求值/耗时预算"""
+    from XlementFitting.FitBudget import FitBudget
+    seen = []
+
+    def recording(p):
+        value = _rosenbrock(p)
+        seen.append((value, np.array(p)))
+        return value
+
+    budget = FitBudget(max_evaluations=40)
+    result = budget.minimize(recording, [-1.2, 1.0], method='BFGS')
+    assert result.budget_limited and not result.success
+    assert len(seen) == 40 and budget.evaluations == 40
+    best_value, best_params = min(seen, key=lambda item: item[0])
+    assert result.fun == best_value and np.allclose(result.x, best_params)
+    assert budget.limited and '求值' in budget.reason
+    assert budget.summary()['budget_limited'] is True
+
+    def slow(p):
+        time.sleep(0.01)
+        return _rosenbrock(p)
+
+    budget = FitBudget(max_seconds=0.2)
+    started = time.perf_counter()
+    result = budget.minimize(slow, [-1.2, 1.0], method='Nelder-Mead')
+    assert result.budget_limited and time.perf_counter() - started < 1.0
+    assert '耗时' in budget.reason
+
+    unlimited = FitBudget()
+    result = unlimited.minimize(_rosenbrock, [-1.2, 1.0], method='BFGS')
+    assert not result.budget_limited and result.success and np.allclose(result.x, [1, 1], atol=1e-3)
+    assert not unlimited.limited
+    print("✅ 测试1通过！")
+
+
+def test_start_budget_and_options():
+    """测试2：起点数预算 + FittingOptions"""
+    from XlementFitting import FittingOptions
+    options = FittingOptions({})
+    assert options.new_budget() is None
+
+    options.set_budget(max_starts=2)
+    budget = options.new_budget()
+    assert options.get_budget() is budget
+    ran = 0
+    for x0 in ([-1.2, 1.0], [0.0, 0.0], [2.0, 2.0]):
+        if not budget.allows_start():
+            break
+        budget.minimize(_rosenbrock, x0, method='BFGS')
+        ran += 1
+    assert ran == 2 and budget.limited and '起点' in budget.reason
+    print("✅ 测试2通过！")
+
+
+def test_local_bivariate_partial_result(app, wide_frame):
+    """测试3：LocalBivariate 部分结果"""
+    from src.utils.fitting_wrapper import fit_data
+    from src.models import (DataManager, ResultManager, FigureManager, LinkManager, ProjectManager,
+                            FitDataCommand)
+    df = wide_frame()
+    x, y = df['Time'].to_numpy(), df.iloc[:, 1].to_numpy()
+
+    limited = fit_data('LocalBivariate', x, y, dataframe=df, budget={'max_evaluations': 15})
+    assert limited['success'] and limited['budget_limited']
+    assert limited['budget']['evaluations'] == 15
+    assert np.isfinite(limited['parameters']['kon'][0]) and limited['y_pred_matrix'].shape == (200, 3)
+
+    full = fit_data('LocalBivariate', x, y, dataframe=df, budget={})
+    assert full['success'] and not full['budget_limited'] and full['budget'] is None
+    assert full['statistics']['rmse'] <= limited['statistics']['rmse']
+
+    managers = dict(data_manager=DataManager(), result_manager=ResultManager(), figure_manager=FigureManager(),
+                    link_manager=LinkManager(), project_manager=ProjectManager())
+    managers['project_manager'].create_project("默认项目")
+    data_id = managers['data_manager'].add_data("曲线", df)
+    version = managers['data_manager'].get_data(data_id).get_dataframe_version()
+    cmd = FitDataCommand(data_id, 'LocalBivariate', fit_result=limited, fit_version=version, **managers)
+    assert cmd.execute(), cmd.error
+    params = managers['result_manager'].get_result(cmd.result_id).parameters
+    assert '求值' in params['BudgetLimited'][0]
+    print("✅ 测试3通过！")
+
+
+def test_numerical_diffusion_budget(tmp_path, wide_frame):
+    """测试4：NumericalDiffusion4 的 TNC 预算"""
+    import FunctionalNumericalDiffusion as diffusion
+    from XlementFitting import FittingOptions
+    from XlementFitting.FitBudget import FitBudget
+    df = wide_frame()
+    df.columns = ['Time'] + [float(c) for c in df.columns[1:]]  # 浓度作为数值列名
+    path = str(tmp_path / 'diffusion.xlsx')
+    df.to_excel(path, index=False)
+
+    result = diffusion.curve_fit_numerical_mf_biv2(path, 0.0, 100.0, budget=FitBudget(max_evaluations=20))
+    assert result.budget_limited and result.nfev == 20
+
+    options = FittingOptions({})
+    options.set_budget(max_evaluations=20)
+    results, _, _ = diffusion.NumericalDiffusion4(path, 0.0, 100.0, options=options)
+    assert options.get_budget().limited and options.get_budget().evaluations == 20
+    assert np.isfinite(results['kon'][0])
+    print("✅ 测试4通过！")
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""
+测试拟合命令的撤销/重做
+验证：
+1. 重做直接复用保留的拟合输出，不重新拟合，重新创建结果/拟合曲线/对比图/链接
+2. 撤销期间源数据被修改时，重做重新拟合
+3. 较大的拟合曲线在重做栈上暂存到磁盘，重做时读回；命令移出历史时删除暂存数据
+"""
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'XlementFitting'))
+
+import numpy as np
+import pandas as pd
+from PySide6.QtCore import QCoreApplication
+
+
+def _setup(monkeypatch):
+    QCoreApplication.instance() or QCoreApplication([])
+    import src.utils.fitting_wrapper as wrapper
+    from src.models import (DataManager, ResultManager, FigureManager, LinkManager, ProjectManager,
+                            ProvenanceManager, CommandManager, FitDataCommand)
+    calls = []
+    original = wrapper.fit_data
+
+    def counting(*args, **kwargs):
+        calls.append(1)
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(wrapper, 'fit_data', counting)
+    managers = dict(data_manager=DataManager(), result_manager=ResultManager(), figure_manager=FigureManager(),
+                    link_manager=LinkManager(), project_manager=ProjectManager())
+    managers['project_manager'].create_project("默认项目")
+    t = np.arange(0, 100.0)
+    data_id = managers['data_manager'].add_data("曲线", pd.DataFrame({'Time': t, 'Y': 1 - np.exp(-0.05 * t)}))
+    commands = CommandManager(ProvenanceManager())
+    make = lambda: FitDataCommand(data_id, 'LocalBivariate', **managers)
+    return managers, commands, make, calls, data_id
+
+
+def test_redo_reuses_outputs(monkeypatch):
+    """测试1：重做不重新拟合"""
+    managers, commands, make, calls, _ = _setup(monkeypatch)
+    cmd = make()
+    assert commands.execute(cmd), cmd.error
+    first = managers['result_manager'].get_result(cmd.result_id)
+    params = dict(first.parameters)
+    fitted = managers['data_manager'].get_data(cmd.fitted_data_id).dataframe.copy()
+
+    assert commands.undo()
+    assert managers['result_manager'].get_result(cmd.result_id) is None
+    assert commands.redo()
+    assert len(calls) == 1
+    assert managers['result_manager'].get_result(cmd.result_id).parameters == params
+    redone = managers['data_manager'].get_data(cmd.fitted_data_id).dataframe
+    assert redone.equals(fitted) and redone.attrs['result_id'] == cmd.result_id
+    assert managers['figure_manager'].get_figure(cmd.figure_id) is not None
+    assert len(cmd.created_links) == 3
+    print("✅ 测试1通过！")
+
+
+def test_redo_refits_after_source_change(monkeypatch):
+    """测试2：源数据修改后重做重新拟合"""
+    managers, commands, make, calls, data_id = _setup(monkeypatch)
+    cmd = make()
+    assert commands.execute(cmd), cmd.error
+    assert commands.undo()
+    data = managers['data_manager'].get_data(data_id)
+    data.dataframe = data.dataframe.assign(Y=data.dataframe['Y'] * 2)
+    assert commands.redo()
+    assert len(calls) == 2
+    print("✅ 测试2通过！")
+
+
+def test_spill_to_disk(monkeypatch):
+    """测试3：重做栈上的拟合曲线暂存到磁盘"""
+    managers, commands, make, calls, _ = _setup(monkeypatch)
+    cmd = make()
+    monkeypatch.setattr(type(cmd), 'SPILL_THRESHOLD_BYTES', 0)
+    assert commands.execute(cmd), cmd.error
+    fitted = managers['data_manager'].get_data(cmd.fitted_data_id).dataframe.copy()
+
+    assert commands.undo()
+    store, spill = cmd._spill_store, cmd._spill_key
+    assert spill and store.contains(spill) and cmd._fit_outputs['fitted_df'] is None
+    assert commands.redo()
+    assert not store.contains(spill) and len(calls) == 1
+    assert managers['data_manager'].get_data(cmd.fitted_data_id).dataframe.equals(fitted)
+
+    # 撤销后执行新命令：重做栈被清空，暂存数据删除
+    assert commands.undo()
+    spill = cmd._spill_key
+    assert commands.execute(make())
+    assert not store.contains(spill) and cmd._fit_outputs is None
+    print("✅ 测试3通过！")
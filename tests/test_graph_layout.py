@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""
+测试血缘图分层布局
+验证：
+1. 层号为从源节点出发的最长路径，同层按输入顺序排列；有环时剩余节点放到最后一层
+2. 新节点挂在已有节点之下时增量追加，已有节点位置不变；指向已有节点时要求全量布局
+3. 几千个节点的布局在线性时间内完成
+"""
+import sys
+import os
+import time
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.utils.graph_layout import LayeredLayout
+
+
+def test_levels_and_cycles():
+    """测试1：分层与环"""
+    layout = LayeredLayout(x_spacing=10, y_spacing=100, start_x=0, start_y=0)
+    nodes = ['file:a', 'data:0', 'result:1', 'figure:2', 'data:3']
+    edges = [('file:a', 'data:0'), ('data:0', 'result:1'), ('result:1', 'figure:2'),
+             ('data:0', 'figure:2'), ('data:0', 'missing:9')]
+    positions = layout.compute(nodes, edges)
+    assert layout.levels == {'file:a': 0, 'data:3': 0, 'data:0': 1, 'result:1': 2, 'figure:2': 3}
+    assert positions['file:a'] == (0, 0) and positions['data:3'] == (10, 0)
+    assert positions['figure:2'] == (0, 300)
+
+    layout.compute(['a', 'b', 'c', 'd'], [('a', 'b'), ('b', 'c'), ('c', 'b'), ('c', 'd')])
+    assert layout.levels['a'] == 0
+    assert layout.levels['b'] == layout.levels['c'] == layout.levels['d'] == 1
+    print("✅ 测试1通过！")
+
+
+def test_incremental_extend():
+    """测试2：增量追加"""
+    layout = LayeredLayout(x_spacing=10, y_spacing=100, start_x=0, start_y=0)
+    edges = [('data:0', 'result:1'), ('data:5', 'result:6')]
+    layout.compute(['data:0', 'result:1', 'data:5', 'result:6'], edges)
+    before = dict(layout.positions)
+
+    edges += [('data:0', 'result:7'), ('result:7', 'figure:8')]
+    assert layout.extend(['result:7', 'figure:8', 'data:9'], edges)
+    assert all(layout.positions[n] == p for n, p in before.items())
+    assert layout.positions['result:7'] == (20, 100)
+    assert layout.positions['figure:8'] == (0, 200)
+    assert layout.positions['data:9'] == (20, 0)
+
+    # 删除留下空位，新节点不覆盖已有位置
+    layout.remove(['result:1'])
+    assert layout.extend(['result:10'], [('data:9', 'result:10')])
+    assert layout.positions['result:10'] == (30, 100)
+
+    # 新节点指向已有节点：已有节点层级会变，需要全量布局
+    assert not layout.extend(['file:x'], [('file:x', 'data:0')])
+    print("✅ 测试2通过！")
+
+
+def test_large_graph():
+    """测试3：大图布局"""
+    n = 5000
+    nodes, edges = [], []
+    for i in range(n):
+        nodes += [f"data:{i}", f"result:{i}", f"figure:{i}"]
+        edges += [(f"data:{i}", f"result:{i}"), (f"result:{i}", f"figure:{i}"),
+                  (f"data:{i}", "figure:0")]
+    start = time.perf_counter()
+    layout = LayeredLayout()
+    layout.compute(nodes, edges)
+    elapsed = time.perf_counter() - start
+    assert len(layout.positions) == 3 * n
+    assert layout.levels['figure:0'] == 2 and layout.levels['figure:1'] == 2
+    assert elapsed < 0.5, elapsed
+    print(f"✅ 测试3通过！（{elapsed * 1000:.0f} ms）")
@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+"""
+测试拟合任务的取消令牌与进度通道
+验证：
+1. track() 包装的 minimize 上报起点序号/迭代次数/最优损失，取消后在一次迭代内抛出 JobCancelled
+2. 真实拟合：fit_data 经 control 上报进度；已取消的令牌不被拟合代码的 except Exception 吞掉
+3. JobManager 线程任务：运行中取消，on_progress 收到进度，on_cancelled 在一次迭代内被调用
+4. JobManager 进程任务：进度经共享状态回到主进程，运行中取消同样生效
+5. 尚未开始的线程任务直接移出队列，cancel() 返回True
+"""
+import sys
+import os
+import time
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'XlementFitting'))
+
+import numpy as np
+import pytest
+from scipy.optimize import minimize, rosen
+
+
+def _manager():
+    from src.utils.job_manager import JobManager
+    JobManager.reset_instance()
+    return JobManager.instance()
+
+
+def _fit_job(df):
+    return ('LocalBivariate', df['Time'].to_numpy(), df.iloc[:, 1].to_numpy(), df)
+
+
+def test_track_and_cancel():
+    """测试1：minimize 回调上报进度，取消在一次迭代内生效"""
+    from src.utils.job_control import JobControl, JobCancelled
+    control = JobControl()
+    objective, callback = control.track(rosen, start=1, n_starts=4)
+    minimize(objective, np.zeros(4), method='BFGS', callback=callback)
+    info = control.snapshot()
+    assert info['start'] == 1 and info['n_starts'] == 4 and info['iteration'] > 5
+    assert info['best_loss'] < 1e-6 and control.fraction() == 0.25
+
+    control = JobControl()
+    objective, callback = control.track(rosen)
+
+    def cancelling(xk):
+        callback(xk)
+        if control.snapshot()['iteration'] == 3:
+            control.cancel()
+
+    with pytest.raises(JobCancelled):
+        minimize(objective, np.zeros(4), method='BFGS', callback=cancelling)
+    assert control.snapshot()['iteration'] == 3
+    print("✅ 测试1通过！")
+
+
+def test_fit_data_progress(wide_frame):
+    """测试2：真实拟合上报进度，取消异常穿透拟合封装"""
+    from src.utils.job_control import JobControl, JobCancelled
+    from src.utils.fitting_wrapper import fit_data
+    method, x, y, df = _fit_job(wide_frame())
+
+    control = JobControl()
+    result = fit_data(method, x, y, dataframe=df, control=control)
+    info = control.snapshot()
+    assert result['success'] and info['iteration'] > 0 and info['best_loss'] is not None
+
+    control = JobControl()
+    control.cancel()
+    with pytest.raises(JobCancelled):
+        fit_data(method, x, y, dataframe=df, control=control)
+    print("✅ 测试2通过！")
+
+
+@pytest.mark.parametrize('use_process', [False, True])
+def test_cancel_running_job(use_process, app, wait, wide_frame):
+    """测试3/4：运行中的线程/进程任务取消"""
+    from src.utils.job_tasks import run_fit_task
+    jm = _manager()
+    events = {'progress': [], 'cancelled': False, 'done': False, 'failed': None}
+
+    job_id = jm.submit_with_callbacks(
+        run_fit_task, *_fit_job(wide_frame()),
+        on_progress=lambda jid, info: events['progress'].append(info),
+        on_done=lambda jid, res: events.update(done=True),
+        on_fail=lambda jid, err: events.update(failed=err),
+        on_cancelled=lambda jid: events.update(cancelled=True),
+        use_process=use_process)
+
+    assert wait(app, lambda: any(p['iteration'] >= 1 for p in events['progress']))
+    at_cancel = jm.get_progress(job_id)['iteration']
+    assert jm.cancel(job_id) is False  # 已在运行：设置令牌
+    started = time.time()
+    assert wait(app, lambda: events['cancelled'] or events['done'] or events['failed'])
+    assert events['cancelled'] and not events['done'] and events['failed'] is None
+    assert time.time() - started < 1.0
+    assert max(p['iteration'] for p in events['progress']) <= at_cancel + 1
+    assert jm.get_progress(job_id) is None and not jm._controls
+    print(f"✅ 测试{4 if use_process else 3}通过！")
+
+
+def test_cancel_queued_thread_job(app, wait, wide_frame):
+    """测试5：排队中的线程任务直接移出"""
+    from src.utils.job_tasks import run_fit_task
+    jm = _manager()
+    pool = jm._thread_pool
+    previous = pool.maxThreadCount()
+    pool.setMaxThreadCount(1)
+    try:
+        calls = []
+        first = jm.submit_with_callbacks(run_fit_task, *_fit_job(wide_frame()),
+                                         on_done=lambda jid, res: calls.append(jid))
+        second = jm.submit_with_callbacks(run_fit_task, *_fit_job(wide_frame()),
+                                          on_done=lambda jid, res: calls.append(jid))
+        assert jm.cancel(second) is True
+        assert wait(app, lambda: calls == [first])
+        pool.waitForDone()
+        assert calls == [first] and not jm._controls
+    finally:
+        pool.setMaxThreadCount(previous)
+    print("✅ 测试5通过！")
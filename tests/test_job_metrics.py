@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+"""
+测试后台任务的指标登记
+验证：
+1. 分位数、吞吐量与时间加权的状态量平均；其他耗时序列（如批量结果提交）
+2. 线程任务与进程任务都登记分段耗时：执行时间与任务实际耗时一致，进程任务的传递时间单独统计；
+   失败/取消的任务按状态计数；等待队列深度与槽位占用率有样本
+3. CSV 导出逐任务记录与状态样本
+"""
+import sys
+import os
+import csv
+import time
+import tempfile
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+
+def _fail():
+    raise RuntimeError("boom")
+
+
+def test_registry_summary():
+    """测试1：汇总"""
+    from src.utils.job_metrics import MetricsRegistry
+    registry = MetricsRegistry()
+    for i in range(100):
+        registry.record_job(f"job_{i}", "fit", "thread", 0, 'done',
+                            queue_wait=0.0, run=(i + 1) / 100.0, commit=0.001, total=(i + 1) / 100.0)
+    registry.record_job("job_x", "fit", "thread", 0, 'failed', run=0.5)
+
+    registry.gauge('queue_depth', 0)
+    registry.gauge('queue_depth', 4)
+    registry.gauge('queue_depth', 4)  # 相同值不重复记录
+    time.sleep(0.2)
+    registry.gauge('queue_depth', 0)
+    time.sleep(0.2)
+    registry.observe('batch_commit', 0.05)
+
+    snap = registry.snapshot(60.0)
+    assert snap['completed'] == 100 and snap['failed'] == 1
+    run = snap['latency']['run']
+    assert run['count'] == 101 and abs(run['p50'] - 0.51) < 0.02 and abs(run['max'] - 1.0) < 1e-9
+    assert abs(run['p90'] - 0.9) < 0.02
+    assert snap['latency']['transfer'] is None
+    assert snap['throughput'] > 0 and snap['by_name']['fit']['count'] == 101
+
+    depth = snap['gauges']['queue_depth']
+    assert depth['current'] == 0 and depth['max'] == 4
+    assert 1.0 < depth['mean'] < 3.0  # 约一半时间为4
+    assert snap['series']['batch_commit']['count'] == 1
+
+    registry.clear()
+    snap = registry.snapshot(60.0)
+    assert snap['completed'] == 0 and snap['latency']['run'] is None
+    assert snap['gauges']['queue_depth']['current'] == 0
+    print("✅ 测试1通过！")
+
+
+def test_job_manager_records_stages(app, wait):
+    """测试2：JobManager 登记"""
+    from src.utils.job_manager import JobManager
+    from src.utils.job_metrics import MetricsRegistry
+    registry = MetricsRegistry()
+    mgr = JobManager(max_workers=1, metrics=registry)
+    try:
+        done = []
+        mgr.submit_with_callbacks(time.sleep, 0.2, on_done=lambda jid, res: done.append(jid))
+        mgr.submit_with_callbacks(time.sleep, 0.2, use_process=True, on_done=lambda jid, res: done.append(jid))
+        mgr.submit_with_callbacks(_fail, on_fail=lambda jid, err: done.append(jid))
+        assert wait(app, lambda: len(done) == 3)
+
+        records = {r['kind']: r for r in registry.job_records() if r['status'] == 'done'}
+        thread, process = records['thread'], records['process']
+        for record in (thread, process):
+            assert 0.18 < record['run'] < 1.0
+            assert record['queue_wait'] >= 0 and record['commit'] >= 0
+            assert record['total'] >= record['run']
+        assert thread['transfer'] == 0.0
+        assert process['transfer'] >= 0
+        assert process['total'] >= process['queue_wait'] + process['run']
+
+        # 取消尚在排队的任务（线程槽位限制为1）
+        pool = mgr._thread_pool
+        previous = pool.maxThreadCount()
+        pool.setMaxThreadCount(1)
+        try:
+            mgr.submit_with_callbacks(time.sleep, 0.3, on_done=lambda jid, res: done.append(jid))
+            pending = mgr.submit(time.sleep, 0.3)
+            assert mgr.cancel(pending) is True
+            assert wait(app, lambda: len(done) == 4)
+        finally:
+            pool.setMaxThreadCount(previous)
+
+        snap = registry.snapshot(60.0)
+        assert snap['completed'] == 3 and snap['failed'] == 1 and snap['cancelled'] == 1
+        assert snap['latency']['run']['count'] >= 4
+        assert {'queue_depth', 'thread_busy', 'process_busy'} <= set(snap['gauges'])
+        assert snap['gauges']['thread_busy']['max'] > 0
+    finally:
+        if mgr._proc_pool is not None:
+            mgr._proc_pool.shutdown()
+    print("✅ 测试2通过！")
+
+
+def test_export_csv():
+    """测试3：导出CSV"""
+    from src.utils.job_metrics import MetricsRegistry, JOB_FIELDS
+    registry = MetricsRegistry()
+    for i in range(3):
+        registry.record_job(f"job_{i}", "fit", "process", 5, 'done',
+                            queue_wait=0.1, transfer=0.01, run=1.0, commit=0.002, total=1.2)
+    registry.gauge('process_busy', 0.5)
+    registry.observe('batch_commit', 0.03)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "metrics.csv")
+        gauges_path = os.path.join(tmp, "metrics_gauges.csv")
+        assert registry.export_csv(path, gauges_path=gauges_path) == 3
+        with open(path, encoding='utf-8-sig', newline='') as f:
+            rows = list(csv.DictReader(f))
+        assert len(rows) == 3 and tuple(rows[0].keys()) == JOB_FIELDS
+        assert rows[0]['kind'] == 'process' and float(rows[0]['run']) == 1.0
+        with open(gauges_path, encoding='utf-8-sig', newline='') as f:
+            samples = list(csv.DictReader(f))
+        assert {(s['type'], s['name']) for s in samples} == {('gauge', 'process_busy'), ('series', 'batch_commit')}
+    print("✅ 测试3通过！")
@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+"""
+测试 JobManager 的优先级调度、超时与背压
+验证：
+1. 交互任务越过排队中的批量任务，并使用保留槽位立即开始；批量任务先于后台任务
+2. 同一优先级的多个批量提交按分组轮转，公平交替执行
+3. 超时任务被中止，on_timeout 收到最后的进度（迭代次数、最优损失）
+4. 非交互等待队列有上限：block=False 时抛出 JobQueueFull，阻塞提交在有空位后继续，
+   队列降到一半以下时发出 capacity_available；交互任务不受上限限制
+5. 任务结束时先回调再启动下一个任务；提交到执行池失败的任务以 on_fail 结束并释放槽位
+"""
+import sys
+import os
+import time
+import threading
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import numpy as np
+import pytest
+from scipy.optimize import minimize, rosen
+
+
+def _record(log, tag, gate):
+    log.append(tag)
+    gate.wait(5)
+    return tag
+
+
+def _slow_minimize():
+    from src.utils.job_control import active_control
+
+    def loss(p):
+        time.sleep(0.002)
+        return rosen(p)
+
+    objective, callback = active_control().track(loss)
+    return minimize(objective, np.zeros(8), method='BFGS', callback=callback).x
+
+
+@pytest.fixture
+def manager(app):
+    from src.utils.job_manager import JobManager
+    mgr = JobManager(max_pending=4)
+    pool = mgr._thread_pool
+    previous = pool.maxThreadCount()
+    pool.setMaxThreadCount(2)  # 1个批量槽位 + 1个保留给交互任务
+    yield app, mgr
+    pool.waitForDone()
+    pool.setMaxThreadCount(previous)
+
+
+def test_priorities(manager, wait):
+    """测试1：交互 > 批量 > 后台"""
+    from src.utils.job_manager import JobManager
+    app, mgr = manager
+    log, gate = [], threading.Event()
+    done = []
+    submit = lambda tag, priority: mgr.submit_with_callbacks(
+        _record, log, tag, gate, priority=priority, on_done=lambda jid, res: done.append(res))
+
+    submit('batch0', JobManager.PRIORITY_BATCH)
+    submit('background', JobManager.PRIORITY_BACKGROUND)
+    submit('batch1', JobManager.PRIORITY_BATCH)
+    assert wait(app, lambda: log == ['batch0'])
+    # 批量槽位已占用，交互任务使用保留槽位立即开始
+    submit('interactive', JobManager.PRIORITY_INTERACTIVE)
+    assert wait(app, lambda: log == ['batch0', 'interactive'])
+    gate.set()
+    assert wait(app, lambda: len(done) == 4)
+    assert log == ['batch0', 'interactive', 'batch1', 'background']
+    print("✅ 测试1通过！")
+
+
+def test_fair_groups(manager, wait):
+    """测试2：分组轮转"""
+    from src.utils.job_manager import JobManager
+    app, mgr = manager
+    mgr.max_pending = 100
+    log, gate = [], threading.Event()
+    done = []
+    for group in ('A', 'B'):
+        for i in range(4):
+            mgr.submit_with_callbacks(_record, log, f"{group}{i}", gate, group=group,
+                                      priority=JobManager.PRIORITY_BATCH,
+                                      on_done=lambda jid, res: done.append(res))
+    gate.set()
+    assert wait(app, lambda: len(done) == 8)
+    assert log == ['A0', 'A1', 'B0', 'A2', 'B1', 'A3', 'B2', 'B3']
+    print("✅ 测试2通过！")
+
+
+def test_timeout_partial(manager, wait):
+    """测试3：超时回调带部分结果"""
+    app, mgr = manager
+    events = {}
+    started = time.time()
+    mgr.submit_with_callbacks(_slow_minimize, timeout=0.3,
+                              on_done=lambda jid, res: events.update(done=res),
+                              on_timeout=lambda jid, partial: events.update(timeout=partial))
+    assert wait(app, lambda: events)
+    assert 'done' not in events and time.time() - started < 1.5
+    progress = events['timeout']['progress']
+    assert progress['iteration'] > 0 and progress['best_loss'] is not None
+    assert events['timeout']['result'] is None and not mgr._jobs
+    print("✅ 测试3通过！")
+
+
+def test_backpressure(manager, wait):
+    """测试4：有界等待队列"""
+    from src.utils.job_manager import JobManager, JobQueueFull
+    app, mgr = manager
+    log, gate = [], threading.Event()
+    done, capacity = [], []
+    mgr.capacity_available.connect(lambda: capacity.append(1))
+    submit = lambda tag, **kw: mgr.submit_with_callbacks(
+        _record, log, tag, gate, on_done=lambda jid, res: done.append(res), **kw)
+
+    for i in range(5):  # 1个运行 + 4个等待
+        submit(f"b{i}", priority=JobManager.PRIORITY_BATCH, block=False)
+    assert mgr.pending_count() == 4 and not mgr.has_capacity()
+    with pytest.raises(JobQueueFull):
+        submit('overflow', priority=JobManager.PRIORITY_BATCH, block=False)
+    submit('interactive')  # 交互任务不受上限限制
+
+    producer = threading.Thread(target=lambda: submit('blocked', priority=JobManager.PRIORITY_BATCH))
+    producer.start()
+    time.sleep(0.2)
+    assert producer.is_alive()  # 队列满，提交方被阻塞
+
+    gate.set()
+    producer.join(5)
+    assert not producer.is_alive()
+    assert wait(app, lambda: len(done) == 7)
+    assert capacity and 'overflow' not in log and log[-1] == 'blocked'
+    print("✅ 测试4通过！")
+
+
+
+def test_deliver_before_launch(manager, wait):
+    """测试5：先回调再启动下一个；提交失败"""
+    from src.utils.job_manager import JobManager
+    app, mgr = manager
+    events = []
+    for tag in ('a', 'b'):
+        mgr.submit_with_callbacks(abs, -1, priority=JobManager.PRIORITY_BATCH,
+                                  on_started=lambda jid, t=tag: events.append(f"{t} started"),
+                                  on_done=lambda jid, res, t=tag: events.append(f"{t} done"))
+    assert wait(app, lambda: len(events) == 4)
+    assert events == ['a started', 'a done', 'b started', 'b done']
+
+    broken = JobManager(max_workers=1)
+    broken._process_pool().shutdown()
+    failures = []
+    broken.submit_with_callbacks(abs, -1, use_process=True, on_fail=lambda jid, err: failures.append(err))
+    assert wait(app, lambda: failures)
+    assert 'shutdown' in failures[0] and broken._running[True] == 0 and not broken._jobs
+    print("✅ 测试5通过！")
@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+"""
+测试链接索引与依赖查询
+验证：
+1. 按类型过滤的邻居查询、链接信息查询与删除后索引一致
+2. 派生/来源对象查询每个节点只出现一次，有环时终止，链接变化后缓存失效
+3. 加载后索引重建；对象相关链接查询
+4. 菱形依赖（一个数据派生大量拟合和对比图）下的查询很快
+"""
+import sys
+import os
+import time
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from PySide6.QtCore import QCoreApplication
+
+
+def _links():
+    QCoreApplication.instance() or QCoreApplication([])
+    from src.models import LinkManager
+    return LinkManager()
+
+
+def test_typed_neighbours():
+    """测试1：类型过滤与删除"""
+    lm = _links()
+    lm.create_link('data', 1, 'result', 2, 'fitting_output')
+    lm.create_link('data', 1, 'figure', 3, 'visualization')
+    lm.create_link('data', 1, 'data', 4, 'split_sample')
+    assert lm.get_targets('data', 1, link_type='split_sample') == [('data', 4)]
+    assert lm.get_targets('data', 1) == [('result', 2), ('figure', 3), ('data', 4)]
+    assert lm.get_sources('figure', 3, link_type='visualization') == [('data', 1)]
+    assert lm.get_sources('figure', 3, link_type='import') == []
+    assert lm.get_link_info('data', 1, 'result', 2)['link_type'] == 'fitting_output'
+    # 重复创建返回原链接
+    assert lm.create_link('data', 1, 'result', 2, 'fitting_output') == 'link_000000'
+
+    assert lm.remove_link('data', 1, 'data', 4)
+    assert not lm.remove_link('data', 1, 'data', 4)
+    assert lm.get_targets('data', 1, link_type='split_sample') == []
+    assert not lm.has_link('data', 1, 'data', 4)
+    assert len(lm.link_metadata) == 2
+    print("✅ 测试1通过！")
+
+
+def test_reachability():
+    """测试2：可达性查询"""
+    lm = _links()
+    # 菱形：data:0 → result:1/2 → figure:3
+    lm.create_link('data', 0, 'result', 1)
+    lm.create_link('data', 0, 'result', 2)
+    lm.create_link('result', 1, 'figure', 3)
+    lm.create_link('result', 2, 'figure', 3, 'visualization')
+    assert lm.get_descendants('data', 0) == [('result', 1), ('result', 2), ('figure', 3)]
+    assert lm.get_ancestors('figure', 3) == [('result', 1), ('result', 2), ('data', 0)]
+    assert lm.get_ancestors('figure', 3, link_type='visualization') == [('result', 2)]
+    assert lm.is_reachable('data', 0, 'figure', 3)
+    assert not lm.is_reachable('figure', 3, 'data', 0)
+
+    # 链接变化后缓存失效；有环时终止
+    lm.create_link('figure', 3, 'data', 0)
+    assert lm.is_reachable('figure', 3, 'data', 0)
+    assert len(lm.get_descendants('data', 0)) == 3
+    lm.remove_link('figure', 3, 'data', 0)
+    assert not lm.is_reachable('figure', 3, 'data', 0)
+    print("✅ 测试2通过！")
+
+
+def test_reload_and_object_links():
+    """测试3：加载后重建索引"""
+    lm = _links()
+    lm.create_link('file', '/a.csv', 'data', 1, 'import')
+    lm.create_link('data', 1, 'figure', 2, 'visualization')
+    lm.create_link('data', 3, 'figure', 2)
+
+    loaded = _links()
+    loaded.from_dict(lm.to_dict())
+    assert loaded.get_targets('data', 1, link_type='visualization') == [('figure', 2)]
+    assert loaded.get_ancestors('figure', 2) == [('data', 1), ('data', 3), ('file', '/a.csv')]
+    links = loaded.get_object_links('data', 1)
+    assert [(l['source_id'], l['target_id']) for l in links] == [('/a.csv', 1), (1, 2)]
+    assert loaded.remove_link('data', 1, 'figure', 2)
+    assert loaded.get_sources('figure', 2) == [('data', 3)]
+
+    loaded.clear()
+    assert loaded.get_descendants('file', '/a.csv') == []
+    print("✅ 测试3通过！")
+
+
+def test_diamond_scaling():
+    """测试4：大量菱形依赖"""
+    lm = _links()
+    lm.create_link('file', 'raw', 'data', 0, 'import')
+    n = 3000
+    for i in range(1, n + 1):
+        lm.create_link('data', 0, 'result', i, 'fitting_output')
+        lm.create_link('result', i, 'figure', i, 'visualization')
+        lm.create_link('result', i, 'figure', 0, 'comparison')
+    lm.create_link('figure', 0, 'figure', -1, 'export')
+
+    start = time.perf_counter()
+    assert len(lm.get_descendants('data', 0)) == 2 * n + 2
+    assert len(lm.get_ancestors('figure', -1)) == n + 3
+    assert len(lm.get_targets('data', 0, link_type='fitting_output')) == n
+    for i in range(1, n + 1):
+        assert lm.is_reachable('file', 'raw', 'figure', i)
+        assert lm.get_link_info('result', i, 'figure', 0)['link_type'] == 'comparison'
+    elapsed = time.perf_counter() - start
+    assert elapsed < 0.5, elapsed
+    print(f"✅ 测试4通过！（{elapsed * 1000:.0f} ms）")
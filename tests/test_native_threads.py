@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""
+测试并行拟合的原生库（BLAS/OpenMP）线程数限制
+验证：
+1. 每进程线程数 = CPU核数 // 进程数（至少1），设置可覆盖；环境变量覆盖 OpenBLAS/MKL/OpenMP 等
+2. 进程池工作进程启动时继承线程数环境变量，并在预热信息中记录；修改进程数后新进程池按新值限制
+3. 诊断报告作为任务提交、不阻塞调用方，包含主进程与工作进程的配置（含 NumPy 链接的BLAS），并能格式化为文本
+"""
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+
+def _worker_threads():
+    from src.utils.job_tasks import worker_info
+    from src.utils.native_threads import native_thread_report
+    return worker_info(), native_thread_report()
+
+
+def test_threads_per_worker():
+    """测试1：线程数计算"""
+    from src.utils.native_threads import threads_per_worker, thread_env, THREAD_ENV_VARS
+    assert threads_per_worker(8, cpu_count=32) == 4
+    assert threads_per_worker(3, cpu_count=32) == 10
+    assert threads_per_worker(64, cpu_count=32) == 1
+    assert threads_per_worker(8, override=3, cpu_count=32) == 3
+    env = thread_env(4)
+    assert set(env) == set(THREAD_ENV_VARS) and set(env.values()) == {'4'}
+    assert {'OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS'} <= set(env)
+    print("✅ 测试1通过！")
+
+
+def test_pool_workers_inherit_limit(app, wait, run_process):
+    """测试2/3：工作进程继承限制 + 诊断"""
+    from src.utils.job_manager import JobManager
+    from src.utils.native_threads import describe, THREAD_ENV_VARS
+    saved = {name: os.environ.get(name) for name in THREAD_ENV_VARS}
+    mgr = JobManager(max_workers=1, native_threads=3)
+    try:
+        assert mgr.native_threads == 3
+        info, report = run_process(mgr, _worker_threads)[0]
+        assert info['native_threads'] == 3
+        assert report['pid'] != os.getpid()
+        assert report['env']['OPENBLAS_NUM_THREADS'] == '3' and report['env']['OMP_NUM_THREADS'] == '3'
+
+        # 恢复自动计算：新进程池按 CPU核数 // 进程数
+        mgr.set_native_threads(None)
+        expected = os.cpu_count() or 1  # 1个进程
+        assert mgr.native_threads == expected
+        info, report = run_process(mgr, _worker_threads)[0]
+        assert info['native_threads'] == expected
+        assert report['env']['OPENBLAS_NUM_THREADS'] == str(expected)
+
+        reports = []
+        job_id = mgr.thread_diagnostics(reports.append)
+        assert isinstance(job_id, str)  # 作为任务提交，报告由回调返回
+        assert wait(app, lambda: reports)
+        diag = reports[0]
+        assert diag['max_workers'] == 1 and diag['native_threads'] == expected
+        assert diag['native_threads_auto'] is True
+        assert isinstance(diag['worker'], dict) and diag['worker']['pid'] != diag['main']['pid']
+        assert diag['main']['blas'] is not None and diag['worker']['blas'] is not None
+        text = describe(diag['worker'])
+        assert str(diag['worker']['pid']) in text and str(expected) in text
+    finally:
+        if mgr._proc_pool is not None:
+            mgr._proc_pool.shutdown()
+        for name, value in saved.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+    print("✅ 测试2通过！")
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""
+测试向量化数值解析与Data解析缓存
+验证：
+1. parse_numeric_series 宽松解析规则（单位/千分位/逗号小数/科学计数法）
+2. 重复调用 get_xy_data 命中缓存
+3. DataFrame 赋值/原地修改后缓存失效
+"""
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import numpy as np
+import pandas as pd
+from src.models.data_model import Data, parse_numeric_series
+
+
+def test_parse_numeric_series_rules():
+    """测试1：宽松解析规则"""
+    s = pd.Series(["1,234.56", "1.234,56", " 12 RU", "abc", "-3e-4s", "", None, "+.5", "1,5"], dtype=object)
+    parsed = parse_numeric_series(s)
+
+    expected = [1234.56, 1234.56, 12.0, np.nan, -3e-4, np.nan, np.nan, 0.5, 1.5]
+    assert parsed.dtype.kind == 'f'
+    assert np.allclose(parsed.to_numpy(), expected, equal_nan=True)
+
+    # 数值列直接转换
+    nums = parse_numeric_series(pd.Series([1, 2, 3]))
+    assert list(nums) == [1, 2, 3]
+    print("✅ 测试1通过！")
+
+
+def test_xy_cache_reused():
+    """测试2：未修改的数据不重复解析"""
+    df = pd.DataFrame({
+        'Time': [0, 1, 2, 3, 4],
+        'Response': ['0.1 RU', '0.2 RU', '0.3 RU', '0.25 RU', '0.15 RU'],
+    })
+    data = Data(item=df, itemtype='dataframe')
+
+    x1, y1 = data.get_xy_data(auto_sort=False)
+    cached = data._get_parse_cache()['series']['Response']
+    x2, y2 = data.get_xy_data(auto_sort=False)
+    result = data.validate_xy_extraction()
+
+    assert data._get_parse_cache()['series']['Response'] is cached
+    assert np.array_equal(y1, y2)
+    assert result['y_col'] == 'Response'
+
+    # 调用方修改返回的数组不影响缓存
+    x3, y3 = data.get_xy_data(auto_sort=False, drop_na=False)
+    y3[:] = -1
+    _, y4 = data.get_xy_data(auto_sort=False)
+    assert np.array_equal(y4, y1)
+    print("✅ 测试2通过！")
+
+
+def test_cache_invalidated_on_change():
+    """测试3：DataFrame变化后重新解析"""
+    data = Data(item=pd.DataFrame({'Time': [0, 1, 2, 3, 4], 'RU': [1, 2, 3, 4, 6.0]}),
+                itemtype='dataframe')
+    version = data.get_dataframe_version()
+    assert data.get_xy_data(return_info=True)[2]['y_col'] == 'RU'
+
+    # 重新赋值 → 版本号递增
+    data.dataframe = pd.DataFrame({'Time': [0, 1, 2, 3, 4], 'Response': [5, 4, 3, 2, 1.0]})
+    assert data.get_dataframe_version() > version
+    assert data.get_xy_data(return_info=True)[2]['y_col'] == 'Response'
+
+    # 原地修改值 → 调用 mark_dataframe_modified
+    data.dataframe['Response'] = [1, 1, 1, 1, 9.0]
+    data.mark_dataframe_modified()
+    _, y = data.get_xy_data(auto_sort=False)
+    assert y[-1] == 9.0
+
+    # 原地增加列 → 列名变化自动失效
+    data.dataframe['Signal'] = [1, 2, 3, 4, 5.0]
+    assert data.validate_xy_extraction()['y_candidates'] == ['Response', 'Signal']
+    print("✅ 测试3通过！")
+
+
+if __name__ == "__main__":
+    test_parse_numeric_series_rules()
+    test_xy_cache_reused()
+    test_cache_invalidated_on_change()
+    print("🎉 所有测试通过！")
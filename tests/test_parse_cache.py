@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+"""
+测试导入解析缓存（ParseCache）
+验证：
+1. DataFrame / 数组字典快照往返一致
+2. 命中缓存时不再调用解析函数，解析参数不同则不共享
+3. 源文件内容变化后重新解析
+4. 超出容量上限时淘汰最久未使用的快照
+5. object 列以JSON保存，快照读取不启用pickle，含pickle对象的快照按损坏处理
+"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'XlementFitting')))
+
+import numpy as np
+import pandas as pd
+from XlementFitting.FileProcess.ParseCache import cached_parse, _cache_key
+
+_unpickled = []
+
+
+def _mark_unpickled():
+    _unpickled.append(1)
+    return 'evil'
+
+
+class _Evil:
+    def __reduce__(self):
+        return (_mark_unpickled, ())
+
+
+def _use_cache_dir(tmp_path, monkeypatch, max_mb=None):
+    monkeypatch.setenv('XLEMENT_PARSE_CACHE_DIR', str(tmp_path / 'cache'))
+    monkeypatch.delenv('XLEMENT_PARSE_CACHE', raising=False)
+    if max_mb is not None:
+        monkeypatch.setenv('XLEMENT_PARSE_CACHE_MAX_MB', str(max_mb))
+
+
+def test_roundtrip_and_hit(tmp_path, monkeypatch):
+    """测试1：快照往返一致，命中时不调用解析函数"""
+    _use_cache_dir(tmp_path, monkeypatch)
+    src = tmp_path / 'source.json'
+    src.write_text('{"a": 1}', encoding='utf-8')
+
+    df = pd.DataFrame({'Time': [0.0, 1.0, 2.0], 'Name': ['A1', 'A2', None], 1e-09: [1, 2, 3]})
+    df.attrs['fitting_options'] = {'KDBound': -15}
+    value = {'frame': df, 'signals': np.arange(6.0).reshape(3, 2), 'holes': ['A1', 'A2'], 'start': np.int64(5)}
+
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return value
+
+    first = cached_parse(src, 'test', {'unit': 'nM'}, loader)
+    second = cached_parse(src, 'test', {'unit': 'nM'}, loader)
+
+    assert len(calls) == 1
+    assert second['frame'].equals(df)
+    assert list(second['frame'].columns) == ['Time', 'Name', 1e-09]
+    assert second['frame'].attrs == df.attrs
+    assert np.array_equal(second['signals'], value['signals'])
+    assert second['holes'] == ['A1', 'A2'] and second['start'] == 5
+
+    # 解析参数不同 → 不共享缓存
+    cached_parse(src, 'test', {'unit': 'M'}, loader)
+    assert len(calls) == 2
+    print("✅ 测试1通过！")
+
+
+def test_content_change_invalidates(tmp_path, monkeypatch):
+    """测试2：源文件内容变化后重新解析"""
+    _use_cache_dir(tmp_path, monkeypatch)
+    src = tmp_path / 'source.csv'
+    src.write_text('x\n1\n', encoding='utf-8')
+
+    def loader():
+        return pd.read_csv(src)
+
+    assert cached_parse(src, 'csv', {}, loader)['x'].tolist() == [1]
+    src.write_text('x\n2\n3\n', encoding='utf-8')
+    assert cached_parse(src, 'csv', {}, loader)['x'].tolist() == [2, 3]
+    print("✅ 测试2通过！")
+
+
+def test_size_bounded_eviction(tmp_path, monkeypatch):
+    """测试3：超出容量上限时淘汰旧快照"""
+    _use_cache_dir(tmp_path, monkeypatch, max_mb=1.5)
+    cache_dir = tmp_path / 'cache'
+    for i in range(4):
+        src = tmp_path / f'source{i}.bin'
+        src.write_bytes(bytes([i]))
+        cached_parse(src, 'big', {}, lambda: np.zeros(80_000))  # 约640KB
+
+    total = sum(p.stat().st_size for p in cache_dir.glob('*.npz'))
+    assert total <= 1.5 * 1024 * 1024
+    assert len(list(cache_dir.glob('*.npz'))) == 2
+    print("✅ 测试3通过！")
+
+
+def test_snapshot_without_pickle(tmp_path, monkeypatch):
+    """测试4：object 列不经pickle保存，pickle快照不会被加载"""
+    _use_cache_dir(tmp_path, monkeypatch)
+    src = tmp_path / 'source.xlsx'
+    src.write_bytes(b'sheet')
+
+    df = pd.DataFrame({'Name': ['A1', None, 3, 1.5], 'Value': [1.0, 2.0, np.nan, 4.0]},
+                      index=pd.Index(['a', 'b', 'c', 'd']))
+    value = {'frame': df, 'labels': np.array([['x', None], [1, 'y']], dtype=object)}
+    cached_parse(src, 'objects', {}, lambda: value)
+
+    path = tmp_path / 'cache' / f"{_cache_key(src, 'objects', {})}.npz"
+    with np.load(path, allow_pickle=False) as npz:
+        assert all(npz[name].dtype != object for name in npz.files)
+
+    loaded = cached_parse(src, 'objects', {}, lambda: None)
+    assert loaded['frame']['Name'].tolist() == ['A1', None, 3, 1.5]
+    assert list(loaded['frame'].index) == ['a', 'b', 'c', 'd']
+    assert np.allclose(loaded['frame']['Value'], df['Value'], equal_nan=True)
+    assert loaded['labels'].shape == (2, 2) and loaded['labels'].tolist() == [['x', None], [1, 'y']]
+
+    # 缓存目录中被替换成含pickle对象的快照: 不反序列化, 删除后重新解析
+    np.savez(path, __meta__=np.array('{"kind": "array"}'), root=np.array([_Evil()], dtype=object))
+    calls = []
+    assert cached_parse(src, 'objects', {}, lambda: calls.append(1) or 'fresh') == 'fresh'
+    assert calls == [1] and _unpickled == []
+    print("✅ 测试4通过！")
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""
+测试XlementDataFrame处理流水线的阶段缓存
+验证：
+1. 只改对齐模式时，上游阶段直接命中缓存
+2. 改零浓度策略时从该阶段起重算，结果与全新实例一致
+3. 重复处理不修改原始信号与浓度
+"""
+import sys
+import os
+import warnings
+from collections import OrderedDict
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'XlementFitting')))
+
+import numpy as np
+from XlementFitting.FileProcess.XlementDataFrame import XlementDataFrame
+
+
+def _make_frame(device='one'):
+    """绕过文件读取，直接构造原始信号"""
+    rng = np.random.default_rng(0)
+    xdf = XlementDataFrame.__new__(XlementDataFrame)
+    xdf._device = device
+    xdf._concentrations_M = [1e-9, 0.0, 2e-9, 4e-9]
+    xdf._raw_baseline_signals = rng.normal(size=(30, 4))
+    xdf._raw_association_signals = rng.normal(size=(60, 4))
+    xdf._raw_dissociation_signals = rng.normal(size=(200, 4))
+    xdf._dissociation_time_start = None
+    xdf._stage_cache = OrderedDict()
+    return xdf
+
+
+def _pipeline(**overrides):
+    pipeline = {
+        'clear_zero_concentration': True,
+        'delete_zero_concentration': False,
+        'signal_expansion_coefficient': 1,
+        '100_truncate': False,
+        '100_truncate_params': {},
+        'zeroing_logic_mode': 'slow',
+        'baseline_included': True,
+        'time_interval': 1,
+    }
+    pipeline.update(overrides)
+    return pipeline
+
+
+def test_downstream_change_reuses_upstream():
+    """测试1：只改对齐模式不重算上游"""
+    xdf = _make_frame()
+    calls = {'zero': 0}
+    original = XlementDataFrame._stage_zero_concentration
+
+    def counting(upstream, clear, delete):
+        calls['zero'] += 1
+        return original(upstream, clear, delete)
+
+    xdf._stage_zero_concentration = counting
+    xdf.process(_pipeline(zeroing_logic_mode='slow'))
+    xdf.process(_pipeline(zeroing_logic_mode='fast'))
+    xdf.process(_pipeline(zeroing_logic_mode='slow'))
+    assert calls['zero'] == 1
+
+    xdf.process(_pipeline(delete_zero_concentration=True))
+    assert calls['zero'] == 2
+    print("✅ 测试1通过！")
+
+
+def test_cached_results_match_fresh():
+    """测试2：缓存结果与全新实例一致"""
+    shared = _make_frame()
+    for options in [dict(), dict(zeroing_logic_mode='fast'), dict(delete_zero_concentration=True),
+                    dict(signal_expansion_coefficient=2.5), dict(clear_zero_concentration=False)]:
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            cached = shared.process(_pipeline(**options))
+            fresh = _make_frame().process(_pipeline(**options))
+        assert cached.equals(fresh)
+    print("✅ 测试2通过！")
+
+
+def test_raw_data_untouched():
+    """测试3：重复处理不修改原始数据"""
+    xdf = _make_frame()
+    raw = xdf._raw_association_signals.copy()
+    first = xdf.process(_pipeline(delete_zero_concentration=True))
+    second = xdf.process(_pipeline(delete_zero_concentration=True))
+    assert first.equals(second)
+    assert np.array_equal(xdf._raw_association_signals, raw)
+    assert xdf.concentrations_M == [1e-9, 0.0, 2e-9, 4e-9]
+    print("✅ 测试3通过！")
+
+
+if __name__ == "__main__":
+    test_downstream_change_reuses_upstream()
+    test_cached_results_match_fresh()
+    test_raw_data_untouched()
+    print("🎉 所有测试通过！")
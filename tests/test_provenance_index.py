@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+"""
+测试操作历史索引
+验证：
+1. 血缘查询按时间顺序返回涉及该对象的操作，按ID查找返回首次记录
+2. 撤销标记同时更新状态，保存/加载后索引重建
+3. SQLite存储跨实例保留操作和撤销状态
+4. 大量操作下记录与血缘查询不随历史长度线性变慢
+"""
+import sys
+import os
+import time
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+
+def _op(op_id, inputs=None, outputs=None):
+    from src.models import OperationLog
+    return OperationLog(op_id=op_id, op_type='fit', timestamp='2024-01-01T00:00:00',
+                        inputs=inputs or {}, outputs=outputs or {}, description=op_id)
+
+
+def _fill(pm):
+    pm.record_operation(_op('a', {'data_id': 0}, {'result_id': 1, 'figure_ids': [2, 3]}))
+    pm.record_operation(_op('b', {'data_ids': [0, 5]}))
+    pm.record_operation(_op('a', {'data_id': 0}))  # 重复ID
+    pm.record_operation(_op('c', {'result_id': 1}))
+
+
+def test_lineage_and_lookup():
+    """测试1：血缘顺序与按ID查找"""
+    from src.models import ProvenanceManager
+    pm = ProvenanceManager()
+    _fill(pm)
+    assert [op.op_id for op in pm.get_lineage('data', 0)] == ['a', 'b', 'a']
+    assert [op.op_id for op in pm.get_lineage('result', 1)] == ['a', 'c']
+    assert [op.op_id for op in pm.get_lineage('figure', 3)] == ['a']
+    assert pm.get_lineage('data', 9) == []
+    assert pm.get_operation_by_id('a').outputs == {'result_id': 1, 'figure_ids': [2, 3]}
+    assert pm.get_operation_by_id('x') is None
+    assert len(pm) == 4
+    print("✅ 测试1通过！")
+
+
+def test_revert_and_reload(tmp_path):
+    """测试2：撤销标记，保存/加载"""
+    from src.models import ProvenanceManager
+    pm = ProvenanceManager()
+    _fill(pm)
+    pm.mark_reverted('b')
+    op = pm.get_operation_by_id('b')
+    assert op.status == 'reverted' and op.reverted
+
+    path = str(tmp_path / 'prov.json')
+    pm.save_to_file(path)
+    loaded = ProvenanceManager()
+    loaded.load_from_file(path)
+    assert [op.op_id for op in loaded.get_lineage('data', 0)] == ['a', 'b', 'a']
+    assert loaded.get_operation_by_id('b').reverted
+    assert loaded.get_all_logs() == pm.get_all_logs()
+    print("✅ 测试2通过！")
+
+
+def test_sqlite_store(tmp_path):
+    """测试3：SQLite存储"""
+    from src.models import ProvenanceManager
+    db = str(tmp_path / 'prov.db')
+    pm = ProvenanceManager(db_path=db)
+    _fill(pm)
+    pm.mark_reverted('a')
+    pm.close()
+
+    reopened = ProvenanceManager(db_path=db)
+    assert len(reopened) == 4
+    lineage = reopened.get_lineage('data', 0)
+    assert [op.op_id for op in lineage] == ['a', 'b', 'a']
+    # 只标记首次记录
+    assert lineage[0].reverted and not lineage[2].reverted
+    assert [op.op_id for op in reopened.get_lineage('data', 5)] == ['b']
+    reopened.clear()
+    assert len(reopened) == 0 and reopened.get_lineage('data', 0) == []
+    reopened.close()
+    print("✅ 测试3通过！")
+
+
+def test_scaling():
+    """测试4：五万条操作下的查询"""
+    from src.models import ProvenanceManager
+    pm = ProvenanceManager()
+    n = 50000
+    for i in range(n):
+        pm.record_operation(_op(f"op{i}", {'data_id': i % 1000}, {'result_id': i}))
+
+    start = time.perf_counter()
+    for i in range(1000):
+        assert len(pm.get_lineage('data', i)) == n // 1000
+        pm.mark_reverted(f"op{n - 1 - i}")
+        assert pm.get_operation_by_id(f"op{i * 7}").outputs['result_id'] == i * 7
+    elapsed = time.perf_counter() - start
+    assert elapsed < 1.0, elapsed
+    print(f"✅ 测试4通过！（{elapsed * 1000:.0f} ms）")
@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+"""
+测试依赖驱动的增量重新计算
+验证：
+1. 原始数据变化后下游结果、拟合曲线、对比图标记过期，后台重新拟合后原地更新
+2. 输入内容未变不重新拟合；恢复到之前的内容复用缓存的拟合输出
+3. 按拓扑顺序：基于拟合曲线的下游拟合在上游完成后才执行；无关结果不重新计算
+4. 结果的 fitting_output 源中混有非数据对象时，拟合完成后仍按源数据写回
+"""
+import sys
+import os
+import time
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'XlementFitting'))
+
+import numpy as np
+import pandas as pd
+from PySide6.QtCore import QCoreApplication
+
+
+def _curve(k=0.05, scale=1.0):
+    t = np.arange(0, 100.0)
+    return pd.DataFrame({'Time': t, 'Y': scale * (1 - np.exp(-k * t))})
+
+
+def _setup(monkeypatch):
+    app = QCoreApplication.instance() or QCoreApplication([])
+    import src.utils.fitting_wrapper as wrapper
+    from src.models import (DataManager, ResultManager, FigureManager, LinkManager, ProjectManager,
+                            RecomputeEngine)
+    calls = []
+    original = wrapper.fit_data
+
+    def counting(method, x_data, y_data, **kwargs):
+        calls.append(len(x_data))
+        return original(method, x_data, y_data, **kwargs)
+
+    monkeypatch.setattr(wrapper, 'fit_data', counting)
+    managers = dict(data_manager=DataManager(), result_manager=ResultManager(), figure_manager=FigureManager(),
+                    link_manager=LinkManager(), project_manager=ProjectManager())
+    managers['project_manager'].create_project("默认项目")
+    engine = RecomputeEngine(managers['data_manager'], managers['result_manager'],
+                             managers['figure_manager'], managers['link_manager'])
+    return app, managers, engine, calls
+
+
+def _fit(managers, data_id):
+    from src.models import FitDataCommand
+    cmd = FitDataCommand(data_id, 'LocalBivariate', **managers)
+    assert cmd.execute(), cmd.error
+    return cmd
+
+
+def _wait(app, engine, timeout=30.0):
+    deadline = time.time() + timeout
+    app.processEvents()
+    while engine.is_busy():
+        assert time.time() < deadline, "重新计算超时"
+        app.processEvents()
+        time.sleep(0.005)
+    app.processEvents()
+
+
+def test_downstream_refit(monkeypatch):
+    """测试1：原始数据变化后重新拟合并原地更新"""
+    app, managers, engine, calls = _setup(monkeypatch)
+    dm, rm = managers['data_manager'], managers['result_manager']
+    data_id = dm.add_data("曲线", _curve())
+    cmd = _fit(managers, data_id)
+    before = dict(rm.get_result(cmd.result_id).parameters)
+    fitted_before = dm.get_data(cmd.fitted_data_id).dataframe.copy()
+    refreshed = []
+    engine.figure_refreshed.connect(refreshed.append)
+    calls.clear()
+
+    dm.update_dataframe(data_id, _curve(scale=2.0))
+    assert engine.is_stale('result', cmd.result_id)
+    assert engine.is_stale('figure', cmd.figure_id)
+    assert engine.is_stale('data', cmd.fitted_data_id)
+    _wait(app, engine)
+
+    assert len(calls) == 1 and engine.stats['refit'] == 1
+    assert engine.get_stale() == []
+    assert rm.get_result(cmd.result_id).parameters != before
+    fitted = dm.get_data(cmd.fitted_data_id).dataframe
+    assert not fitted.equals(fitted_before)
+    assert fitted.attrs['result_id'] == cmd.result_id and fitted.attrs['source_type'] == 'fitted_curve'
+    assert refreshed == [cmd.figure_id]
+    print("✅ 测试1通过！")
+
+
+def test_unchanged_and_cached(monkeypatch):
+    """测试2：输入未变不拟合，恢复内容复用缓存"""
+    app, managers, engine, calls = _setup(monkeypatch)
+    dm, rm = managers['data_manager'], managers['result_manager']
+    data_id = dm.add_data("曲线", _curve())
+    cmd = _fit(managers, data_id)
+    calls.clear()
+
+    # 内容相同的重新导入
+    dm.update_dataframe(data_id, _curve())
+    _wait(app, engine)
+    assert calls == [] and engine.stats['unchanged'] == 1
+
+    dm.update_dataframe(data_id, _curve(scale=2.0))
+    _wait(app, engine)
+    scaled = dict(rm.get_result(cmd.result_id).parameters)
+    dm.update_dataframe(data_id, _curve(scale=3.0))
+    _wait(app, engine)
+    assert len(calls) == 2
+
+    # 恢复到 ×2：命中缓存
+    dm.update_dataframe(data_id, _curve(scale=2.0))
+    _wait(app, engine)
+    assert len(calls) == 2 and engine.stats['reused'] == 1
+    assert rm.get_result(cmd.result_id).parameters == scaled
+    print("✅ 测试2通过！")
+
+
+def test_topological_order(monkeypatch):
+    """测试3：上游结果完成后才计算下游；无关结果不动"""
+    app, managers, engine, calls = _setup(monkeypatch)
+    dm = managers['data_manager']
+    raw = dm.add_data("曲线", _curve())
+    other = dm.add_data("其它", _curve(k=0.08))
+    first = _fit(managers, raw)
+    second = _fit(managers, first.fitted_data_id)  # 基于拟合曲线的再拟合
+    unrelated = _fit(managers, other)
+    order = []
+    engine.result_recomputed.connect(order.append)
+    calls.clear()
+
+    dm.update_dataframe(raw, _curve(scale=2.0))
+    assert engine.is_stale('result', second.result_id)
+    assert not engine.is_stale('result', unrelated.result_id)
+    _wait(app, engine)
+
+    assert order == [first.result_id, second.result_id]
+    assert len(calls) == 2
+    second_data = dm.get_data(second.fitted_data_id).dataframe
+    assert second_data['YValue'].max() > 1.5  # 下游使用了更新后的拟合曲线
+    print("✅ 测试3通过！")
+
+
+def test_non_data_source_link(monkeypatch):
+    """测试4：非数据源排在数据源之前"""
+    app, managers, engine, calls = _setup(monkeypatch)
+    dm, rm, lm = managers['data_manager'], managers['result_manager'], managers['link_manager']
+    data_id = dm.add_data("曲线", _curve())
+    cmd = _fit(managers, data_id)
+    before = dict(rm.get_result(cmd.result_id).parameters)
+    # 让项目节点成为第一个 fitting_output 源
+    lm.remove_link('data', data_id, 'result', cmd.result_id)
+    lm.create_link('project', 999, 'result', cmd.result_id, link_type='fitting_output')
+    lm.create_link('data', data_id, 'result', cmd.result_id, link_type='fitting_output')
+    assert lm.get_sources('result', cmd.result_id, link_type='fitting_output')[0][0] == 'project'
+    calls.clear()
+
+    dm.update_dataframe(data_id, _curve(scale=2.0))
+    _wait(app, engine)
+
+    assert len(calls) == 1 and engine.stats['refit'] == 1
+    assert engine.get_stale() == []
+    assert rm.get_result(cmd.result_id).parameters != before
+    assert dm.get_data(cmd.fitted_data_id).dataframe['YValue'].max() > 1.5
+    print("✅ 测试4通过！")
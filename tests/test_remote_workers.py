@@ -0,0 +1,244 @@
+# -*- coding: utf-8 -*-
+"""
+测试远程工作进程协议（全部在本机 localhost 上运行）
+验证：
+1. 任务分发到多个工作进程，结果正确回传；密钥不符的协调者无法连接
+2. 工作进程被强制结束（独立进程 kill）时运行中的任务重新排队到其他工作进程，批量拟合照常完成
+3. 心跳超时的工作进程上的任务在其他工作进程重试，两个副本都完成时只接受第一个结果，重复结果被丢弃
+4. 取消：排队中的任务直接移出且不再回调，运行中的任务以"已取消"结束
+5. 没有显式设置密钥时工作进程拒绝启动（无默认密钥），默认只监听本机
+6. 重试次数用尽后副本以"已取消"返回（未请求取消）时，任务以 on_fail 结束，不会悬而未决
+7. 未配置 REMOTE_WORKERS 时 coordinator_from_config() 返回None（批量拟合在本机执行）；控制器导入的名字都存在
+"""
+import sys
+import os
+import re
+import time
+import threading
+import subprocess
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'XlementFitting'))
+
+import pytest
+from PySide6.QtCore import QCoreApplication
+
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+KEY = b'test-key'
+
+
+def _square(x, delay=0.0, check=False):
+    from src.utils.job_control import active_control
+    deadline = time.time() + delay
+    while time.time() < deadline:
+        if check:
+            active_control().check()
+        time.sleep(0.01)
+    return {'x': x, 'square': x * x, 'thread': threading.current_thread().name}
+
+
+def _wait(condition, timeout=30.0, app=None):
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        if app is not None:
+            app.processEvents()
+        time.sleep(0.01)
+    if app is not None:
+        app.processEvents()
+    return condition()
+
+
+@pytest.fixture
+def workers():
+    from src.utils.remote_workers import RemoteWorker, register_task
+    register_task('square', _square)
+    started = []
+
+    def start(**kwargs):
+        worker = RemoteWorker('127.0.0.1', 0, authkey=KEY, **kwargs)
+        threading.Thread(target=worker.serve_forever, daemon=True).start()
+        started.append(worker)
+        return worker
+
+    yield start
+    for worker in started:
+        worker.stop()
+
+
+def _coordinator(addresses, **kwargs):
+    from src.utils.remote_workers import WorkerCoordinator
+    coordinator = WorkerCoordinator(addresses, authkey=KEY, reconnect_interval=0.2, **kwargs)
+    coordinator.start()
+    assert coordinator.wait_connected(len(addresses), timeout=10)
+    return coordinator
+
+
+def test_distribute(workers):
+    """测试1：分发与回传"""
+    from src.utils.remote_workers import WorkerCoordinator
+    a, b = workers(), workers()
+    coordinator = _coordinator([a.address, f"127.0.0.1:{b.address[1]}"])
+    results = {}
+    try:
+        for x in range(8):
+            coordinator.submit('square', x, delay=0.05,
+                               on_done=lambda tid, res: results.update({res['x']: res['square']}))
+        assert _wait(lambda: len(results) == 8)
+        assert results == {x: x * x for x in range(8)}
+        assert all(w['completed'] > 0 for w in coordinator.workers())
+        assert coordinator.pending_count() == 0
+    finally:
+        coordinator.shutdown()
+
+    # 密钥不符：无法连接
+    stranger = WorkerCoordinator([a.address], authkey=b'wrong', reconnect_interval=0.2)
+    stranger.start()
+    try:
+        assert not stranger.wait_connected(1, timeout=1.0)
+    finally:
+        stranger.shutdown()
+    print("✅ 测试1通过！")
+
+
+def _spawn_worker():
+    proc = subprocess.Popen(
+        [sys.executable, '-m', 'src.utils.remote_workers', '--host', '127.0.0.1', '--port', '0',
+         '--authkey', KEY.decode(), '--no-warm'],
+        cwd=ROOT, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    for line in proc.stdout:
+        match = re.search(r'监听 127\.0\.0\.1:(\d+)', line)
+        if match:
+            threading.Thread(target=proc.stdout.read, daemon=True).start()  # 持续读出输出
+            return proc, ('127.0.0.1', int(match.group(1)))
+    raise RuntimeError("工作进程未能启动")
+
+
+def test_worker_killed(workers, wide_frame):
+    """测试2：工作进程被kill后任务重试，批量拟合完成"""
+    from src.utils.batch_fit import BatchFitter
+    app = QCoreApplication.instance() or QCoreApplication([])
+    proc, address = _spawn_worker()
+    local = workers()
+    coordinator = _coordinator([address, local.address])
+    try:
+        frames = {1: wide_frame(), 2: wide_frame(1.5)}
+        fitter = BatchFitter(coordinator=coordinator)
+        finished = []
+        fitter.finished.connect(lambda ok, failed: finished.append((ok, failed)))
+        fitter.start([(d, 'LocalBivariate', df['Time'].to_numpy(), df.iloc[:, 1].to_numpy(), df)
+                      for d, df in frames.items()])
+        remote = lambda: coordinator.workers()[0]
+        assert _wait(lambda: remote()['running'] > 0, app=app)
+        proc.kill()
+        proc.wait()
+        assert _wait(lambda: finished, timeout=60, app=app)
+        ok, failed = finished[0]
+        assert sorted(ok) == [1, 2] and not failed
+        assert coordinator.retries >= 1 and not remote()['connected']
+    finally:
+        coordinator.shutdown()
+        if proc.poll() is None:
+            proc.kill()
+    print("✅ 测试2通过！")
+
+
+def test_heartbeat_retry_and_dedup(workers):
+    """测试3：心跳超时重试 + 结果去重"""
+    silent = workers(heartbeat_interval=30)  # 不发心跳
+    healthy = workers(heartbeat_interval=0.1)
+    coordinator = _coordinator([silent.address, healthy.address], heartbeat_timeout=1.0)
+    delivered = []
+    try:
+        coordinator.submit('square', 7, delay=2.5, on_done=lambda tid, res: delivered.append(res))
+        assert _wait(lambda: coordinator.workers()[0]['suspect'])
+        assert _wait(lambda: coordinator.workers()[1]['running'] == 1, timeout=5)
+        # 两个副本都会完成：只接受第一个，迟到的被丢弃
+        assert _wait(lambda: coordinator.duplicates_dropped == 1, timeout=10)
+        assert len(delivered) == 1 and delivered[0]['square'] == 49
+        assert coordinator.retries == 1 and coordinator.pending_count() == 0
+        assert all(w['connected'] for w in coordinator.workers())  # 心跳超时不断开连接
+    finally:
+        coordinator.shutdown()
+    print("✅ 测试3通过！")
+
+
+def test_cancel(workers):
+    """测试4：取消"""
+    coordinator = _coordinator([workers().address])
+    events = []
+    try:
+        running = coordinator.submit('square', 1, delay=10, check=True,
+                                     on_done=lambda tid, res: events.append(('done', tid)),
+                                     on_fail=lambda tid, err: events.append((err, tid)))
+        queued = coordinator.submit('square', 2, on_done=lambda tid, res: events.append(('done', tid)),
+                                    on_fail=lambda tid, err: events.append((err, tid)))
+        assert _wait(lambda: coordinator.workers()[0]['running'] == 1)
+        assert coordinator.cancel(queued) is True
+        assert coordinator.cancel(running) is False
+        assert _wait(lambda: events)
+        time.sleep(0.3)
+        assert events == [("已取消", running)] and coordinator.pending_count() == 0
+    finally:
+        coordinator.shutdown()
+    print("✅ 测试4通过！")
+
+
+def test_authkey_required(monkeypatch):
+    """测试5：必须显式设置密钥"""
+    import config
+    from src.utils.remote_workers import RemoteWorker, WorkerCoordinator, MissingAuthKey
+    monkeypatch.setattr(config, 'REMOTE_WORKER_AUTHKEY', None)
+    with pytest.raises(MissingAuthKey):
+        RemoteWorker(port=0)
+    with pytest.raises(MissingAuthKey):
+        WorkerCoordinator(['127.0.0.1:7810'])
+
+    env = dict(os.environ)
+    env.pop('SPR_WORKER_AUTHKEY', None)
+    proc = subprocess.run([sys.executable, '-m', 'src.utils.remote_workers', '--port', '0', '--no-warm'],
+                          cwd=ROOT, env=env, capture_output=True, text=True, timeout=60)
+    assert proc.returncode != 0 and 'SPR_WORKER_AUTHKEY' in proc.stderr
+
+    worker = RemoteWorker(port=0, authkey=KEY)
+    try:
+        assert worker.address[0] == '127.0.0.1'
+    finally:
+        worker._listener.close()
+    print("✅ 测试5通过！")
+
+
+def test_aborted_copy_after_retries(workers):
+    """测试6：重试用尽后被中止的副本"""
+    coordinator = _coordinator([workers().address], max_retries=0)
+    events = []
+    try:
+        task_id = coordinator.submit('square', 3, delay=10, check=True,
+                                     on_done=lambda tid, res: events.append(('done', tid)),
+                                     on_fail=lambda tid, err: events.append((err, tid)))
+        assert _wait(lambda: coordinator.workers()[0]['running'] == 1)
+        # 工作进程报告该副本被中止（例如另一端断开时取消了运行中的任务）
+        coordinator._on_message(coordinator._links[0], ('error', task_id, "已取消", True))
+        assert len(events) == 1 and events[0][1] == task_id and '已重试 0 次' in events[0][0]
+        assert coordinator.pending_count() == 0
+    finally:
+        coordinator.shutdown()
+    print("✅ 测试6通过！")
+
+
+def test_unconfigured_coordinator(monkeypatch):
+    """测试7：未配置工作站时在本机拟合；控制器按名导入的函数存在"""
+    import ast
+    import config
+    import src.utils.remote_workers as remote_workers
+    monkeypatch.setattr(config, 'REMOTE_WORKERS', [])
+    assert remote_workers.coordinator_from_config() is None
+
+    # 控制器（依赖 pyqtgraph，这里不导入）在每次批量拟合时延迟导入这些名字
+    path = os.path.join(ROOT, 'src', 'controllers', 'main_controller_full.py')
+    with open(path, encoding='utf-8') as f:
+        tree = ast.parse(f.read())
+    names = [alias.name for node in ast.walk(tree)
+             if isinstance(node, ast.ImportFrom) and node.module == 'src.utils.remote_workers'
+             for alias in node.names]
+    assert 'coordinator_from_config' in names
+    assert all(hasattr(remote_workers, name) for name in names)
+    print("✅ 测试7通过！")
@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+"""
+测试会话增量保存
+验证：
+1. 再次保存时未修改的数据帧不重新编码，相同内容只存一份
+2. 修改后的会话可完整加载
+3. 增量追加中断后可恢复到上次保存的状态
+4. 后台保存只写入快照，不受之后的修改影响
+5. 取快照时只拷贝上次保存后变化的数据帧，未变化的按成员名沿用（pandas 2.x 未开启写时复制时拷贝即深拷贝）
+6. 增量追加只在验证过的 Python 版本上启用；其它版本整体重写，已有数据帧成员仍直接拷贝、不重新编码
+"""
+import sys
+import os
+import zipfile
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import numpy as np
+import pandas as pd
+from PySide6.QtWidgets import QApplication
+
+
+def _session():
+    QApplication.instance() or QApplication([])
+    from src.models import SessionManager
+    sm = SessionManager()
+    sm.enable_auto_save(False)
+    return sm
+
+
+def _frame(seed):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({'Time': np.arange(50.0), 'Y': rng.normal(size=50)})
+
+
+def _count_encodes(monkeypatch):
+    import src.models.session_manager as sm_module
+    calls = []
+    original = sm_module._encode_frame
+
+    def counting(df):
+        calls.append(1)
+        return original(df)
+
+    monkeypatch.setattr(sm_module, '_encode_frame', counting)
+    return calls
+
+
+def test_unchanged_frames_not_reencoded(tmp_path, monkeypatch):
+    """测试1：只重新编码变化的数据帧"""
+    sm = _session()
+    for i in range(5):
+        sm.data_manager.add_data(f"d{i}", _frame(i))
+    sm.data_manager.add_data("dup", _frame(0))
+    path = str(tmp_path / 'session.sprx')
+
+    calls = _count_encodes(monkeypatch)
+    assert sm.save_to_file(path)
+    assert len(calls) == 5  # 重复内容只编码一次
+    frames = [n for n in zipfile.ZipFile(path).namelist() if n.startswith('data/')]
+    assert len(frames) == 5
+
+    calls.clear()
+    sm.figure_manager.add_figure("图1", "line")
+    assert sm.save_to_file(path)
+    assert len(calls) == 0
+
+    data = sm.data_manager.get_data(2)
+    data.dataframe = data.dataframe.assign(Y=0.0)
+    assert sm.save_to_file(path)
+    assert len(calls) == 1
+    print("✅ 测试1通过！")
+
+
+def test_incremental_roundtrip(tmp_path):
+    """测试2：多次增量保存后完整加载"""
+    sm = _session()
+    ids = [sm.data_manager.add_data(f"d{i}", _frame(i)) for i in range(3)]
+    path = str(tmp_path / 'session.sprx')
+    assert sm.save_to_file(path)
+    sm.data_manager.remove_data(ids[0])
+    sm.data_manager.get_data(ids[1]).dataframe = _frame(42)
+    assert sm.save_to_file(path)
+
+    loaded = _session()
+    assert loaded.load_from_file(path)
+    assert sorted(loaded.data_manager._data_dict) == ids[1:]
+    assert loaded.data_manager.get_data(ids[1]).dataframe.equals(_frame(42))
+    assert loaded.data_manager.get_data(ids[2]).dataframe.equals(_frame(2))
+    assert zipfile.ZipFile(path).testzip() is None
+    print("✅ 测试2通过！")
+
+
+def test_interrupted_append_recovered(tmp_path):
+    """测试3：追加中断后截断恢复"""
+    sm = _session()
+    sm.data_manager.add_data("d0", _frame(0))
+    path = tmp_path / 'session.sprx'
+    assert sm.save_to_file(str(path))
+    size = path.stat().st_size
+
+    # 模拟：已写入 .pending 并追加了一半数据后崩溃
+    (tmp_path / 'session.sprx.pending').write_text(str(size), encoding='utf-8')
+    with open(path, 'ab') as f:
+        f.write(b'PK\x03\x04 half written member')
+
+    loaded = _session()
+    assert loaded.load_from_file(str(path))
+    assert path.stat().st_size == size
+    assert not (tmp_path / 'session.sprx.pending').exists()
+    assert len(loaded.data_manager._data_dict) == 1
+    print("✅ 测试3通过！")
+
+
+def test_background_save_isolated_from_edits(tmp_path):
+    """测试4：后台保存写入的是快照，之后的修改不影响文件且保留修改标志"""
+    sm = _session()
+    data_id = sm.data_manager.add_data("d0", _frame(0))
+    path = str(tmp_path / 'session.sprx')
+    assert sm.save_to_file(path)
+
+    sm.data_manager.get_data(data_id).dataframe = _frame(1)
+    sm.mark_modified()
+    assert sm.save_in_background(path)
+    # 快照之后原地修改与新增数据
+    sm.data_manager.get_data(data_id).dataframe.loc[0, 'Y'] = 999.0
+    sm.data_manager.add_data("d1", _frame(2))
+    sm.wait_for_background_save()
+
+    assert sm.is_modified
+    loaded = _session()
+    loaded.journal_enabled = False  # 只检查归档本身（快照之后的修改记在命令日志里）
+    assert loaded.load_from_file(path)
+    assert list(loaded.data_manager._data_dict) == [data_id]
+    assert loaded.data_manager.get_data(data_id).dataframe.equals(_frame(1))
+    print("✅ 测试4通过！")
+
+
+def test_snapshot_copies_only_changed_frames(tmp_path, monkeypatch):
+    """测试5：快照只拷贝变化的数据帧"""
+    import src.models.session_manager as sm_module
+    sm = _session()
+    ids = [sm.data_manager.add_data(f"d{i}", _frame(i)) for i in range(4)]
+    path = str(tmp_path / 'session.sprx')
+    assert sm.save_to_file(path)
+
+    copied = []
+    original = sm_module._snapshot_frame
+    monkeypatch.setattr(sm_module, '_snapshot_frame', lambda df: copied.append(df) or original(df))
+    sm.data_manager.get_data(ids[1]).dataframe = _frame(10)
+    snapshot = sm._take_snapshot(path)
+    assert len(copied) == 1 and copied[0] is sm.data_manager.get_data(ids[1]).dataframe
+    assert [df is None for _, _, _, df in snapshot['frames']] == [True, False, True, True]
+
+    assert sm.save_in_background(path)
+    sm.wait_for_background_save()
+    loaded = _session()
+    assert loaded.load_from_file(path)
+    for i, data_id in enumerate(ids):
+        assert loaded.data_manager.get_data(data_id).dataframe.equals(_frame(10 if i == 1 else i))
+    print("✅ 测试5通过！")
+
+
+def test_rewrite_when_append_unsupported(tmp_path, monkeypatch):
+    """测试6：未验证的 Python 版本整体重写"""
+    import src.models.session_archive as archive
+    sm = _session()
+    ids = [sm.data_manager.add_data(f"d{i}", _frame(i)) for i in range(3)]
+    path = tmp_path / 'session.sprx'
+    assert sm.save_to_file(str(path))
+
+    appends = []
+    original = archive._append
+    monkeypatch.setattr(archive, '_append', lambda *a: (appends.append(1), original(*a))[1])
+    sm.data_manager.get_data(ids[0]).dataframe = _frame(10)
+    assert sm.save_to_file(str(path))
+    assert appends == [1]
+    appended_size = path.stat().st_size
+
+    monkeypatch.setattr(archive, 'APPEND_SUPPORTED', False)
+    calls = _count_encodes(monkeypatch)
+    sm.data_manager.get_data(ids[1]).dataframe = _frame(11)
+    assert sm.save_to_file(str(path))
+    assert appends == [1] and len(calls) == 1
+    assert path.stat().st_size < appended_size  # 重写不保留追加留下的死区
+    with zipfile.ZipFile(path) as zf:
+        assert zf.testzip() is None
+        assert len([n for n in zf.namelist() if n.startswith('data/')]) == 3
+
+    loaded = _session()
+    assert loaded.load_from_file(str(path))
+    assert loaded.data_manager.get_data(ids[0]).dataframe.equals(_frame(10))
+    assert loaded.data_manager.get_data(ids[1]).dataframe.equals(_frame(11))
+    assert loaded.data_manager.get_data(ids[2]).dataframe.equals(_frame(2))
+    print("✅ 测试6通过！")
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""
+测试会话延迟加载
+验证：
+1. 加载会话只读元信息，数据帧首次访问时才从归档成员读取
+2. 加载后直接保存不读取、不重新编码任何数据帧
+3. 另存为时未读取的数据帧原样拷贝到新文件
+4. parquet成员以STORED方式存放
+"""
+import sys
+import os
+import zipfile
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import numpy as np
+import pandas as pd
+from PySide6.QtWidgets import QApplication
+
+
+def _session():
+    QApplication.instance() or QApplication([])
+    from src.models import SessionManager
+    sm = SessionManager()
+    sm.enable_auto_save(False)
+    return sm
+
+
+def _frame(seed):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({'Time': np.arange(50.0), 'Y': rng.normal(size=50)})
+
+
+def _saved_session(tmp_path, count=3):
+    sm = _session()
+    ids = [sm.data_manager.add_data(f"d{i}", _frame(i)) for i in range(count)]
+    path = str(tmp_path / 'session.sprx')
+    assert sm.save_to_file(path)
+    return path, ids
+
+
+def test_frames_loaded_on_first_access(tmp_path):
+    """测试1：首次访问才读取"""
+    path, ids = _saved_session(tmp_path)
+    loaded = _session()
+    assert loaded.load_from_file(path)
+    items = [loaded.data_manager.get_data(i) for i in ids]
+    assert not any(d.is_dataframe_loaded() for d in items)
+
+    df = items[1].dataframe
+    assert df.equals(_frame(1))
+    assert items[1].is_dataframe_loaded()
+    assert not items[0].is_dataframe_loaded() and not items[2].is_dataframe_loaded()
+    print("✅ 测试1通过！")
+
+
+def test_save_after_load_keeps_members(tmp_path, monkeypatch):
+    """测试2：未访问的数据帧保存时不物化"""
+    import src.models.session_manager as sm_module
+    path, ids = _saved_session(tmp_path)
+    loaded = _session()
+    assert loaded.load_from_file(path)
+
+    calls = []
+    monkeypatch.setattr(sm_module, '_encode_frame', lambda df: calls.append(1))
+    loaded.figure_manager.add_figure("图1", "line")
+    assert loaded.save_to_file(path)
+    assert calls == []
+    assert not any(loaded.data_manager.get_data(i).is_dataframe_loaded() for i in ids)
+
+    reloaded = _session()
+    assert reloaded.load_from_file(path)
+    assert reloaded.data_manager.get_data(ids[2]).dataframe.equals(_frame(2))
+    print("✅ 测试2通过！")
+
+
+def test_save_as_copies_unloaded_frames(tmp_path):
+    """测试3：另存为拷贝未读取的数据帧"""
+    path, ids = _saved_session(tmp_path)
+    loaded = _session()
+    assert loaded.load_from_file(path)
+    loaded.data_manager.get_data(ids[0]).dataframe = _frame(10)
+    other = str(tmp_path / 'other.sprx')
+    assert loaded.save_to_file(other)
+    os.remove(path)
+
+    # 原文件删除后仍可从新文件读取
+    assert loaded.data_manager.get_data(ids[1]).dataframe.equals(_frame(1))
+    reloaded = _session()
+    assert reloaded.load_from_file(other)
+    assert reloaded.data_manager.get_data(ids[0]).dataframe.equals(_frame(10))
+    assert reloaded.data_manager.get_data(ids[2]).dataframe.equals(_frame(2))
+    print("✅ 测试3通过！")
+
+
+def test_parquet_members_stored(tmp_path):
+    """测试4：parquet不再二次压缩"""
+    path, _ = _saved_session(tmp_path)
+    with zipfile.ZipFile(path) as zf:
+        infos = [zi for zi in zf.infolist() if zi.filename.endswith('.parquet')]
+        assert infos and all(zi.compress_type == zipfile.ZIP_STORED for zi in infos)
+        assert zf.getinfo('data.json').compress_type == zipfile.ZIP_DEFLATED
+    print("✅ 测试4通过！")
@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+"""
+测试进程任务的共享内存数组传输
+验证：
+1. 大数组/数值DataFrame 打包为描述符后 pickle 很小，映射回来内容一致（索引、列名、attrs保留）
+2. 写时复制：任务端修改映射数组不影响共享块；引用计数归零删除文件
+3. 子进程结果中的大数组经共享块返回，主进程接管后文件立即删除
+4. JobManager 进程任务：参数与结果走共享块，任务结束后不遗留文件，结果与线程执行一致
+5. 可空扩展类型（Int64/Float64）的DataFrame照常pickle，不写入共享块；对象数组不能写入共享块
+"""
+import sys
+import os
+import glob
+import time
+import pickle
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'XlementFitting'))
+
+import numpy as np
+import pandas as pd
+from PySide6.QtCore import QCoreApplication
+
+
+def _blocks():
+    from src.utils.shared_arrays import _shared_dir
+    return set(glob.glob(os.path.join(_shared_dir(), 'spr_arr_*.bin')))
+
+
+def _plate(rows=4000, cols=24):
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(rng.normal(size=(rows, cols)), columns=['Time'] + [f"{1e-9 * (i + 1)}" for i in range(cols - 1)],
+                      index=pd.RangeIndex(10, 10 + rows))
+    df.attrs['source'] = 'plate'
+    return df
+
+
+def _expected_curve(df):
+    curve = df.to_numpy() * 2
+    curve[0, 0] = -2.0
+    return curve
+
+
+def _summarise(x, frame):
+    """子进程任务：返回输入摘要与一个大的结果数组"""
+    frame.iloc[0, 0] = -1.0  # 写时复制，不影响共享块
+    return {'x_sum': float(np.sum(x)), 'frame_sum': float(frame.to_numpy()[1:].sum()),
+            'columns': list(frame.columns), 'curve': np.asarray(frame.to_numpy() * 2)}
+
+
+def test_roundtrip_and_pickle_size():
+    """测试1：描述符很小，内容一致"""
+    from src.utils.shared_arrays import SharedArrayStore, call_shared
+    store = SharedArrayStore()
+    x = np.linspace(0, 1, 100000)
+    df = _plate()
+    args, kwargs, refs = store.share_payload((x, df, 'tag'), {'small': np.arange(3)})
+    assert len(refs) == 2 and len(pickle.dumps((args, kwargs))) < 4096
+    assert kwargs['small'].tolist() == [0, 1, 2] and args[2] == 'tag'
+
+    opened = pickle.loads(pickle.dumps(args))
+    x2, df2 = opened[0].open(), opened[1].open()
+    assert np.array_equal(x2, x)
+    assert df2.equals(df) and df2.attrs['source'] == 'plate' and list(df2.index) == list(df.index)
+    for ref in refs:
+        store.release(ref)
+    assert len(store) == 0 and not any(os.path.exists(r.path) for r in refs)
+    print("✅ 测试1通过！")
+
+
+def test_copy_on_write_and_refcount():
+    """测试2：写时复制与引用计数"""
+    from src.utils.shared_arrays import SharedArrayStore
+    store = SharedArrayStore()
+    ref = store.share(np.ones(20000))
+    view = ref.open()
+    view[0] = 5
+    assert ref.open()[0] == 1
+    store.retain(ref)
+    store.release(ref)
+    assert os.path.exists(ref.path)
+    store.release(ref)
+    assert not os.path.exists(ref.path)
+    print("✅ 测试2通过！")
+
+
+def test_results_adopted():
+    """测试3：结果经共享块返回"""
+    from src.utils.shared_arrays import SharedArrayStore, call_shared, adopt_shared
+    store = SharedArrayStore()
+    before = _blocks()
+    df = _plate()
+    args, kwargs, refs = store.share_payload((np.ones(10000), df), {})
+    raw = pickle.loads(pickle.dumps(call_shared(_summarise, args, kwargs)))
+    assert len(pickle.dumps(raw)) < 4096
+    result = adopt_shared(raw)
+    for ref in refs:
+        store.release(ref)
+    assert np.array_equal(result['curve'], _expected_curve(df))
+    assert result['x_sum'] == 10000 and np.isclose(result['frame_sum'], df.to_numpy()[1:].sum())
+    assert _blocks() == before
+    print("✅ 测试3通过！")
+
+
+def test_job_manager_process_transport():
+    """测试4：进程任务全程共享块传输"""
+    from src.utils.job_manager import JobManager
+    from src.utils.job_tasks import run_fit_task
+    app = QCoreApplication.instance() or QCoreApplication([])
+    before = _blocks()
+    mgr = JobManager(max_workers=2)
+    df = _plate()
+    results = {}
+    mgr.submit_with_callbacks(_summarise, np.ones(10000), df, use_process=True,
+                              on_done=lambda jid, res: results.update(summary=res))
+
+    t = np.arange(0, 2000.0)
+    wide = pd.DataFrame({'Time': t, **{str(c): 50 * (1 - np.exp(-c * 1e6 * np.minimum(t, 1000)))
+                                        * np.exp(-1e-3 * np.maximum(t - 1000, 0)) for c in (1e-8, 2e-8, 4e-8, 8e-8)}})
+    for use_process in (True, False):
+        mgr.submit_with_callbacks(run_fit_task, 'LocalBivariate', wide['Time'].to_numpy(), wide.iloc[:, 1].to_numpy(),
+                                  wide, use_process=use_process,
+                                  on_done=lambda jid, res, key=use_process: results.update({key: res}))
+    deadline = time.time() + 60
+    while len(results) < 3 and time.time() < deadline:
+        app.processEvents()
+        time.sleep(0.01)
+    mgr._proc_pool.shutdown()
+
+    assert np.array_equal(results['summary']['curve'], _expected_curve(df))
+    assert df.iloc[0, 0] != -1.0
+    fitted_process, fitted_thread = results[True], results[False]
+    assert fitted_process['success'] and fitted_thread['success']
+    assert np.allclose(fitted_process['y_pred_matrix'], fitted_thread['y_pred_matrix'])
+    assert _blocks() == before and len(mgr._shared_store) == 0
+    print("✅ 测试4通过！")
+
+
+def test_extension_dtypes_not_shared():
+    """测试5：扩展类型与对象数组"""
+    import pytest
+    from src.utils.shared_arrays import SharedArrayStore, _write_block
+    store = SharedArrayStore()
+    before = _blocks()
+    for dtype in ('Int64', 'Float64'):
+        df = _plate().round().astype(dtype)
+        args, _kwargs, refs = store.share_payload((df,), {})
+        assert not refs and args[0] is df
+    assert _blocks() == before
+
+    with pytest.raises(TypeError):
+        _write_block(np.empty(100000, dtype=object))
+    assert _blocks() == before
+    print("✅ 测试5通过！")
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""
+测试撤销历史的内存预算
+验证：
+1. 历史常驻内存超出预算时，较早删除命令的数据写入暂存区，撤销时读回且内容不变
+2. 批量导入命令的保存结果可暂存，重做时读回
+3. 命令移出历史时删除暂存数据；暂存区超出预算时丢弃最早的命令
+"""
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import numpy as np
+import pandas as pd
+from PySide6.QtCore import QCoreApplication
+
+
+def _frame(seed, rows=20000):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({'Time': np.arange(float(rows)), 'Y': rng.normal(size=rows)})
+    df.attrs['seed'] = seed
+    return df
+
+
+def _managers():
+    QCoreApplication.instance() or QCoreApplication([])
+    from src.models import DataManager, FigureManager, ResultManager, LinkManager, ProjectManager
+    managers = {'data': DataManager(), 'figure': FigureManager(), 'result': ResultManager(),
+                'link': LinkManager(), 'project': ProjectManager()}
+    managers['project'].create_project("默认项目")
+    return managers
+
+
+def _command_manager(tmp_path, **budget):
+    from src.models import CommandManager, ProvenanceManager
+    from src.models.scratch_store import ScratchStore
+    store = ScratchStore(str(tmp_path / 'scratch'))
+    return CommandManager(ProvenanceManager(), scratch_store=store, **budget), store
+
+
+def test_old_deletes_spilled(tmp_path):
+    """测试1：较早的删除命令暂存，撤销时读回"""
+    from src.models import DeleteItemCommand
+    managers = _managers()
+    ids = [managers['data'].add_data(f"d{i}", _frame(i)) for i in range(5)]
+    size = int(_frame(0).memory_usage(deep=True).sum())
+    commands, store = _command_manager(tmp_path, memory_budget=int(size * 2.5))
+
+    for data_id in ids:
+        assert commands.execute(DeleteItemCommand('data', data_id, managers))
+    usage = commands.get_memory_usage()
+    assert usage['resident_bytes'] <= size * 2.5
+    assert len(store) == 3 and usage['spilled_bytes'] > 0
+    # 最近一步保留在内存
+    assert commands._undo_stack[-1].saved_object.is_dataframe_loaded()
+
+    for _ in ids:
+        assert commands.undo()
+    for i, data_id in enumerate(ids):
+        df = managers['data'].get_data(data_id).dataframe
+        assert df.equals(_frame(i)) and df.attrs['seed'] == i
+    assert len(store) == 0
+    print("✅ 测试1通过！")
+
+
+def test_bulk_import_spill(tmp_path):
+    """测试2：批量导入的保存结果暂存后重做"""
+    from src.models import BulkImportCommand
+    managers = _managers()
+
+    def register(file_path, df, export_path=None):
+        return [managers['data'].add_data(os.path.basename(file_path), df)], []
+
+    entries = []
+    for i in range(3):
+        data_ids, _ = register(f"f{i}.csv", _frame(i))
+        entries.append({'file_path': f"f{i}.csv", 'dataframe': _frame(i), 'export_path': None,
+                        'data_ids': data_ids, 'figure_ids': []})
+    cmd = BulkImportCommand(entries, register, managers['data'], managers['figure'], managers['project'])
+    commands, store = _command_manager(tmp_path, memory_budget=0)
+    commands.record(cmd)
+    assert cmd.payload_bytes() > 0  # 撤销栈顶保留在内存
+
+    # 新的一步之后原命令不再是栈顶，被暂存
+    data_ids, _ = register("g.csv", _frame(9, rows=10))
+    commands.record(BulkImportCommand([{'file_path': "g.csv", 'dataframe': _frame(9, rows=10),
+                                        'export_path': None, 'data_ids': data_ids, 'figure_ids': []}],
+                                      register, managers['data'], managers['figure'], managers['project']))
+    assert cmd.payload_bytes() == 0 and len(store) == 3
+
+    assert commands.undo() and commands.undo()
+    assert len(managers['data']._data_dict) == 0
+    assert commands.redo()
+    names = sorted(d.name for d in managers['data']._data_dict.values())
+    assert names == ['f0.csv', 'f1.csv', 'f2.csv']
+    assert entries[1]['dataframe'].equals(_frame(1))
+    print("✅ 测试2通过！")
+
+
+def test_release_and_disk_budget(tmp_path):
+    """测试3：移出历史删除暂存数据，暂存区超预算丢弃最早命令"""
+    from src.models import DeleteItemCommand
+    managers = _managers()
+    ids = [managers['data'].add_data(f"d{i}", _frame(i)) for i in range(4)]
+    commands, store = _command_manager(tmp_path, memory_budget=0, max_history=2)
+    for data_id in ids[:3]:
+        assert commands.execute(DeleteItemCommand('data', data_id, managers))
+    # 超出步数被丢弃的命令不留暂存数据
+    assert len(commands._undo_stack) == 2 and len(store) == 1
+
+    disk = store.bytes_on_disk
+    commands.disk_budget = disk
+    assert commands.execute(DeleteItemCommand('data', ids[3], managers))
+    assert store.bytes_on_disk <= disk
+    commands.clear()
+    assert len(store) == 0
+    print("✅ 测试3通过！")
@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+"""
+测试 JobManager 进程池的延迟创建、预热与进程回收
+验证：
+1. 创建 JobManager 不启动进程池，首个进程任务才创建
+2. 工作进程启动时已导入数值计算栈与拟合模块，并记录预热耗时
+3. 每个进程执行 max_tasks_per_child 个任务后重启（进程号变化），任务结果不受影响
+4. prewarm() 启动全部工作进程；set_max_workers() 之后的任务使用新进程池
+5. 工作进程被杀死/崩溃时，运行中的任务失败，进程池被替换，排队中与之后的任务在新进程池中正常执行
+"""
+import sys
+import os
+import time
+import signal
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+
+def _loaded_modules():
+    from src.utils.job_tasks import worker_info
+    names = ('numpy', 'pandas', 'scipy.optimize', 'openpyxl',
+             'src.utils.fitting_wrapper', 'model_data_process.LocalBivariate')
+    return worker_info(), {name: name in sys.modules for name in names}
+
+
+def _crash():
+    os._exit(1)
+
+
+def test_lazy_preloaded_pool(run_process):
+    """测试1/2：延迟创建 + 预热导入"""
+    from src.utils.job_manager import JobManager
+    mgr = JobManager(max_workers=1)
+    assert mgr._proc_pool is None
+    try:
+        (info, modules), = run_process(mgr, _loaded_modules)
+        assert mgr._proc_pool is not None
+        assert all(modules.values()), modules
+        assert info['pid'] != os.getpid() and info['warm_seconds'] > 0
+    finally:
+        mgr._proc_pool.shutdown()
+    print("✅ 测试1通过！")
+    print("✅ 测试2通过！")
+
+
+def test_worker_recycling(run_process):
+    """测试3：执行N个任务后重启工作进程"""
+    from src.utils.job_manager import JobManager
+    from src.utils.job_tasks import worker_info
+    mgr = JobManager(max_workers=1, max_tasks_per_child=2)
+    try:
+        results = run_process(mgr, worker_info, count=5)
+        pids = [info['pid'] for info in results]
+        # 每个进程最多执行2个任务
+        assert len(set(pids)) >= 3
+        assert all(pids.count(pid) <= 2 for pid in pids)
+        assert all('warm_seconds' in info for info in results)
+    finally:
+        mgr._proc_pool.shutdown()
+    print("✅ 测试3通过！")
+
+
+def test_prewarm_and_resize(app, wait, run_process):
+    """测试4：预热全部进程，修改进程数"""
+    from src.utils.job_manager import JobManager
+    from src.utils.job_tasks import worker_info
+    mgr = JobManager(max_workers=2, max_tasks_per_child=0)
+    try:
+        assert mgr.prewarm() == 2
+        pool = mgr._proc_pool
+        assert wait(app, lambda: len(pool._processes) == 2)
+
+        mgr.set_max_workers(1)
+        assert mgr.max_workers == 1 and mgr._proc_pool is None
+        info, = run_process(mgr, worker_info)
+        assert mgr._proc_pool is not pool and len(mgr._proc_pool._processes) == 1
+        assert 'warm_seconds' in info
+    finally:
+        if mgr._proc_pool is not None:
+            mgr._proc_pool.shutdown()
+    print("✅ 测试4通过！")
+
+
+def test_broken_pool_replaced(app, wait, run_process):
+    """测试5：进程池损坏后替换"""
+    from src.utils.job_manager import JobManager
+    from src.utils.job_tasks import worker_info
+    mgr = JobManager(max_workers=1, max_tasks_per_child=0)
+    try:
+        info, = run_process(mgr, worker_info)
+        first_pool = mgr._proc_pool
+
+        # 外部杀死正在执行任务的工作进程
+        outcomes = []
+        mgr.submit_with_callbacks(time.sleep, 30, use_process=True,
+                                  on_done=lambda jid, res: outcomes.append(('done', res)),
+                                  on_fail=lambda jid, err: outcomes.append(('failed', err)))
+        time.sleep(0.5)
+        os.kill(info['pid'], signal.SIGKILL)
+        assert wait(app, lambda: outcomes)
+        assert outcomes[0][0] == 'failed' and mgr._proc_pool is not first_pool
+
+        after, = run_process(mgr, worker_info)
+        assert after['pid'] != info['pid'] and mgr._running[True] == 0
+
+        # 任务自身使工作进程退出：排在其后的任务在新进程池中执行
+        second_pool = mgr._proc_pool
+        results = {}
+        crashed = mgr.submit_with_callbacks(_crash, use_process=True,
+                                            on_fail=lambda jid, err: results.update({jid: 'failed'}))
+        queued = mgr.submit_with_callbacks(worker_info, use_process=True,
+                                           on_done=lambda jid, res: results.update({jid: res}),
+                                           on_fail=lambda jid, err: results.update({jid: err}))
+        assert wait(app, lambda: len(results) == 2)
+        assert results[crashed] == 'failed' and isinstance(results[queued], dict)
+        assert mgr._proc_pool is not second_pool and not mgr._jobs
+    finally:
+        if mgr._proc_pool is not None:
+            mgr._proc_pool.shutdown()
+    print("✅ 测试5通过！")
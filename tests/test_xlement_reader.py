@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+"""
+测试XlementDataFrame各设备格式的读取
+验证：
+1. '100' / '100-capture' 三个工作表的时间轴与孔信号矩阵（595 - 575）
+2. 含备注等非数值行的表仍按孔读出，孔内非数值信号报错
+3. 'one' excel 表头定位、时间分段与 Test - Refe 信号
+4. 'one' zip 各CSV的浓度、时间分段与差值信号按成员顺序排列
+"""
+import sys
+import os
+import zipfile
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'XlementFitting')))
+
+import numpy as np
+import pandas as pd
+import pytest
+from XlementFitting.FileProcess.XlementDataFrame import XlementDataFrame
+
+HOLES = ['A1', 'A2', 'A3']
+
+
+@pytest.fixture(autouse=True)
+def _no_parse_cache(monkeypatch):
+    monkeypatch.setenv('XLEMENT_PARSE_CACHE', '0')
+
+
+def _reader(path, device, dtype='excel', unit='nM', hole_info=None):
+    xdf = XlementDataFrame({'device': device, 'dtype': dtype, 'unit': unit,
+                            'molecular_mass': 50000, 'hole_info': hole_info, 'file_path': str(path)})
+    return xdf, xdf._parse_data(str(path))
+
+
+def _hole_sheet(times, signals_575, signals_595, note=False):
+    """一个工作表: 时间行 + 每孔两行(575/595), 末尾一列为空"""
+    width = len(times) + 1
+    rows = [['Time [s]'] + list(times) + [None]]
+    if note:
+        rows.append(['Remark', 'operator'] + [None] * (width - 1))
+    for hole, s575, s595 in zip(HOLES, signals_575.T, signals_595.T):
+        rows.append([hole] + list(s575) + [None])
+        rows.append([hole] + list(s595) + [None])
+    return pd.DataFrame(rows, columns=['Hole'] + [f'c{i}' for i in range(width)])
+
+
+def _write_100(path, first_sheet, note=False, corrupt=None):
+    rng = np.random.default_rng(1)
+    expected = {}
+    with pd.ExcelWriter(path) as writer:
+        for sheet, n in ((first_sheet, 4), ('结合', 6), ('解离', 5)):
+            times = np.arange(n) * 1.5 + 0.2
+            s575 = rng.normal(size=(n, len(HOLES)))
+            s595 = rng.normal(size=(n, len(HOLES)))
+            df = _hole_sheet(times, s575, s595, note=note)
+            if corrupt == sheet:
+                df = df.astype(object)
+                df.iloc[-1, 2] = 'err'
+            df.to_excel(writer, sheet_name=sheet, index=False)
+            expected[sheet] = (np.array([round(t) for t in times]), s595 - s575)
+    return expected
+
+
+@pytest.mark.parametrize('device, first_sheet', [('100', '基线'), ('100-capture', '配体稳定')])
+def test_100_formats(tmp_path, device, first_sheet):
+    """测试1：'100' / '100-capture' 时间轴与孔信号"""
+    path = tmp_path / f'{device}.xlsx'
+    expected = _write_100(path, first_sheet)
+
+    xdf, data = _reader(path, device, hole_info='A1:0, A2:10，A3:20, B1:-1')
+    assert data['hole_names'] == HOLES
+    assert data['concentrations'] == ['0nM', '10nM', '20nM']
+    for stage, sheet in (('baseline', first_sheet), ('association', '结合'), ('dissociation', '解离')):
+        times, signals = expected[sheet]
+        assert np.array_equal(data[f'{stage}_time'], times)
+        assert np.allclose(data[f'{stage}_signals'], signals)
+    assert np.allclose(xdf.raw_association_signals, expected['结合'][1])
+    print("✅ 测试1通过！")
+
+
+def test_100_non_numeric_cells(tmp_path):
+    """测试2：备注行不影响读取，孔内非数值信号报错"""
+    path = tmp_path / 'note.xlsx'
+    expected = _write_100(path, '基线', note=True)
+    _, data = _reader(path, '100', hole_info='A1:0,A2:10,A3:20')
+    assert np.allclose(data['dissociation_signals'], expected['解离'][1])
+
+    path = tmp_path / 'corrupt.xlsx'
+    _write_100(path, '基线', note=True, corrupt='结合')
+    with pytest.raises(ValueError, match="'err'.*'A3'"):
+        _reader(path, '100', hole_info='A1:0,A2:10,A3:20')
+    print("✅ 测试2通过！")
+
+
+def test_one_excel(tmp_path):
+    """测试3：'one' excel"""
+    rng = np.random.default_rng(2)
+    concentrations = ['0', '5e-09', '1e-08']
+    n = 40
+    test = rng.normal(size=(n, 3))
+    refe = rng.normal(size=(n, 3))
+
+    width = 1 + 3 * len(concentrations)
+    rows = [['Sample concentration(M)'] + sum([[c, None, None] for c in concentrations], [])]
+    for header, value in (('Base line(s)', 0), ('Association start(s)', 10),
+                          ('Association finish(s)', 25), ('Dissociation finish(s)', 40)):
+        rows.append([header, value] + [None] * (width - 2))
+    rows.append(['Time'] + ['Test', 'Refe', 'Time'] * len(concentrations))
+    for t in range(n):
+        row = [t]
+        for i in range(len(concentrations)):
+            row += [test[t, i], refe[t, i], t]
+        rows.append(row)
+    path = tmp_path / 'one.xlsx'
+    pd.DataFrame(rows, columns=['Info'] + [f'c{i}' for i in range(width - 1)]).to_excel(path, index=False)
+
+    _, data = _reader(path, 'one', unit='M')
+    signals = test - refe  # 'Test' 列减去 'Refe' 列
+    assert data['concentrations'] == concentrations
+    assert data['time_split'] == [0, 10, 25, 40]
+    assert np.allclose(data['baseline_signals'], signals[0:10])
+    assert np.allclose(data['association_signals'], signals[10:25])
+    assert np.allclose(data['dissociation_signals'], signals[25:40])
+    print("✅ 测试3通过！")
+
+
+def test_one_zip(tmp_path):
+    """测试4：'one' zip"""
+    rng = np.random.default_rng(3)
+    n = 30
+    names = ['Sample 20nM_3.txt', 'Sample 0nM_1.txt', 'Sample 10nM_2.txt']
+    diffs = rng.normal(size=(n, len(names)))
+
+    path = tmp_path / 'one.zip'
+    with zipfile.ZipFile(path, 'w', compression=zipfile.ZIP_DEFLATED) as zf:
+        for i, name in enumerate(names):
+            df = pd.DataFrame({'时间': np.arange(n), 'Test': 0.0, 'Refe': 0.0, '差值': diffs[:, i], 'Flag': 1,
+                               '5': 0, '20': 0, '30': 0, '0': 0})
+            zf.writestr(name, df.to_csv(sep='\t', index=False))
+
+    _, data = _reader(path, 'one', dtype='zip')
+    assert data['concentrations'] == ['20nM', '0nM', '10nM']
+    assert data['time_split'] == [5, 20, 30, 0]
+    assert np.allclose(data['baseline_signals'], diffs[0:5])
+    assert np.allclose(data['association_signals'], diffs[5:20])
+    assert np.allclose(data['dissociation_signals'], diffs[20:30])
+    print("✅ 测试4通过！")